@@ -0,0 +1,218 @@
+"""
+Benchmark: every serving app on the shared inference core
+
+Trains the two artifact shapes the apps serve (v1/training/train.py's
+bundle around a StandardScaler + LogisticRegression Pipeline, and
+v3/iris-spring-boot/train_model.py's bare RandomForest), then:
+
+- times the engine against the per-request code the apps used to run
+  (model.predict then model.predict_proba on a fresh (1, 4) array), for
+  a fresh row and for a repeated one (cache hit);
+- starts v1, v2, v3 and v4 in-process, each through its own startup
+  hook, and times GET /health and POST /predict with fresh and repeated
+  rows.
+
+Needs each app's dependencies (fastapi, httpx, python-dotenv,
+pydantic-settings). Run it from the inference-core directory:
+
+    python -m benchmarks.bench_apps
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+from collections.abc import Callable
+from statistics import median
+
+import joblib
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from inference_core import CLASS_NAMES, FEATURE_NAMES, PredictionEngine
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APPS = [
+    ("v1", os.path.join(REPO, "v1", "api", "app.py"), {}),
+    ("v2", os.path.join(REPO, "v2", "iris-azure-ml", "api", "app.py"), {}),
+    (
+        "v3",
+        os.path.join(REPO, "v3", "iris-spring-boot", "inference-service", "app.py"),
+        {},
+    ),
+    (
+        "v4",
+        os.path.join(REPO, "v4", "apps", "inference-service"),
+        {"GRPC_ENABLED": "false", "CONCURRENCY_LIMIT_ENABLED": "false"},
+    ),
+]
+
+
+def train_artifacts(directory: str) -> dict[str, str]:
+    """Write both artifact shapes and return their paths"""
+    iris = load_iris()
+    pipeline = Pipeline(
+        [("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=2000))]
+    )
+    pipeline.fit(iris.data, iris.target)
+    forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(
+        iris.data, iris.target
+    )
+
+    paths = {
+        "pipeline": os.path.join(directory, "pipeline.pkl"),
+        "forest": os.path.join(directory, "forest.pkl"),
+    }
+    joblib.dump(
+        {"model": pipeline, "target_names": iris.target_names.tolist()},
+        paths["pipeline"],
+    )
+    joblib.dump(forest, paths["forest"])
+    return paths
+
+
+def time_call(
+    fn: Callable[[], object], repeat: int = 300, warmup: int = 20
+) -> dict[str, float]:
+    """Time fn() and return median and p99 latency in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "median_us": median(samples),
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def print_table(title: str, rows, columns):
+    """Print benchmark results as a fixed-width table"""
+    print(title)
+    print("  " + "".join(f"{c:>16}" for c in columns))
+    for row in rows:
+        print(
+            "  "
+            + "".join(
+                f"{v:>16.1f}" if isinstance(v, float) else f"{v!s:>16}" for v in row
+            )
+        )
+    print()
+
+
+def fresh_rows(seed: int = 0):
+    """An endless stream of distinct measurement rows (never a cache hit)"""
+    rng = np.random.default_rng(seed)
+    while True:
+        yield rng.uniform(0.1, 8.0, size=(1, len(FEATURE_NAMES)))
+
+
+def bench_engine(paths: dict[str, str]):
+    rows = []
+    for name, path in paths.items():
+        artifact = joblib.load(path)
+        model = artifact["model"] if isinstance(artifact, dict) else artifact
+        engine = PredictionEngine(model, CLASS_NAMES, app="bench")
+        stream = fresh_rows()
+        repeated = next(fresh_rows(1))
+
+        def before(model=model, stream=stream):
+            X = next(stream)
+            model.predict(X)
+            model.predict_proba(X)
+
+        rows.append(
+            (
+                name,
+                "fresh",
+                time_call(before)["median_us"],
+                time_call(lambda e=engine, s=stream: e.predict_row(next(s)))[
+                    "median_us"
+                ],
+            )
+        )
+        rows.append(
+            (
+                name,
+                "repeated",
+                time_call(
+                    lambda m=model, X=repeated: (m.predict(X), m.predict_proba(X))
+                )["median_us"],
+                time_call(lambda e=engine, X=repeated: e.predict_row(X))["median_us"],
+            )
+        )
+    print_table(
+        "Single-row scoring, median latency (us)",
+        rows,
+        ["artifact", "row", "predict+proba", "engine"],
+    )
+
+
+def import_app(name: str, location: str):
+    """Import an app module from its path; v4 is the src package of its service directory"""
+    if name == "v4":
+        sys.path.insert(0, location)
+        return importlib.import_module("src.app")
+    spec = importlib.util.spec_from_file_location(f"bench_app_{name}", location)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_apps(paths: dict[str, str]):
+    from fastapi.testclient import TestClient
+
+    rows = []
+    for name, location, env in APPS:
+        os.environ.update(env, MODEL_PATH=paths["pipeline"], API_KEY="")
+        module = import_app(name, location)
+        stream = fresh_rows()
+        repeated = dict(zip(FEATURE_NAMES, next(fresh_rows(1))[0].tolist()))
+        with TestClient(module.app) as client:
+            health = time_call(lambda: client.get("/health"))
+            fresh = time_call(
+                lambda s=stream: client.post(
+                    "/predict", json=dict(zip(FEATURE_NAMES, next(s)[0].tolist()))
+                )
+            )
+            cached = time_call(lambda r=repeated: client.post("/predict", json=r))
+            assert client.post("/predict", json=repeated).status_code == 200
+        rows.append(
+            (
+                name,
+                health["median_us"],
+                fresh["median_us"],
+                fresh["p99_us"],
+                cached["median_us"],
+            )
+        )
+    print_table(
+        "Apps in-process on the pipeline artifact, latency (us)",
+        rows,
+        ["app", "health_med", "predict_med", "predict_p99", "repeated_med"],
+    )
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    # The apps log every request; keep the tables readable
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = train_artifacts(directory)
+        bench_engine(paths)
+        bench_apps(paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Shared inference core for the iris serving apps
+
+Model loading, the prediction engine, caching and metrics live here
+once; v1, v2, v3 and v4 each wrap them in their own HTTP contract.
+"""
+
+from .cache import LRUCache
+from .engine import Prediction, PredictionEngine, fold_preprocessing, score, score_row
+from .features import CLASS_NAMES, FEATURE_NAMES, build_features
+from .loading import (
+    LoadedModel,
+    ModelHolder,
+    class_names_of,
+    load_model,
+    unpack_artifact,
+)
+from .metrics import REGISTRY
+
+__version__ = "1.0.0"
+
+__all__ = [
+    "CLASS_NAMES",
+    "FEATURE_NAMES",
+    "REGISTRY",
+    "LRUCache",
+    "LoadedModel",
+    "ModelHolder",
+    "Prediction",
+    "PredictionEngine",
+    "build_features",
+    "class_names_of",
+    "fold_preprocessing",
+    "load_model",
+    "score",
+    "score_row",
+    "unpack_artifact",
+]
@@ -0,0 +1,60 @@
+"""
+Bounded LRU cache keyed by exact feature bytes
+
+Iris traffic repeats itself: the same measurements are sent over and
+over, and a row's result only depends on the model that scored it. The
+engine caches single-row predictions, and v4's explainer caches per-row
+contributions, in an LRUCache owned by the loaded model, so a model swap
+starts from an empty cache and no entry outlives the model it came from.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit and miss counters
+
+    Args:
+        capacity: Entries kept; 0 disables caching
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = max(0, capacity)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits_total = 0
+        self.misses_total = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses_total += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits_total += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if not self.capacity:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "entries": len(self._entries),
+            "hits_total": self.hits_total,
+            "misses_total": self.misses_total,
+        }
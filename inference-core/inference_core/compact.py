@@ -0,0 +1,233 @@
+"""
+Compact float32 / uint8 forest for lower memory and cache pressure
+
+sklearn keeps every tree as its own object with 64-byte float64 node
+records plus a float64 value array, and predict_proba dispatches one
+task per tree. export_forest() flattens a fitted forest (or single tree)
+into a handful of contiguous arrays:
+
+    feature    int8/16/32 split feature per node (leaves loop to themselves)
+    threshold  float32  split threshold per node
+    left/right int16/32 child node indexes (global across trees)
+    values     float32  class probabilities per node, or uint8 (p * 255)
+    roots      int32    first node of each tree
+    classes             class label of each values column (the model's classes_)
+
+about 16-25 bytes per node. CompactForest walks all trees for a chunk of
+rows at once, a few vectorized gathers per tree level, on float32
+features (the dtype sklearn's trees compare against anyway). That skips
+sklearn's per-tree dispatch, which dominates single-row latency; for
+large batches sklearn's compiled traversal remains faster. The export is a plain
+dict of NumPy arrays, so it can be saved into a training artifact and
+loaded without this module's classes; parity_report() measures the
+class agreement and probability error against the original model.
+"""
+
+import pickle
+from typing import Any
+
+import numpy as np
+
+FORMAT_VERSION = 1
+LEAF_DTYPES = ("float32", "uint8")
+
+# Rows traversed together; keeps the (trees, rows) node matrix in cache
+CHUNK_ROWS = 256
+
+
+def tree_estimators(model):
+    """The fitted sklearn trees of a tree classifier or forest"""
+    if hasattr(model, "tree_"):
+        return [model]
+    estimators = list(np.ravel(getattr(model, "estimators_", [])))
+    if not estimators or not all(hasattr(tree, "tree_") for tree in estimators):
+        raise ValueError(f"{type(model).__name__} is not a tree classifier")
+    return estimators
+
+
+def _smallest_int(largest: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if largest <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"{largest} does not fit an int32 index")
+
+
+def export_forest(model, leaf_dtype: str = "float32") -> dict[str, Any]:
+    """
+    Flatten a fitted sklearn tree classifier (or forest of them) into arrays
+
+    Args:
+        model: Fitted DecisionTreeClassifier, RandomForestClassifier or ExtraTreesClassifier
+        leaf_dtype: float32 probabilities, or uint8 quantized (p * 255)
+    """
+    if leaf_dtype not in LEAF_DTYPES:
+        raise ValueError(f"leaf_dtype must be one of {LEAF_DTYPES}")
+    trees = tree_estimators(model)
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left < 0
+        node_ids = np.arange(t.node_count)
+        roots.append(offset)
+        features.append(np.where(leaf, 0, t.feature))
+        thresholds.append(np.where(leaf, 0.0, t.threshold))
+        lefts.append(np.where(leaf, node_ids, t.children_left) + offset)
+        rights.append(np.where(leaf, node_ids, t.children_right) + offset)
+        # Normalize per node: counts or fractions depending on the sklearn version
+        value = t.value[:, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+        offset += t.node_count
+        depth = max(depth, t.max_depth)
+
+    # sklearn compares float32(x) <= float64 threshold; rounding each
+    # threshold down to float32 keeps that comparison exact
+    threshold = np.concatenate(thresholds)
+    threshold32 = threshold.astype(np.float32)
+    threshold32 = np.where(
+        threshold32 > threshold,
+        np.nextafter(threshold32, np.float32(-np.inf)),
+        threshold32,
+    )
+
+    feature = np.concatenate(features)
+    n_features = int(getattr(model, "n_features_in_", feature.max() + 1))
+    index_dtype = np.int16 if offset <= np.iinfo(np.int16).max else np.int32
+    probabilities = np.concatenate(values)
+    if leaf_dtype == "uint8":
+        probabilities = np.rint(probabilities * 255).astype(np.uint8)
+    else:
+        probabilities = probabilities.astype(np.float32)
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "leaf_dtype": leaf_dtype,
+        "feature": feature.astype(_smallest_int(n_features - 1)),
+        "threshold": threshold32.astype(np.float32),
+        "left": np.concatenate(lefts).astype(index_dtype),
+        "right": np.concatenate(rights).astype(index_dtype),
+        "values": probabilities,
+        "roots": np.asarray(roots, dtype=np.int32),
+        "classes": np.asarray(
+            getattr(model, "classes_", np.arange(probabilities.shape[1]))
+        ),
+        "max_depth": int(depth),
+    }
+
+
+class CompactForest:
+    """predict / predict_proba over the arrays produced by export_forest"""
+
+    def __init__(self, arrays: dict[str, Any]):
+        if arrays.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported compact forest format: {arrays.get('format_version')}"
+            )
+        self.arrays = arrays
+        self.leaf_dtype = arrays["leaf_dtype"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.values = arrays["values"]
+        self.roots = arrays["roots"]
+        self.max_depth = arrays["max_depth"]
+        # Exports written before classes were stored: columns are the classes
+        self.classes = arrays.get("classes")
+        self.n_trees = len(self.roots)
+        # Traversal works on intp copies (small next to the 2-D node matrix);
+        # children are interleaved (right, left): a step is children[2 * node + go_left]
+        self._children = (
+            np.stack([self.right, self.left], axis=1).astype(np.intp).ravel()
+        )
+        self._features = self.feature.astype(np.intp)
+        self._roots = self.roots.astype(np.intp)
+        self._class_values = np.ascontiguousarray(self.values.T)
+        if self.leaf_dtype == "uint8":
+            self._accumulator, self._scale = np.int32, 255.0 * self.n_trees
+        else:
+            self._accumulator, self._scale = np.float32, float(self.n_trees)
+
+    @classmethod
+    def from_model(cls, model, leaf_dtype: str = "float32") -> "CompactForest":
+        return cls(export_forest(model, leaf_dtype))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes
+            for a in (
+                self.feature,
+                self.threshold,
+                self.left,
+                self.right,
+                self.values,
+                self.roots,
+            )
+        )
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node of every tree for each row, as an (n_trees, n) matrix"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = np.arange(0, n_rows * n_features, n_features, dtype=np.intp)
+        nodes = np.repeat(self._roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            go_left = np.take(
+                flat, np.take(self._features, nodes) + row_offsets
+            ) <= np.take(self.threshold, nodes)
+            nodes = np.take(self._children, 2 * nodes + go_left)
+        return nodes
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf node index of every tree for each row, as an (n_trees, n) matrix"""
+        return self._leaves(np.ascontiguousarray(X, dtype=np.float32))
+
+    def _proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self._leaves(X)
+        probabilities = np.empty((len(X), len(self._class_values)))
+        # Sum over trees per class: contiguous row adds over the (trees, n) matrix
+        for k, class_values in enumerate(self._class_values):
+            probabilities[:, k] = np.take(class_values, leaves).sum(
+                axis=0, dtype=self._accumulator
+            )
+        return probabilities / self._scale
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) <= CHUNK_ROWS:
+            return self._proba(X)
+        return np.concatenate(
+            [self._proba(X[i : i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)]
+        )
+
+    def _class_ids(self, probabilities: np.ndarray) -> np.ndarray:
+        columns = probabilities.argmax(axis=1)
+        return columns if self.classes is None else np.take(self.classes, columns)
+
+    def predict_with_proba(self, X):
+        probabilities = self.predict_proba(X)
+        return self._class_ids(probabilities), probabilities
+
+    def predict(self, X) -> np.ndarray:
+        return self._class_ids(self.predict_proba(X))
+
+
+def parity_report(compact: CompactForest, model, X: np.ndarray) -> dict[str, Any]:
+    """Class agreement, probability error and memory of the compact forest vs the model"""
+    expected = np.asarray(model.predict_proba(X))
+    probabilities = compact.predict_proba(X)
+    error = np.abs(probabilities - expected)
+    return {
+        "leaf_dtype": compact.leaf_dtype,
+        "eval_rows": len(X),
+        "class_agreement": float(
+            np.mean(probabilities.argmax(axis=1) == expected.argmax(axis=1))
+        ),
+        "max_probability_error": float(error.max()),
+        "mean_probability_error": float(error.mean()),
+        "model_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "compact_bytes": compact.nbytes,
+    }
@@ -0,0 +1,217 @@
+"""
+Prediction engine shared by the serving apps
+
+The apps used to call model.predict(X) and then model.predict_proba(X)
+on every request: two passes through sklearn's input validation and,
+for the Pipeline v1/training/train.py saves, two scaler transforms.
+PredictionEngine owns the served form of one loaded model:
+
+- linear preprocessing folded into the model at load, kept only if it
+  passes a parity check against the original (fused.py);
+- class ids and probabilities from one pass (score());
+- single-row results cached by their exact feature bytes (cache.py);
+  the cache belongs to the engine, so a new model starts empty;
+- batches scored in chunks of batch_rows, bounding the temporaries of a
+  large request;
+- a warm-up at load, so the first request does not pay sklearn's and
+  NumPy's one-off costs.
+
+Rows scored, scoring time and cache hits are counted in the shared
+metrics registry, labeled by the app the engine serves.
+"""
+
+import logging
+import time
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .features import FEATURE_NAMES, grid_rows
+from .fused import NotFusable, fuse_checked
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+rows_total = REGISTRY.counter(
+    "inference_core_rows_total", "Rows scored by the prediction engine"
+)
+score_seconds_total = REGISTRY.counter(
+    "inference_core_score_seconds_total",
+    "Time spent scoring rows in the prediction engine",
+)
+cache_hits_total = REGISTRY.counter(
+    "inference_core_cache_hits_total",
+    "Single-row predictions answered from the engine cache",
+)
+
+
+def score(active_model, features: np.ndarray):
+    """
+    Class ids and probabilities, in one pass for models that support it
+
+    Probabilities are None for a model without predict_proba.
+    """
+    if hasattr(active_model, "predict_with_proba"):
+        return active_model.predict_with_proba(features)
+    if not hasattr(active_model, "predict_proba"):
+        return active_model.predict(features), None
+    return active_model.predict(features), active_model.predict_proba(features)
+
+
+def score_row(active_model, features: np.ndarray):
+    """Class id and probability row of a single-row prediction"""
+    class_ids, probabilities = score(active_model, features)
+    return int(class_ids[0]), np.asarray(probabilities[0], dtype=np.float64)
+
+
+def fold_preprocessing(
+    model,
+    n_features: int = len(FEATURE_NAMES),
+    eval_rows: int = 2000,
+    tolerance: float = 1e-9,
+) -> tuple[Any, dict[str, Any] | None]:
+    """
+    Fold a pipeline's linear preprocessing into the model
+
+    Returns:
+        (served model, parity report); the unchanged model and the report
+        (or None) when it has nothing to fold or fails the parity check
+    """
+    try:
+        fused, report = fuse_checked(
+            model, grid_rows(max(1, eval_rows), n_features), tolerance=tolerance
+        )
+    except NotFusable as e:
+        logger.info(f"Preprocessing not folded: {e}")
+        return model, None
+    if fused is model:
+        logger.warning(
+            f"Folded preprocessing failed the parity check, serving the pipeline: {report}"
+        )
+    else:
+        logger.info(f"Preprocessing folded into the model: {report}")
+    return fused, report
+
+
+class Prediction(NamedTuple):
+    """A single-row prediction; probabilities is None for a model without predict_proba"""
+
+    class_id: int
+    class_name: str
+    probabilities: np.ndarray | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """The predicted_class_id / predicted_class_name / probabilities fields every app returns"""
+        return {
+            "predicted_class_id": self.class_id,
+            "predicted_class_name": self.class_name,
+            "probabilities": None
+            if self.probabilities is None
+            else self.probabilities.tolist(),
+        }
+
+
+class PredictionEngine:
+    """
+    Served form of a loaded model, scoring single rows and batches
+
+    Args:
+        model: Fitted estimator, or anything with predict (and predict_proba)
+        class_names: Name of each class id
+        fold: Fold linear preprocessing into the model (fold_preprocessing())
+        cache_rows: Single-row predictions cached; 0 disables the cache
+        batch_rows: Rows per scoring call in predict_batch()
+        app: Label of the engine's metrics
+    """
+
+    def __init__(
+        self,
+        model,
+        class_names: Sequence[str],
+        fold: bool = True,
+        cache_rows: int = 1024,
+        batch_rows: int = 4096,
+        app: str = "default",
+    ):
+        self.model = model
+        self.class_names: list[str] = list(class_names)
+        self.n_features = int(getattr(model, "n_features_in_", len(FEATURE_NAMES)))
+        self.fused_report = None
+        self.served = model
+        if fold:
+            self.served, self.fused_report = fold_preprocessing(model, self.n_features)
+        self.has_proba = hasattr(self.served, "predict_with_proba") or hasattr(
+            self.served, "predict_proba"
+        )
+        self.cache = LRUCache(cache_rows)
+        self.batch_rows = max(1, batch_rows)
+        self.app = app
+
+    def _record(self, rows: int, seconds: float):
+        rows_total.inc(rows, app=self.app)
+        score_seconds_total.inc(seconds, app=self.app)
+
+    def predict_row(self, features: np.ndarray) -> Prediction:
+        """Prediction for one (1, n_features) row, from the cache when it was seen before"""
+        features = np.ascontiguousarray(features, dtype=np.float64).reshape(1, -1)
+        key = features.tobytes()
+        cached = self.cache.get(key)
+        if cached is not None:
+            cache_hits_total.inc(app=self.app)
+            return cached
+
+        start = time.perf_counter()
+        class_ids, probabilities = score(self.served, features)
+        self._record(1, time.perf_counter() - start)
+        class_id = int(class_ids[0])
+        prediction = Prediction(
+            class_id,
+            self.class_names[class_id],
+            None
+            if probabilities is None
+            else np.asarray(probabilities[0], dtype=np.float64),
+        )
+        self.cache.put(key, prediction)
+        return prediction
+
+    def predict_batch(self, X) -> tuple[np.ndarray, np.ndarray | None]:
+        """Class ids and probabilities of an (n, n_features) matrix, scored batch_rows at a time"""
+        X = np.asarray(X, dtype=np.float64)
+        start = time.perf_counter()
+        if len(X) <= self.batch_rows:
+            class_ids, probabilities = score(self.served, X)
+        else:
+            parts = [
+                score(self.served, X[i : i + self.batch_rows])
+                for i in range(0, len(X), self.batch_rows)
+            ]
+            class_ids = np.concatenate([ids for ids, _ in parts])
+            probabilities = (
+                None if parts[0][1] is None else np.concatenate([p for _, p in parts])
+            )
+        self._record(len(X), time.perf_counter() - start)
+        return np.asarray(class_ids).astype(np.int64), probabilities
+
+    def warm_up(self, iterations: int = 20, batch_size: int = 64) -> float:
+        """
+        Score synthetic single rows and batches, bypassing the cache
+
+        Returns:
+            Warm-up wall time in seconds
+        """
+        start = time.perf_counter()
+        for i in range(iterations):
+            rows = grid_rows(batch_size, self.n_features, seed=i)
+            score(self.served, rows[:1])
+            score(self.served, rows)
+        return time.perf_counter() - start
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "model": type(self.model).__name__,
+            "served": type(self.served).__name__,
+            "folded": self.served is not self.model,
+            "cache": self.cache.snapshot(),
+        }
@@ -0,0 +1,35 @@
+"""
+Iris feature and class layout shared by the serving apps
+
+Every app accepts the same four measurements, in centimetres, and maps
+class ids to the same names. build_features() takes any request object
+with the four measurement attributes (each app keeps its own pydantic
+model and its own validation rules).
+"""
+
+import numpy as np
+
+FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+CLASS_NAMES = ["setosa", "versicolor", "virginica"]
+
+
+def build_features(request) -> np.ndarray:
+    """Build the (1, 4) feature matrix for a single request"""
+    return np.array(
+        [
+            [
+                request.sepal_length,
+                request.sepal_width,
+                request.petal_length,
+                request.petal_width,
+            ]
+        ]
+    )
+
+
+def grid_rows(
+    n: int, n_features: int = len(FEATURE_NAMES), seed: int = 0
+) -> np.ndarray:
+    """n random rows on the 0.1 cm grid from 0 to 10 cm, for parity checks and warm-up"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 101, size=(n, n_features)) / 10
@@ -0,0 +1,245 @@
+"""
+Linear preprocessing folded into the model at load
+
+v1/training/train.py saves Pipeline([StandardScaler, clf]). A call
+through the Pipeline runs sklearn's generic machinery: fitted-state and
+input checks in every step, the scaler's transform into an intermediate
+array, then the classifier's own validation. For a single row that
+overhead is most of the call. fuse_pipeline() compiles it away:
+
+- consecutive per-feature affine steps (StandardScaler, MaxAbsScaler,
+  MinMaxScaler without clip) compose into one scale and offset vector;
+- when the final step is a LogisticRegression the transform is folded
+  into its weights, W' = W * scale and b' = b + W @ offset, so a call is
+  one matmul followed by the softmax (or one-vs-rest normalization) that
+  LogisticRegression.predict_proba would apply;
+- otherwise the composed transform runs as one fused expression,
+  X * scale + offset, in front of the final estimator.
+
+Inputs reaching the model are already validated by the serving app, so
+the fused models skip sklearn's checks. parity_report() compares a fused
+model with the original pipeline and times a single-row call of each.
+"""
+
+import time
+from statistics import median
+from typing import Any
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MaxAbsScaler, MinMaxScaler, StandardScaler
+
+
+class NotFusable(ValueError):
+    """The model has no linear preprocessing that can be folded"""
+
+
+def _affine(step, n_features: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per-feature (scale, offset) with step.transform(X) == X * scale + offset"""
+    scale = np.ones(n_features)
+    offset = np.zeros(n_features)
+    if isinstance(step, StandardScaler):
+        if step.with_mean:
+            offset = -np.asarray(step.mean_, dtype=np.float64)
+        if step.with_std:
+            scale = 1.0 / np.asarray(step.scale_, dtype=np.float64)
+            offset = offset * scale
+        return scale, offset
+    if isinstance(step, MaxAbsScaler):
+        return 1.0 / np.asarray(step.scale_, dtype=np.float64), offset
+    if isinstance(step, MinMaxScaler) and not step.clip:
+        return np.asarray(step.scale_, dtype=np.float64), np.asarray(
+            step.min_, dtype=np.float64
+        )
+    raise NotFusable(f"{type(step).__name__} is not a per-feature affine transform")
+
+
+def _multinomial(clf) -> bool:
+    # Mirrors LogisticRegression.predict_proba's choice between softmax and OvR
+    multi_class = getattr(clf, "multi_class", "auto")
+    if multi_class in ("ovr", "warn"):
+        return False
+    if multi_class == "auto":
+        return clf.classes_.size > 2 and clf.solver != "liblinear"
+    return True
+
+
+class FusedLinearModel:
+    """
+    Logistic regression with the preprocessing folded into its weights
+
+    Args:
+        coef: (n_classes or 1, n_features) folded weights
+        intercept: (n_classes or 1,) folded intercepts
+        classes: Class labels, as the original classes_
+        multinomial: Softmax over the decision values, else OvR normalization
+    """
+
+    kind = "folded_linear"
+
+    def __init__(
+        self,
+        coef: np.ndarray,
+        intercept: np.ndarray,
+        classes: np.ndarray,
+        multinomial: bool,
+    ):
+        self.coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = classes
+        self.multinomial = multinomial
+
+    def predict_proba(self, X) -> np.ndarray:
+        decision = np.asarray(X, dtype=np.float64) @ self.coef_t
+        decision += self.intercept
+        if decision.shape[1] == 1:
+            decision = (
+                np.hstack([-decision, decision]) if self.multinomial else decision
+            )
+        if self.multinomial:
+            decision -= decision.max(axis=1, keepdims=True)
+            np.exp(decision, out=decision)
+        else:
+            # expit, then normalize across classes (LogisticRegression._predict_proba_lr)
+            np.negative(decision, out=decision)
+            np.exp(decision, out=decision)
+            decision += 1.0
+            np.reciprocal(decision, out=decision)
+            if decision.shape[1] == 1:
+                return np.hstack([1.0 - decision, decision])
+        decision /= decision.sum(axis=1, keepdims=True)
+        return decision
+
+    def predict_with_proba(self, X):
+        """Class ids and probabilities from one matmul"""
+        probabilities = self.predict_proba(X)
+        return self.classes_[probabilities.argmax(axis=1)], probabilities
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_with_proba(X)[0]
+
+
+class FusedPreprocessing:
+    """
+    The final estimator behind one fused X * scale + offset expression
+
+    Keeps the estimator's own predict and predict_proba (for SVC they can
+    disagree, as they do through the Pipeline).
+    """
+
+    kind = "fused_transform"
+
+    def __init__(self, scale: np.ndarray, offset: np.ndarray, estimator):
+        self.scale = scale
+        self.offset = offset
+        self.estimator = estimator
+        self.classes_ = getattr(estimator, "classes_", None)
+
+    def transform(self, X) -> np.ndarray:
+        transformed = np.asarray(X, dtype=np.float64) * self.scale
+        transformed += self.offset
+        return transformed
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.estimator.predict_proba(self.transform(X))
+
+    def predict(self, X) -> np.ndarray:
+        return self.estimator.predict(self.transform(X))
+
+    def predict_with_proba(self, X):
+        """Class ids and probabilities sharing one transform"""
+        transformed = self.transform(X)
+        return self.estimator.predict(transformed), self.estimator.predict_proba(
+            transformed
+        )
+
+
+def fuse_pipeline(model):
+    """
+    Compile a fitted Pipeline of affine scalers and a classifier
+
+    Returns:
+        FusedLinearModel for a LogisticRegression final step, otherwise
+        FusedPreprocessing
+
+    Raises:
+        NotFusable: if the model is not a Pipeline, has no preprocessing,
+            or has a step that is not a per-feature affine transform
+    """
+    if not isinstance(model, Pipeline):
+        raise NotFusable(f"{type(model).__name__} is not a Pipeline")
+    steps = [
+        step
+        for _, step in model.steps[:-1]
+        if step is not None and step != "passthrough"
+    ]
+    final = model.steps[-1][1]
+    if not steps:
+        raise NotFusable("Pipeline has no preprocessing steps")
+
+    n_features = int(getattr(steps[0], "n_features_in_", 0))
+    scale = np.ones(n_features)
+    offset = np.zeros(n_features)
+    for step in steps:
+        step_scale, step_offset = _affine(step, n_features)
+        scale, offset = scale * step_scale, offset * step_scale + step_offset
+
+    if isinstance(final, LogisticRegression):
+        coef = np.asarray(final.coef_, dtype=np.float64)
+        return FusedLinearModel(
+            coef * scale,
+            np.asarray(final.intercept_, dtype=np.float64) + coef @ offset,
+            final.classes_,
+            _multinomial(final),
+        )
+    return FusedPreprocessing(scale, offset, final)
+
+
+def _single_row_us(fn, row: np.ndarray, calls: int) -> float:
+    fn(row)
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(row)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return median(samples)
+
+
+def parity_report(
+    fused, model, X: np.ndarray, timing_calls: int = 200
+) -> dict[str, Any]:
+    """Class agreement and probability error of the fused model vs the pipeline, and single-row latency of each"""
+    expected = np.asarray(model.predict_proba(X))
+    probabilities = fused.predict_proba(X)
+    error = np.abs(probabilities - expected)
+    report = {
+        "kind": fused.kind,
+        "eval_rows": len(X),
+        "class_agreement": float(np.mean(fused.predict(X) == model.predict(X))),
+        "max_probability_error": float(error.max()),
+    }
+    if timing_calls > 0:
+        row = X[:1]
+        report["pipeline_us"] = _single_row_us(model.predict_proba, row, timing_calls)
+        report["fused_us"] = _single_row_us(fused.predict_proba, row, timing_calls)
+        report["saved_us"] = report["pipeline_us"] - report["fused_us"]
+    return report
+
+
+def fuse_checked(
+    model, X: np.ndarray, tolerance: float = 1e-9, timing_calls: int = 200
+) -> tuple[Any, dict[str, Any] | None]:
+    """
+    fuse_pipeline() guarded by a parity check
+
+    Returns:
+        (fused model, report) when every class matches and probabilities
+        agree within tolerance, else (model, report or None)
+    """
+    fused = fuse_pipeline(model)
+    report = parity_report(fused, model, X, timing_calls)
+    if report["class_agreement"] < 1.0 or report["max_probability_error"] > tolerance:
+        report["rejected"] = True
+        return model, report
+    return fused, report
@@ -0,0 +1,198 @@
+"""
+Eager model loading shared by the serving apps
+
+v1 loaded the artifact on the first /health or /predict call and, while
+the file was missing, looked for it again on every call; the first
+prediction after a deploy paid for unpickling the model. ModelHolder
+loads the artifact once at startup and builds, folds and warms its
+PredictionEngine before anything is served. While the artifact is
+missing (v1's model is uploaded to the mounted file share after the
+container starts) get() retries the load at most once every
+retry_seconds, from one caller at a time, instead of on every request.
+
+Artifacts are the bundle written by the training scripts ({"model": ...,
+"target_names": ..., "reference_stats": ...}) or a bare estimator
+(v3/iris-spring-boot/train_model.py).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+import joblib
+
+from .engine import PredictionEngine
+from .features import CLASS_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+def unpack_artifact(artifact):
+    """
+    Split a model artifact into the estimator and its reference statistics
+
+    Accepts the bundle written by the training scripts ({"model": ...,
+    "reference_stats": ...}) as well as a bare estimator.
+    """
+    if isinstance(artifact, dict) and "model" in artifact:
+        return artifact["model"], artifact.get("reference_stats")
+    return artifact, None
+
+
+def class_names_of(artifact, default: Sequence[str] = CLASS_NAMES) -> list[str]:
+    """The bundle's target_names, else the default class names"""
+    if isinstance(artifact, dict) and artifact.get("target_names") is not None:
+        return [str(name) for name in artifact["target_names"]]
+    return list(default)
+
+
+class LoadedModel(NamedTuple):
+    """A model artifact loaded into its prediction engine"""
+
+    engine: PredictionEngine
+    path: str
+    version: str
+    loaded_at: str
+    reference_stats: dict[str, Any] | None
+    load_seconds: float
+
+
+def load_model(
+    path: str,
+    version: str = "unknown",
+    class_names: Sequence[str] = CLASS_NAMES,
+    warmup_iterations: int = 20,
+    **engine_options,
+) -> LoadedModel:
+    """
+    Load an artifact and build its warmed-up prediction engine
+
+    Args:
+        path: joblib artifact
+        version: Model version reported by the app
+        class_names: Class names for a bare estimator (bundles carry their own)
+        warmup_iterations: Synthetic scoring rounds before returning (0 skips the warm-up)
+        **engine_options: PredictionEngine keyword arguments
+
+    Raises:
+        FileNotFoundError: when the artifact does not exist
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file not found: {path}")
+
+    start = time.perf_counter()
+    logger.info(f"Loading model from {path}...")
+    artifact = joblib.load(path)
+    model, reference_stats = unpack_artifact(artifact)
+    engine = PredictionEngine(
+        model, class_names_of(artifact, class_names), **engine_options
+    )
+    if warmup_iterations > 0:
+        engine.warm_up(warmup_iterations)
+    return LoadedModel(
+        engine=engine,
+        path=path,
+        version=version,
+        loaded_at=datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        reference_stats=reference_stats,
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+class ModelHolder:
+    """
+    The model an app serves, loaded at startup and retried while missing
+
+    Args:
+        path: joblib artifact
+        version: Model version reported by the app
+        retry_seconds: Least time between load attempts while no model is
+            loaded; 0 never retries after the first attempt
+        clock: Time source, injectable for tests
+        **load_options: load_model() keyword arguments
+    """
+
+    def __init__(
+        self,
+        path: str,
+        version: str = "unknown",
+        retry_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        **load_options,
+    ):
+        self.path = path
+        self.version = version
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.load_options = load_options
+        self.current: LoadedModel | None = None
+        self.error: str | None = None
+        self._lock = threading.Lock()
+        self._last_attempt: float | None = None
+
+    def load(self) -> LoadedModel | None:
+        """Load the artifact now; on failure keep the previous model and record the error"""
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> LoadedModel | None:
+        self._last_attempt = self.clock()
+        try:
+            loaded = load_model(self.path, self.version, **self.load_options)
+        except FileNotFoundError as e:
+            # Expected until the artifact is uploaded: no traceback
+            logger.error(f"Failed to load model: {e}")
+            self.error = str(e)
+            return self.current
+        except Exception as e:
+            logger.exception("Failed to load model")
+            self.error = str(e)
+            return self.current
+        self.current = loaded
+        self.error = None
+        logger.info(
+            f"Model loaded successfully (version: {self.version}) in {loaded.load_seconds:.3f}s"
+        )
+        return loaded
+
+    def _retry_due(self) -> bool:
+        # An app without a startup hook loads on first use
+        if self._last_attempt is None:
+            return True
+        return (
+            self.retry_seconds > 0
+            and self.clock() - self._last_attempt >= self.retry_seconds
+        )
+
+    def get(self) -> LoadedModel | None:
+        """
+        The loaded model, or None
+
+        While none is loaded, one caller per retry interval attempts the
+        load; everyone else gets None without waiting.
+        """
+        loaded = self.current
+        if loaded is not None or not self._retry_due():
+            return loaded
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self.current is None and self._retry_due():
+                self._load()
+            return self.current
+        finally:
+            self._lock.release()
+
+    def snapshot(self) -> dict[str, Any]:
+        loaded = self.current
+        return {
+            "model_loaded": loaded is not None,
+            "model_path": self.path,
+            "model_version": self.version,
+            "loaded_at": loaded.loaded_at if loaded is not None else None,
+            "error": self.error,
+        }
@@ -0,0 +1,137 @@
+"""
+Prometheus metrics for the serving apps
+
+Minimal in-process registry rendered in the Prometheus text exposition
+format by each app's /metrics endpoint. Kept dependency-free so every
+module of the core and of the apps can publish metrics without pulling
+in a client library.
+"""
+
+import math
+import threading
+from collections.abc import Callable
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in key)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isfinite(value) and value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base class for a named metric with optional labels
+
+    A metric with a callback is read from it at render time instead: the
+    callback returns a number, or a list of (labels, value) pairs for a
+    labeled metric.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(
+        self, name: str, description: str, callback: Callable[[], float] | None = None
+    ):
+        self.name = name
+        self.description = description
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._values: dict[LabelKey, float] = {}
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        if self._callback is not None:
+            value = self._callback()
+            if isinstance(value, (int, float)):
+                return [(self.name, (), float(value))]
+            # Labeled callbacks return (labels, value) pairs
+            return [(self.name, _label_key(labels), float(v)) for labels, v in value]
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter, incremented here or read from a callback over a running total"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge that is either set explicitly or read from a callback"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+
+class MetricsRegistry:
+    """Holds every metric exported by the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, description: str, callback: Callable[[], float] | None = None
+    ) -> Counter:
+        return self.register(Counter(name, description, callback))
+
+    def gauge(
+        self, name: str, description: str, callback: Callable[[], float] | None = None
+    ) -> Gauge:
+        return self.register(Gauge(name, description, callback))
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the core and the app serving from it
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,102 @@
+"""
+Single-flight coalescing of identical in-flight predictions
+
+Clients that retry on timeout (and the gateway) send the same
+measurements several times at once. Callers that ask for a key already
+being computed wait on the first caller's future instead of running the
+model again. Entries exist only while the computation is in flight: this
+merges overlapping requests and is not a result cache.
+
+The futures are concurrent.futures.Future, so REST handlers on the event
+loop (do_async) and gRPC handler threads (do) coalesce with each other.
+A leader's result or error is shared with its followers, except for its
+cancellation (its client went away): the followers then try again, and
+one of them runs the call.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+
+class _LeaderCancelled(Exception):
+    """The leading call was cancelled; its followers try again"""
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its outcome"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self.leaders_total = 0
+        self.coalesced_total = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced_total += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.leaders_total += 1
+            return future, True
+
+    def _finish(
+        self,
+        key: Hashable,
+        future: Future,
+        result: Any = None,
+        error: BaseException | None = None,
+    ):
+        # Forget the key before publishing so late arrivals start a fresh call
+        with self._lock:
+            del self._calls[key]
+        if isinstance(error, asyncio.CancelledError):
+            future.set_exception(_LeaderCancelled())
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        """Call fn(*args), or wait for the identical call already in flight"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderCancelled:
+                continue
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        """Await fn(), or the identical call already in flight, without blocking the loop"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return await asyncio.wrap_future(future)
+            except _LeaderCancelled:
+                continue
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
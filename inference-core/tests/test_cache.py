@@ -0,0 +1,27 @@
+"""
+Tests for the LRU cache
+"""
+
+import numpy as np
+
+from inference_core.cache import LRUCache
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LRUCache(capacity=2)
+    cache.put(b"a", np.zeros(1))
+    cache.put(b"b", np.ones(1))
+    assert cache.get(b"a") is not None
+    cache.put(b"c", np.ones(1))
+    assert cache.get(b"b") is None
+    assert len(cache) == 2 and cache.hits_total == 1 and cache.misses_total == 1
+    assert cache.snapshot() == {
+        "capacity": 2,
+        "entries": 2,
+        "hits_total": 1,
+        "misses_total": 1,
+    }
+
+    disabled = LRUCache(capacity=0)
+    disabled.put(b"a", np.zeros(1))
+    assert disabled.get(b"a") is None
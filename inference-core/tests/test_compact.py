@@ -0,0 +1,129 @@
+"""
+Tests for the compact float32 / uint8 forest
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from inference_core.compact import (
+    CHUNK_ROWS,
+    CompactForest,
+    export_forest,
+    parity_report,
+)
+
+
+@pytest.fixture(scope="module")
+def iris():
+    return load_iris()
+
+
+@pytest.fixture(scope="module")
+def forest(iris):
+    return RandomForestClassifier(n_estimators=25, max_depth=5, random_state=0).fit(
+        iris.data, iris.target
+    )
+
+
+def grid_rows(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 101, size=(n, 4)) / 10
+
+
+def test_float32_matches_sklearn(forest, iris):
+    compact = CompactForest.from_model(forest, "float32")
+    X = np.vstack([iris.data, grid_rows(3000)])
+
+    np.testing.assert_array_equal(compact.predict(X), forest.predict(X))
+    np.testing.assert_allclose(
+        compact.predict_proba(X), forest.predict_proba(X), atol=1e-6
+    )
+
+
+def test_thresholds_rounded_down_keep_float32_comparison_exact(iris):
+    # 1.7 is not representable; sklearn's threshold sits just below float32(1.7)
+    tree = DecisionTreeClassifier(random_state=0).fit([[1.6], [1.7]], [0, 1])
+    compact = CompactForest.from_model(tree)
+    X = np.array([[1.6], [1.65], [1.7], [1.75]])
+    np.testing.assert_array_equal(compact.predict(X), tree.predict(X))
+
+
+def test_uint8_leaves_are_smaller_and_close(forest):
+    float32 = CompactForest.from_model(forest, "float32")
+    uint8 = CompactForest.from_model(forest, "uint8")
+    X = grid_rows(2000)
+
+    assert uint8.nbytes < float32.nbytes
+    assert uint8.values.dtype == np.uint8
+    np.testing.assert_array_equal(uint8.predict(X), forest.predict(X))
+    np.testing.assert_allclose(
+        uint8.predict_proba(X), forest.predict_proba(X), atol=1 / 510
+    )
+
+
+def test_chunked_batches_match_single_rows(forest):
+    compact = CompactForest.from_model(forest)
+    X = grid_rows(CHUNK_ROWS * 2 + 7)
+    batch = compact.predict_proba(X)
+    np.testing.assert_allclose(
+        batch[-5:],
+        np.vstack(
+            [compact.predict_proba(X[i : i + 1]) for i in range(len(X) - 5, len(X))]
+        ),
+    )
+
+
+def test_export_is_plain_arrays(iris):
+    model = ExtraTreesClassifier(n_estimators=5, random_state=0).fit(
+        iris.data, iris.target
+    )
+    arrays = export_forest(model, "uint8")
+    assert all(isinstance(v, (np.ndarray, int, str)) for v in arrays.values())
+    assert arrays["left"].dtype == np.int16
+    np.testing.assert_array_equal(
+        CompactForest(arrays).predict(iris.data), model.predict(iris.data)
+    )
+
+
+def test_feature_index_dtype_fits_the_feature_count():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 200))
+    y = (X[:, 150] > 0).astype(int)
+    tree = DecisionTreeClassifier(max_depth=2, random_state=0).fit(X, y)
+
+    arrays = export_forest(tree)
+    assert arrays["feature"].dtype == np.int16
+    np.testing.assert_array_equal(CompactForest(arrays).predict(X), tree.predict(X))
+
+
+def test_predict_maps_columns_to_model_classes(iris):
+    labels = np.array([10, 20, 30])[iris.target]
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+        iris.data, labels
+    )
+    compact = CompactForest.from_model(model)
+
+    np.testing.assert_array_equal(compact.predict(iris.data), model.predict(iris.data))
+    assert (
+        compact.predict_with_proba(iris.data[:1])[0].tolist()
+        == model.predict(iris.data[:1]).tolist()
+    )
+
+
+def test_parity_report(forest):
+    report = parity_report(
+        CompactForest.from_model(forest, "uint8"), forest, grid_rows(1000)
+    )
+    assert report["class_agreement"] == 1.0
+    assert report["max_probability_error"] <= 1 / 510
+    assert report["compact_bytes"] < report["model_bytes"]
+
+
+def test_rejects_non_tree_models_and_bad_dtype(iris, forest):
+    with pytest.raises(ValueError):
+        export_forest(LogisticRegression(max_iter=500).fit(iris.data, iris.target))
+    with pytest.raises(ValueError):
+        export_forest(forest, "float16")
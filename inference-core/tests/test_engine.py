@@ -0,0 +1,80 @@
+"""
+Tests for the shared prediction engine
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from inference_core.engine import PredictionEngine, rows_total, score
+from inference_core.features import CLASS_NAMES, build_features
+from inference_core.fused import FusedLinearModel
+
+
+@pytest.fixture(scope="module")
+def iris():
+    data = load_iris()
+    return data.data, data.target
+
+
+def test_pipeline_is_folded_and_matches_sklearn(iris):
+    pipeline = Pipeline(
+        [("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=2000))]
+    ).fit(*iris)
+    engine = PredictionEngine(pipeline, CLASS_NAMES, app="test")
+    assert isinstance(engine.served, FusedLinearModel)
+    assert engine.snapshot()["folded"] is True
+
+    X = iris[0][::7]
+    class_ids, probabilities = engine.predict_batch(X)
+    np.testing.assert_array_equal(class_ids, pipeline.predict(X))
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(X), atol=1e-9)
+
+
+def test_predict_row_is_cached_per_feature_row(iris):
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(*iris)
+    engine = PredictionEngine(forest, CLASS_NAMES, cache_rows=8, app="test")
+    before = rows_total.value(app="test")
+
+    first = engine.predict_row(iris[0][:1])
+    again = engine.predict_row(iris[0][:1].copy())
+    assert again is first
+    assert first.class_name == CLASS_NAMES[first.class_id]
+    np.testing.assert_allclose(
+        first.probabilities, forest.predict_proba(iris[0][:1])[0]
+    )
+    assert engine.cache.hits_total == 1 and engine.cache.misses_total == 1
+    assert rows_total.value(app="test") == before + 1
+
+    assert first.as_dict() == {
+        "predicted_class_id": first.class_id,
+        "predicted_class_name": first.class_name,
+        "probabilities": first.probabilities.tolist(),
+    }
+
+
+def test_batches_are_scored_in_chunks(iris):
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(*iris)
+    engine = PredictionEngine(forest, CLASS_NAMES, batch_rows=16)
+    class_ids, probabilities = engine.predict_batch(iris[0])
+    np.testing.assert_array_equal(class_ids, forest.predict(iris[0]))
+    np.testing.assert_allclose(probabilities, forest.predict_proba(iris[0]))
+
+
+def test_model_without_probabilities(iris):
+    engine = PredictionEngine(SVC().fit(*iris), CLASS_NAMES)
+    assert not engine.has_proba
+
+    class Request:
+        sepal_length, sepal_width, petal_length, petal_width = 5.1, 3.5, 1.4, 0.2
+
+    prediction = engine.predict_row(build_features(Request()))
+    assert prediction.as_dict()["probabilities"] is None
+    assert score(engine.served, iris[0][:3])[1] is None
+    assert engine.predict_batch(iris[0][:40])[1] is None
+    assert engine.warm_up(iterations=2) >= 0
@@ -0,0 +1,100 @@
+"""
+Tests for folding linear preprocessing into the model
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import (
+    MaxAbsScaler,
+    MinMaxScaler,
+    PolynomialFeatures,
+    StandardScaler,
+)
+from sklearn.svm import SVC
+
+from inference_core.fused import (
+    FusedLinearModel,
+    FusedPreprocessing,
+    NotFusable,
+    fuse_checked,
+    fuse_pipeline,
+)
+
+IRIS = load_iris()
+ROWS = np.random.default_rng(0).integers(0, 101, size=(500, 4)) / 10
+
+
+def fit(steps, clf, target=IRIS.target):
+    return Pipeline(
+        [(f"step{i}", step) for i, step in enumerate(steps)] + [("clf", clf)]
+    ).fit(IRIS.data, target)
+
+
+def assert_parity(fused, pipeline):
+    np.testing.assert_allclose(
+        fused.predict_proba(ROWS), pipeline.predict_proba(ROWS), rtol=0, atol=1e-12
+    )
+    np.testing.assert_array_equal(fused.predict(ROWS), pipeline.predict(ROWS))
+
+
+@pytest.mark.parametrize(
+    "steps, clf, target",
+    [
+        ([StandardScaler()], LogisticRegression(max_iter=2000), IRIS.target),
+        (
+            [StandardScaler(), MinMaxScaler()],
+            LogisticRegression(max_iter=2000, multi_class="ovr"),
+            IRIS.target,
+        ),
+        ([MaxAbsScaler()], LogisticRegression(), IRIS.target > 0),
+        (
+            [StandardScaler(with_mean=False)],
+            LogisticRegression(multi_class="multinomial"),
+            IRIS.target > 0,
+        ),
+    ],
+)
+def test_scaler_folds_into_logistic_regression(steps, clf, target):
+    pipeline = fit(steps, clf, target.astype(int))
+    fused = fuse_pipeline(pipeline)
+    assert isinstance(fused, FusedLinearModel)
+    assert_parity(fused, pipeline)
+    class_ids, _ = fused.predict_with_proba(ROWS)
+    np.testing.assert_array_equal(class_ids, pipeline.predict(ROWS))
+
+
+@pytest.mark.parametrize(
+    "clf",
+    [SVC(probability=True, random_state=0), RandomForestClassifier(20, random_state=0)],
+)
+def test_other_estimators_get_one_fused_transform(clf):
+    pipeline = fit([StandardScaler()], clf)
+    fused = fuse_pipeline(pipeline)
+    assert isinstance(fused, FusedPreprocessing)
+    assert_parity(fused, pipeline)
+
+
+def test_not_fusable():
+    with pytest.raises(NotFusable):
+        fuse_pipeline(LogisticRegression(max_iter=2000).fit(IRIS.data, IRIS.target))
+    with pytest.raises(NotFusable):
+        fuse_pipeline(fit([PolynomialFeatures()], LogisticRegression(max_iter=2000)))
+    with pytest.raises(NotFusable):
+        fuse_pipeline(fit([MinMaxScaler(clip=True)], LogisticRegression(max_iter=2000)))
+
+
+def test_parity_gate():
+    pipeline = fit([StandardScaler()], LogisticRegression(max_iter=2000))
+    served, report = fuse_checked(pipeline, ROWS, timing_calls=20)
+    assert isinstance(served, FusedLinearModel)
+    assert report["class_agreement"] == 1.0
+    assert report["pipeline_us"] > 0 and report["fused_us"] > 0
+    assert report["saved_us"] == report["pipeline_us"] - report["fused_us"]
+
+    served, report = fuse_checked(pipeline, ROWS, tolerance=-1.0, timing_calls=0)
+    assert served is pipeline
+    assert report["rejected"]
@@ -0,0 +1,97 @@
+"""
+Tests for eager model loading and the throttled retry
+"""
+
+import joblib
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from inference_core.features import CLASS_NAMES
+from inference_core.loading import (
+    ModelHolder,
+    class_names_of,
+    load_model,
+    unpack_artifact,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="module")
+def forest():
+    data = load_iris()
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(
+        data.data, data.target
+    )
+
+
+def test_bundle_and_bare_estimator(tmp_path, forest):
+    bundle = {
+        "model": forest,
+        "target_names": ["a", "b", "c"],
+        "reference_stats": {"count": 1},
+    }
+    assert unpack_artifact(bundle) == (forest, {"count": 1})
+    assert unpack_artifact(forest) == (forest, None)
+    assert class_names_of(bundle) == ["a", "b", "c"]
+    assert class_names_of(forest) == CLASS_NAMES
+
+    path = tmp_path / "bundle.pkl"
+    joblib.dump(bundle, path)
+    loaded = load_model(str(path), "2.0.0", warmup_iterations=1)
+    assert loaded.version == "2.0.0" and loaded.reference_stats == {"count": 1}
+    assert loaded.engine.class_names == ["a", "b", "c"]
+
+    with pytest.raises(FileNotFoundError):
+        load_model(str(tmp_path / "missing.pkl"))
+
+
+def test_missing_model_is_retried_once_per_interval(tmp_path, forest):
+    path = tmp_path / "model.pkl"
+    clock = FakeClock()
+    holder = ModelHolder(
+        str(path), "1.0.0", retry_seconds=30.0, clock=clock, warmup_iterations=0
+    )
+
+    assert holder.load() is None
+    assert "not found" in holder.error
+    assert holder.snapshot()["model_loaded"] is False
+
+    # Uploaded after startup: not picked up before the retry interval
+    joblib.dump(forest, path)
+    clock.now = 10.0
+    assert holder.get() is None
+    clock.now = 30.0
+    loaded = holder.get()
+    assert loaded is not None and holder.error is None
+    assert holder.snapshot()["loaded_at"] == loaded.loaded_at
+
+    # Loaded models are served without touching the disk again
+    path.unlink()
+    clock.now = 100.0
+    assert holder.get() is loaded
+
+
+def test_first_use_loads_without_a_startup_hook(tmp_path, forest):
+    path = tmp_path / "model.pkl"
+    joblib.dump(forest, path)
+    holder = ModelHolder(str(path), retry_seconds=0, warmup_iterations=0)
+    assert holder.get() is not None
+
+
+def test_failed_reload_keeps_the_current_model(tmp_path, forest):
+    path = tmp_path / "model.pkl"
+    joblib.dump(forest, path)
+    holder = ModelHolder(str(path), warmup_iterations=0)
+    loaded = holder.load()
+
+    path.write_bytes(b"not a pickle")
+    assert holder.load() is loaded
+    assert holder.error
@@ -0,0 +1,118 @@
+"""
+Tests for single-flight coalescing
+"""
+
+import asyncio
+import threading
+import time
+
+from inference_core.singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        time.sleep(0.1)
+        return value * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow, 21)))
+    leader.start()
+    started.wait()
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("k", slow, 21)))
+        for _ in range(4)
+    ]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+
+    assert calls == [21]
+    assert results == [42] * 5
+    assert flight.leaders_total == 1
+    assert flight.coalesced_total == 4
+    assert flight.inflight == 0
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.coalesced_total == 0
+
+
+def test_error_is_shared_and_key_released():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("model exploded")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert errors == ["model exploded"] * 2
+    assert flight.inflight == 0
+    assert flight.do("k", lambda: "recovered") == "recovered"
+
+
+def test_async_callers_coalesce_with_threads():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("k", compute) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert calls == [1]
+    assert flight.coalesced_total == 2
+
+
+def test_followers_run_the_call_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("k", compute))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.ensure_future(flight.do_async("k", compute)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*followers), leader.cancelled()
+
+    assert asyncio.run(main()) == (["result", "result"], True)
+    assert calls == [1, 1]
+    assert flight.inflight == 0
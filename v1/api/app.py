@@ -1,15 +1,27 @@
 ﻿import os
-import joblib
-import numpy as np
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
+from inference_core import REGISTRY, ModelHolder, build_features
+
 MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")
 API_KEY = os.getenv("API_KEY", "")
+# The model may be uploaded to the mounted file share after startup
+MODEL_RETRY_SECONDS = float(os.getenv("MODEL_RETRY_SECONDS", "30"))
+
+model_holder = ModelHolder(MODEL_PATH, retry_seconds=MODEL_RETRY_SECONDS, app="v1")
+
 
-app = FastAPI(title="Iris Classifier API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_holder.load()
+    yield
 
-_model_bundle = None
+
+app = FastAPI(title="Iris Classifier API", version="1.0.0", lifespan=lifespan)
 
 
 class PredictRequest(BaseModel):
@@ -19,19 +31,10 @@ class PredictRequest(BaseModel):
     petal_width: float = Field(..., example=0.2)
 
 
-def load_model():
-    global _model_bundle
-    if _model_bundle is None:
-        if not os.path.exists(MODEL_PATH):
-            return None
-        _model_bundle = joblib.load(MODEL_PATH)
-    return _model_bundle
-
-
 @app.get("/health")
 def health():
-    bundle = load_model()
-    return {"status": "ok", "model_loaded": bundle is not None, "model_path": MODEL_PATH}
+    loaded = model_holder.get()
+    return {"status": "ok", "model_loaded": loaded is not None, "model_path": MODEL_PATH}
 
 
 @app.post("/predict")
@@ -39,15 +42,13 @@ def predict(payload: PredictRequest, x_api_key: str | None = Header(default=None
     if API_KEY and x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    bundle = load_model()
-    if bundle is None:
+    loaded = model_holder.get()
+    if loaded is None:
         raise HTTPException(status_code=503, detail="Model not loaded. Upload model.pkl to the mounted file share.")
 
-    model = bundle["model"]
-    target_names = bundle["target_names"]
+    return loaded.engine.predict_row(build_features(payload)).as_dict()
 
-    X = np.array([[payload.sepal_length, payload.sepal_width, payload.petal_length, payload.petal_width]])
-    pred = int(model.predict(X)[0])
-    proba = model.predict_proba(X)[0].tolist() if hasattr(model, "predict_proba") else None
 
-    return {"predicted_class_id": pred, "predicted_class_name": target_names[pred], "probabilities": proba}
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -4,6 +4,7 @@ import joblib
 import numpy as np
 
 from sklearn.datasets import load_iris
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
@@ -14,6 +15,31 @@ from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier
 
 
+def best_per_family(search, pipe, X_train, y_train):
+    """Refit the best configuration of each classifier family found by the grid search"""
+    best = {}
+    for params, score in zip(search.cv_results_["params"], search.cv_results_["mean_test_score"]):
+        name = params["clf"].__class__.__name__
+        if name not in best or score > best[name][1]:
+            best[name] = (params, score)
+
+    members = []
+    for name, (params, score) in best.items():
+        # O estimador em "clf" é compartilhado entre as combinações do grid
+        params = dict(params, clf=clone(params["clf"]))
+        member = clone(pipe).set_params(**params)
+        member.fit(X_train, y_train)
+        members.append({"name": name, "model": member, "weight": float(score), "cv_score": float(score)})
+    return members
+
+
+def soft_vote(members, X):
+    """Weighted average of the members' class probabilities"""
+    weights = np.array([m["weight"] for m in members])
+    probabilities = np.stack([m["model"].predict_proba(X) for m in members])
+    return np.tensordot(weights / weights.sum(), probabilities, axes=1)
+
+
 def main():
     iris = load_iris()
     X = iris.data
@@ -67,6 +93,10 @@ def main():
         y_test, y_pred, target_names=iris.target_names, output_dict=True
     )
 
+    # Ensemble com o melhor LR, SVC e RF (servido pelo v4 com SERVING_MODE=ensemble)
+    members = best_per_family(search, pipe, X_train, y_train)
+    ensemble_acc = accuracy_score(y_test, soft_vote(members, X_test).argmax(axis=1))
+
     os.makedirs("artifacts", exist_ok=True)
 
     joblib.dump(
@@ -74,6 +104,7 @@ def main():
             "model": best_model,
             "target_names": iris.target_names.tolist(),
             "feature_names": iris.feature_names,
+            "ensemble": members,
         },
         "artifacts/model.pkl",
     )
@@ -91,6 +122,13 @@ def main():
                 "test_accuracy": float(acc),
                 "classification_report": report,
                 "best_model_class": best_model.named_steps["clf"].__class__.__name__,
+                "ensemble": {
+                    "members": [
+                        {"name": m["name"], "weight": m["weight"], "cv_score": m["cv_score"]}
+                        for m in members
+                    ],
+                    "test_accuracy": float(ensemble_acc),
+                },
             },
             f,
             indent=2,
@@ -99,6 +137,7 @@ def main():
     print("Saved artifacts/model.pkl and artifacts/metrics.json")
     print("Best CV score:", search.best_score_)
     print("Test accuracy:", acc)
+    print("Ensemble test accuracy:", ensemble_acc)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,15 @@
 import os
 import json
 import logging
-import joblib
-import numpy as np
 from datetime import datetime
 from pathlib import Path
 from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field
 
+from inference_core import REGISTRY, ModelHolder, build_features
+
 # Carregar variáveis de ambiente do arquivo .env
 try:
     from dotenv import load_dotenv
@@ -28,14 +29,10 @@ logger = logging.getLogger(__name__)
 MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")
 MODEL_VERSION = os.getenv("MODEL_VERSION", "unknown")
 API_KEY = os.getenv("API_KEY", "")
+MODEL_RETRY_SECONDS = float(os.getenv("MODEL_RETRY_SECONDS", "30"))
 
-# Estado da aplicação
-_app_state = {
-    "model_bundle": None,
-    "model_loaded_at": None,
-    "is_ready": False,
-    "last_error": None
-}
+# Estado da aplicação: modelo carregado pelo inference-core compartilhado
+model_holder = ModelHolder(MODEL_PATH, MODEL_VERSION, retry_seconds=MODEL_RETRY_SECONDS, app="v2")
 
 
 class PredictRequest(BaseModel):
@@ -74,31 +71,13 @@ async def lifespan(app: FastAPI):
 
 
 def load_model_on_startup():
-    """Carrega o modelo na inicialização"""
-    global _app_state
-    try:
-        if not os.path.exists(MODEL_PATH):
-            msg = f"Model file not found at {MODEL_PATH}"
-            logger.error(msg)
-            _app_state["last_error"] = msg
-            _app_state["is_ready"] = False
-            return
-        
-        logger.info(f"Loading model from {MODEL_PATH}...")
-        bundle = joblib.load(MODEL_PATH)
-        _app_state["model_bundle"] = bundle
-        _app_state["model_loaded_at"] = datetime.utcnow().isoformat()
-        _app_state["is_ready"] = True
-        logger.info(f"✅ Model loaded successfully (version: {MODEL_VERSION})")
-    except Exception as e:
-        logger.error(f"❌ Failed to load model: {str(e)}")
-        _app_state["last_error"] = str(e)
-        _app_state["is_ready"] = False
+    """Carrega, otimiza e aquece o modelo na inicialização"""
+    model_holder.load()
 
 
 def load_model():
-    """Retorna o modelo carregado"""
-    return _app_state["model_bundle"]
+    """Retorna o modelo carregado (LoadedModel) ou None"""
+    return model_holder.get()
 
 
 # ============================================================================
@@ -132,17 +111,12 @@ def readiness():
     ✅ 200 OK: Pronto para aceitar requisições
     ❌ 503 Service Unavailable: Não pronto (modelo não carregado)
     """
-    bundle = load_model()
-    is_ready = bundle is not None and _app_state["is_ready"]
-    
+    is_ready = load_model() is not None
+
     response = {
         "status": "ready" if is_ready else "not_ready",
         "ready": is_ready,
-        "model_loaded": bundle is not None,
-        "model_version": MODEL_VERSION,
-        "model_path": MODEL_PATH,
-        "loaded_at": _app_state["model_loaded_at"],
-        "error": _app_state["last_error"]
+        **model_holder.snapshot()
     }
     
     if not is_ready:
@@ -191,8 +165,8 @@ def predict(payload: PredictRequest, x_api_key: str | None = Header(default=None
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     # Validação
-    bundle = load_model()
-    if bundle is None:
+    loaded = load_model()
+    if loaded is None:
         logger.error("Model not loaded")
         raise HTTPException(
             status_code=503,
@@ -200,33 +174,27 @@ def predict(payload: PredictRequest, x_api_key: str | None = Header(default=None
         )
 
     try:
-        model = bundle["model"]
-        target_names = bundle["target_names"]
-
-        # Preparar dados
-        X = np.array([
-            [payload.sepal_length, payload.sepal_width, 
-             payload.petal_length, payload.petal_width]
-        ])
-        
-        # Predição
-        pred = int(model.predict(X)[0])
-        proba = (
-            model.predict_proba(X)[0].tolist() 
-            if hasattr(model, "predict_proba") 
-            else None
-        )
+        # Predição (uma única passada pelo modelo, com cache por linha)
+        prediction = loaded.engine.predict_row(build_features(payload)).as_dict()
+        proba = prediction["probabilities"]
 
-        logger.info(f"Prediction: class={pred}, confidence={max(proba) if proba else 'N/A'}")
+        logger.info(f"Prediction: class={prediction['predicted_class_id']}, "
+                    f"confidence={max(proba) if proba else 'N/A'}")
 
         return {
-            "predicted_class_id": pred,
-            "predicted_class_name": target_names[pred],
-            "probabilities": proba,
+            **prediction,
             "model_version": MODEL_VERSION,
             "timestamp": datetime.utcnow().isoformat()
         }
     
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+def metrics():
+    """
+    Métricas Prometheus do inference-core (linhas, tempo de predição, cache)
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
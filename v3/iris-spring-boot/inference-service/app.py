@@ -11,12 +11,12 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException, Header
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field, validator
-import joblib
-import numpy as np
 from dotenv import load_dotenv
 
+from inference_core import CLASS_NAMES, REGISTRY, ModelHolder, build_features
+
 # Load environment variables
 load_dotenv()
 
@@ -31,9 +31,7 @@ logger = logging.getLogger(__name__)
 MODEL_PATH = os.getenv("MODEL_PATH", "models/model.pkl")
 MODEL_VERSION = os.getenv("MODEL_VERSION", "1.0.0")
 API_KEY = os.getenv("API_KEY", "")
-
-# Target classes
-CLASS_NAMES = ["setosa", "versicolor", "virginica"]
+MODEL_RETRY_SECONDS = float(os.getenv("MODEL_RETRY_SECONDS", "30"))
 
 # Initialize FastAPI
 app = FastAPI(
@@ -42,9 +40,10 @@ app = FastAPI(
     version=MODEL_VERSION
 )
 
-# Global model reference
-model = None
-model_load_time = None
+# Model loaded, optimized and warmed up by the shared inference core
+# (train_model.py saves a bare estimator, so class names default to CLASS_NAMES)
+model_holder = ModelHolder(MODEL_PATH, MODEL_VERSION, retry_seconds=MODEL_RETRY_SECONDS,
+                           class_names=CLASS_NAMES, app="v3")
 
 
 class PredictRequest(BaseModel):
@@ -92,23 +91,8 @@ class LivenessResponse(BaseModel):
 @app.on_event("startup")
 async def startup():
     """Load model on startup"""
-    global model, model_load_time
-    
     logger.info("🚀 Starting Iris Inference Service...")
-    
-    try:
-        if not os.path.exists(MODEL_PATH):
-            logger.error(f"❌ Model file not found at {MODEL_PATH}")
-            raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-        
-        logger.info(f"📦 Loading model from {MODEL_PATH}...")
-        model = joblib.load(MODEL_PATH)
-        model_load_time = datetime.utcnow().isoformat()
-        logger.info(f"✅ Model loaded successfully (v{MODEL_VERSION})")
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to load model: {str(e)}")
-        model = None
+    model_holder.load()
 
 
 @app.on_event("shutdown")
@@ -124,9 +108,9 @@ async def liveness():
 
 
 @app.get("/health/ready")
-async def readiness():
-    """Kubernetes readiness probe"""
-    if model is None:
+def readiness():
+    """Kubernetes readiness probe (plain def: a retried model load runs in the threadpool)"""
+    if model_holder.get() is None:
         logger.warning("⚠️ Model not loaded")
         raise HTTPException(
             status_code=503,
@@ -136,28 +120,21 @@ async def readiness():
                 "model_loaded": False,
                 "model_version": MODEL_VERSION,
                 "model_path": MODEL_PATH,
-                "error": "Model not loaded"
+                "error": model_holder.error or "Model not loaded"
             }
         )
     
-    return HealthResponse(
-        status="ready",
-        ready=True,
-        model_loaded=True,
-        model_version=MODEL_VERSION,
-        model_path=MODEL_PATH,
-        loaded_at=model_load_time
-    )
+    return HealthResponse(status="ready", ready=True, **model_holder.snapshot())
 
 
 @app.get("/health")
-async def health():
+def health():
     """Legacy health endpoint"""
-    return await readiness()
+    return readiness()
 
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(None)):
+def predict(request: PredictRequest, x_api_key: Optional[str] = Header(None)):
     """
     Classify iris flower measurements
     
@@ -176,7 +153,8 @@ async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(Non
             raise HTTPException(status_code=401, detail="Unauthorized")
     
     # Check model is loaded
-    if model is None:
+    loaded = model_holder.get()
+    if loaded is None:
         logger.error("❌ Model not loaded")
         raise HTTPException(
             status_code=503,
@@ -187,31 +165,17 @@ async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(Non
         logger.info(f"📊 Prediction request: SL={request.sepal_length}, SW={request.sepal_width}, "
                    f"PL={request.petal_length}, PW={request.petal_width}")
         
-        # Prepare features
-        features = np.array([[
-            request.sepal_length,
-            request.sepal_width,
-            request.petal_length,
-            request.petal_width
-        ]])
-        
-        # Make prediction
-        predicted_class_id = int(model.predict(features)[0])
-        predicted_class_name = CLASS_NAMES[predicted_class_id]
-        
-        # Get probabilities
-        probabilities = model.predict_proba(features)[0].tolist()
+        # Class id and probabilities in one pass (cached per feature row)
+        prediction = loaded.engine.predict_row(build_features(request))
         
         response = PredictionResponse(
-            predicted_class_id=predicted_class_id,
-            predicted_class_name=predicted_class_name,
-            probabilities=probabilities,
+            **prediction.as_dict(),
             model_version=MODEL_VERSION,
             timestamp=datetime.utcnow().isoformat()
         )
         
-        logger.info(f"✅ Prediction successful: class_id={predicted_class_id}, "
-                   f"class_name={predicted_class_name}")
+        logger.info(f"✅ Prediction successful: class_id={prediction.class_id}, "
+                   f"class_name={prediction.class_name}")
         
         return response
         
@@ -223,6 +187,12 @@ async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(Non
         )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of the shared inference core"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -235,7 +205,8 @@ async def root():
             "predict": "POST /predict",
             "health": "GET /health",
             "readiness": "GET /health/ready",
-            "liveness": "GET /health/live"
+            "liveness": "GET /health/live",
+            "metrics": "GET /metrics"
         }
     }
 
@@ -5,7 +5,11 @@ import org.springframework.boot.autoconfigure.SpringBootApplication;
 import org.springframework.context.annotation.Bean;
 import org.springframework.web.client.RestTemplate;
 import org.apache.hc.client5.http.classic.HttpClient;
+import org.apache.hc.client5.http.config.ConnectionConfig;
 import org.apache.hc.client5.http.impl.classic.HttpClients;
+import org.apache.hc.client5.http.impl.io.PoolingHttpClientConnectionManager;
+import org.apache.hc.client5.http.impl.io.PoolingHttpClientConnectionManagerBuilder;
+import org.apache.hc.core5.util.TimeValue;
 import org.springframework.http.client.HttpComponentsClientHttpRequestFactory;
 
 import lombok.extern.slf4j.Slf4j;
@@ -34,11 +38,29 @@ public class IrisApplication {
 
     /**
      * Configure RestTemplate for HTTP calls to Python inference service
-     * with connection pooling and timeouts
+     * with connection pooling and timeouts.
+     *
+     * Connections are kept alive and reused; idle ones are evicted after 30s,
+     * well before the inference service's 75s keep-alive, so the gateway never
+     * writes to a socket the server is closing. A bounded TTL lets new pods
+     * receive traffic after a scale-up, and a draining pod's Connection: close
+     * removes its connections from the pool.
      */
     @Bean
     public RestTemplate restTemplate() {
-        HttpClient httpClient = HttpClients.createDefault();
+        PoolingHttpClientConnectionManager connectionManager = PoolingHttpClientConnectionManagerBuilder.create()
+                .setMaxConnTotal(200)
+                .setMaxConnPerRoute(100)
+                .setDefaultConnectionConfig(ConnectionConfig.custom()
+                        .setTimeToLive(TimeValue.ofMinutes(5))
+                        .setValidateAfterInactivity(TimeValue.ofSeconds(10))
+                        .build())
+                .build();
+        HttpClient httpClient = HttpClients.custom()
+                .setConnectionManager(connectionManager)
+                .evictIdleConnections(TimeValue.ofSeconds(30))
+                .evictExpiredConnections()
+                .build();
         HttpComponentsClientHttpRequestFactory factory = new HttpComponentsClientHttpRequestFactory(httpClient);
         factory.setConnectTimeout(5000);
         factory.setConnectionRequestTimeout(5000);
@@ -0,0 +1,67 @@
+"""
+Shared helpers for the inference service benchmarks
+
+Benchmarks run in-process against the FastAPI app with a freshly trained
+model, so they need no running server and no model artifact on disk.
+Run them from the service directory, e.g.:
+
+    python -m benchmarks.bench_wire
+"""
+
+import time
+from statistics import median
+from typing import Callable, Dict
+
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+
+def train_model(n_estimators: int = 100, max_depth: int = 5):
+    """Train the same model shape as ml/training/train.py"""
+    iris = load_iris()
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42)
+    model.fit(iris.data, iris.target)
+    return model
+
+
+def sample_rows(n: int, seed: int = 0) -> np.ndarray:
+    """Draw n realistic measurement rows from the iris dataset"""
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    return iris.data[rng.integers(0, len(iris.data), size=n)]
+
+
+def install_model(model):
+    """Publish a model into the app module and return a TestClient for it"""
+    from fastapi.testclient import TestClient
+    import src.app as app_module
+
+    app_module.model = model
+    app_module.settings.concurrency_limit_enabled = False
+    return TestClient(app_module.app)
+
+
+def time_call(fn: Callable[[], object], repeat: int = 200, warmup: int = 20) -> Dict[str, float]:
+    """Time fn() and return median and p99 latency in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "median_us": median(samples),
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def print_table(title: str, rows, columns):
+    """Print benchmark results as a fixed-width table"""
+    print(title)
+    print("  " + "".join(f"{c:>16}" for c in columns))
+    for row in rows:
+        print("  " + "".join(f"{v:>16.1f}" if isinstance(v, float) else f"{v!s:>16}" for v in row))
+    print()
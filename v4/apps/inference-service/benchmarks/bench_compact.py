@@ -0,0 +1,37 @@
+"""
+Benchmark: compact float32 / uint8 forest vs the sklearn forest
+
+Times predict_proba for 1-row and larger batches and prints the parity
+report (accuracy, probability error, bytes) of each leaf dtype.
+
+    python -m benchmarks.bench_compact
+"""
+
+import numpy as np
+
+from benchmarks._common import print_table, sample_rows, time_call, train_model
+from inference_core.compact import CompactForest, parity_report
+
+BATCH_SIZES = [1, 100, 10000]
+
+
+def main():
+    model = train_model()
+    variants = {dtype: CompactForest.from_model(model, dtype) for dtype in ("float32", "uint8")}
+
+    rows_out = []
+    for n in BATCH_SIZES:
+        X = sample_rows(n)
+        row = [n, time_call(lambda: model.predict_proba(X), repeat=30, warmup=3)["median_us"]]
+        for compact in variants.values():
+            row.append(time_call(lambda: compact.predict_proba(X), repeat=30, warmup=3)["median_us"])
+        rows_out.append(tuple(row))
+    print_table("predict_proba latency (median us)", rows_out, ["rows", "sklearn_us", "float32_us", "uint8_us"])
+
+    X = np.vstack([sample_rows(1000), np.random.default_rng(0).integers(0, 101, size=(20000, 4)) / 10])
+    for compact in variants.values():
+        print(parity_report(compact, model, X))
+
+
+if __name__ == "__main__":
+    main()
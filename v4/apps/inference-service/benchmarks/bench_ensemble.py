@@ -0,0 +1,63 @@
+"""
+Benchmark: ensemble member evaluation, sequential vs thread pool
+
+Builds the LogisticRegression / SVC / RandomForest pipelines that
+v1/training/train.py's grid search picks and times one soft vote with
+the members called one after another and in parallel (EnsembleModel).
+
+    python -m benchmarks.bench_ensemble
+"""
+
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from benchmarks._common import print_table, sample_rows, time_call
+from src.ensemble import EnsembleMember, EnsembleModel
+
+BATCH_SIZES = [1, 100, 1000]
+
+
+def train_members():
+    iris = load_iris()
+    classifiers = [
+        ("LogisticRegression", LogisticRegression(C=10.0, max_iter=2000)),
+        ("SVC", SVC(C=1.0, kernel="linear", probability=True)),
+        ("RandomForestClassifier", RandomForestClassifier(n_estimators=300, max_depth=5, random_state=42)),
+    ]
+    members = []
+    for name, clf in classifiers:
+        pipe = Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(iris.data, iris.target)
+        members.append(EnsembleMember(name, pipe, weight=1.0))
+    return members
+
+
+def sequential_vote(members, X):
+    weights = np.array([m.weight for m in members])
+    probabilities = np.stack([m.model.predict_proba(X) for m in members])
+    return np.tensordot(weights / weights.sum(), probabilities, axes=1)
+
+
+def main():
+    members = train_members()
+    ensemble = EnsembleModel(members, timeout_seconds=5.0)
+
+    rows_out = []
+    for n in BATCH_SIZES:
+        X = sample_rows(n)
+        np.testing.assert_allclose(ensemble.predict_proba(X), sequential_vote(members, X))
+        member_us = [time_call(lambda: m.model.predict_proba(X), repeat=50, warmup=5)["median_us"] for m in members]
+        sequential = time_call(lambda: sequential_vote(members, X), repeat=50, warmup=5)
+        parallel = time_call(lambda: ensemble.predict_proba(X), repeat=50, warmup=5)
+        rows_out.append((n, *member_us, sequential["median_us"], parallel["median_us"]))
+
+    print_table("Soft vote latency (median us)", rows_out,
+                ["rows", "lr_us", "svc_us", "rf_us", "sequential_us", "parallel_us"])
+
+
+if __name__ == "__main__":
+    main()
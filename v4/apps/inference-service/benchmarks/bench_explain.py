@@ -0,0 +1,54 @@
+"""
+Benchmark: per-prediction feature contributions
+
+Times the path attributions of explain.py (precomputed per-node credits,
+one vectorized traversal) against walking each tree's decision_path per
+request, for one row and for a 100-row batch, next to a plain
+predict_proba and to a fully cached request.
+
+    python -m benchmarks.bench_explain
+"""
+
+import numpy as np
+
+from benchmarks._common import print_table, sample_rows, time_call, train_model
+from src.explain import TreeExplainer
+
+
+def walk_paths(model, X):
+    """Contributions from each tree's decision_path, computed per request"""
+    contributions = np.zeros((len(X), X.shape[1], model.n_classes_))
+    for tree in model.estimators_:
+        t = tree.tree_
+        value = t.value[:, 0, :] / t.value[:, 0, :].sum(axis=1, keepdims=True)
+        paths = tree.decision_path(X.astype(np.float32))
+        for row in range(len(X)):
+            nodes = paths.indices[paths.indptr[row]:paths.indptr[row + 1]]
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                contributions[row, t.feature[parent]] += value[child] - value[parent]
+    return contributions / len(model.estimators_)
+
+
+def main():
+    model = train_model()
+    explainer = TreeExplainer(model, cache_rows=0)
+    cached = TreeExplainer(model)
+
+    rows = []
+    for label, X, repeat in [("1 row", sample_rows(1), 500), ("100 rows", sample_rows(100), 50)]:
+        np.testing.assert_allclose(explainer.contributions(X), walk_paths(model, X), atol=1e-9)
+        cached.explain(X)
+        rows.append((
+            label,
+            time_call(lambda: model.predict_proba(X), repeat=repeat)["median_us"],
+            time_call(lambda: walk_paths(model, X), repeat=max(5, repeat // 10))["median_us"],
+            time_call(lambda: explainer.explain(X), repeat=repeat)["median_us"],
+            time_call(lambda: cached.explain(X), repeat=repeat)["median_us"],
+        ))
+    print_table(f"RandomForest({len(model.estimators_)} trees) median latency (us)", rows,
+                ["input", "predict_proba", "decision_path", "precomputed", "cached"])
+    print(f"  precomputed structures: {explainer.nbytes / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
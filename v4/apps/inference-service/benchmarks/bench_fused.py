@@ -0,0 +1,51 @@
+"""
+Benchmark: Pipeline(StandardScaler, clf) vs preprocessing folded at load
+
+Fits the three classifier families of v1/training/train.py behind a
+StandardScaler and times predict_proba through the sklearn Pipeline and
+through the fused model the service builds at load, for one row (the
+/predict path) and for a 1000-row batch.
+
+    python -m benchmarks.bench_fused
+"""
+
+import warnings
+
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from benchmarks._common import print_table, sample_rows, time_call
+from inference_core.fused import fuse_checked
+
+CLASSIFIERS = [
+    ("LogisticRegression", LogisticRegression(max_iter=2000)),
+    ("SVC", SVC(probability=True, random_state=42)),
+    ("RandomForest", RandomForestClassifier(n_estimators=150, max_depth=5, random_state=42)),
+]
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    iris = load_iris()
+    single = sample_rows(1)
+    batch = sample_rows(1000)
+
+    rows = []
+    for name, clf in CLASSIFIERS:
+        pipeline = Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(iris.data, iris.target)
+        fused, report = fuse_checked(pipeline, sample_rows(2000, seed=1), timing_calls=0)
+        for label, X, repeat in [("1 row", single, 2000), ("1000 rows", batch, 200)]:
+            before = time_call(lambda: pipeline.predict_proba(X), repeat=repeat)["median_us"]
+            after = time_call(lambda: fused.predict_proba(X), repeat=repeat)["median_us"]
+            rows.append((name, label, report["kind"], before, after, before - after))
+        rows.append((name, "max error", f"{report['max_probability_error']:.1e}", "", "", ""))
+    print_table("predict_proba median latency (us)", rows,
+                ["classifier", "input", "fused as", "pipeline_us", "fused_us", "saved_us"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: REST vs gRPC unary vs gRPC streaming throughput
+
+Both transports run over loopback in this process on the same model and
+prediction core: uvicorn in a background thread for REST (one keep-alive
+client connection), the gRPC server for the RPCs.
+
+    python -m benchmarks.bench_grpc
+"""
+
+import logging
+import threading
+import time
+
+import grpc
+import httpx
+import uvicorn
+
+from benchmarks._common import print_table, sample_rows, train_model
+from src import iris_inference_pb2 as pb
+from src.grpc_server import InferenceServicer, InferenceStub, create_server
+
+FEATURES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+N_REQUESTS = 2000
+REST_PORT = 18080
+
+
+def start_rest(app):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=REST_PORT,
+                                           log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def throughput(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed, elapsed / n * 1e6
+
+
+def main():
+    import src.app as app_module
+
+    # A small forest keeps the comparison about transport, not tree traversal
+    app_module.model = train_model(n_estimators=10)
+    app_module.settings.concurrency_limit_enabled = False
+    logging.disable(logging.INFO)
+    rows = [dict(zip(FEATURES, r)) for r in sample_rows(N_REQUESTS).tolist()]
+
+    rest_server, rest_thread = start_rest(app_module.app)
+    servicer = InferenceServicer(lambda: app_module.model, app_module.run_prediction)
+    grpc_server, grpc_port = create_server(servicer, 0)
+    grpc_server.start()
+    channel = grpc.insecure_channel(f"localhost:{grpc_port}")
+    stub = InferenceStub(channel)
+
+    def rest():
+        with httpx.Client(base_url=f"http://127.0.0.1:{REST_PORT}") as client:
+            for row in rows:
+                client.post("/predict", json=row)
+
+    def grpc_unary():
+        for row in rows:
+            stub.Predict(pb.PredictRequest(**row))
+
+    def grpc_stream():
+        for _ in stub.PredictStream(pb.PredictRequest(**row) for row in rows):
+            pass
+
+    # Warm every path before measuring
+    for fn in (rest, grpc_unary, grpc_stream):
+        fn()
+
+    results = []
+    for name, fn in (("rest", rest), ("grpc-unary", grpc_unary), ("grpc-stream", grpc_stream)):
+        rps, us_per_request = throughput(fn, N_REQUESTS)
+        results.append((name, rps, us_per_request))
+
+    channel.close()
+    grpc_server.stop(None)
+    rest_server.should_exit = True
+    rest_thread.join()
+
+    print_table(f"Sequential predictions over loopback ({N_REQUESTS} rows)", results,
+                ["transport", "rows_per_s", "us_per_row"])
+
+
+if __name__ == "__main__":
+    main()
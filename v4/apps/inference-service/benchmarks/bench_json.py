@@ -0,0 +1,73 @@
+"""
+Benchmark: /predict response serialization, pydantic + FastAPI vs direct bytes
+
+Times and measures the allocations of shaping one single-row prediction
+into its JSON body, the previous way (PredictionResponse, .tolist(),
+utcnow().isoformat(), jsonable_encoder, JSONResponse) and with
+PredictionEncoder.
+
+    python -m benchmarks.bench_json
+"""
+
+import logging
+import tracemalloc
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from benchmarks._common import print_table, sample_rows, time_call, train_model
+from src.app import CLASS_NAMES, PredictionResponse, settings
+from src.fastjson import PredictionEncoder
+
+CALLS = 2000
+
+
+def pydantic_body(class_id, probabilities):
+    response = PredictionResponse(
+        predicted_class_id=class_id,
+        predicted_class_name=CLASS_NAMES[class_id],
+        probabilities=probabilities.tolist(),
+        model_version=settings.model_version,
+        timestamp=datetime.utcnow().isoformat()
+    )
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def allocated_bytes_per_call(fn) -> float:
+    """Bytes allocated per call (tracemalloc peak over one call, averaged)"""
+    fn()
+    total = 0
+    tracemalloc.start()
+    for _ in range(CALLS):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return total / CALLS
+
+
+def main():
+    logging.disable(logging.INFO)
+    model = train_model()
+    row = sample_rows(1)
+    probabilities = model.predict_proba(row)[0]
+    class_id = int(probabilities.argmax())
+    encoder = PredictionEncoder(CLASS_NAMES, settings.model_version)
+
+    def direct():
+        return encoder.encode(class_id, probabilities)
+
+    def pydantic():
+        return pydantic_body(class_id, probabilities)
+
+    rows = []
+    for name, fn in [("pydantic", pydantic), ("direct", direct)]:
+        timing = time_call(fn, repeat=CALLS, warmup=200)
+        rows.append((name, timing["median_us"], timing["p99_us"], allocated_bytes_per_call(fn)))
+    print_table("Serialize one prediction", rows, ["path", "median_us", "p99_us", "alloc_bytes"])
+
+
+if __name__ == "__main__":
+    main()
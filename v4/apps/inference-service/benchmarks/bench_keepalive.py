@@ -0,0 +1,130 @@
+"""
+Benchmark: request latency over new vs reused connections
+
+Starts the production server (python -m src.serve, one worker) with a
+temporary model and calls it the way the gateway does: a blocking client
+sending one request at a time. /health/live isolates the connection and
+protocol cost; /predict adds the model. Each server profile is measured
+with a new TCP connection per request (the old HttpClients.createDefault()
+behaviour under load) and with one pooled keep-alive connection.
+
+    python -m benchmarks.bench_keepalive
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+
+from benchmarks._common import print_table, train_model
+
+CALLS = 1000
+BODY = json.dumps({"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}).encode()
+HEADERS = {"Content-Type": "application/json"}
+PATHS = ["/health/live", "/predict"]
+PROFILES = [("h11", "asyncio"), ("httptools", "uvloop")]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(model_path: str, protocol: str, loop: str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        MODEL_PATH=model_path,
+        HOST="127.0.0.1",
+        PORT=str(port),
+        WORKERS="1",
+        GRPC_ENABLED="false",
+        SERVER_HTTP=protocol,
+        SERVER_LOOP=loop,
+        SERVER_DRAIN_SECONDS="0",
+        CONCURRENCY_LIMIT_ENABLED="false",
+    )
+    proc = subprocess.Popen([sys.executable, "-m", "src.serve"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health/ready")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc, port
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not become ready")
+
+
+def connect(port: int) -> http.client.HTTPConnection:
+    """Open a connection with TCP_NODELAY, as Apache HttpClient does by default"""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.connect()
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def call(conn: http.client.HTTPConnection, path: str):
+    if path == "/predict":
+        conn.request("POST", path, body=BODY, headers=HEADERS)
+    else:
+        conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 200
+
+
+def measure(port: int, path: str, reuse: bool):
+    samples = []
+    conn = connect(port) if reuse else None
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        if reuse:
+            call(conn, path)
+        else:
+            fresh = connect(port)
+            call(fresh, path)
+            fresh.close()
+        samples.append((time.perf_counter() - start) * 1e6)
+    elapsed = time.perf_counter() - started
+    if conn is not None:
+        conn.close()
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)], CALLS / elapsed
+
+
+def main():
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.joblib")
+        joblib.dump(train_model(), model_path)
+        for protocol, loop in PROFILES:
+            proc, port = start_server(model_path, protocol, loop)
+            try:
+                for path in PATHS:
+                    for reuse in (False, True):
+                        measure(port, path, reuse)
+                        result = measure(port, path, reuse)
+                        rows.append((f"{protocol}/{loop}", path, "keep-alive" if reuse else "new", *result))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+    print_table(f"{CALLS} sequential calls per row", rows,
+                ["server", "path", "connection", "median_us", "p99_us", "requests_per_s"])
+
+
+if __name__ == "__main__":
+    main()
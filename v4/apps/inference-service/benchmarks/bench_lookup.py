@@ -0,0 +1,40 @@
+"""
+Benchmark: decision-table serving vs the random forest
+
+Times predict_proba on 1-row and larger batches of on-grid rows for the
+bare model and for the table (SERVING_MODE=table), and prints the
+table's size and accuracy-loss report.
+
+    python -m benchmarks.bench_lookup
+"""
+
+import numpy as np
+
+from benchmarks._common import print_table, sample_rows, time_call, train_model
+from src.lookup import DecisionTable, TableModel
+
+BATCH_SIZES = [1, 100, 10000]
+
+
+def main():
+    model = train_model()
+    table = DecisionTable.build(model)
+    served = TableModel(model, table)
+
+    rows_out = []
+    for n in BATCH_SIZES:
+        rows = np.round(sample_rows(n), 1)
+        model_stats = time_call(lambda: model.predict_proba(rows), repeat=50, warmup=5)
+        table_stats = time_call(lambda: served.predict_proba(rows), repeat=50, warmup=5)
+        rows_out.append((n, model_stats["median_us"], table_stats["median_us"],
+                         model_stats["median_us"] / table_stats["median_us"]))
+
+    print_table("predict_proba: model vs decision table", rows_out,
+                ["rows", "model_us", "table_us", "speedup"])
+    print("Table report:")
+    for key, value in table.report.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
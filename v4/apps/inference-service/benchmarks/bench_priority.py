@@ -0,0 +1,79 @@
+"""
+Benchmark: interactive latency under bulk load, FIFO vs weighted fair queues
+
+Several bulk clients keep 2000-row batches queued while one interactive
+client sends single rows back to back. Both share the same execution
+slots; with one FIFO class interactive calls wait behind every queued
+batch, with separate weighted classes they wait for at most the batches
+already running.
+
+    python -m benchmarks.bench_priority
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import print_table, sample_rows, train_model
+from src.scheduling import PriorityClass, WeightedFairScheduler
+
+SLOTS = 2
+BULK_CLIENTS = 6
+BULK_ROWS = 2000
+INTERACTIVE_CALLS = 200
+
+
+async def scenario(model, classes, bulk_class, interactive_class):
+    scheduler = WeightedFairScheduler(classes, slots=SLOTS)
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=SLOTS + 2)
+    bulk_rows = sample_rows(BULK_ROWS)
+    single_row = sample_rows(1)
+    stop = asyncio.Event()
+    bulk_done = 0
+
+    async def bulk_client():
+        nonlocal bulk_done
+        while not stop.is_set():
+            async with scheduler.slot(bulk_class, cost=BULK_ROWS):
+                await loop.run_in_executor(pool, model.predict_proba, bulk_rows)
+            bulk_done += 1
+
+    bulk = [asyncio.create_task(bulk_client()) for _ in range(BULK_CLIENTS)]
+    await asyncio.sleep(0.2)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(INTERACTIVE_CALLS):
+        start = time.perf_counter()
+        async with scheduler.slot(interactive_class, cost=1):
+            await loop.run_in_executor(pool, model.predict_proba, single_row)
+        latencies.append((time.perf_counter() - start) * 1e3)
+
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*bulk)
+    pool.shutdown()
+    latencies.sort()
+    return (
+        latencies[len(latencies) // 2],
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        bulk_done * BULK_ROWS / elapsed,
+    )
+
+
+def main():
+    model = train_model()
+    fifo = asyncio.run(scenario(model, [PriorityClass("shared", 1, 1000)], "shared", "shared"))
+    weighted = asyncio.run(scenario(
+        model, [PriorityClass("interactive", 8, 1000), PriorityClass("bulk", 1, 1000)], "bulk", "interactive"
+    ))
+    print_table(
+        f"Single-row latency with {BULK_CLIENTS} bulk clients ({BULK_ROWS} rows), {SLOTS} slots",
+        [("fifo", *fifo), ("weighted", *weighted)],
+        ["queues", "median_ms", "p99_ms", "bulk_rows_per_s"]
+    )
+
+
+if __name__ == "__main__":
+    main()
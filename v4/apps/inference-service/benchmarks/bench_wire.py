@@ -0,0 +1,86 @@
+"""
+Benchmark: JSON vs packed float32 vs msgpack for /predict/batch
+
+Measures codec cost alone (client encode + server decode + server encode +
+client decode) and the full in-process request through the FastAPI app.
+
+    python -m benchmarks.bench_wire
+"""
+
+import json
+import logging
+
+import numpy as np
+
+from benchmarks._common import install_model, print_table, sample_rows, time_call, train_model
+from src import wire
+
+FEATURES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+BATCH_SIZES = [1, 100, 1000]
+
+
+def json_codec(rows, class_ids, probabilities):
+    body = json.dumps({"instances": [dict(zip(FEATURES, r)) for r in rows.tolist()]})
+    decoded = json.loads(body)
+    np.array([[i[f] for f in FEATURES] for i in decoded["instances"]])
+    out = json.dumps({"predictions": [
+        {"predicted_class_id": c, "probabilities": p}
+        for c, p in zip(class_ids.tolist(), probabilities.tolist())
+    ]})
+    json.loads(out)
+
+
+def float32_codec(rows, class_ids, probabilities):
+    body = np.ascontiguousarray(rows, dtype="<f4").tobytes()
+    wire.decode_float32(body)
+    out = wire.encode_float32(class_ids, probabilities)
+    np.frombuffer(out[:4 * len(class_ids)], dtype="<i4")
+    np.frombuffer(out[4 * len(class_ids):], dtype="<f4")
+
+
+def msgpack_codec(rows, class_ids, probabilities):
+    import msgpack
+    body = msgpack.packb({"features": np.ascontiguousarray(rows, dtype="<f4").tobytes()})
+    wire.decode_msgpack(body)
+    out = wire.encode_msgpack(class_ids, ["a", "b", "c"], probabilities, "1.0.0", "t")
+    msgpack.unpackb(out)
+
+
+def main():
+    logging.disable(logging.INFO)
+    model = train_model()
+    client = install_model(model)
+    codecs = [("json", json_codec), ("float32", float32_codec)]
+    if wire.msgpack is not None:
+        codecs.append(("msgpack", msgpack_codec))
+
+    codec_rows = []
+    request_rows = []
+    for n in BATCH_SIZES:
+        rows = sample_rows(n)
+        class_ids = model.predict(rows)
+        probabilities = model.predict_proba(rows)
+        for name, codec in codecs:
+            stats = time_call(lambda: codec(rows, class_ids, probabilities))
+            codec_rows.append((n, name, stats["median_us"], stats["p99_us"]))
+
+        payloads = {
+            "json": (wire.JSON, json.dumps({"instances": [dict(zip(FEATURES, r)) for r in rows.tolist()]}).encode()),
+            "float32": (wire.FLOAT32, np.ascontiguousarray(rows, dtype="<f4").tobytes()),
+        }
+        if wire.msgpack is not None:
+            payloads["msgpack"] = (wire.MSGPACK, wire.msgpack.packb({"instances": rows.tolist()}))
+        for name, (content_type, body) in payloads.items():
+            stats = time_call(
+                lambda: client.post("/predict/batch", content=body, headers={"Content-Type": content_type}),
+                repeat=50, warmup=5
+            )
+            request_rows.append((n, name, len(body), stats["median_us"], stats["p99_us"]))
+
+    print_table("Codec round trip (no model)", codec_rows, ["rows", "format", "median_us", "p99_us"])
+    print_table("Full /predict/batch request (in-process)", request_rows,
+                ["rows", "format", "request_bytes", "median_us", "p99_us"])
+
+
+if __name__ == "__main__":
+    main()
@@ -9,115 +9,1352 @@ Features:
 - Kubernetes health probes (liveness/readiness)
 - Structured logging
 - Prometheus metrics compatible
+- Model warm-up before the readiness probe reports ready
+- Adaptive concurrency limiting with load shedding on /predict
+- Batch scoring with JSON, packed float32 and msgpack wire formats
+- gRPC endpoint (unary and streaming) sharing the loaded model
+- Multi-process serving with a pre-fork shared model (see serve.py)
+- W3C traceparent propagation and per-phase request spans
+- Opt-in sampling profiler and runtime-toggleable phase timers (/debug)
+- Streaming input-distribution statistics and drift against training (/stats)
+- Asynchronous, compressed prediction audit log with pluggable upload
+- Single-flight coalescing of identical in-flight predictions
+- Optional precomputed decision-table serving mode over the 0.1 cm grid
+- Optional soft-voting ensemble serving mode with parallel members
+- Optional compact float32 / uint8 forest serving mode
+- Linear preprocessing (StandardScaler) folded into the model at load
+- Background registry prefetch of the next model version, activated by swap
+- Cached per-class feature contributions under a latency budget (/predict/explain)
+- Sampled traffic capture for replay against new builds (see replay.py)
+- Model memory accounting, with loads and swaps refused over budget
+- Prediction engine, caching and metrics shared with v1-v3 (inference-core)
 """
 
-import os
+import json
 import logging
-from datetime import datetime
-from typing import List, Optional
-from contextlib import asynccontextmanager
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
 
-from fastapi import FastAPI, HTTPException, Header
-from pydantic import BaseModel, Field, field_validator
-from pydantic_settings import BaseSettings
 import joblib
 import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from inference_core.compact import CompactForest, parity_report
+from inference_core.engine import fold_preprocessing, score, score_row
+from inference_core.features import (
+    CLASS_NAMES,
+    FEATURE_NAMES,
+    build_features,
+    grid_rows,
+)
+from inference_core.loading import unpack_artifact
+from inference_core.metrics import REGISTRY
+from inference_core.singleflight import SingleFlight
+from pydantic import BaseModel, Field, field_validator
+from pydantic_settings import BaseSettings
+
+from . import validation, wire
+from .audit import AuditLog, create_sink
+from .autoscaling import LoadSignal
+from .concurrency import AdaptiveConcurrencyLimiter
+from .ensemble import EnsembleModel, members_from_bundle
+from .explain import ExplanationUnsupported, build_explainer
+from .fastjson import PredictionEncoder
+from .lookup import DecisionTable, LookupTableUnsupported, TableModel
+from .memory import LoadMeter, MemoryBudget, MemoryBudgetExceeded, process_rss_bytes
+from .profiling import PhaseTimers, ProfilerBusy, SamplingProfiler
+from .registry import ModelPrefetcher, create_registry, read_active
+from .replay import CaptureMiddleware, TrafficRecorder, capture_path
+from .scheduling import QueueFull, WeightedFairScheduler, parse_classes
+from .stats import StreamingStats
+from .tracing import TRACEPARENT_HEADER, Tracer, create_exporter, current_span
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
 
 class Settings(BaseSettings):
     """Application settings from environment variables"""
+
     model_path: str = "models/model.pkl"
     model_version: str = "1.0.0"
     api_key: str = ""
 
+    # Warm-up: synthetic requests pushed through decode -> predict -> serialize
+    # before the model is published, so readiness only flips once it is hot
+    warmup_enabled: bool = True
+    warmup_iterations: int = 20
+    warmup_batch_size: int = 8
+
+    # Adaptive concurrency limit (AIMD) in front of the prediction endpoints
+    concurrency_limit_enabled: bool = True
+    concurrency_initial_limit: int = 20
+    concurrency_min_limit: int = 1
+    concurrency_max_limit: int = 200
+    concurrency_latency_target_ms: float = 50.0
+    concurrency_backoff_ratio: float = 0.9
+
+    # Weighted fair scheduling of model execution across priority classes
+    # ("name:weight:queue capacity", the first class is the default)
+    scheduler_enabled: bool = True
+    scheduler_slots: int = 4
+    priority_classes: str = "interactive:8:256,bulk:1:16"
+    priority_header: str = "X-Priority"
+    priority_routes: str = "/predict/batch=bulk"
+    shed_retry_after_seconds: int = 1
+
+    # Sliding-window load signals exported for the custom-metrics HPA
+    autoscaling_window_seconds: int = 60
+    autoscaling_wait_samples: int = 4096
+
+    # Upper bound on rows accepted by /predict/batch
+    max_batch_rows: int = 10000
+
+    # gRPC endpoint served next to REST from the same process and model
+    grpc_enabled: bool = True
+    grpc_port: int = 50051
+    grpc_max_workers: int = 8
+    grpc_grace_seconds: float = 5.0
+
+    # Multi-process serving (python -m src.serve); workers=0 derives the
+    # count from the cgroup CPU quota
+    host: str = "0.0.0.0"
+    port: int = 5000
+    workers: int = 0
+    cpu_affinity: bool = False
+
+    # Server profile (python -m src.serve). server_http is auto (httptools
+    # when installed), h11, httptools, or h2c (HTTP/2 cleartext through the
+    # optional hypercorn). Keep-alive outlives the gateway's idle eviction so
+    # the client always closes first. On SIGTERM the worker reports
+    # not-ready and closes kept-alive connections for server_drain_seconds
+    # while still serving, then stops accepting and waits for in-flight
+    # requests up to server_graceful_timeout_seconds.
+    server_loop: str = "auto"
+    server_http: str = "auto"
+    server_keepalive_seconds: float = 75.0
+    server_backlog: int = 2048
+    server_drain_seconds: float = 10.0
+    server_graceful_timeout_seconds: float = 20.0
+
+    # Tracing: requests with a sampled traceparent are always traced, others
+    # at tracing_sample_ratio; exporter is none, memory, file or log
+    tracing_sample_ratio: float = 0.0
+    tracing_exporter: str = "none"
+    tracing_file_path: str = "/tmp/traces.jsonl"
+
+    # Profiling: /debug endpoints are opt-in; phase timers can also be
+    # toggled at runtime through PUT /debug/timers
+    debug_endpoints_enabled: bool = False
+    profile_max_seconds: float = 120.0
+    profile_interval_ms: float = 10.0
+    phase_timers_enabled: bool = False
+
+    # Streaming feature statistics; PSI above the threshold flags drift
+    stats_enabled: bool = True
+    drift_psi_threshold: float = 0.2
+
+    # "model" runs the estimator; "table" answers on-grid inputs from a
+    # decision table built at load (off-grid inputs still use the model);
+    # "ensemble" soft-votes the members of the artifact's "ensemble" list;
+    # "compact" serves a flattened float32 / uint8 copy of the forest
+    serving_mode: str = "model"
+    lookup_table_max_cells: int = 5_000_000
+    lookup_table_eval_rows: int = 20000
+    ensemble_member_timeout_ms: float = 50.0
+    ensemble_max_workers: int = 0
+    compact_leaf_dtype: str = "float32"
+    compact_eval_rows: int = 20000
+
+    # Fold a Pipeline's scalers into the model at load (into the weights of
+    # a LogisticRegression, else one fused expression before the final
+    # step); kept only if it matches the pipeline on fuse_eval_rows rows
+    fuse_preprocessing: bool = True
+    fuse_eval_rows: int = 2000
+    fuse_tolerance: float = 1e-9
+
+    # /predict/explain: per-class feature contributions from structures
+    # built at load. Explanations run in the explain_priority scheduler
+    # class and give up with 503 if no execution slot frees up within
+    # explain_budget_ms; the last explain_cache_rows distinct rows are cached
+    explain_enabled: bool = True
+    explain_priority: str = "bulk"
+    explain_budget_ms: float = 250.0
+    explain_max_rows: int = 100
+    explain_cache_rows: int = 10000
+
+    # Memory budget of one model: the larger of the deep size of its
+    # arrays and the RSS growth while loading it (0 = no budget). The
+    # process RSS may reach memory_process_budget_ratio of the container
+    # memory limit while loading. Loads and swaps over either are refused,
+    # and a refused swap leaves the current model in place
+    memory_model_budget_mb: float = 0.0
+    memory_process_budget_ratio: float = 0.9
+
+    # Identical concurrent /predict requests share one model call
+    coalesce_enabled: bool = True
+
+    # Prediction audit log: ring buffer flushed to compressed local segments
+    audit_enabled: bool = False
+    audit_dir: str = "/tmp/audit"
+    audit_buffer_rows: int = 100000
+    audit_flush_interval_seconds: float = 1.0
+    audit_segment_max_bytes: int = 64 * 1024 * 1024
+    audit_segment_max_seconds: float = 300.0
+    audit_compression: str = "zstd"
+    audit_sink: str = "none"
+    audit_sink_path: str = ""
+    audit_azure_container: str = "audit"
+    audit_upload_retry_seconds: float = 5.0
+    audit_upload_retry_max_seconds: float = 300.0
+    azure_storage_connection_string: str = ""
+
+    # Traffic capture for replay (python -m src.replay): a sample of the
+    # /predict* exchanges, one capture file per process in capture_dir
+    capture_enabled: bool = False
+    capture_dir: str = "/tmp/capture"
+    capture_sample_ratio: float = 0.01
+    capture_max_records: int = 100000
+    capture_buffer_records: int = 10000
+
+    # Model registry prefetch (none, local or azure): the next version is
+    # downloaded, verified and warmed in the background, polls spread by
+    # +/- registry_poll_jitter, and swapped in on SIGUSR2, POST
+    # /model/activate, or once the pin file (e.g. the mounted model-config
+    # MODEL_VERSION key) names it
+    registry_type: str = "none"
+    registry_local_path: str = "models/registry"
+    registry_container: str = "models"
+    registry_prefix: str = "iris-classifier"
+    registry_staging_dir: str = "/tmp/model-staging"
+    registry_poll_seconds: float = 300.0
+    registry_poll_jitter: float = 0.5
+    registry_pin_file: str = ""
+    registry_auto_activate: bool = False
+
     class Config:
         env_file = ".env"
 
 
 settings = Settings()
 
-# Target classes
-CLASS_NAMES = ["setosa", "versicolor", "virginica"]
-
 # Global model reference
 model = None
-model_load_time: Optional[str] = None
+model_load_time: str | None = None
+warmup_seconds: float | None = None
+# Accuracy-loss report of the decision table (SERVING_MODE=table)
+lookup_report: dict[str, Any] | None = None
+# Parity report of the compact forest (SERVING_MODE=compact)
+compact_report: dict[str, Any] | None = None
+# Parity and per-call savings of folded preprocessing (FUSE_PREPROCESSING)
+fused_report: dict[str, Any] | None = None
+# Attribution structures of the loaded model, None when it has none (see explain.py)
+explainer = None
+# Deep size, RSS growth and budget of the loaded model (see memory.py)
+model_memory: dict[str, Any] | None = None
+# Why the last startup load failed, reported by readiness
+model_load_error: str | None = None
+
+# Set by serve.py when running as one of several pre-forked workers
+worker_status = None
+# Set by serve.py on SIGTERM: readiness fails while in-flight work drains
+draining = False
+
+# Prediction traffic goes through the limiter; health, metrics and docs never do
+limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=settings.concurrency_initial_limit,
+    min_limit=settings.concurrency_min_limit,
+    max_limit=settings.concurrency_max_limit,
+    latency_target_seconds=settings.concurrency_latency_target_ms / 1000.0,
+    backoff_ratio=settings.concurrency_backoff_ratio,
+)
+LIMITED_PATH_PREFIX = "/predict"
+# Only single-row latency adapts the limit; /predict/batch and
+# /predict/explain hold a slot but normally run past the latency target
+ADAPTIVE_PATH = "/predict"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+tracer = Tracer(
+    create_exporter(settings.tracing_exporter, settings.tracing_file_path),
+    sample_ratio=settings.tracing_sample_ratio,
+)
+
+profiler = SamplingProfiler(interval_seconds=settings.profile_interval_ms / 1000.0)
+phase_timers = PhaseTimers(enabled=settings.phase_timers_enabled)
+
+REGISTRY.gauge(
+    "inference_concurrency_limit",
+    "Current adaptive concurrency limit",
+    callback=lambda: limiter.limit,
+)
+REGISTRY.gauge(
+    "inference_inflight_requests",
+    "Prediction requests currently in flight",
+    callback=lambda: limiter.inflight,
+)
+REGISTRY.counter(
+    "inference_requests_shed_total",
+    "Prediction requests rejected with 429",
+    callback=lambda: limiter.shed_total,
+)
+
+memory_budget = MemoryBudget.from_settings(
+    settings.memory_model_budget_mb, settings.memory_process_budget_ratio
+)
+
+REGISTRY.gauge(
+    "inference_model_memory_bytes",
+    "Footprint of the loaded model (deep size or load RSS growth, the larger)",
+    callback=lambda: model_memory["footprint_bytes"] if model_memory is not None else 0,
+)
+REGISTRY.gauge(
+    "inference_model_estimator_bytes",
+    "Deep size of the loaded model's objects and arrays",
+    callback=lambda: model_memory["estimator_bytes"] if model_memory is not None else 0,
+)
+REGISTRY.gauge(
+    "inference_model_memory_budget_bytes",
+    "Largest model footprint that will be loaded (0 = no budget)",
+    callback=lambda: memory_budget.model_bytes,
+)
+REGISTRY.gauge(
+    "inference_process_resident_bytes",
+    "Resident set size of this process",
+    callback=lambda: process_rss_bytes() or 0,
+)
+model_memory_rejections_total = REGISTRY.counter(
+    "inference_model_memory_rejections_total",
+    "Model loads and swaps refused for exceeding the memory budget",
+)
+
+# HPA signals over the last autoscaling_window_seconds (see autoscaling.py)
+load_signal = LoadSignal(
+    settings.autoscaling_window_seconds, settings.autoscaling_wait_samples
+)
+
+REGISTRY.gauge(
+    "inference_load_inflight",
+    "Admitted prediction requests in flight",
+    callback=lambda: load_signal.inflight,
+)
+REGISTRY.gauge(
+    "inference_load_inflight_avg",
+    "Average prediction requests in flight over the window",
+    callback=lambda: load_signal.mean_inflight(),
+)
+REGISTRY.gauge(
+    "inference_load_queue_wait_p95_seconds",
+    "95th percentile wait for an execution slot over the window",
+    callback=lambda: load_signal.wait_percentile(95.0),
+)
+REGISTRY.gauge(
+    "inference_load_rows_per_second",
+    "Rows scored per second over the window",
+    callback=lambda: load_signal.rows_per_second(),
+)
+REGISTRY.gauge(
+    "inference_load_requests_per_second",
+    "Prediction requests completed per second over the window",
+    callback=lambda: load_signal.requests_per_second(),
+)
+
+# Live input statistics, rebuilt against the artifact's reference on every load
+feature_stats = StreamingStats(FEATURE_NAMES, CLASS_NAMES)
+
+REGISTRY.gauge(
+    "inference_feature_mean",
+    "Running mean of each input feature",
+    callback=lambda: feature_stats.metric_samples("mean"),
+)
+REGISTRY.gauge(
+    "inference_feature_stddev",
+    "Running standard deviation of each input feature",
+    callback=lambda: feature_stats.metric_samples("stddev"),
+)
+REGISTRY.gauge(
+    "inference_feature_psi",
+    "Population stability index of each feature vs training",
+    callback=lambda: feature_stats.metric_samples("psi"),
+)
+REGISTRY.counter(
+    "inference_predicted_class_total",
+    "Predictions per class since the model was loaded",
+    callback=lambda: feature_stats.class_samples(),
+)
+
+single_flight = SingleFlight()
+
+prediction_encoder = PredictionEncoder(CLASS_NAMES, settings.model_version)
+
+scheduler = WeightedFairScheduler(
+    parse_classes(settings.priority_classes), slots=settings.scheduler_slots
+)
+PRIORITY_ROUTES = dict(
+    route.split("=", 1) for route in settings.priority_routes.split(",") if "=" in route
+)
+
+REGISTRY.gauge(
+    "inference_queue_depth",
+    "Requests waiting for an execution slot, per priority class",
+    callback=lambda: scheduler.metric_samples("depth"),
+)
+REGISTRY.gauge(
+    "inference_queue_running",
+    "Model executions running, per priority class",
+    callback=lambda: scheduler.metric_samples("running"),
+)
+REGISTRY.counter(
+    "inference_queue_wait_seconds_total",
+    "Time spent waiting for an execution slot, per priority class",
+    callback=lambda: scheduler.metric_samples("wait_seconds_total"),
+)
+REGISTRY.counter(
+    "inference_queue_dispatched_total",
+    "Requests given an execution slot, per priority class",
+    callback=lambda: scheduler.metric_samples("dispatched_total"),
+)
+REGISTRY.counter(
+    "inference_queue_rejected_total",
+    "Requests rejected because their class queue was full",
+    callback=lambda: scheduler.metric_samples("rejected_total"),
+)
+
+REGISTRY.counter(
+    "inference_explain_cache_hits_total",
+    "Explained rows served from the explanation cache",
+    callback=lambda: explainer.cache.hits_total if explainer is not None else 0,
+)
+REGISTRY.counter(
+    "inference_explain_cache_misses_total",
+    "Explained rows computed",
+    callback=lambda: explainer.cache.misses_total if explainer is not None else 0,
+)
+explain_budget_exceeded_total = REGISTRY.counter(
+    "inference_explain_budget_exceeded_total",
+    "Explanation requests rejected for waiting beyond the budget",
+)
+
+validation_seconds = REGISTRY.counter(
+    "inference_validation_seconds_total", "Time spent validating batch feature matrices"
+)
+invalid_rows_total = REGISTRY.counter(
+    "inference_invalid_rows_total", "Batch rows rejected by validation, by reason"
+)
+
+REGISTRY.counter(
+    "inference_coalesced_requests_total",
+    "Predictions served from an identical in-flight call",
+    callback=lambda: single_flight.coalesced_total,
+)
+REGISTRY.counter(
+    "inference_coalesce_leaders_total",
+    "Predictions that ran the model (coalescing enabled)",
+    callback=lambda: single_flight.leaders_total,
+)
+
+# Started per worker in lifespan (threads do not survive fork)
+audit_log: AuditLog | None = None
+
+REGISTRY.counter(
+    "inference_audit_records_total",
+    "Prediction rows written to the audit log",
+    callback=lambda: audit_log.records_total if audit_log is not None else 0,
+)
+REGISTRY.counter(
+    "inference_audit_dropped_total",
+    "Prediction rows dropped because the audit buffer was full",
+    callback=lambda: audit_log.dropped_total if audit_log is not None else 0,
+)
+REGISTRY.gauge(
+    "inference_audit_buffered_rows",
+    "Prediction rows waiting in the audit buffer",
+    callback=lambda: audit_log.buffered_rows if audit_log is not None else 0,
+)
+REGISTRY.counter(
+    "inference_audit_segments_total",
+    "Audit segments sealed",
+    callback=lambda: audit_log.segments_total if audit_log is not None else 0,
+)
+REGISTRY.counter(
+    "inference_audit_upload_failures_total",
+    "Audit segment uploads that failed",
+    callback=lambda: audit_log.upload_failures_total if audit_log is not None else 0,
+)
+
+# Started per worker in lifespan (CAPTURE_ENABLED)
+traffic_recorder: TrafficRecorder | None = None
+
+REGISTRY.counter(
+    "inference_capture_records_total",
+    "Exchanges captured for replay",
+    callback=lambda: (
+        traffic_recorder.recorded_total if traffic_recorder is not None else 0
+    ),
+)
+REGISTRY.counter(
+    "inference_capture_dropped_total",
+    "Sampled exchanges dropped: capture buffer full or too large to record",
+    callback=lambda: (
+        traffic_recorder.dropped_total if traffic_recorder is not None else 0
+    ),
+)
+
+# Started per worker in lifespan when a registry is configured
+prefetcher: ModelPrefetcher | None = None
+
+REGISTRY.gauge(
+    "inference_model_staged",
+    "1 while a prefetched model version waits for activation",
+    callback=lambda: int(
+        prefetcher is not None and prefetcher.staged_version is not None
+    ),
+)
+REGISTRY.counter(
+    "inference_model_downloads_total",
+    "Model versions downloaded by the prefetcher",
+    callback=lambda: prefetcher.downloads_total if prefetcher is not None else 0,
+)
+REGISTRY.counter(
+    "inference_model_verify_failures_total",
+    "Prefetched model versions rejected by verification",
+    callback=lambda: prefetcher.verify_failures_total if prefetcher is not None else 0,
+)
+REGISTRY.counter(
+    "inference_model_activations_total",
+    "Staged model versions swapped in",
+    callback=lambda: prefetcher.activations_total if prefetcher is not None else 0,
+)
 
 
 class PredictRequest(BaseModel):
     """Prediction request model with validation"""
+
     sepal_length: float = Field(..., ge=0.0, le=10.0, description="Sepal length in cm")
     sepal_width: float = Field(..., ge=0.0, le=10.0, description="Sepal width in cm")
     petal_length: float = Field(..., ge=0.0, le=10.0, description="Petal length in cm")
     petal_width: float = Field(..., ge=0.0, le=10.0, description="Petal width in cm")
 
-    @field_validator('sepal_length', 'sepal_width', 'petal_length', 'petal_width')
+    @field_validator("sepal_length", "sepal_width", "petal_length", "petal_width")
     @classmethod
     def validate_measurements(cls, v):
         if v < 0 or v > 10:
-            raise ValueError('Measurement must be between 0 and 10')
+            raise ValueError("Measurement must be between 0 and 10")
         return v
 
 
 class PredictionResponse(BaseModel):
     """Prediction response model"""
+
     predicted_class_id: int
     predicted_class_name: str
-    probabilities: List[float]
+    probabilities: list[float]
     model_version: str
     timestamp: str
 
 
 class HealthResponse(BaseModel):
     """Health check response"""
+
     status: str
     ready: bool
     model_loaded: bool
     model_version: str
     model_path: str
-    loaded_at: Optional[str] = None
-    error: Optional[str] = None
+    loaded_at: str | None = None
+    warmup_seconds: float | None = None
+    workers: dict[str, int] | None = None
+    serving_mode: str | None = None
+    lookup_table: dict[str, Any] | None = None
+    compact_model: dict[str, Any] | None = None
+    fused_model: dict[str, Any] | None = None
+    memory: dict[str, Any] | None = None
+    error: str | None = None
 
 
 class LivenessResponse(BaseModel):
     """Liveness probe response"""
+
     status: str
 
 
+class ExplainRequest(BaseModel):
+    """Rows to explain"""
+
+    instances: list[PredictRequest] = Field(..., min_length=1)
+
+
+class Explanation(BaseModel):
+    """Prediction of one row with each feature's contribution to every class"""
+
+    predicted_class_id: int
+    predicted_class_name: str
+    probabilities: list[float]
+    base_values: list[float]
+    contributions: dict[str, list[float]]
+
+
+class ExplainResponse(BaseModel):
+    """Explanations in request order; base value plus contributions is the row's value in `space`"""
+
+    explanations: list[Explanation]
+    method: str
+    space: str
+    class_names: list[str]
+    global_importances: dict[str, float]
+    cached_rows: int
+    model_version: str
+    timestamp: str
+
+
+class BatchPrediction(BaseModel):
+    """Single row of a batch prediction response"""
+
+    predicted_class_id: int
+    predicted_class_name: str
+    probabilities: list[float]
+
+
+class RowError(BaseModel):
+    """A batch row that failed validation and was not scored"""
+
+    index: int
+    error: str
+
+
+class BatchPredictionResponse(BaseModel):
+    """JSON batch prediction response; invalid rows are null and listed in errors"""
+
+    predictions: list[BatchPrediction | None]
+    errors: list[RowError] = []
+    model_version: str
+    timestamp: str
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as a naive ISO timestamp (the format responses have always used)"""
+    return datetime.now(UTC).replace(tzinfo=None).isoformat()
+
+
+def prediction_response(class_id: int, probabilities: np.ndarray) -> PredictionResponse:
+    """Shape a single-row prediction as a PredictionResponse"""
+    return PredictionResponse(
+        predicted_class_id=class_id,
+        predicted_class_name=CLASS_NAMES[class_id],
+        probabilities=probabilities.tolist(),
+        model_version=settings.model_version,
+        timestamp=utc_timestamp(),
+    )
+
+
+def run_prediction(active_model, features: np.ndarray) -> PredictionResponse:
+    """Run the model on a single feature row and shape the response"""
+    return prediction_response(*score_row(active_model, features))
+
+
+def encode_prediction(class_id: int, probabilities: np.ndarray) -> Response:
+    """PredictionResponse JSON written straight from the probability row"""
+    prediction_encoder.set_model_version(settings.model_version)
+    return Response(
+        content=prediction_encoder.encode(class_id, probabilities),
+        media_type="application/json",
+    )
+
+
+def record_predictions(source: str, features: np.ndarray, class_ids, probabilities):
+    """Fold served predictions into the live statistics, the load signal and the audit log"""
+    load_signal.add_rows(len(features))
+    if settings.stats_enabled:
+        feature_stats.update(features, class_ids)
+    if audit_log is not None:
+        audit_log.record(
+            source, settings.model_version, features, class_ids, probabilities
+        )
+
+
+def prediction_key(active_model, features: np.ndarray):
+    """Identity of a single-row prediction: model version and exact feature bytes"""
+    return settings.model_version, id(active_model), features.tobytes()
+
+
+def priority_of(request: Request) -> str:
+    """Priority class of a request: the priority header if it names a class, else by route"""
+    requested = request.headers.get(settings.priority_header)
+    if requested in scheduler.classes:
+        return requested
+    return PRIORITY_ROUTES.get(request.url.path, scheduler.default_class)
+
+
+async def run_scheduled(
+    priority: str, cost: float, fn, *args, wait_timeout: float | None = None
+):
+    """
+    Run fn(*args) in the thread pool once the priority class gets an execution slot
+
+    Args:
+        wait_timeout: Give up if no slot is granted within this many seconds
+
+    Raises:
+        HTTPException: 429 if the class's queue is full
+        asyncio.TimeoutError: if wait_timeout passed before a slot was granted
+    """
+    if not settings.scheduler_enabled:
+        return await run_in_threadpool(fn, *args)
+    queued = time.perf_counter()
+    try:
+        async with scheduler.slot(priority, cost, wait_timeout):
+            load_signal.record_wait(time.perf_counter() - queued)
+            return await run_in_threadpool(fn, *args)
+    except QueueFull as e:
+        logger.warning(f"Shedding request: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)},
+        )
+
+
+async def predict_coalesced(
+    active_model, features: np.ndarray, priority: str | None = None
+):
+    """
+    Run a single-row prediction off the event loop, sharing identical in-flight calls
+
+    Returns:
+        (class id, probability row), as score_row
+    """
+    if not settings.coalesce_enabled:
+        return await run_scheduled(priority, 1, score_row, active_model, features)
+    return await single_flight.do_async(
+        prediction_key(active_model, features),
+        lambda: run_scheduled(priority, 1, score_row, active_model, features),
+    )
+
+
+def predict_and_record(
+    active_model, features: np.ndarray, source: str = "predict"
+) -> PredictionResponse:
+    """Serve a single-row prediction on the calling thread and record it"""
+    if settings.coalesce_enabled:
+        class_id, probabilities = single_flight.do(
+            prediction_key(active_model, features), score_row, active_model, features
+        )
+    else:
+        class_id, probabilities = score_row(active_model, features)
+    record_predictions(source, features, [class_id], probabilities[None])
+    return prediction_response(class_id, probabilities)
+
+
+def predict_matrix(active_model, features: np.ndarray):
+    """Score an (n, 4) feature matrix, returning class ids and probabilities"""
+    class_ids, probabilities = score(active_model, features)
+    return np.asarray(class_ids, dtype=np.int64), np.asarray(probabilities)
+
+
+def explain_rows(active_model, active_explainer, features: np.ndarray):
+    """Served predictions of the rows with their (cached) contributions"""
+    class_ids, probabilities = predict_matrix(active_model, features)
+    contributions, cached = active_explainer.explain(features)
+    return class_ids, probabilities, contributions, cached
+
+
+def validate_batch(
+    features: np.ndarray, malformed: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Error code per row of a decoded batch (0 = valid)
+
+    Raises:
+        HTTPException: 422 when no row is valid, since there is nothing to score
+    """
+    start = time.perf_counter()
+    errors = validation.row_errors(features)
+    if malformed is not None:
+        errors[malformed] = validation.MALFORMED
+    validation_seconds.inc(time.perf_counter() - start)
+
+    if errors.any():
+        codes, counts = np.unique(
+            errors[errors != validation.VALID], return_counts=True
+        )
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            invalid_rows_total.inc(count, reason=validation.ERROR_MESSAGES[code])
+        if errors.all():
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error": "Measurements must be finite and between 0 and 10",
+                    "invalid_rows": np.flatnonzero(errors).tolist(),
+                    "errors": validation.describe_errors(errors),
+                },
+            )
+    return errors
+
+
+def decode_batch(body: bytes, fmt: str):
+    """
+    Decode a batch request body into an (n, 4) feature matrix
+
+    Returns:
+        (features, malformed row mask or None)
+    """
+    if fmt == wire.JSON:
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON body: {e}")
+        instances = payload.get("instances") if isinstance(payload, dict) else None
+        if not isinstance(instances, list) or not instances:
+            raise HTTPException(
+                status_code=422, detail="Body needs a non-empty 'instances' list"
+            )
+        return validation.json_instances_matrix(instances, FEATURE_NAMES)
+
+    try:
+        if fmt == wire.FLOAT32:
+            return wire.decode_float32(body), None
+        return wire.decode_msgpack(body)
+    except wire.WireFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def predict_valid_rows(active_model, features: np.ndarray, errors: np.ndarray):
+    """Score the valid rows; invalid rows get class id -1 and NaN probabilities"""
+    valid = errors == validation.VALID
+    if valid.all():
+        return predict_matrix(active_model, features)
+    valid_ids, valid_probabilities = predict_matrix(active_model, features[valid])
+    class_ids = np.full(len(features), wire.INVALID_CLASS_ID, dtype=np.int64)
+    probabilities = np.full((len(features), valid_probabilities.shape[1]), np.nan)
+    class_ids[valid] = valid_ids
+    probabilities[valid] = valid_probabilities
+    return class_ids, probabilities
+
+
+def encode_batch(
+    class_ids: np.ndarray, probabilities: np.ndarray, fmt: str, errors: np.ndarray
+):
+    """Encode batch predictions in the negotiated response format"""
+    timestamp = utc_timestamp()
+    row_errors = validation.describe_errors(errors)
+
+    if fmt == wire.FLOAT32:
+        return Response(
+            content=wire.encode_float32(class_ids, probabilities),
+            media_type=wire.FLOAT32,
+            headers={
+                wire.ROWS_HEADER: str(len(class_ids)),
+                wire.CLASSES_HEADER: str(probabilities.shape[1]),
+                wire.INVALID_ROWS_HEADER: str(len(row_errors)),
+                "X-Model-Version": settings.model_version,
+            },
+        )
+    if fmt == wire.MSGPACK:
+        return Response(
+            content=wire.encode_msgpack(
+                class_ids,
+                CLASS_NAMES,
+                probabilities,
+                settings.model_version,
+                timestamp,
+                row_errors,
+            ),
+            media_type=wire.MSGPACK,
+        )
+
+    return BatchPredictionResponse(
+        predictions=[
+            BatchPrediction(
+                predicted_class_id=class_id,
+                predicted_class_name=CLASS_NAMES[class_id],
+                probabilities=row,
+            )
+            if class_id != wire.INVALID_CLASS_ID
+            else None
+            for class_id, row in zip(class_ids.tolist(), probabilities.tolist())
+        ],
+        errors=row_errors,
+        model_version=settings.model_version,
+        timestamp=timestamp,
+    )
+
+
+def warm_up_model(candidate) -> float:
+    """
+    Push synthetic requests through the full request path
+
+    Each iteration decodes JSON payloads into PredictRequest, runs the
+    single-row prediction, encodes the REST response body and the
+    PredictionResponse the gRPC path dumps, and finally scores the whole synthetic batch at once. This pays the
+    one-off costs (sklearn validation, NumPy dispatch, pydantic schema
+    compilation, lazy imports) before any real traffic arrives.
+
+    Returns:
+        Warm-up wall time in seconds
+    """
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+
+    for _ in range(settings.warmup_iterations):
+        rows = rng.uniform(
+            0.1, 8.0, size=(settings.warmup_batch_size, len(FEATURE_NAMES))
+        ).round(1)
+        for row in rows:
+            payload = json.dumps(dict(zip(FEATURE_NAMES, row.tolist())))
+            request = PredictRequest.model_validate_json(payload)
+            class_id, probabilities = score_row(candidate, build_features(request))
+            encode_prediction(class_id, probabilities)
+            prediction_response(class_id, probabilities).model_dump()
+        candidate.predict_proba(rows)
+
+    return time.perf_counter() - start
+
+
+def build_fused_model(candidate):
+    """
+    Fold the pipeline's linear preprocessing into the model (FUSE_PREPROCESSING)
+
+    Returns:
+        (served model, parity report); the unchanged model and the report
+        (or None) when it has nothing to fold or fails the parity check
+    """
+    return fold_preprocessing(
+        candidate, len(FEATURE_NAMES), settings.fuse_eval_rows, settings.fuse_tolerance
+    )
+
+
+def build_model_explainer(candidate, reference_stats):
+    """
+    Attribution structures for /predict/explain (EXPLAIN_ENABLED)
+
+    Built from the artifact's estimator, which the table and compact modes
+    reproduce under their parity checks. An ensemble's soft vote has no
+    attribution, so it gets no explainer.
+    """
+    if not settings.explain_enabled:
+        return None
+    if settings.serving_mode == "ensemble":
+        logger.info("Explanations are not available in ensemble serving mode")
+        return None
+    try:
+        explainer = build_explainer(
+            candidate, reference_stats, settings.explain_cache_rows
+        )
+    except ExplanationUnsupported as e:
+        logger.warning(f"Explanations unavailable: {e}")
+        return None
+    logger.info(
+        f"Explainer ready: {explainer.method} contributions in {explainer.space} space"
+    )
+    return explainer
+
+
+def build_ensemble_model(artifact, candidate):
+    """
+    Soft-voting ensemble from the bundle's "ensemble" list (v1/training/train.py)
+
+    Falls back to the bundle's single model when there is no ensemble.
+    """
+    entries = artifact.get("ensemble") if isinstance(artifact, dict) else None
+    if not entries:
+        logger.warning(
+            "Model artifact has no ensemble members, serving the single model"
+        )
+        return candidate
+    members = members_from_bundle(entries)
+    if settings.fuse_preprocessing:
+        for member in members:
+            member.model, _ = build_fused_model(member.model)
+    ensemble = EnsembleModel(
+        members,
+        timeout_seconds=settings.ensemble_member_timeout_ms / 1000,
+        max_workers=settings.ensemble_max_workers or None,
+    )
+    logger.info(
+        "Ensemble members: "
+        + ", ".join(f"{m.name} (w={m.weight:.3f})" for m in ensemble.members)
+    )
+    return ensemble
+
+
+def serving_mode_of(active_model) -> str:
+    if isinstance(active_model, TableModel):
+        return "table"
+    if isinstance(active_model, EnsembleModel):
+        return "ensemble"
+    if isinstance(active_model, CompactForest):
+        return "compact"
+    return "model"
+
+
+def build_compact_model(artifact, candidate):
+    """
+    Compact forest for SERVING_MODE=compact, plus its parity report
+
+    Uses the arrays exported at training time (train.py --compact) when the
+    bundle has them, otherwise flattens the model at load. The sklearn
+    model is only kept for the parity check.
+
+    Returns:
+        (served model, parity report); the bare model and None when the
+        model is not a tree classifier
+    """
+    exported = artifact.get("compact_model") if isinstance(artifact, dict) else None
+    try:
+        if exported:
+            compact = CompactForest(exported)
+        else:
+            compact = CompactForest.from_model(candidate, settings.compact_leaf_dtype)
+    except ValueError as e:
+        logger.warning(f"Compact forest unavailable, serving the model directly: {e}")
+        return candidate, None
+
+    rows = grid_rows(settings.compact_eval_rows)
+    report = parity_report(compact, candidate, rows) if len(rows) else None
+    logger.info(
+        f"Compact forest ready ({'exported' if exported else 'built at load'}): {report}"
+    )
+    return compact, report
+
+
+def build_table_model(candidate):
+    """
+    Wrap a model with its precomputed decision table for SERVING_MODE=table
+
+    Returns:
+        (served model, table report); the bare model and None when the
+        model cannot be tabulated within the configured budget
+    """
+    try:
+        table = DecisionTable.build(
+            candidate,
+            n_features=len(FEATURE_NAMES),
+            max_cells=settings.lookup_table_max_cells,
+            eval_rows=settings.lookup_table_eval_rows,
+        )
+    except LookupTableUnsupported as e:
+        logger.warning(f"Decision table unavailable, serving the model directly: {e}")
+        return candidate, None
+    logger.info(f"Decision table built: {table.report}")
+    return TableModel(candidate, table), table.report
+
+
+def prepare_model(path: str) -> dict[str, Any]:
+    """
+    Load an artifact, build the served model for SERVING_MODE and warm it up
+
+    Nothing is published, so this also stages the next version in the
+    background (src/registry.py).
+
+    Returns:
+        Dict with the served model, its reference statistics, the
+        table/compact/fused reports, the explainer, the memory report and
+        the warm-up time
+
+    Raises:
+        FileNotFoundError: when the artifact does not exist
+        MemoryBudgetExceeded: when the model does not fit the memory budget
+    """
+    if not os.path.exists(path):
+        logger.error(f"Model file not found at {path}")
+        raise FileNotFoundError(f"Model file not found: {path}")
+
+    artifact_bytes = os.path.getsize(path)
+    meter = LoadMeter()
+    check_memory(memory_budget.check_before_load, artifact_bytes, meter.rss_before)
+
+    logger.info(f"Loading model from {path}...")
+    artifact = joblib.load(path)
+    candidate, reference_stats = unpack_artifact(artifact)
+    if reference_stats is None:
+        logger.warning(
+            "Model artifact has no reference statistics; drift will not be reported"
+        )
+
+    explainer = build_model_explainer(candidate, reference_stats)
+    report = None
+    parity = None
+    fused = None
+    if settings.fuse_preprocessing and settings.serving_mode in ("model", "table"):
+        candidate, fused = build_fused_model(candidate)
+    if settings.serving_mode == "table":
+        candidate, report = build_table_model(candidate)
+    elif settings.serving_mode == "ensemble":
+        candidate = build_ensemble_model(artifact, candidate)
+    elif settings.serving_mode == "compact":
+        candidate, parity = build_compact_model(artifact, candidate)
+    del artifact
+
+    memory = meter.report(candidate, explainer, artifact_bytes=artifact_bytes)
+    memory["model_budget_bytes"] = memory_budget.model_bytes
+    memory["process_budget_bytes"] = memory_budget.process_bytes
+    check_memory(memory_budget.check_footprint, memory)
+    logger.info(
+        f"Model footprint: {memory['footprint_bytes']} bytes "
+        f"(deep size {memory['estimator_bytes']}, RSS growth {memory['rss_delta_bytes']})"
+    )
+
+    elapsed = None
+    if settings.warmup_enabled and settings.warmup_iterations > 0:
+        logger.info(f"Warming up model ({settings.warmup_iterations} iterations)...")
+        elapsed = warm_up_model(candidate)
+        logger.info(f"Model warm-up completed in {elapsed:.3f}s")
+
+    return {
+        "model": candidate,
+        "reference_stats": reference_stats,
+        "lookup_report": report,
+        "compact_report": parity,
+        "fused_report": fused,
+        "explainer": explainer,
+        "memory": memory,
+        "warmup_seconds": elapsed,
+    }
+
+
+def check_memory(check, *args):
+    """Run a memory budget check, counting and logging a refusal"""
+    try:
+        check(*args)
+    except MemoryBudgetExceeded as e:
+        model_memory_rejections_total.inc()
+        logger.error(f"Model refused: {e}")
+        raise
+
+
+def publish_model(prepared: dict[str, Any], version: str, path: str):
+    """Swap a prepared model in; each request sees either the old or the new one"""
+    global \
+        model, \
+        model_load_time, \
+        warmup_seconds, \
+        feature_stats, \
+        lookup_report, \
+        compact_report, \
+        fused_report
+    global explainer, model_memory
+
+    feature_stats = StreamingStats(
+        FEATURE_NAMES, CLASS_NAMES, prepared["reference_stats"]
+    )
+    settings.model_version = version
+    settings.model_path = path
+    model = prepared["model"]
+    model_load_time = utc_timestamp()
+    warmup_seconds = prepared["warmup_seconds"]
+    lookup_report = prepared["lookup_report"]
+    compact_report = prepared["compact_report"]
+    fused_report = prepared["fused_report"]
+    explainer = prepared["explainer"]
+    model_memory = prepared["memory"]
+
+
 def load_model():
-    """Load ML model from filesystem"""
-    global model, model_load_time
+    """Load ML model from filesystem, warm it up, then publish it"""
+    global model, model_load_error
 
     logger.info("Starting Iris Inference Service v4...")
 
     try:
-        if not os.path.exists(settings.model_path):
-            logger.error(f"Model file not found at {settings.model_path}")
-            raise FileNotFoundError(f"Model file not found: {settings.model_path}")
-
-        logger.info(f"Loading model from {settings.model_path}...")
-        model = joblib.load(settings.model_path)
-        model_load_time = datetime.utcnow().isoformat()
+        # Readiness keys off the global model, so it stays 503 until warm-up ends
+        publish_model(
+            prepare_model(settings.model_path),
+            settings.model_version,
+            settings.model_path,
+        )
+        model_load_error = None
         logger.info(f"Model loaded successfully (v{settings.model_version})")
 
     except Exception as e:
-        logger.error(f"Failed to load model: {str(e)}")
+        logger.exception("Failed to load model")
         model = None
+        model_load_error = str(e)
+
+
+def load_active_model() -> bool:
+    """
+    Publish the version a worker activated since startup, if it is not the one served
+
+    serve.py's supervisor calls this before forking a replacement worker,
+    so the worker starts on the activated model instead of the startup one.
+
+    Returns:
+        True if a model was swapped in
+    """
+    if settings.registry_type == "none":
+        return False
+    active = read_active(settings.registry_staging_dir)
+    if active is None or active[0] == settings.model_version:
+        return False
+    version, path = active
+    try:
+        publish_model(prepare_model(path), version, path)
+    except Exception:
+        logger.exception(f"Failed to load activated model v{version}")
+        return False
+    logger.info(f"Activated model v{version} loaded for new workers")
+    return True
+
+
+def start_grpc_server():
+    """Start the gRPC endpoint; REST keeps serving if it cannot start"""
+    try:
+        from .grpc_server import InferenceServicer, create_server
+
+        servicer = InferenceServicer(
+            lambda: model, partial(predict_and_record, source="grpc"), settings.api_key
+        )
+        server, port = create_server(
+            servicer,
+            settings.grpc_port,
+            max_workers=settings.grpc_max_workers,
+            max_concurrent_rpcs=settings.concurrency_max_limit,
+        )
+        server.start()
+        logger.info(f"gRPC endpoint listening on port {port}")
+        return server
+    except Exception:
+        logger.exception("Failed to start gRPC endpoint")
+        return None
+
+
+def start_audit_log():
+    """Create and start this process's audit log from settings"""
+    global audit_log
+    sink = create_sink(
+        settings.audit_sink,
+        settings.audit_sink_path,
+        settings.azure_storage_connection_string,
+        settings.audit_azure_container,
+    )
+    audit_log = AuditLog(
+        settings.audit_dir,
+        capacity=settings.audit_buffer_rows,
+        flush_interval_seconds=settings.audit_flush_interval_seconds,
+        segment_max_bytes=settings.audit_segment_max_bytes,
+        segment_max_seconds=settings.audit_segment_max_seconds,
+        compression=settings.audit_compression,
+        sink=sink,
+        upload_retry_seconds=settings.audit_upload_retry_seconds,
+        upload_retry_max_seconds=settings.audit_upload_retry_max_seconds,
+    )
+    audit_log.start()
+    logger.info(
+        f"Audit log writing to {settings.audit_dir} (sink: {settings.audit_sink})"
+    )
+
+
+def start_traffic_capture():
+    """Start sampling /predict* exchanges into this process's capture file"""
+    global traffic_recorder
+    traffic_recorder = TrafficRecorder(
+        capture_path(settings.capture_dir),
+        sample_ratio=settings.capture_sample_ratio,
+        max_records=settings.capture_max_records,
+        capacity=settings.capture_buffer_records,
+    )
+    traffic_recorder.start()
+    logger.info(
+        f"Capturing {settings.capture_sample_ratio:.2%} of prediction traffic to {traffic_recorder.path}"
+    )
+
+
+def stop_traffic_capture():
+    """Write out and close the capture file on shutdown"""
+    global traffic_recorder
+    if traffic_recorder is not None:
+        traffic_recorder.stop()
+        traffic_recorder = None
+
+
+def start_prefetcher():
+    """Start background prefetch of the next model version from the configured registry"""
+    global prefetcher
+    registry = create_registry(
+        settings.registry_type,
+        settings.registry_local_path,
+        settings.azure_storage_connection_string,
+        settings.registry_container,
+        settings.registry_prefix,
+    )
+    prefetcher = ModelPrefetcher(
+        registry,
+        settings.registry_staging_dir,
+        prepare=prepare_model,
+        publish=lambda version, path, prepared: publish_model(prepared, version, path),
+        current_version=lambda: settings.model_version,
+        poll_seconds=settings.registry_poll_seconds,
+        jitter=settings.registry_poll_jitter,
+        pin_file=settings.registry_pin_file,
+        auto_activate=settings.registry_auto_activate,
+    )
+    prefetcher.start()
+    logger.info(
+        f"Model prefetch from {settings.registry_type} registry every ~{settings.registry_poll_seconds:.0f}s"
+    )
+
+
+def stop_prefetcher():
+    global prefetcher
+    if prefetcher is not None:
+        prefetcher.stop()
+        prefetcher = None
+
+
+def request_model_activation():
+    """Activate the staged model version (called from serve.py's SIGUSR2 handler)"""
+    if prefetcher is not None:
+        prefetcher.request_activation()
+
+
+def begin_drain():
+    """Fail readiness so the endpoint is removed before the worker stops serving"""
+    global draining
+    draining = True
+    if worker_status is not None:
+        worker_status.mark(False)
+    logger.info("Draining: readiness now reports not ready")
+
+
+def stop_audit_log():
+    """Flush and seal the audit log on shutdown"""
+    global audit_log
+    if audit_log is not None:
+        audit_log.stop()
+        audit_log = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown"""
-    load_model()
+    # Pre-forked workers inherit a model the supervisor already loaded
+    if model is None:
+        load_model()
+    if worker_status is not None:
+        worker_status.mark(model is not None)
+    grpc_server = start_grpc_server() if settings.grpc_enabled else None
+    if settings.audit_enabled:
+        start_audit_log()
+    if settings.capture_enabled:
+        start_traffic_capture()
+    if settings.registry_type != "none":
+        start_prefetcher()
     yield
     logger.info("Shutting down Iris Inference Service")
+    if worker_status is not None:
+        worker_status.mark(False)
+    if grpc_server is not None:
+        grpc_server.stop(settings.grpc_grace_seconds).wait()
+    stop_prefetcher()
+    stop_traffic_capture()
+    stop_audit_log()
 
 
 # Initialize FastAPI with lifespan
@@ -125,7 +1362,111 @@ app = FastAPI(
     title="Iris Inference Service",
     description="ML model inference service for Iris classification",
     version=settings.model_version,
-    lifespan=lifespan
+    lifespan=lifespan,
+)
+
+
+@app.middleware("http")
+async def track_load(request: Request, call_next):
+    """Count admitted prediction requests and their time in flight for the HPA signals"""
+    if not request.url.path.startswith(LIMITED_PATH_PREFIX):
+        return await call_next(request)
+
+    load_signal.started()
+    start = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        load_signal.finished(time.perf_counter() - start)
+
+
+@app.middleware("http")
+async def concurrency_limit(request: Request, call_next):
+    """Shed prediction requests with 429 once the adaptive limit is reached"""
+    if not settings.concurrency_limit_enabled or not request.url.path.startswith(
+        LIMITED_PATH_PREFIX
+    ):
+        return await call_next(request)
+
+    if not limiter.try_acquire():
+        logger.warning(
+            f"Shedding request: {limiter.inflight} in flight, limit {limiter.limit}"
+        )
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests in flight"},
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)},
+        )
+
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = await call_next(request)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        limiter.release(
+            time.perf_counter() - start,
+            failed=failed,
+            adapt=request.url.path == ADAPTIVE_PATH,
+        )
+
+
+@contextmanager
+def phase(name: str):
+    """Trace and time one phase of the request path"""
+    with tracer.span(name) as span, phase_timers.time(name):
+        yield span
+
+
+def record_phase(name: str, start_ns: int, end_ns: int):
+    """Record a phase measured outside the handler (decode, serialize)"""
+    root_span = current_span()
+    if root_span.recording:
+        root_span.child(name, start_ns=start_ns).end(end_ns)
+    phase_timers.record(name, (end_ns - start_ns) / 1e9)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Server span per prediction request, continuing the caller's traceparent"""
+    if not request.url.path.startswith(LIMITED_PATH_PREFIX):
+        return await call_next(request)
+
+    span = tracer.start_request(
+        f"{request.method} {request.url.path}", request.headers.get(TRACEPARENT_HEADER)
+    )
+    if not span.recording and not phase_timers.enabled:
+        return await call_next(request)
+
+    # Lets the handler measure the decode phase FastAPI runs before it
+    request.state.received_ns = time.time_ns()
+    span.set_attribute("http.method", request.method)
+    span.set_attribute("http.target", request.url.path)
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        span.set_error(str(e))
+        span.end()
+        raise
+
+    # FastAPI serializes the endpoint's return value after the handler exits
+    handler_end_ns = getattr(request.state, "handler_end_ns", None)
+    if handler_end_ns is not None:
+        record_phase("serialize", handler_end_ns, time.time_ns())
+
+    if span.recording:
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f"HTTP {response.status_code}")
+        response.headers[TRACEPARENT_HEADER] = span.context.to_traceparent()
+    span.end()
+    return response
+
+
+# Outermost, so captured latencies and statuses include shedding and queueing
+app.add_middleware(
+    CaptureMiddleware, recorder=lambda: traffic_recorder, prefix=LIMITED_PATH_PREFIX
 )
 
 
@@ -138,6 +1479,21 @@ async def liveness():
 @app.get("/health/ready", response_model=HealthResponse)
 async def readiness():
     """Kubernetes readiness probe - is the app ready for traffic?"""
+    if draining:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "draining",
+                "ready": False,
+                "model_loaded": model is not None,
+                "model_version": settings.model_version,
+                "model_path": settings.model_path,
+                "workers": worker_status.summary()
+                if worker_status is not None
+                else None,
+                "error": "Shutting down",
+            },
+        )
     if model is None:
         logger.warning("Model not loaded")
         raise HTTPException(
@@ -148,8 +1504,13 @@ async def readiness():
                 "model_loaded": False,
                 "model_version": settings.model_version,
                 "model_path": settings.model_path,
-                "error": "Model not loaded"
-            }
+                "workers": worker_status.summary()
+                if worker_status is not None
+                else None,
+                "error": f"Model not loaded: {model_load_error}"
+                if model_load_error
+                else "Model not loaded",
+            },
         )
 
     return HealthResponse(
@@ -158,7 +1519,14 @@ async def readiness():
         model_loaded=True,
         model_version=settings.model_version,
         model_path=settings.model_path,
-        loaded_at=model_load_time
+        loaded_at=model_load_time,
+        warmup_seconds=warmup_seconds,
+        workers=worker_status.summary() if worker_status is not None else None,
+        serving_mode=serving_mode_of(model),
+        lookup_table=lookup_report,
+        compact_model=compact_report,
+        fused_model=fused_report,
+        memory=model_memory,
     )
 
 
@@ -168,8 +1536,24 @@ async def health():
     return await readiness()
 
 
+def check_api_key(x_api_key: str | None):
+    """Reject the request if an API key is configured and does not match"""
+    if settings.api_key and settings.api_key.strip() and x_api_key != settings.api_key:
+        logger.warning("Unauthorized prediction attempt")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+def check_model_loaded():
+    """Reject the request if no model is loaded"""
+    if model is None:
+        logger.error("Model not loaded")
+        raise HTTPException(status_code=503, detail="Model not available")
+
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(None)):
+async def predict(
+    request: PredictRequest, http_request: Request, x_api_key: str | None = Header(None)
+):
     """
     Classify iris flower measurements
 
@@ -180,59 +1564,324 @@ async def predict(request: PredictRequest, x_api_key: Optional[str] = Header(Non
     Returns:
         Prediction with class ID, name, and probabilities
     """
+    # Body read and pydantic validation happen before the handler runs
+    received_ns = getattr(http_request.state, "received_ns", None)
+    if received_ns is not None:
+        record_phase("decode", received_ns, time.time_ns())
 
-    # Check API key if configured
-    if settings.api_key and settings.api_key.strip():
-        if not x_api_key or x_api_key != settings.api_key:
-            logger.warning("Unauthorized prediction attempt")
-            raise HTTPException(status_code=401, detail="Unauthorized")
+    with phase("auth"):
+        check_api_key(x_api_key)
+    check_model_loaded()
 
-    # Check model is loaded
-    if model is None:
-        logger.error("Model not loaded")
+    try:
+        logger.info(
+            f"Prediction request: SL={request.sepal_length}, SW={request.sepal_width}, "
+            f"PL={request.petal_length}, PW={request.petal_width}"
+        )
+
+        # Off the event loop, so in-flight requests are real concurrency
+        features = build_features(request)
+        with phase("inference"):
+            class_id, probabilities = await predict_coalesced(
+                model, features, priority_of(http_request)
+            )
+        # Every caller is recorded, including those that shared a call
+        record_predictions("predict", features, [class_id], probabilities[None])
+
+        logger.info(
+            f"Prediction successful: class_id={class_id}, "
+            f"class_name={CLASS_NAMES[class_id]}"
+        )
+
+        if received_ns is not None:
+            http_request.state.handler_end_ns = time.time_ns()
+        # Same schema as PredictionResponse, without building and re-encoding the model
+        return encode_prediction(class_id, probabilities)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}") from e
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    http_request: Request, response: Response, x_api_key: str | None = Header(None)
+):
+    """
+    Classify a batch of iris measurements
+
+    The body is either JSON ({"instances": [PredictRequest, ...]}), a packed
+    float32 matrix (application/x-iris-float32) or msgpack, chosen by
+    Content-Type. The response format follows Accept, defaulting to the
+    request format.
+
+    Rows with a NaN, infinite, out-of-range or missing measurement are
+    not scored; they keep their position in the response and are listed
+    by index. Validation and inference wall times are returned separately
+    in the Server-Timing header.
+    """
+    with phase("auth"):
+        check_api_key(x_api_key)
+
+    try:
+        request_fmt = wire.request_format(http_request.headers.get("content-type"))
+    except wire.UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    try:
+        response_fmt = wire.response_format(
+            http_request.headers.get("accept"), request_fmt
+        )
+    except wire.UnsupportedMediaType as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    check_model_loaded()
+
+    with phase("decode") as span:
+        features, malformed = decode_batch(await http_request.body(), request_fmt)
+        span.set_attribute("batch.rows", len(features))
+    if len(features) > settings.max_batch_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(features)} rows exceeds limit of {settings.max_batch_rows}",
+        )
+
+    validate_start = time.perf_counter()
+    with phase("validate") as span:
+        errors = validate_batch(features, malformed)
+        valid = errors == validation.VALID
+        span.set_attribute("batch.invalid_rows", int(len(errors) - valid.sum()))
+    validate_seconds = time.perf_counter() - validate_start
+
+    try:
+        inference_start = time.perf_counter()
+        with phase("inference"):
+            class_ids, probabilities = await run_scheduled(
+                priority_of(http_request),
+                int(valid.sum()),
+                predict_valid_rows,
+                model,
+                features,
+                errors,
+            )
+        inference_seconds = time.perf_counter() - inference_start
+        scored = slice(None) if valid.all() else valid
+        record_predictions(
+            "predict_batch", features[scored], class_ids[scored], probabilities[scored]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}") from e
+
+    logger.info(
+        f"Batch prediction successful: rows={len(class_ids)}, invalid={len(errors) - int(valid.sum())}, "
+        f"format={request_fmt}"
+    )
+    server_timing = f"validate;dur={validate_seconds * 1000:.3f}, inference;dur={inference_seconds * 1000:.3f}"
+    with phase("serialize"):
+        encoded = encode_batch(class_ids, probabilities, response_fmt, errors)
+    if isinstance(encoded, Response):
+        encoded.headers[SERVER_TIMING_HEADER] = server_timing
+    else:
+        response.headers[SERVER_TIMING_HEADER] = server_timing
+    return encoded
+
+
+@app.post("/predict/explain", response_model=ExplainResponse)
+async def predict_explain(
+    request: ExplainRequest, x_api_key: str | None = Header(None)
+):
+    """
+    Per-class feature contributions of each row's prediction
+
+    Tree models are explained in probability space, linear models in
+    log-odds space; in both, base value plus contributions is the row's
+    value. Explanations always run in the EXPLAIN_PRIORITY scheduler
+    class, and are rejected with 503 rather than wait longer than
+    EXPLAIN_BUDGET_MS for an execution slot.
+    """
+    check_api_key(x_api_key)
+    check_model_loaded()
+    active_model, active_explainer = model, explainer
+    if active_explainer is None:
+        raise HTTPException(
+            status_code=501,
+            detail="Explanations are not available for the served model",
+        )
+    if len(request.instances) > settings.explain_max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(request.instances)} rows exceeds the explanation limit of {settings.explain_max_rows}",
+        )
+
+    features = np.vstack([build_features(instance) for instance in request.instances])
+    try:
+        class_ids, probabilities, contributions, cached = await run_scheduled(
+            settings.explain_priority,
+            len(features),
+            explain_rows,
+            active_model,
+            active_explainer,
+            features,
+            wait_timeout=settings.explain_budget_ms / 1000,
+        )
+    except TimeoutError:
+        explain_budget_exceeded_total.inc()
+        logger.warning(
+            f"Explanation waited over its {settings.explain_budget_ms:.0f} ms budget"
+        )
         raise HTTPException(
             status_code=503,
-            detail="Model not available"
+            detail="Explanation budget exceeded",
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)},
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Explanation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Explanation failed: {e}") from e
+
+    explanations = [
+        Explanation(
+            predicted_class_id=int(class_id),
+            predicted_class_name=CLASS_NAMES[class_id],
+            probabilities=row_probabilities.tolist(),
+            base_values=active_explainer.bias.tolist(),
+            contributions=dict(zip(FEATURE_NAMES, row_contributions.tolist())),
+        )
+        for class_id, row_probabilities, row_contributions in zip(
+            class_ids, probabilities, contributions
+        )
+    ]
+    return ExplainResponse(
+        explanations=explanations,
+        method=active_explainer.method,
+        space=active_explainer.space,
+        class_names=CLASS_NAMES,
+        global_importances=active_explainer.global_importances(FEATURE_NAMES),
+        cached_rows=cached,
+        model_version=settings.model_version,
+        timestamp=utc_timestamp(),
+    )
+
+
+def check_debug_enabled(x_api_key: str | None):
+    """Debug endpoints are opt-in and honour the API key"""
+    if not settings.debug_endpoints_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    check_api_key(x_api_key)
+
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(
+    seconds: float = Query(30.0, gt=0), x_api_key: str | None = Header(None)
+):
+    """
+    Sample every thread for `seconds` and return collapsed stacks
+
+    The output ("frame;frame;frame count" per line) feeds flamegraph.pl or
+    speedscope directly. Only one profile runs at a time.
+    """
+    check_debug_enabled(x_api_key)
+    seconds = min(seconds, settings.profile_max_seconds)
 
     try:
-        logger.info(f"Prediction request: SL={request.sepal_length}, SW={request.sepal_width}, "
-                   f"PL={request.petal_length}, PW={request.petal_width}")
+        stacks = await run_in_threadpool(profiler.profile, seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks)
+
 
-        # Prepare features
-        features = np.array([[
-            request.sepal_length,
-            request.sepal_width,
-            request.petal_length,
-            request.petal_width
-        ]])
+@app.get("/debug/timers")
+async def debug_timers(x_api_key: str | None = Header(None)):
+    """Per-phase timings collected while phase timers are on"""
+    check_debug_enabled(x_api_key)
+    return {"enabled": phase_timers.enabled, "phases": phase_timers.snapshot()}
 
-        # Make prediction
-        predicted_class_id = int(model.predict(features)[0])
-        predicted_class_name = CLASS_NAMES[predicted_class_id]
 
-        # Get probabilities
-        probabilities = model.predict_proba(features)[0].tolist()
+@app.put("/debug/timers")
+async def toggle_debug_timers(
+    enabled: bool = Query(...),
+    reset: bool = Query(False),
+    x_api_key: str | None = Header(None),
+):
+    """Switch phase timers on or off at runtime, optionally clearing them"""
+    check_debug_enabled(x_api_key)
+    if reset:
+        phase_timers.reset(enabled)
+    else:
+        phase_timers.enabled = enabled
+    logger.info(f"Phase timers {'enabled' if enabled else 'disabled'}")
+    return {"enabled": phase_timers.enabled, "phases": phase_timers.snapshot()}
 
-        response = PredictionResponse(
-            predicted_class_id=predicted_class_id,
-            predicted_class_name=predicted_class_name,
-            probabilities=probabilities,
-            model_version=settings.model_version,
-            timestamp=datetime.utcnow().isoformat()
+
+@app.get("/model/registry")
+async def model_registry(x_api_key: str | None = Header(None)):
+    """Served, staged and pinned model versions and prefetch counters"""
+    check_api_key(x_api_key)
+    if prefetcher is None:
+        raise HTTPException(
+            status_code=404, detail="Model registry prefetch is not enabled"
         )
+    return prefetcher.snapshot()
 
-        logger.info(f"Prediction successful: class_id={predicted_class_id}, "
-                   f"class_name={predicted_class_name}")
 
-        return response
+@app.post("/model/activate")
+async def activate_model(
+    version: str | None = Query(None), x_api_key: str | None = Header(None)
+):
+    """
+    Swap in the staged model version on this worker
 
-    except Exception as e:
-        logger.error(f"Prediction failed: {str(e)}")
+    Pass `version` to make sure the expected version is activated. Use
+    SIGUSR2 or the pin file to switch every worker of a pod.
+    """
+    check_api_key(x_api_key)
+    if prefetcher is None:
         raise HTTPException(
-            status_code=500,
-            detail=f"Prediction failed: {str(e)}"
+            status_code=404, detail="Model registry prefetch is not enabled"
         )
+    activated = await run_in_threadpool(prefetcher.activate, version)
+    if not activated:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "No matching staged model version",
+                "staged_version": prefetcher.staged_version,
+            },
+        )
+    return prefetcher.snapshot()
+
+
+@app.get("/model/importances")
+async def model_importances():
+    """Global feature importances of the loaded model, computed at load"""
+    check_model_loaded()
+    if explainer is None:
+        raise HTTPException(
+            status_code=501,
+            detail="Feature importances are not available for the served model",
+        )
+    return {
+        "model_version": settings.model_version,
+        "importances": explainer.global_importances(FEATURE_NAMES),
+        **explainer.snapshot(),
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """Live per-feature statistics, class frequencies and drift vs the training data"""
+    return feature_stats.snapshot(drift_threshold=settings.drift_psi_threshold)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/")
@@ -244,14 +1893,21 @@ async def root():
         "status": "running",
         "endpoints": {
             "predict": "POST /predict",
+            "predict_batch": "POST /predict/batch",
+            "explain": "POST /predict/explain",
+            "importances": "GET /model/importances",
             "health": "GET /health",
             "readiness": "GET /health/ready",
             "liveness": "GET /health/live",
-            "docs": "GET /docs"
-        }
+            "metrics": "GET /metrics",
+            "stats": "GET /stats",
+            "grpc": f"iris.inference.v1.InferenceService on port {settings.grpc_port}",
+            "docs": "GET /docs",
+        },
     }
 
 
 if __name__ == "__main__":
     import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=5000, log_level="info")
@@ -0,0 +1,479 @@
+"""
+Asynchronous prediction audit log
+
+Every prediction (inputs, outputs, model version, timestamp) is appended
+to a bounded in-memory ring buffer; the request path only pays for a
+tuple append under a lock. A background flusher drains the buffer,
+renders one JSON line per scored row and appends the batch as one
+compressed frame to the open segment on local disk:
+
+    <dir>/audit-<utc start>-<pid>-<seq>.jsonl.zst.part
+
+A segment is sealed (renamed without .part) once it reaches a size or an
+age limit, then handed to a pluggable sink for upload. Concatenated zstd
+(or gzip) frames decode as one stream, so sealed segments read back with
+`zstd -dc` / `zcat`. Sealed segments that fail to upload stay on disk and
+are retried with exponential backoff.
+
+Pre-forked workers share the directory. Every segment name carries the
+pid of the process that owns it, and a starting log only takes over
+segments whose owner is gone: it claims each one by renaming it to
+
+    audit-<utc start>-<pid>-<seq>.jsonl.zst.claimed-<own pid>
+
+Rename is atomic, so when several workers start together exactly one of
+them claims (and uploads) a given leftover segment.
+
+When the buffer is full new records are dropped and counted rather than
+blocking the request; the buffer holds at most `capacity` rows.
+"""
+
+import gzip
+import heapq
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import UTC, datetime
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+CLAIM_SUFFIX = ".claimed-"
+_EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+
+
+class SegmentSink(ABC):
+    """Destination for sealed audit segments"""
+
+    @abstractmethod
+    def upload(self, local_path: str, name: str):
+        """
+        Upload one sealed segment
+
+        Args:
+            local_path: Path of the sealed segment on local disk
+            name: File name of the segment, used as the remote object name
+
+        Raises:
+            Exception: on failure; the segment stays on disk for a retry
+        """
+
+
+class LocalDirectorySink(SegmentSink):
+    """Copies segments to another directory (a mounted share, or for dev/test)"""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        os.makedirs(base_path, exist_ok=True)
+
+    def upload(self, local_path: str, name: str):
+        shutil.copyfile(local_path, os.path.join(self.base_path, name))
+
+
+class AzureBlobSink(SegmentSink):
+    """Uploads segments to an Azure Blob Storage container"""
+
+    def __init__(
+        self,
+        connection_string: str,
+        container_name: str = "audit",
+        prefix: str = "inference-service",
+    ):
+        try:
+            from azure.storage.blob import BlobServiceClient
+        except ImportError:
+            raise ImportError("azure-storage-blob not installed")
+
+        self.prefix = prefix.strip("/")
+        client = BlobServiceClient.from_connection_string(connection_string)
+        self.container_client = client.get_container_client(container_name)
+        logger.info(f"AzureBlobSink initialized (container: {container_name})")
+
+    def upload(self, local_path: str, name: str):
+        blob_name = f"{self.prefix}/{name}" if self.prefix else name
+        with open(local_path, "rb") as f:
+            self.container_client.upload_blob(blob_name, f, overwrite=True)
+
+
+def create_sink(
+    kind: str,
+    local_path: str = "",
+    connection_string: str = "",
+    container_name: str = "audit",
+) -> SegmentSink | None:
+    """Build a segment sink from its configured name: none, local or azure"""
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind == "local":
+        return LocalDirectorySink(local_path)
+    if kind == "azure":
+        if not connection_string:
+            raise ValueError("AZURE_STORAGE_CONNECTION_STRING not set")
+        return AzureBlobSink(connection_string, container_name)
+    raise ValueError(f"Unknown audit sink: {kind}")
+
+
+def _compressor(compression: str):
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard not installed")
+        return zstandard.ZstdCompressor(level=3).compress
+    if compression == "gzip":
+        return lambda data: gzip.compress(data, compresslevel=6)
+    if compression == "none":
+        return lambda data: data
+    raise ValueError(f"Unknown audit compression: {compression}")
+
+
+def _segment_pid(name: str) -> int | None:
+    # audit-<start>-<pid>-<seq>.<ext>
+    try:
+        return int(name.split("-")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _segment_owner(name: str) -> int | None:
+    # A claimed segment belongs to its claimer, any other one to its writer
+    if CLAIM_SUFFIX in name:
+        try:
+            return int(name.rsplit(CLAIM_SUFFIX, 1)[1])
+        except ValueError:
+            return None
+    return _segment_pid(name)
+
+
+def _sealed_name(name: str) -> str:
+    """Segment file name without the open or claimed suffix, as uploaded"""
+    name = name.split(CLAIM_SUFFIX, 1)[0]
+    name = name.removesuffix(PART_SUFFIX)
+    return name
+
+
+def _process_alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_segment(path: str) -> list[dict]:
+    """Decode every record of a (sealed or open) segment, for tools and tests"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if ".zst" in path:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            data, read_across_frames=True
+        )
+        data = reader.read()
+    elif ".gz" in path:
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.splitlines() if line]
+
+
+class AuditLog:
+    """
+    Ring buffer plus background flusher writing compressed audit segments
+
+    Args:
+        directory: Local directory for segments
+        capacity: Maximum rows held in memory; further records are dropped
+        flush_interval_seconds: How often the flusher drains the buffer
+        segment_max_bytes: Compressed size at which a segment is sealed
+        segment_max_seconds: Age at which a segment is sealed
+        compression: zstd, gzip or none
+        sink: Where sealed segments are uploaded (None keeps them local)
+        delete_after_upload: Remove local segments once uploaded
+        upload_retry_seconds: Delay before the first retry of a failed upload,
+            doubled on every further failure
+        upload_retry_max_seconds: Upper bound of the retry delay
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = 100000,
+        flush_interval_seconds: float = 1.0,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        segment_max_seconds: float = 300.0,
+        compression: str = "zstd",
+        sink: SegmentSink | None = None,
+        delete_after_upload: bool = True,
+        upload_retry_seconds: float = 5.0,
+        upload_retry_max_seconds: float = 300.0,
+    ):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval_seconds = flush_interval_seconds
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.compression = compression
+        self.sink = sink
+        self.delete_after_upload = delete_after_upload
+        self.upload_retry_seconds = upload_retry_seconds
+        self.upload_retry_max_seconds = upload_retry_max_seconds
+        self._compress = _compressor(compression)
+        self._extension = _EXTENSIONS[compression]
+
+        self._lock = threading.Lock()
+        self._buffer: deque = deque()
+        self._buffered_rows = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._uploader: threading.Thread | None = None
+        self._uploads: queue.Queue = queue.Queue()
+
+        self._segment_path: str | None = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        self._sequence = 0
+
+        self.records_total = 0
+        self.dropped_total = 0
+        self.segments_total = 0
+        self.upload_failures_total = 0
+
+    @property
+    def buffered_rows(self) -> int:
+        return self._buffered_rows
+
+    def record(
+        self,
+        source: str,
+        model_version: str,
+        features: np.ndarray,
+        class_ids,
+        probabilities,
+    ) -> bool:
+        """
+        Queue the rows of one prediction call for the audit log
+
+        Never blocks on I/O. The arrays are kept by reference, so callers
+        must not mutate them afterwards.
+
+        Returns:
+            False if the buffer was full and the rows were dropped
+        """
+        rows = len(features)
+        entry = (time.time(), source, model_version, features, class_ids, probabilities)
+        with self._lock:
+            if self._buffered_rows + rows > self.capacity:
+                self.dropped_total += rows
+                return False
+            self._buffer.append(entry)
+            self._buffered_rows += rows
+            wake = self._buffered_rows * 2 >= self.capacity
+        # Flush early rather than drop once the buffer is half full
+        if wake:
+            self._wake.set()
+        return True
+
+    def start(self):
+        """Start the flusher and uploader threads, queueing leftover segments for upload"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._stopping.clear()
+        self._recover()
+        self._flusher = threading.Thread(
+            target=self._run_flusher, name="audit-flusher", daemon=True
+        )
+        self._flusher.start()
+        if self.sink is not None:
+            self._uploader = threading.Thread(
+                target=self._run_uploader, name="audit-uploader", daemon=True
+            )
+            self._uploader.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is buffered, seal the open segment and drain pending uploads"""
+        self._stopping.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout)
+            self._flusher = None
+        if self._uploader is not None:
+            self._uploads.put(None)
+            self._uploader.join(timeout)
+            self._uploader = None
+
+    def flush(self, seal: bool = False):
+        """
+        Write everything buffered so far (and optionally seal the segment)
+
+        Runs on the flusher thread; call it directly only when the log was
+        not started.
+        """
+        with self._lock:
+            entries = list(self._buffer)
+            self._buffer.clear()
+            self._buffered_rows = 0
+
+        if entries:
+            payload = self._render(entries)
+            self._write(self._compress(payload))
+            self.records_total += sum(len(entry[3]) for entry in entries)
+
+        if self._segment_path is not None and (
+            seal
+            or self._segment_bytes >= self.segment_max_bytes
+            or time.time() - self._segment_opened >= self.segment_max_seconds
+        ):
+            self._seal()
+
+    def _render(self, entries) -> bytes:
+        lines = []
+        for (
+            recorded_at,
+            source,
+            model_version,
+            features,
+            class_ids,
+            probabilities,
+        ) in entries:
+            timestamp = datetime.fromtimestamp(recorded_at, UTC).isoformat()
+            for row, class_id, probs in zip(
+                np.asarray(features).tolist(),
+                np.asarray(class_ids).tolist(),
+                np.asarray(probabilities).tolist(),
+            ):
+                lines.append(
+                    json.dumps(
+                        {
+                            "timestamp": timestamp,
+                            "source": source,
+                            "model_version": model_version,
+                            "features": row,
+                            "predicted_class_id": class_id,
+                            "probabilities": probs,
+                        }
+                    )
+                )
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _write(self, chunk: bytes):
+        if self._segment_path is None:
+            self._sequence += 1
+            started = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+            name = (
+                f"audit-{started}-{os.getpid()}-{self._sequence:04d}{self._extension}"
+            )
+            self._segment_path = os.path.join(self.directory, name + PART_SUFFIX)
+            self._segment_bytes = 0
+            self._segment_opened = time.time()
+        # Appended once per flush; nothing is held open between flushes
+        with open(self._segment_path, "ab") as segment:
+            segment.write(chunk)
+        self._segment_bytes += len(chunk)
+
+    def _seal(self):
+        sealed_path = self._segment_path[: -len(PART_SUFFIX)]
+        os.replace(self._segment_path, sealed_path)
+        self._segment_path = None
+        self.segments_total += 1
+        logger.info(f"Sealed audit segment {os.path.basename(sealed_path)}")
+        if self.sink is not None:
+            self._uploads.put(sealed_path)
+
+    def _recover(self):
+        """Claim the segments of processes that are gone: seal them and queue their upload"""
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith("audit-"):
+                continue
+            # Sibling workers share the directory; their segments are theirs to upload
+            if _process_alive(_segment_owner(name)):
+                continue
+            if self.sink is None:
+                # Nothing to upload: only seal what a dead process left open
+                if not name.endswith(PART_SUFFIX):
+                    continue
+                target = _sealed_name(name)
+            else:
+                target = _sealed_name(name) + f"{CLAIM_SUFFIX}{os.getpid()}"
+            try:
+                os.rename(
+                    os.path.join(self.directory, name),
+                    os.path.join(self.directory, target),
+                )
+            except FileNotFoundError:
+                # Claimed first by a sibling worker starting at the same time
+                continue
+            if self.sink is not None:
+                self._uploads.put(os.path.join(self.directory, target))
+
+    def _run_flusher(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+        try:
+            self.flush(seal=True)
+        except Exception:
+            logger.exception("Final audit flush failed")
+
+    def _run_uploader(self):
+        # Failed uploads wait here as (due, attempt, path) until their retry
+        retries = []
+        while True:
+            timeout = max(retries[0][0] - time.monotonic(), 0.0) if retries else None
+            try:
+                path = self._uploads.get(timeout=timeout)
+                attempt = 0
+            except queue.Empty:
+                _, attempt, path = heapq.heappop(retries)
+            if path is None:
+                # Segments still failing stay on disk and are claimed again at the next start
+                return
+            if not self._upload(path):
+                delay = min(
+                    self.upload_retry_seconds * 2**attempt,
+                    self.upload_retry_max_seconds,
+                )
+                heapq.heappush(retries, (time.monotonic() + delay, attempt + 1, path))
+
+    def _upload(self, path: str) -> bool:
+        """Upload one sealed segment; False if it should be retried"""
+        name = _sealed_name(os.path.basename(path))
+        try:
+            self.sink.upload(path, name)
+        except FileNotFoundError:
+            # Removed from under us; nothing left to upload
+            return True
+        except Exception:
+            # Any sink error (network, auth, storage) is retried
+            self.upload_failures_total += 1
+            logger.warning(
+                "Audit segment upload failed, kept on disk for a retry", exc_info=True
+            )
+            return False
+        try:
+            if self.delete_after_upload:
+                os.remove(path)
+            elif os.path.basename(path) != name:
+                os.replace(path, os.path.join(os.path.dirname(path), name))
+        except FileNotFoundError:
+            pass
+        return True
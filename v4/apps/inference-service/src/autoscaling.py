@@ -0,0 +1,174 @@
+"""
+Sliding-window load signals for a custom-metrics HorizontalPodAutoscaler
+
+CPU and memory utilization trail the load of a queue-bound service. The
+HPA instead scales on what the pods are actually asked to do:
+
+- in-flight requests, both the instantaneous count and the window
+  average (by Little's law: the time spent by requests completed in the
+  window, divided by its length; stable between scrapes);
+- queue wait p95, the time requests wait for an execution slot;
+- rows scored per second.
+
+Everything lives in fixed-size ring buffers, so recording is O(1) and
+allocation-free; only a scrape pays for the aggregation. Rates come from
+one bucket per second (WindowedSum) and percentiles from the most recent
+samples (RingPercentile), both restricted to the last window_seconds.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+
+class WindowedSum:
+    """
+    Per-second buckets in a ring, summed over the last window_seconds
+
+    Args:
+        window_seconds: Length of the window (one bucket per second)
+        clock: Time source, injectable for tests
+    """
+
+    def __init__(
+        self, window_seconds: int = 60, clock: Callable[[], float] = time.monotonic
+    ):
+        self.window_seconds = max(1, int(window_seconds))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._seconds = np.full(self.window_seconds, -1, dtype=np.int64)
+        self._sums = np.zeros(self.window_seconds)
+
+    def add(self, amount: float = 1.0):
+        second = int(self.clock())
+        index = second % self.window_seconds
+        with self._lock:
+            if self._seconds[index] != second:
+                self._seconds[index] = second
+                self._sums[index] = 0.0
+            self._sums[index] += amount
+
+    def total(self) -> float:
+        """Sum over the last window_seconds, including the current second"""
+        now = int(self.clock())
+        with self._lock:
+            live = self._seconds > now - self.window_seconds
+            return float(self._sums[live].sum())
+
+    def rate(self) -> float:
+        """Per-second average over the window"""
+        return self.total() / self.window_seconds
+
+
+class RingPercentile:
+    """
+    The last `capacity` samples with their timestamps, for windowed percentiles
+
+    Args:
+        capacity: Samples kept; under heavy load the window holds at most this many
+        window_seconds: Samples older than this are ignored
+        clock: Time source, injectable for tests
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        window_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = max(1, capacity)
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._values = np.zeros(self.capacity)
+        self._times = np.full(self.capacity, -np.inf)
+        self._next = 0
+
+    def record(self, value: float):
+        now = self.clock()
+        with self._lock:
+            index = self._next
+            self._values[index] = value
+            self._times[index] = now
+            self._next = (index + 1) % self.capacity
+
+    def percentile(self, q: float) -> float:
+        """q-th percentile (0-100) of the samples in the window; 0 when there are none"""
+        cutoff = self.clock() - self.window_seconds
+        with self._lock:
+            values = self._values[self._times >= cutoff]
+        if not len(values):
+            return 0.0
+        return float(np.percentile(values, q))
+
+
+class LoadSignal:
+    """
+    In-flight requests, queue wait and row throughput over a sliding window
+
+    Args:
+        window_seconds: Aggregation window of the averages and the percentile
+        wait_samples: Ring size of the queue-wait percentile
+        clock: Time source, injectable for tests
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 60,
+        wait_samples: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._busy = WindowedSum(window_seconds, clock)
+        self._rows = WindowedSum(window_seconds, clock)
+        self._requests = WindowedSum(window_seconds, clock)
+        self._waits = RingPercentile(wait_samples, window_seconds, clock)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def started(self):
+        """A request was admitted"""
+        with self._lock:
+            self._inflight += 1
+
+    def finished(self, seconds: float):
+        """A request admitted by started() completed after `seconds`"""
+        with self._lock:
+            self._inflight -= 1
+        self._busy.add(seconds)
+        self._requests.add()
+
+    def record_wait(self, seconds: float):
+        self._waits.record(seconds)
+
+    def add_rows(self, rows: int):
+        self._rows.add(rows)
+
+    def mean_inflight(self) -> float:
+        """Average concurrency over the window (busy seconds / window seconds)"""
+        return self._busy.rate()
+
+    def wait_percentile(self, q: float = 95.0) -> float:
+        return self._waits.percentile(q)
+
+    def rows_per_second(self) -> float:
+        return self._rows.rate()
+
+    def requests_per_second(self) -> float:
+        return self._requests.rate()
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "window_seconds": self.window_seconds,
+            "inflight": self.inflight,
+            "mean_inflight": self.mean_inflight(),
+            "queue_wait_p95_seconds": self.wait_percentile(95.0),
+            "rows_per_second": self.rows_per_second(),
+            "requests_per_second": self.requests_per_second(),
+        }
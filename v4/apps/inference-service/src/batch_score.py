@@ -0,0 +1,401 @@
+"""
+Offline batch scoring of CSV / Parquet files with a process pool
+
+Scores files that do not fit in memory with the same model artifact the
+service loads, without going through HTTP. The input is read in chunks
+(CSV: byte blocks cut at line ends; Parquet: record batches), each chunk
+is scored with one vectorized call in a worker process, and results are
+written in input order. At most `workers * 2` chunks are in flight, so
+memory stays bounded by chunk size whatever the file size.
+
+CSV workers parse their block, score it and format the output lines, so
+the parent only reads and writes bytes. The input needs a header row
+naming the four feature columns (extra columns are passed through) and
+no line breaks inside quoted fields. Every output row is the input row
+followed by predicted_class_id, predicted_class_name, one probability
+per class and an error column; rows that fail validation (NaN, infinite,
+out of range or unparsable) are not scored and carry the error instead.
+
+Parquet input needs the optional pyarrow package and writes Parquet with
+the same extra columns.
+
+Usage (from apps/inference-service):
+    python -m src.batch_score input.csv output.csv --model ../../ml/models/model.pkl
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Any
+
+import joblib
+import numpy as np
+from inference_core.engine import score
+from inference_core.features import CLASS_NAMES, FEATURE_NAMES
+from inference_core.loading import unpack_artifact
+
+from . import validation
+
+try:
+    import pyarrow
+    from pyarrow import parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+    parquet = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_CHUNK_ROWS = 200_000
+OUTPUT_COLUMNS = (
+    ["predicted_class_id", "predicted_class_name"]
+    + [f"probability_{name}" for name in CLASS_NAMES]
+    + ["error"]
+)
+
+_VALID_ROW = "%s,%d,%s," + ",".join(["%.6g"] * len(CLASS_NAMES)) + ",\n"
+_INVALID_ROW = "%s" + "," * len(OUTPUT_COLUMNS) + '"%s"\n'
+
+# Set in each worker process by _init_worker
+_model = None
+
+
+def _init_worker(model_path: str):
+    global _model
+    _model, _ = unpack_artifact(joblib.load(model_path))
+
+
+def score_features(features: np.ndarray, malformed: np.ndarray | None = None):
+    """
+    Validate and score an (n, 4) matrix with the worker's model
+
+    Returns:
+        (class ids with -1 for invalid rows, probabilities with NaN rows, error codes)
+    """
+    errors = validation.row_errors(features)
+    if malformed is not None:
+        errors[malformed] = validation.MALFORMED
+    valid = errors == validation.VALID
+    class_ids = np.full(len(features), -1, dtype=np.int64)
+    probabilities = np.full((len(features), len(CLASS_NAMES)), np.nan)
+    if valid.any():
+        scored = slice(None) if valid.all() else valid
+        class_ids[scored], probabilities[scored] = score(_model, features[scored])
+    return class_ids, probabilities, errors
+
+
+def _parse_csv_rows(lines: list[str], usecols: tuple[int, ...]):
+    """Feature matrix of CSV lines, flagging rows that do not parse"""
+    try:
+        features = np.loadtxt(
+            lines,
+            delimiter=",",
+            usecols=usecols,
+            dtype=np.float64,
+            quotechar='"',
+            ndmin=2,
+            comments=None,
+        )
+        return features, None
+    except ValueError:
+        pass
+
+    # Slow path: find the rows that do not parse
+    features = np.full((len(lines), len(usecols)), np.nan)
+    malformed = np.zeros(len(lines), dtype=bool)
+    for i, row in enumerate(csv.reader(lines)):
+        try:
+            features[i] = [float(row[c]) for c in usecols]
+        except (IndexError, ValueError):
+            malformed[i] = True
+    return features, malformed
+
+
+def score_csv_block(block: bytes, usecols: tuple[int, ...]) -> tuple[bytes, int, int]:
+    """
+    Score one block of complete CSV lines and render the output lines
+
+    Returns:
+        (output bytes, rows, invalid rows)
+    """
+    lines = [line for line in block.decode("utf-8").splitlines() if line.strip()]
+    if not lines:
+        return b"", 0, 0
+    features, malformed = _parse_csv_rows(lines, usecols)
+    class_ids, probabilities, errors = score_features(features, malformed)
+
+    names = np.array(CLASS_NAMES + [""], dtype=object)[class_ids].tolist()
+    columns = [lines, class_ids.tolist(), names, *probabilities.T.tolist()]
+    invalid = int(np.count_nonzero(errors))
+    if not invalid:
+        # One %-format over the whole block is several times faster than per-row f-strings
+        text = (_VALID_ROW * len(lines)) % tuple(chain.from_iterable(zip(*columns)))
+    else:
+        text = "".join(
+            _VALID_ROW % row
+            if not error
+            else _INVALID_ROW % (row[0], validation.ERROR_MESSAGES[error])
+            for row, error in zip(zip(*columns), errors.tolist())
+        )
+    return text.encode("utf-8"), len(lines), invalid
+
+
+def score_arrow_batch(features: np.ndarray):
+    """Score one Parquet record batch's feature matrix"""
+    return score_features(features)
+
+
+def _csv_blocks(f, chunk_bytes: int) -> Iterator[bytes]:
+    """Blocks of whole lines of about chunk_bytes each"""
+    remainder = b""
+    while True:
+        data = f.read(chunk_bytes)
+        if not data:
+            if remainder.strip():
+                yield remainder
+            return
+        data = remainder + data
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            remainder = data
+            continue
+        remainder = data[cut + 1 :]
+        yield data[: cut + 1]
+
+
+def _csv_usecols(header: str) -> tuple[int, ...]:
+    columns = [c.strip() for c in next(csv.reader([header]))]
+    missing = [name for name in FEATURE_NAMES if name not in columns]
+    if missing:
+        raise ValueError(f"CSV header is missing feature columns: {', '.join(missing)}")
+    return tuple(columns.index(name) for name in FEATURE_NAMES)
+
+
+class _OrderedPool:
+    """Submits chunks to a process pool and yields results in submission order"""
+
+    def __init__(self, model_path: str, workers: int):
+        self.workers = workers
+        self.max_inflight = max(2 * workers, 1)
+        self._pending = deque()
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(model_path,)
+            )
+        else:
+            # In-process scoring, for single-CPU hosts and tests
+            self._pool = None
+            _init_worker(model_path)
+
+    def submit(self, fn, *args) -> Iterator[Any]:
+        """Queue one chunk; yields finished results once the window is full"""
+        if self._pool is None:
+            yield fn(*args)
+            return
+        self._pending.append(self._pool.submit(fn, *args))
+        while len(self._pending) >= self.max_inflight:
+            yield self._pending.popleft().result()
+
+    def drain(self) -> Iterator[Any]:
+        while self._pending:
+            yield self._pending.popleft().result()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+
+def _score_csv(
+    input_path: str, output_path: str, pool: _OrderedPool, chunk_bytes: int
+) -> tuple[int, int]:
+    rows = invalid = 0
+    with open(input_path, "rb") as src, open(output_path, "wb") as dst:
+        header = src.readline().decode("utf-8").rstrip("\r\n")
+        usecols = _csv_usecols(header)
+        dst.write(f"{header},{','.join(OUTPUT_COLUMNS)}\n".encode())
+
+        def write(result):
+            nonlocal rows, invalid
+            data, n, bad = result
+            dst.write(data)
+            rows += n
+            invalid += bad
+
+        for block in _csv_blocks(src, chunk_bytes):
+            for result in pool.submit(score_csv_block, block, usecols):
+                write(result)
+        for result in pool.drain():
+            write(result)
+    return rows, invalid
+
+
+def _score_parquet(
+    input_path: str, output_path: str, pool: _OrderedPool, chunk_rows: int
+) -> tuple[int, int]:
+    if parquet is None:
+        raise ImportError("pyarrow not installed")
+    source = parquet.ParquetFile(input_path)
+    missing = [name for name in FEATURE_NAMES if name not in source.schema_arrow.names]
+    if missing:
+        raise ValueError(
+            f"Parquet file is missing feature columns: {', '.join(missing)}"
+        )
+
+    rows = invalid = 0
+    writer = None
+    batches = deque()
+
+    def write(result):
+        nonlocal rows, invalid, writer
+        batch = batches.popleft()
+        class_ids, probabilities, errors = result
+        names = np.array(CLASS_NAMES + [None], dtype=object)
+        messages = np.array(
+            [None]
+            + [validation.ERROR_MESSAGES[c] for c in sorted(validation.ERROR_MESSAGES)],
+            dtype=object,
+        )
+        columns = [
+            pyarrow.array(np.where(class_ids >= 0, class_ids, 0), mask=class_ids < 0),
+            pyarrow.array(names[class_ids]),
+            *[
+                pyarrow.array(probabilities[:, k])
+                for k in range(probabilities.shape[1])
+            ],
+            pyarrow.array(messages[errors]),
+        ]
+        table = pyarrow.Table.from_batches([batch]).append_column(
+            OUTPUT_COLUMNS[0], columns[0]
+        )
+        for name, column in zip(OUTPUT_COLUMNS[1:], columns[1:]):
+            table = table.append_column(name, column)
+        if writer is None:
+            writer = parquet.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+        rows += len(class_ids)
+        invalid += int(np.count_nonzero(errors))
+
+    try:
+        for batch in source.iter_batches(batch_size=chunk_rows):
+            features = np.column_stack(
+                [
+                    batch.column(name)
+                    .to_numpy(zero_copy_only=False)
+                    .astype(np.float64, copy=False)
+                    for name in FEATURE_NAMES
+                ]
+            )
+            batches.append(batch)
+            for result in pool.submit(score_arrow_batch, features):
+                write(result)
+        for result in pool.drain():
+            write(result)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows, invalid
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str,
+    workers: int | None = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> dict[str, Any]:
+    """
+    Score a CSV or Parquet file into an output file of the same format
+
+    Args:
+        input_path: .csv or .parquet input with the four feature columns
+        output_path: Where to write the scored rows
+        model_path: Model artifact, as loaded by the service
+        workers: Worker processes (None = one per CPU, 0 = score in-process)
+        chunk_bytes: CSV block size handed to a worker
+        chunk_rows: Parquet rows per record batch handed to a worker
+
+    Returns:
+        {"rows", "invalid_rows", "seconds", "rows_per_second", "workers"}
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    is_parquet = input_path.endswith((".parquet", ".pq"))
+
+    start = time.perf_counter()
+    pool = _OrderedPool(model_path, workers)
+    try:
+        if is_parquet:
+            rows, invalid = _score_parquet(input_path, output_path, pool, chunk_rows)
+        else:
+            rows, invalid = _score_csv(input_path, output_path, pool, chunk_bytes)
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "invalid_rows": invalid,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "workers": workers,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Score a CSV or Parquet file with the inference model"
+    )
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output file (same format as the input)")
+    parser.add_argument(
+        "--model",
+        default=os.environ.get("MODEL_PATH", "models/model.pkl"),
+        help="Model artifact (default MODEL_PATH)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: one per CPU; 0 scores in-process)",
+    )
+    parser.add_argument(
+        "--chunk-mb",
+        type=float,
+        default=DEFAULT_CHUNK_BYTES / 2**20,
+        help="CSV block size per worker task in MiB",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Parquet rows per worker task",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = score_file(
+        args.input,
+        args.output,
+        args.model,
+        args.workers,
+        chunk_bytes=int(args.chunk_mb * 2**20),
+        chunk_rows=args.chunk_rows,
+    )
+    print(
+        f"Scored {summary['rows']} rows ({summary['invalid_rows']} invalid) in {summary['seconds']}s "
+        f"with {summary['workers']} workers: {summary['rows_per_second']:.0f} rows/s",
+        file=sys.stderr,
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Adaptive concurrency limiting for the inference service
+
+AIMD (additive increase, multiplicative decrease) limiter driven by the
+observed latency of admitted requests. While requests finish under the
+latency target and the limit is actually being used, the limit grows by
+one; when a request is slow or fails, the limit is cut by a constant
+factor. Requests arriving while the service is at its limit are shed
+immediately instead of queueing, which keeps goodput stable under spikes.
+
+The limit is cut at most once per latency window: only a request
+admitted after the previous cut can cut it again, so one burst of slow
+requests that were all in flight together backs off once, not once per
+request. Requests whose latency says nothing about overload (bulk
+routes, which normally run past the target) release with adapt=False:
+they hold a slot while in flight but never move the limit.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class AdaptiveConcurrencyLimiter:
+    """Thread-safe AIMD concurrency limiter"""
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        latency_target_seconds: float = 0.05,
+        backoff_ratio: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("min_limit must be >= 1 and <= max_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self.backoff_ratio = backoff_ratio
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._last_decrease = float("-inf")
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._inflight = 0
+        self.shed_total = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def try_acquire(self) -> bool:
+        """Admit a request if the current limit allows it"""
+        with self._lock:
+            if self._inflight >= int(self._limit):
+                self.shed_total += 1
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self, latency_seconds: float, failed: bool = False, adapt: bool = True):
+        """
+        Release an admitted request and adapt the limit
+
+        Args:
+            latency_seconds: Time the request spent in the service
+            failed: Whether the request ended in a server-side error
+            adapt: Whether the request's outcome may move the limit
+        """
+        with self._lock:
+            inflight = self._inflight
+            self._inflight = max(self._inflight - 1, 0)
+            if not adapt:
+                return
+
+            if failed or latency_seconds > self.latency_target_seconds:
+                now = self.clock()
+                # Requests admitted before the last cut already counted towards it
+                if now - latency_seconds >= self._last_decrease:
+                    self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                    self._last_decrease = now
+            elif inflight * 2 >= self._limit:
+                # Only grow while the current limit is actually being exercised
+                self._limit = min(self.max_limit, self._limit + 1)
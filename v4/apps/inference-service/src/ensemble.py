@@ -0,0 +1,152 @@
+"""
+Weighted soft-voting ensemble with parallel member evaluation
+
+Serves the best LogisticRegression, SVC and RandomForest pipelines that
+v1/training/train.py's grid search saves under the bundle's "ensemble"
+key. Every member's predict_proba is submitted to a shared thread pool
+(sklearn's compiled kernels release the GIL), and the ensemble waits up
+to a per-call budget. Members that miss the budget are left out of that
+call's vote and the remaining weights are renormalized; if none made it
+(or all that did failed), the first member to succeed answers alone, and
+the call fails only when every member has failed. A member that timed out keeps
+running in the pool, so the pool is sized to absorb a few stragglers.
+
+Per-member latency, calls and timeouts go to the metrics registry.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
+import numpy as np
+from inference_core.metrics import REGISTRY
+
+
+class EnsembleMember:
+    """One fitted estimator and its voting weight"""
+
+    __slots__ = ("model", "name", "weight")
+
+    def __init__(self, name: str, model, weight: float = 1.0):
+        self.name = name
+        self.model = model
+        self.weight = weight
+
+
+def members_from_bundle(entries: list[dict[str, Any]]) -> list[EnsembleMember]:
+    """Build members from the bundle's "ensemble" list ({"name", "model", "weight"})"""
+    return [
+        EnsembleMember(e["name"], e["model"], float(e.get("weight", 1.0)))
+        for e in entries
+    ]
+
+
+class EnsembleModel:
+    """
+    Soft-voting ensemble exposing predict / predict_proba
+
+    Args:
+        members: Fitted members; all must share the same class order
+        timeout_seconds: Budget for one call; late members are skipped
+        max_workers: Size of the member thread pool
+    """
+
+    def __init__(
+        self,
+        members: list[EnsembleMember],
+        timeout_seconds: float = 0.05,
+        max_workers: int | None = None,
+    ):
+        if not members:
+            raise ValueError("An ensemble needs at least one member")
+        classes = [getattr(m.model, "classes_", None) for m in members]
+        if any(c is not None and not np.array_equal(c, classes[0]) for c in classes):
+            raise ValueError("Ensemble members disagree on class order")
+
+        self.members = members
+        self.timeout_seconds = timeout_seconds
+        self.max_workers = max_workers or 2 * len(members)
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._executor_lock = threading.Lock()
+
+        self._seconds = REGISTRY.counter(
+            "inference_ensemble_member_seconds_total",
+            "Wall time of each ensemble member's predict_proba",
+        )
+        self._calls = REGISTRY.counter(
+            "inference_ensemble_member_calls_total",
+            "predict_proba calls per ensemble member",
+        )
+        self._timeouts = REGISTRY.counter(
+            "inference_ensemble_member_timeouts_total",
+            "Ensemble calls that went ahead without this member",
+        )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Pool threads do not survive fork; pre-forked workers build their own
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="ensemble"
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _run_member(self, member: EnsembleMember, X) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            return np.asarray(member.model.predict_proba(X))
+        finally:
+            self._seconds.inc(time.perf_counter() - start, member=member.name)
+            self._calls.inc(member=member.name)
+
+    def predict_with_proba(self, X):
+        """Class ids and soft-vote probabilities from a single round of member calls"""
+        probabilities = self.predict_proba(X)
+        return probabilities.argmax(axis=1), probabilities
+
+    def predict_proba(self, X) -> np.ndarray:
+        pool = self._pool()
+        futures = {
+            pool.submit(self._run_member, member, X): member for member in self.members
+        }
+        done, pending = wait(futures, timeout=self.timeout_seconds)
+        # Nobody answered in time: go with the first member that succeeds,
+        # failing only once every member has failed
+        while pending and all(future.exception() is not None for future in done):
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            done |= finished
+
+        for future in pending:
+            self._timeouts.inc(member=futures[future].name)
+
+        total = 0.0
+        weighted = None
+        errors = []
+        for future in done:
+            member = futures[future]
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+                continue
+            contribution = member.weight * future.result()
+            weighted = contribution if weighted is None else weighted + contribution
+            total += member.weight
+
+        if weighted is None:
+            # Every member failed
+            raise errors[0]
+        return weighted / total
+
+    def predict(self, X) -> np.ndarray:
+        """Column index of the winning class (the service's class id)"""
+        return self.predict_proba(X).argmax(axis=1)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,271 @@
+"""
+Per-class feature contributions for /predict/explain
+
+Auditors need to know why a row got its probabilities, not only what
+they are. Both attribution methods are reduced at load to array lookups,
+so explaining a row costs about as much as predicting it:
+
+- Tree classifiers (DecisionTree, RandomForest, ExtraTrees, alone or
+  behind affine scalers): path attributions. Every split on a row's path
+  moves the node's class distribution; the change is credited to the
+  split feature. Along the path the credits add up to the leaf's
+  probabilities minus the root's, so for every row
+
+      bias + contributions.sum(over features) == predict_proba
+
+  exactly, averaged over the trees of a forest. The cumulative
+  (features, classes) credit of every node is precomputed, so a batch is
+  one vectorized traversal to the leaves (CompactForest.apply) and a
+  gather. This is the path-dependent attribution that TreeSHAP refines
+  by averaging over feature orderings, at O(leaves * depth^2) per tree
+  and row.
+- LogisticRegression (with a Pipeline's scalers folded in, see
+  inference_core/fused.py): coefficient times value in decision
+  (log-odds) space, relative to the training mean:
+  W[c, f] * (x[f] - mean[f]), with bias b[c] + W[c] @ mean. The
+  contributions add up to the decision values.
+
+Global importances are computed once per model: a forest's
+feature_importances_ (as ml/training/train.py prints them), or for a
+linear model the mean |W| scaled by the training standard deviation,
+normalized to sum to 1.
+
+An LRUCache (inference_core/cache.py) keeps the contributions of
+recently explained rows, keyed by their exact feature bytes. An
+explainer, and so its cache, belongs to one loaded model.
+"""
+
+from typing import Any
+
+import numpy as np
+from inference_core.cache import LRUCache
+from inference_core.compact import CHUNK_ROWS, CompactForest, tree_estimators
+from inference_core.fused import FusedLinearModel, NotFusable, fuse_pipeline
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+
+class ExplanationUnsupported(ValueError):
+    """The model has no attribution method"""
+
+
+class Explainer:
+    """
+    Cached per-row contributions; subclasses compute them for a batch
+
+    Args:
+        bias: (n_classes,) value every row starts from
+        importances: (n_features,) global importances, summing to 1
+        cache_rows: Capacity of the explanation cache
+    """
+
+    method = ""
+    space = ""
+
+    def __init__(
+        self, bias: np.ndarray, importances: np.ndarray, cache_rows: int = 10000
+    ):
+        self.bias = np.asarray(bias, dtype=np.float64)
+        self.importances = np.asarray(importances, dtype=np.float64)
+        self.n_classes = len(self.bias)
+        self.n_features = len(self.importances)
+        self.cache = LRUCache(cache_rows)
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """(n, n_features, n_classes) contributions, without the cache"""
+        raise NotImplementedError
+
+    def explain(self, X) -> tuple[np.ndarray, int]:
+        """
+        Contributions of each row, computing each distinct uncached row once
+
+        Returns:
+            ((n, n_features, n_classes) contributions, rows not computed:
+            cache hits and repeats within X)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        result = np.empty((len(X), self.n_features, self.n_classes))
+        pending: dict[bytes, list[int]] = {}
+        for i, row in enumerate(X):
+            key = row.tobytes()
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                pending[key] = [i]
+            else:
+                result[i] = cached
+        if pending:
+            computed = self.contributions(
+                X[[indices[0] for indices in pending.values()]]
+            )
+            for (key, indices), row in zip(pending.items(), computed):
+                result[indices] = row
+                self.cache.put(key, row.copy())
+        return result, len(X) - len(pending)
+
+    def global_importances(self, feature_names) -> dict[str, float]:
+        return {
+            name: float(value) for name, value in zip(feature_names, self.importances)
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "method": self.method,
+            "space": self.space,
+            "cache_rows": len(self.cache),
+            "cache_hits_total": self.cache.hits_total,
+            "cache_misses_total": self.cache.misses_total,
+        }
+
+
+class TreeExplainer(Explainer):
+    """
+    Path attributions of a tree classifier or forest
+
+    Args:
+        model: Fitted DecisionTreeClassifier, RandomForestClassifier or ExtraTreesClassifier
+        scale, offset: Affine preprocessing in front of the trees (X * scale + offset)
+        cache_rows: Capacity of the explanation cache
+    """
+
+    method = "tree_path"
+    space = "probability"
+
+    def __init__(
+        self,
+        model,
+        scale: np.ndarray | None = None,
+        offset: np.ndarray | None = None,
+        cache_rows: int = 10000,
+    ):
+        trees = tree_estimators(model)
+        n_features = int(trees[0].tree_.n_features)
+        nodes, roots = [], []
+        for tree in trees:
+            t = tree.tree_
+            # Normalize per node: counts or fractions depending on the sklearn version
+            value = t.value[:, 0, :]
+            value = value / value.sum(axis=1, keepdims=True)
+            credit = np.zeros((t.node_count, n_features, value.shape[1]))
+            # Children are numbered after their parent, so one pass in node
+            # order extends each path from an already finished prefix
+            for node in np.flatnonzero(t.children_left >= 0):
+                feature = t.feature[node]
+                for child in (t.children_left[node], t.children_right[node]):
+                    credit[child] = credit[node]
+                    credit[child, feature] += value[child] - value[node]
+            nodes.append(credit)
+            roots.append(value[0])
+
+        super().__init__(np.mean(roots, axis=0), model.feature_importances_, cache_rows)
+        # Same global node numbering as the compact forest's traversal
+        self.forest = CompactForest.from_model(model)
+        self.node_contributions = np.concatenate(nodes)
+        self.scale = scale
+        self.offset = offset
+
+    @property
+    def nbytes(self) -> int:
+        return self.node_contributions.nbytes + self.forest.nbytes
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        if self.scale is not None:
+            X = X * self.scale + self.offset
+        parts = []
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self.forest.apply(X[start : start + CHUNK_ROWS])
+            parts.append(np.take(self.node_contributions, leaves, axis=0).mean(axis=0))
+        return np.concatenate(parts)
+
+
+class LinearExplainer(Explainer):
+    """
+    Coefficient-times-value attributions of a logistic regression
+
+    Args:
+        coef: (n_classes or 1, n_features) weights on the raw features
+        intercept: (n_classes or 1,) intercepts
+        mean, std: Training mean and standard deviation per feature
+        cache_rows: Capacity of the explanation cache
+    """
+
+    method = "linear"
+    space = "log_odds"
+
+    def __init__(
+        self,
+        coef: np.ndarray,
+        intercept: np.ndarray,
+        mean: np.ndarray | None = None,
+        std: np.ndarray | None = None,
+        cache_rows: int = 10000,
+    ):
+        coef = np.atleast_2d(np.asarray(coef, dtype=np.float64))
+        intercept = np.atleast_1d(np.asarray(intercept, dtype=np.float64))
+        if len(coef) == 1:
+            # Binary: one decision value for the positive class, negated for the other
+            coef, intercept = (
+                np.vstack([-coef, coef]),
+                np.concatenate([-intercept, intercept]),
+            )
+        n_features = coef.shape[1]
+        self.mean = (
+            np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        )
+        std = np.ones(n_features) if std is None else np.asarray(std, dtype=np.float64)
+        importances = np.abs(coef).mean(axis=0) * std
+        total = importances.sum()
+        super().__init__(
+            intercept + coef @ self.mean,
+            importances / total if total else importances,
+            cache_rows,
+        )
+        self.coef_t = np.ascontiguousarray(coef.T)
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean)[:, :, None] * self.coef_t
+
+
+def build_explainer(
+    model, reference_stats: dict[str, Any] | None = None, cache_rows: int = 10000
+) -> Explainer:
+    """
+    Attribution structures for a fitted model
+
+    Args:
+        model: The artifact's estimator (before any serving-mode wrapping)
+        reference_stats: Training statistics; their feature mean and std
+            anchor linear attributions
+        cache_rows: Capacity of the explanation cache
+
+    Raises:
+        ExplanationUnsupported: for models that are neither trees nor a
+            logistic regression, or whose preprocessing is not affine
+    """
+    reference_stats = reference_stats or {}
+    mean, std = reference_stats.get("feature_mean"), reference_stats.get("feature_std")
+    scale = offset = None
+    estimator = model
+    if isinstance(model, Pipeline):
+        try:
+            fused = fuse_pipeline(model)
+        except NotFusable as e:
+            raise ExplanationUnsupported(str(e))
+        if isinstance(fused, FusedLinearModel):
+            return LinearExplainer(
+                fused.coef_t.T, fused.intercept, mean, std, cache_rows
+            )
+        scale, offset, estimator = fused.scale, fused.offset, fused.estimator
+
+    if isinstance(estimator, LogisticRegression):
+        return LinearExplainer(
+            estimator.coef_, estimator.intercept_, mean, std, cache_rows
+        )
+    try:
+        return TreeExplainer(estimator, scale, offset, cache_rows)
+    except ValueError:
+        raise ExplanationUnsupported(
+            f"No attribution method for {type(estimator).__name__}"
+        )
@@ -0,0 +1,100 @@
+"""
+Direct JSON encoding of single-row prediction responses
+
+Returning a PredictionResponse from /predict costs a pydantic model,
+a probabilities .tolist(), a datetime.utcnow().isoformat(), then
+FastAPI's response validation, jsonable_encoder and json.dumps. The
+schema is fixed, so PredictionEncoder renders the same bytes from
+precomputed pieces instead:
+
+- one bytes template per class, with the class id, the JSON-escaped
+  class name and the model version already in place, so a response is
+  a single bytes %-format of the three probabilities and the timestamp;
+- probabilities written with %r, the float repr json.dumps uses;
+- the timestamp's "YYYY-MM-DDTHH:MM:SS" prefix cached per second, with
+  isoformat()'s rule of omitting a zero microsecond part.
+
+The output is byte-for-byte what FastAPI's JSONResponse produces for the
+equivalent PredictionResponse (compact separators, ensure_ascii=False).
+"""
+
+import json
+import math
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import numpy as np
+
+MEDIA_TYPE = "application/json"
+
+
+def _dumps(value) -> str:
+    # Same options as starlette.responses.JSONResponse.render
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    )
+
+
+class PredictionEncoder:
+    """
+    Renders PredictionResponse JSON from a class id and a probability row
+
+    Args:
+        class_names: Class name per class id
+        model_version: Version string reported in every response
+    """
+
+    def __init__(self, class_names: Sequence[str], model_version: str):
+        self.class_names = list(class_names)
+        self.model_version = model_version
+        self._templates: list[bytes] = []
+        self._second = (-1, "")
+        self._build_templates()
+
+    def _build_templates(self):
+        n_classes = len(self.class_names)
+        probabilities = ",".join(["%r"] * n_classes)
+        suffix = f'],"model_version":{_dumps(self.model_version)},"timestamp":"'
+        self._templates = [
+            (
+                f'{{"predicted_class_id":{class_id},"predicted_class_name":{_dumps(name)},"probabilities":['.replace(
+                    "%", "%%"
+                )
+                + probabilities
+                + suffix.replace("%", "%%")
+                + '%s"}'
+            ).encode("utf-8")
+            for class_id, name in enumerate(self.class_names)
+        ]
+
+    def set_model_version(self, model_version: str):
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self._build_templates()
+
+    def timestamp(self) -> str:
+        """Current UTC time formatted like datetime.utcnow().isoformat()"""
+        now = time.time()
+        second = int(now)
+        micro = int((now - second) * 1e6)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = (
+                datetime.fromtimestamp(second, UTC).replace(tzinfo=None).isoformat()
+            )
+            # Replaced as one tuple so threads never pair a second with another's prefix
+            self._second = (second, prefix)
+        return prefix if micro == 0 else f"{prefix}.{micro:06d}"
+
+    def encode(self, class_id: int, probabilities: np.ndarray) -> bytes:
+        """
+        JSON body for one prediction
+
+        Raises:
+            ValueError: for non-finite probabilities, as json.dumps(allow_nan=False) would
+        """
+        values = probabilities.tolist()
+        if not math.isfinite(sum(values)):
+            raise ValueError("Out of range float values are not JSON compliant")
+        return self._templates[class_id] % (*values, self.timestamp().encode("ascii"))
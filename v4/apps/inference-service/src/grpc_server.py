@@ -0,0 +1,163 @@
+"""
+gRPC endpoint for the inference service
+
+Serves iris.inference.v1.InferenceService (see proto/iris_inference.proto)
+from the same process as the FastAPI app, sharing its loaded model and
+prediction core. Unary Predict mirrors POST /predict; the bidirectional
+PredictStream lets high-rate callers keep one multiplexed HTTP/2
+connection open and stream rows instead of opening a request per row.
+An invalid row in the stream does not end it: like a null row of
+/predict/batch, its response carries only request_id and the error.
+
+Handlers are registered generically against the generated messages, so
+only iris_inference_pb2 needs to be generated from the proto.
+"""
+
+import logging
+from collections.abc import Callable
+from concurrent import futures
+
+import grpc
+import numpy as np
+
+from . import iris_inference_pb2 as pb
+from . import validation
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "iris.inference.v1.InferenceService"
+API_KEY_METADATA = "x-api-key"
+
+
+class InferenceServicer:
+    """
+    Implements InferenceService on top of the REST prediction core
+
+    Args:
+        get_model: Returns the currently published model (or None)
+        predict_row: The REST single-row core, (model, features) -> PredictionResponse
+        api_key: Required value of the x-api-key metadata, empty to disable
+    """
+
+    def __init__(self, get_model: Callable, predict_row: Callable, api_key: str = ""):
+        self._get_model = get_model
+        self._predict_row = predict_row
+        self._api_key = api_key.strip()
+
+    def _authorize(self, context):
+        if not self._api_key:
+            return
+        metadata = dict(context.invocation_metadata())
+        if metadata.get(API_KEY_METADATA) != self._api_key:
+            logger.warning("Unauthorized gRPC prediction attempt")
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, "Unauthorized")
+
+    def _model(self, context):
+        model = self._get_model()
+        if model is None:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Model not available")
+        return model
+
+    def _score(self, model, request, features: np.ndarray, context):
+        try:
+            response = self._predict_row(model, features)
+        except Exception as e:
+            logger.exception("gRPC prediction failed")
+            context.abort(grpc.StatusCode.INTERNAL, f"Prediction failed: {e}")
+
+        return pb.PredictResponse(
+            request_id=request.request_id, **response.model_dump()
+        )
+
+    def Predict(self, request, context):
+        self._authorize(context)
+        model = self._model(context)
+        features = _features(request)
+        error = int(validation.row_errors(features)[0])
+        if error:
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, validation.ERROR_MESSAGES[error]
+            )
+        return self._score(model, request, features, context)
+
+    def PredictStream(self, request_iterator, context):
+        self._authorize(context)
+        for request in request_iterator:
+            model = self._model(context)
+            features = _features(request)
+            error = int(validation.row_errors(features)[0])
+            if error:
+                yield pb.PredictResponse(
+                    request_id=request.request_id,
+                    error=validation.ERROR_MESSAGES[error],
+                )
+                continue
+            yield self._score(model, request, features, context)
+
+
+def _features(request) -> np.ndarray:
+    return np.array(
+        [
+            [
+                request.sepal_length,
+                request.sepal_width,
+                request.petal_length,
+                request.petal_width,
+            ]
+        ]
+    )
+
+
+def _generic_handler(servicer: InferenceServicer):
+    return grpc.method_handlers_generic_handler(
+        SERVICE_NAME,
+        {
+            "Predict": grpc.unary_unary_rpc_method_handler(
+                servicer.Predict,
+                request_deserializer=pb.PredictRequest.FromString,
+                response_serializer=pb.PredictResponse.SerializeToString,
+            ),
+            "PredictStream": grpc.stream_stream_rpc_method_handler(
+                servicer.PredictStream,
+                request_deserializer=pb.PredictRequest.FromString,
+                response_serializer=pb.PredictResponse.SerializeToString,
+            ),
+        },
+    )
+
+
+def create_server(
+    servicer: InferenceServicer,
+    port: int,
+    max_workers: int = 8,
+    max_concurrent_rpcs: int | None = None,
+) -> tuple[grpc.Server, int]:
+    """
+    Build (but do not start) a gRPC server for the servicer
+
+    Returns:
+        The server and the port it is bound to (useful with port=0)
+    """
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grpc"),
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+    )
+    server.add_generic_rpc_handlers((_generic_handler(servicer),))
+    bound_port = server.add_insecure_port(f"[::]:{port}")
+    return server, bound_port
+
+
+class InferenceStub:
+    """Client stub for InferenceService, for tests, benchmarks and tooling"""
+
+    def __init__(self, channel: grpc.Channel):
+        self.Predict = channel.unary_unary(
+            f"/{SERVICE_NAME}/Predict",
+            request_serializer=pb.PredictRequest.SerializeToString,
+            response_deserializer=pb.PredictResponse.FromString,
+        )
+        self.PredictStream = channel.stream_stream(
+            f"/{SERVICE_NAME}/PredictStream",
+            request_serializer=pb.PredictRequest.SerializeToString,
+            response_deserializer=pb.PredictResponse.FromString,
+        )
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: iris_inference.proto
+# Protobuf Python Version: 4.25.0
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14iris_inference.proto\x12\x11iris.inference.v1\"z\n\x0ePredictRequest\x12\x14\n\x0csepal_length\x18\x01 \x01(\x01\x12\x13\n\x0bsepal_width\x18\x02 \x01(\x01\x12\x14\n\x0cpetal_length\x18\x03 \x01(\x01\x12\x13\n\x0bpetal_width\x18\x04 \x01(\x01\x12\x12\n\nrequest_id\x18\x05 \x01(\t\"\xaf\x01\n\x0fPredictResponse\x12\x1a\n\x12predicted_class_id\x18\x01 \x01(\x05\x12\x1c\n\x14predicted_class_name\x18\x02 \x01(\t\x12\x15\n\rprobabilities\x18\x03 \x03(\x01\x12\x15\n\rmodel_version\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x12\n\nrequest_id\x18\x06 \x01(\t\x12\r\n\x05\x65rror\x18\x07 \x01(\t2\xc0\x01\n\x10InferenceService\x12P\n\x07Predict\x12!.iris.inference.v1.PredictRequest\x1a\".iris.inference.v1.PredictResponse\x12Z\n\rPredictStream\x12!.iris.inference.v1.PredictRequest\x1a\".iris.inference.v1.PredictResponse(\x01\x30\x01\x42\x11\n\rcom.iris.grpcP\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'iris_inference_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  _globals['DESCRIPTOR']._options = None
+  _globals['DESCRIPTOR']._serialized_options = b'\n\rcom.iris.grpcP\001'
+  _globals['_PREDICTREQUEST']._serialized_start=43
+  _globals['_PREDICTREQUEST']._serialized_end=165
+  _globals['_PREDICTRESPONSE']._serialized_start=168
+  _globals['_PREDICTRESPONSE']._serialized_end=343
+  _globals['_INFERENCESERVICE']._serialized_start=346
+  _globals['_INFERENCESERVICE']._serialized_end=538
+# @@protoc_insertion_point(module_scope)
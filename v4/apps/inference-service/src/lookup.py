@@ -0,0 +1,250 @@
+"""
+Precomputed decision table over the quantized iris feature space
+
+Inputs are four measurements in 0-10 cm at 0.1 cm resolution, so the
+whole domain is a 101^4 grid. A tree ensemble is piecewise constant
+between its split thresholds, so grid values of one feature that fall
+between the same pair of thresholds always give the same prediction.
+Each feature axis is compressed to those intervals (a 101-entry code
+array per feature) and the model is evaluated once per interval
+combination; for the production random forest that is a few tens of
+thousands of cells instead of ~10^8.
+
+Per cell the table stores the model's class id and its probabilities
+quantized to uint8 (p * 255). A lookup is four array indexes and a
+ravel; rows that are not on the 0.1 cm grid (or outside 0-10) are
+answered by the real model. Probabilities carry at most 1/510 of
+quantization error; build() reports the measured loss.
+"""
+
+import logging
+import time
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GRID_LOW = 0.0
+GRID_HIGH = 10.0
+GRID_RESOLUTION = 0.1
+
+# Tolerance for "on the grid": 5.1 arrives as 5.0999999999999996
+_ON_GRID_TOLERANCE = 1e-6
+
+
+class LookupTableUnsupported(ValueError):
+    """The model cannot be tabulated within the configured budget"""
+
+
+def _tree_thresholds(model, n_features: int) -> list[np.ndarray] | None:
+    """Sorted split thresholds per feature over every tree, or None for non-tree models"""
+    if hasattr(model, "tree_"):
+        trees = [model]
+    elif hasattr(model, "estimators_"):
+        trees = list(np.ravel(model.estimators_))
+        if not all(hasattr(tree, "tree_") for tree in trees):
+            return None
+    else:
+        return None
+
+    thresholds = [[] for _ in range(n_features)]
+    for tree in trees:
+        split = tree.tree_.feature >= 0
+        for feature, threshold in zip(
+            tree.tree_.feature[split], tree.tree_.threshold[split]
+        ):
+            thresholds[feature].append(threshold)
+    return [np.unique(np.asarray(t, dtype=np.float64)) for t in thresholds]
+
+
+class DecisionTable:
+    """
+    Class ids and uint8 probabilities over the interval-compressed grid
+
+    Build with DecisionTable.build(model); look up with lookup(features).
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        shape: tuple,
+        class_ids: np.ndarray,
+        probabilities: np.ndarray,
+        report: dict[str, Any] | None = None,
+    ):
+        self.codes = codes
+        self.shape = shape
+        self.class_ids = class_ids
+        self.probabilities = probabilities
+        self.report = report or {}
+        self._scale = 1.0 / GRID_RESOLUTION
+        self._last_index = codes.shape[1] - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.class_ids.nbytes + self.probabilities.nbytes
+
+    @classmethod
+    def build(
+        cls,
+        model,
+        n_features: int = 4,
+        max_cells: int = 5_000_000,
+        eval_rows: int = 20000,
+        seed: int = 0,
+    ) -> "DecisionTable":
+        """
+        Tabulate a fitted tree model over the 0.1 cm grid
+
+        Args:
+            model: Fitted sklearn tree or tree ensemble
+            n_features: Number of input features
+            max_cells: Largest table allowed (cells, i.e. interval combinations)
+            eval_rows: Random on-grid rows used to measure the accuracy loss
+            seed: Seed for the evaluation rows
+
+        Raises:
+            LookupTableUnsupported: for non-tree models or tables over max_cells
+        """
+        start = time.perf_counter()
+        thresholds = _tree_thresholds(model, n_features)
+        if thresholds is None:
+            raise LookupTableUnsupported(f"{type(model).__name__} is not a tree model")
+
+        # sklearn compares float32(x) <= threshold, so code the float32 grid
+        grid = np.round(
+            np.arange(GRID_LOW, GRID_HIGH + GRID_RESOLUTION / 2, GRID_RESOLUTION), 1
+        )
+        grid32 = grid.astype(np.float32).astype(np.float64)
+        codes = np.empty((n_features, len(grid)), dtype=np.int32)
+        representatives = []
+        for f in range(n_features):
+            intervals = np.searchsorted(thresholds[f], grid32, side="left")
+            _, first, dense = np.unique(
+                intervals, return_index=True, return_inverse=True
+            )
+            codes[f] = dense
+            representatives.append(grid[first])
+
+        shape = tuple(len(r) for r in representatives)
+        n_cells = int(np.prod(shape))
+        if n_cells > max_cells:
+            raise LookupTableUnsupported(
+                f"Table needs {n_cells} cells, budget is {max_cells}"
+            )
+
+        mesh = np.meshgrid(*representatives, indexing="ij")
+        cell_features = np.stack([m.ravel() for m in mesh], axis=1)
+        probabilities = np.asarray(model.predict_proba(cell_features))
+        class_ids = np.asarray(model.predict(cell_features))
+
+        table = cls(
+            codes,
+            shape,
+            class_ids.astype(np.uint8),
+            np.rint(probabilities * 255).astype(np.uint8),
+        )
+        table.report = dict(
+            evaluate(table, model, n_features, eval_rows, seed),
+            cells=n_cells,
+            axis_intervals=list(shape),
+            bytes=table.nbytes,
+            build_seconds=round(time.perf_counter() - start, 3),
+        )
+        return table
+
+    def lookup(self, features: np.ndarray):
+        """
+        Answer the on-grid rows of an (n, 4) matrix from the table
+
+        Returns:
+            (on_grid mask, class ids, float probabilities) for the on-grid rows
+        """
+        scaled = np.asarray(features, dtype=np.float64) * self._scale
+        index = np.rint(scaled)
+        on_grid = np.all(
+            (np.abs(scaled - index) < _ON_GRID_TOLERANCE)
+            & (index >= 0)
+            & (index <= self._last_index),
+            axis=1,
+        )
+        index = index[on_grid].astype(np.intp)
+        cells = np.ravel_multi_index(
+            tuple(self.codes[f, index[:, f]] for f in range(index.shape[1])), self.shape
+        )
+        return on_grid, self.class_ids[cells], self.probabilities[cells] / 255.0
+
+
+def evaluate(
+    table: DecisionTable, model, n_features: int, rows: int, seed: int = 0
+) -> dict[str, Any]:
+    """Agreement and probability error of the table against the model on random grid rows"""
+    if rows <= 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    last = table.codes.shape[1] - 1
+    features = rng.integers(0, last + 1, size=(rows, n_features)) * GRID_RESOLUTION
+    _, class_ids, probabilities = table.lookup(features)
+    expected = np.asarray(model.predict_proba(features))
+    error = np.abs(probabilities - expected)
+    return {
+        "eval_rows": rows,
+        "class_agreement": float(
+            np.mean(class_ids == np.asarray(model.predict(features)))
+        ),
+        "max_probability_error": float(error.max()),
+        "mean_probability_error": float(error.mean()),
+    }
+
+
+class TableModel:
+    """
+    Serves predict / predict_proba from a DecisionTable, falling back to
+    the wrapped model for off-grid rows
+    """
+
+    def __init__(self, model, table: DecisionTable):
+        self.model = model
+        self.table = table
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        on_grid, _, probabilities = self.table.lookup(X)
+        if on_grid.all():
+            return probabilities
+        result = np.empty((len(X), probabilities.shape[1]))
+        result[on_grid] = probabilities
+        result[~on_grid] = self.model.predict_proba(X[~on_grid])
+        return result
+
+    def predict_with_proba(self, X):
+        """Class ids and probabilities from one table lookup and at most one model call"""
+        X = np.asarray(X, dtype=np.float64)
+        on_grid, class_ids, probabilities = self.table.lookup(X)
+        if on_grid.all():
+            return class_ids.astype(np.int64), probabilities
+        # Off-grid rows: class ids are the argmax of one predict_proba call, as in sklearn's predict
+        off_grid_probabilities = np.asarray(self.model.predict_proba(X[~on_grid]))
+        off_grid_ids = off_grid_probabilities.argmax(axis=1)
+        classes = getattr(self.model, "classes_", None)
+        if classes is not None:
+            off_grid_ids = np.asarray(classes)[off_grid_ids]
+
+        result_ids = np.empty(len(X), dtype=np.int64)
+        result_ids[on_grid] = class_ids
+        result_ids[~on_grid] = off_grid_ids
+        result = np.empty((len(X), probabilities.shape[1]))
+        result[on_grid] = probabilities
+        result[~on_grid] = off_grid_probabilities
+        return result_ids, result
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        on_grid, class_ids, _ = self.table.lookup(X)
+        if on_grid.all():
+            return class_ids.astype(np.int64)
+        result = np.empty(len(X), dtype=np.int64)
+        result[on_grid] = class_ids
+        result[~on_grid] = self.model.predict(X[~on_grid])
+        return result
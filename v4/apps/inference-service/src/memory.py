@@ -0,0 +1,234 @@
+"""
+Memory footprint of loaded models and the budget they must fit in
+
+The deployment caps the container's memory, and an oversized artifact
+(a large grid-search winner, an unpruned forest) is simply OOM-killed,
+taking the served model down with it. A model's footprint is measured
+two ways while it is prepared:
+
+- deep size: every object reachable from the served model (and its
+  explainer), with each NumPy buffer counted once. sklearn's Cython
+  trees expose their node and value arrays through __getstate__;
+- RSS growth: resident set size of the process after preparing the
+  model minus before loading it. It also covers allocator overhead and
+  load-time temporaries that are still resident, but can read low when
+  freed memory is reused.
+
+The footprint is the larger of the two. check_before_load() refuses an
+artifact whose file size alone exceeds the budget, or which would push
+the process past its RSS budget, before it is unpickled (the unpickled
+arrays are about the size of an uncompressed joblib file).
+check_footprint() applies the same budgets to the measured model.
+"""
+
+import gc
+import os
+import sys
+import threading
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any
+
+import numpy as np
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+# cgroup v1 reports "no limit" as a page-rounded 2^63
+_UNLIMITED = 1 << 60
+_SKIPPED = (
+    type,
+    ModuleType,
+    FunctionType,
+    BuiltinFunctionType,
+    MethodType,
+    threading.Thread,
+)
+_SCALARS = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Loading the model would exceed the configured memory budget"""
+
+
+def deep_sizeof(*objects) -> int:
+    """Bytes reachable from the objects, counting shared objects and array buffers once"""
+    seen: dict[int, Any] = {}
+    buffers = set()
+    stack = list(objects)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        # Holding on to visited objects keeps their ids from being reused
+        seen[id(obj)] = obj
+
+        if isinstance(obj, np.ndarray):
+            root = obj
+            while isinstance(root.base, np.ndarray):
+                root = root.base
+            total += sys.getsizeof(obj) - (obj.nbytes if obj.base is None else 0)
+            address = root.__array_interface__["data"][0]
+            if address not in buffers:
+                buffers.add(address)
+                total += root.nbytes
+            if obj.dtype.hasobject:
+                stack.extend(obj.ravel().tolist())
+            continue
+
+        total += sys.getsizeof(obj)
+        if isinstance(obj, _SCALARS):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        else:
+            # Extension types (sklearn's Tree) expose their arrays as pickled state
+            try:
+                state = obj.__getstate__()
+            except (AttributeError, TypeError, ValueError):
+                # Not picklable: no state to walk
+                state = None
+            if isinstance(state, dict):
+                stack.append(state)
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return total
+
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def cgroup_memory_limit(root: str = CGROUP_ROOT) -> int | None:
+    """Memory limit of the container in bytes, or None when there is none (or no cgroup)"""
+    for path in (
+        os.path.join(root, "memory.max"),
+        os.path.join(root, "memory", "memory.limit_in_bytes"),
+    ):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value == "max":
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            return None
+        return limit if 0 < limit < _UNLIMITED else None
+    return None
+
+
+class MemoryBudget:
+    """
+    Per-model footprint budget plus an RSS ceiling for the whole process
+
+    Args:
+        model_bytes: Largest footprint one model may have (0 = no budget)
+        process_bytes: Largest RSS the process may reach while loading (0 = no ceiling)
+    """
+
+    def __init__(self, model_bytes: int = 0, process_bytes: int = 0):
+        self.model_bytes = model_bytes
+        self.process_bytes = process_bytes
+
+    @classmethod
+    def from_settings(
+        cls,
+        model_budget_mb: float,
+        process_budget_ratio: float,
+        workers: int = 1,
+        cgroup_root: str = CGROUP_ROOT,
+    ) -> "MemoryBudget":
+        """
+        Model budget in MiB; process ceiling as a fraction of the container
+        memory limit, shared evenly by the container's pre-forked workers
+        (each one only sees its own RSS)
+        """
+        limit = cgroup_memory_limit(cgroup_root)
+        process_bytes = 0
+        if limit and process_budget_ratio > 0:
+            process_bytes = int(limit * process_budget_ratio / max(workers, 1))
+        return cls(int(model_budget_mb * 2**20), process_bytes)
+
+    def check_before_load(self, artifact_bytes: int, rss_bytes: int | None):
+        """
+        Refuse an artifact that cannot fit before it is unpickled
+
+        Raises:
+            MemoryBudgetExceeded: if the file alone exceeds the model budget,
+                or the process would pass its RSS ceiling loading it
+        """
+        if self.model_bytes and artifact_bytes > self.model_bytes:
+            raise MemoryBudgetExceeded(
+                f"Artifact of {_mib(artifact_bytes)} exceeds the model memory budget of {_mib(self.model_bytes)}"
+            )
+        if (
+            self.process_bytes
+            and rss_bytes is not None
+            and rss_bytes + artifact_bytes > self.process_bytes
+        ):
+            raise MemoryBudgetExceeded(
+                f"Loading {_mib(artifact_bytes)} on top of {_mib(rss_bytes)} resident would exceed "
+                f"the process memory budget of {_mib(self.process_bytes)}"
+            )
+
+    def check_footprint(self, report: dict[str, Any]):
+        """
+        Refuse a prepared model whose measured footprint does not fit
+
+        Raises:
+            MemoryBudgetExceeded: if the footprint exceeds the model budget,
+                or the process RSS after preparing it exceeds the ceiling
+        """
+        if self.model_bytes and report["footprint_bytes"] > self.model_bytes:
+            raise MemoryBudgetExceeded(
+                f"Model footprint of {_mib(report['footprint_bytes'])} exceeds the model memory budget "
+                f"of {_mib(self.model_bytes)}"
+            )
+        rss = report.get("process_rss_bytes")
+        if self.process_bytes and rss is not None and rss > self.process_bytes:
+            raise MemoryBudgetExceeded(
+                f"Process RSS of {_mib(rss)} after loading exceeds the process memory budget "
+                f"of {_mib(self.process_bytes)}"
+            )
+
+
+def _mib(n: int) -> str:
+    return f"{n / 2**20:.1f} MiB"
+
+
+class LoadMeter:
+    """RSS before and after preparing a model, and the footprint report"""
+
+    def __init__(self):
+        gc.collect()
+        self.rss_before = process_rss_bytes()
+
+    def report(self, *objects, artifact_bytes: int | None = None) -> dict[str, Any]:
+        gc.collect()
+        rss_after = process_rss_bytes()
+        estimator_bytes = deep_sizeof(*objects)
+        rss_delta = (
+            rss_after - self.rss_before
+            if rss_after is not None and self.rss_before is not None
+            else None
+        )
+        return {
+            "estimator_bytes": estimator_bytes,
+            "rss_delta_bytes": rss_delta,
+            "footprint_bytes": max(estimator_bytes, rss_delta or 0),
+            "artifact_bytes": artifact_bytes,
+            "process_rss_bytes": rss_after,
+        }
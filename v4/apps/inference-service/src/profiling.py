@@ -0,0 +1,144 @@
+"""
+Low-overhead profiling for the prediction hot path
+
+- SamplingProfiler: a background thread snapshots every other thread's
+  stack with sys._current_frames() at a fixed interval and aggregates
+  them into collapsed stacks ("frame;frame;frame count"), the input
+  format of flamegraph.pl, speedscope and friends. Nothing is installed
+  in the profiled threads, so the cost is one stack walk per interval.
+- PhaseTimers: per-phase wall-time accumulators for the request path that
+  can be switched on and off at runtime; when off, timing a phase is a
+  single boolean check.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+from inference_core.metrics import REGISTRY
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already being collected"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SamplingProfiler:
+    """
+    Statistical wall-clock profiler over all Python threads
+
+    Args:
+        interval_seconds: Time between stack samples
+        max_depth: Frames kept per stack (innermost frames win)
+    """
+
+    def __init__(self, interval_seconds: float = 0.01, max_depth: int = 64):
+        self.interval_seconds = interval_seconds
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    def _sample(self, stacks: StackCounter, own_ident: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+
+    def profile(self, seconds: float) -> str:
+        """
+        Sample all threads for `seconds` and return collapsed stacks
+
+        Blocks the calling thread for the duration; run it off the event loop.
+
+        Raises:
+            ProfilerBusy: if another profile is in progress
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            stacks: StackCounter = StackCounter()
+            own_ident = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                self._sample(stacks, own_ident)
+                time.sleep(self.interval_seconds)
+            return "".join(
+                f"{stack} {count}\n" for stack, count in stacks.most_common()
+            )
+        finally:
+            self._lock.release()
+
+
+class PhaseTimers:
+    """Runtime-toggleable wall-time accumulators per request phase"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, float]] = {}
+        self._seconds = REGISTRY.counter(
+            "inference_phase_seconds_total",
+            "Wall time spent per request phase (when phase timers are on)",
+        )
+        self._count = REGISTRY.counter(
+            "inference_phase_count_total",
+            "Timed executions per request phase (when phase timers are on)",
+        )
+
+    def record(self, phase: str, seconds: float):
+        """Record one execution of a phase (ignored while disabled)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats.get(phase)
+            if stats is None:
+                stats = self._stats[phase] = {
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                }
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        self._seconds.inc(seconds, phase=phase)
+        self._count.inc(phase=phase)
+
+    @contextmanager
+    def time(self, phase: str):
+        """Time a block as one execution of a phase"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Per-phase count, total, mean and max, in seconds"""
+        with self._lock:
+            return {
+                phase: dict(stats, mean_seconds=stats["total_seconds"] / stats["count"])
+                for phase, stats in self._stats.items()
+            }
+
+    def reset(self, enabled: bool | None = None):
+        with self._lock:
+            self._stats.clear()
+        if enabled is not None:
+            self.enabled = enabled
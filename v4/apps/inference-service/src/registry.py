@@ -0,0 +1,496 @@
+"""
+Model registry prefetch and staged activation
+
+Without prefetch a pod only picks up a new model version when it
+restarts, so a rollout makes every pod download the artifact at the same
+moment. ModelPrefetcher instead polls the registry from a background
+thread, at an interval with random jitter so pods spread out, and
+prepares the next version ahead of time:
+
+1. download it to the local staging directory (<version>/model.pkl.part),
+2. verify it: the sha256 from the version's model.json when present,
+   then a full load, build and warm-up through the service's own
+   prepare function,
+3. keep it staged, on disk and warm in memory.
+
+Activation publishes the staged model, so it only costs an in-memory
+swap. It happens on an explicit signal (request_activation(), SIGUSR2 in
+src.serve) or when the version pin changes to the staged version. The
+pin is a file, such as the mounted model-config ConfigMap key, holding
+the version to serve; "latest" or an empty pin means prefetch the
+newest version without switching.
+
+Pre-forked workers each run their own prefetcher but share the staging
+directory: downloads take an exclusive file lock and renaming
+model.pkl.part happens only after verification, so a pod downloads each
+version once and the other workers load the verified file. Activation
+also records the version in the staging directory's "active" file, so
+the pre-fork supervisor can respawn a worker on it (see read_active).
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = "model.pkl"
+METADATA_NAME = "model.json"
+PART_SUFFIX = ".part"
+ACTIVE_NAME = "active"
+LATEST = "latest"
+
+
+def version_key(version: str) -> tuple:
+    """Sort key ordering "1.10.0" after "1.9.0"; non-numeric parts compare as text"""
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.split(r"[.\-+]", version.lstrip("v"))
+    )
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry(ABC):
+    """Versioned model artifacts laid out as <prefix>/v<version>/model.pkl (+ model.json)"""
+
+    @abstractmethod
+    def get_latest_version(self) -> str | None:
+        """Newest version in the registry, or None when it is empty"""
+
+    @abstractmethod
+    def download(self, version: str, local_path: str):
+        """
+        Write the artifact of `version` to local_path
+
+        Raises:
+            FileNotFoundError: when the version does not exist
+        """
+
+    @abstractmethod
+    def get_metadata(self, version: str) -> dict[str, Any] | None:
+        """The version's model.json (training date, metrics, sha256), if any"""
+
+
+class LocalDirectoryRegistry(ModelRegistry):
+    """Registry in a local or mounted directory (dev/test)"""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+    def _path(self, version: str, name: str) -> str:
+        return os.path.join(self.base_path, f"v{version}", name)
+
+    def get_latest_version(self) -> str | None:
+        if not os.path.isdir(self.base_path):
+            return None
+        versions = [
+            entry[1:]
+            for entry in os.listdir(self.base_path)
+            if entry.startswith("v")
+            and os.path.exists(self._path(entry[1:], ARTIFACT_NAME))
+        ]
+        return max(versions, key=version_key) if versions else None
+
+    def download(self, version: str, local_path: str):
+        source = self._path(version, ARTIFACT_NAME)
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Model not found: {source}")
+        shutil.copyfile(source, local_path)
+
+    def get_metadata(self, version: str) -> dict[str, Any] | None:
+        path = self._path(version, METADATA_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+
+class AzureBlobRegistry(ModelRegistry):
+    """Registry in an Azure Blob Storage container (the layout of MODEL_BLOB_NAME)"""
+
+    def __init__(
+        self,
+        connection_string: str,
+        container_name: str = "models",
+        prefix: str = "iris-classifier",
+    ):
+        try:
+            from azure.storage.blob import BlobServiceClient
+        except ImportError:
+            raise ImportError("azure-storage-blob not installed")
+
+        self.prefix = prefix.strip("/")
+        client = BlobServiceClient.from_connection_string(connection_string)
+        self.container_client = client.get_container_client(container_name)
+        logger.info(
+            f"AzureBlobRegistry initialized (container: {container_name}, prefix: {self.prefix})"
+        )
+
+    def _blob_name(self, version: str, name: str) -> str:
+        return (
+            f"{self.prefix}/v{version}/{name}" if self.prefix else f"v{version}/{name}"
+        )
+
+    def get_latest_version(self) -> str | None:
+        start = f"{self.prefix}/v" if self.prefix else "v"
+        versions = [
+            blob.name[len(start) : -len(ARTIFACT_NAME) - 1]
+            for blob in self.container_client.list_blobs(name_starts_with=start)
+            if blob.name.endswith(f"/{ARTIFACT_NAME}")
+        ]
+        return max(versions, key=version_key) if versions else None
+
+    def download(self, version: str, local_path: str):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        blob_client = self.container_client.get_blob_client(
+            self._blob_name(version, ARTIFACT_NAME)
+        )
+        try:
+            with open(local_path, "wb") as f:
+                blob_client.download_blob().readinto(f)
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"Model not found: {blob_client.blob_name}")
+
+    def get_metadata(self, version: str) -> dict[str, Any] | None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        blob_client = self.container_client.get_blob_client(
+            self._blob_name(version, METADATA_NAME)
+        )
+        try:
+            return json.loads(blob_client.download_blob().readall())
+        except ResourceNotFoundError:
+            return None
+
+
+def create_registry(
+    kind: str,
+    local_path: str = "",
+    connection_string: str = "",
+    container_name: str = "models",
+    prefix: str = "iris-classifier",
+) -> ModelRegistry | None:
+    """Build a registry from its configured name: none, local or azure"""
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind == "local":
+        return LocalDirectoryRegistry(local_path)
+    if kind == "azure":
+        if not connection_string:
+            raise ValueError("AZURE_STORAGE_CONNECTION_STRING not set")
+        return AzureBlobRegistry(connection_string, container_name, prefix)
+    raise ValueError(f"Unknown model registry: {kind}")
+
+
+def read_pin(path: str) -> str | None:
+    """Pinned version from the pin file; None when unset, empty or "latest" """
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            pin = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return None if pin in ("", LATEST) else pin
+
+
+def read_active(staging_dir: str) -> tuple[str, str] | None:
+    """(version, artifact path) last activated by a worker of the pod; None if unset or pruned"""
+    try:
+        with open(os.path.join(staging_dir, ACTIVE_NAME)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(staging_dir, version, ARTIFACT_NAME)
+    if not version or not os.path.exists(path):
+        return None
+    return version, path
+
+
+class ModelPrefetcher:
+    """
+    Background download, verification and staging of the next model version
+
+    Args:
+        registry: Where versions are listed and downloaded from
+        staging_dir: Local directory for verified artifacts, shared by the pod's workers
+        prepare: Loads, builds and warms up an artifact path; raising rejects the version
+        publish: Swaps a prepared model in, given (version, path, prepared)
+        current_version: Returns the version being served
+        poll_seconds: Mean interval between registry polls
+        jitter: Polls are spread uniformly over poll_seconds * (1 +/- jitter);
+            the first one anywhere in [0, poll_seconds)
+        pin_file: File holding the version to serve (see read_pin)
+        pin_check_seconds: How often the pin file is read
+        auto_activate: Activate every newly staged version without waiting for a signal or pin
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        staging_dir: str,
+        prepare: Callable[[str], Any],
+        publish: Callable[[str, str, Any], None],
+        current_version: Callable[[], str],
+        poll_seconds: float = 300.0,
+        jitter: float = 0.5,
+        pin_file: str = "",
+        pin_check_seconds: float = 5.0,
+        auto_activate: bool = False,
+    ):
+        self.registry = registry
+        self.staging_dir = staging_dir
+        self.prepare = prepare
+        self.publish = publish
+        self.current_version = current_version
+        self.poll_seconds = poll_seconds
+        self.jitter = jitter
+        self.pin_file = pin_file
+        self.pin_check_seconds = pin_check_seconds
+        self.auto_activate = auto_activate
+
+        self._lock = threading.Lock()
+        self._staged: tuple[str, str, Any] | None = None
+        self._rejected: dict[str, str] = {}
+        self._activation_requested = threading.Event()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.last_poll: float | None = None
+        self.last_error: str | None = None
+        self.downloads_total = 0
+        self.reused_total = 0
+        self.verify_failures_total = 0
+        self.activations_total = 0
+
+    @property
+    def staged_version(self) -> str | None:
+        staged = self._staged
+        return staged[0] if staged is not None else None
+
+    def start(self):
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_activation(self):
+        """Ask the prefetch thread to activate the staged version (safe from a signal handler)"""
+        self._activation_requested.set()
+        self._wake.set()
+
+    def next_poll_delay(self) -> float:
+        spread = self.poll_seconds * self.jitter
+        return max(0.0, self.poll_seconds + random.uniform(-spread, spread))
+
+    def target_version(self) -> str | None:
+        """The pinned version, else the registry's newest"""
+        return read_pin(self.pin_file) or self.registry.get_latest_version()
+
+    def poll(self) -> str | None:
+        """
+        Stage the target version unless it is already served, staged or rejected
+
+        Returns:
+            The staged version, if any
+        """
+        self.last_poll = time.time()
+        try:
+            target = self.target_version()
+            if (
+                target is not None
+                and target != self.current_version()
+                and target != self.staged_version
+                and target not in self._rejected
+            ):
+                self.stage(target)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning("Model prefetch failed", exc_info=True)
+        return self.staged_version
+
+    def stage(self, version: str):
+        """Download (once per pod), verify and prepare `version`, then hold it staged"""
+        path = self.fetch(version)
+        started = time.perf_counter()
+        try:
+            prepared = self.prepare(path)
+        except Exception as e:
+            self._reject(version, f"load failed: {e}")
+            raise
+        with self._lock:
+            self._staged = (version, path, prepared)
+        logger.info(
+            f"Model v{version} staged from {path} (prepared in {time.perf_counter() - started:.3f}s)"
+        )
+
+    def fetch(self, version: str) -> str:
+        """Path of the verified artifact of `version` in the staging directory, downloading it if needed"""
+        directory = os.path.join(self.staging_dir, version)
+        path = os.path.join(directory, ARTIFACT_NAME)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(path):
+                self.reused_total += 1
+                return path
+
+            part = path + PART_SUFFIX
+            started = time.perf_counter()
+            self.registry.download(version, part)
+            metadata = self.registry.get_metadata(version) or {}
+            expected = metadata.get("sha256")
+            if expected and file_sha256(part) != expected.lower():
+                os.remove(part)
+                self._reject(version, "sha256 mismatch")
+                raise ValueError(
+                    f"Model v{version} failed verification: sha256 mismatch"
+                )
+            os.replace(part, path)
+            self.downloads_total += 1
+            logger.info(
+                f"Model v{version} downloaded in {time.perf_counter() - started:.3f}s"
+                + (" (sha256 verified)" if expected else "")
+            )
+        return path
+
+    def _reject(self, version: str, reason: str):
+        # A version that failed verification is not retried until the process restarts
+        self._rejected[version] = reason
+        self.verify_failures_total += 1
+
+    def activate(self, version: str | None = None) -> bool:
+        """
+        Publish the staged model
+
+        Args:
+            version: Only activate if this is the staged version
+
+        Returns:
+            True if a model was swapped in
+        """
+        with self._lock:
+            staged = self._staged
+            if staged is None or (version is not None and staged[0] != version):
+                return False
+            self._staged = None
+        staged_version, path, prepared = staged
+        previous = self.current_version()
+        self.publish(staged_version, path, prepared)
+        self.activations_total += 1
+        logger.info(f"Model v{staged_version} activated (was v{previous})")
+        self._record_active(staged_version)
+        self.prune(staged_version)
+        return True
+
+    def _record_active(self, version: str):
+        # Replaced atomically: the supervisor may read it while a worker writes it
+        active = os.path.join(self.staging_dir, ACTIVE_NAME)
+        part = f"{active}{PART_SUFFIX}.{os.getpid()}"
+        with open(part, "w") as f:
+            f.write(version)
+        os.replace(part, active)
+
+    def prune(self, active_version: str):
+        """Remove staged artifacts older than the active version (newer ones may be mid-download)"""
+        for entry in os.listdir(self.staging_dir):
+            path = os.path.join(self.staging_dir, entry)
+            if os.path.isdir(path) and version_key(entry) < version_key(active_version):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def check_pin(self) -> str | None:
+        """Activate the staged version if the pin names it; returns the pin"""
+        pin = read_pin(self.pin_file)
+        if (
+            pin is not None
+            and pin != self.current_version()
+            and pin == self.staged_version
+        ):
+            self.activate(pin)
+        return pin
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "current_version": self.current_version(),
+            "staged_version": self.staged_version,
+            "pinned_version": read_pin(self.pin_file),
+            "last_poll": self.last_poll,
+            "last_error": self.last_error,
+            "rejected": dict(self._rejected),
+            "downloads_total": self.downloads_total,
+            "reused_total": self.reused_total,
+            "verify_failures_total": self.verify_failures_total,
+            "activations_total": self.activations_total,
+        }
+
+    def _run(self):
+        next_poll = time.monotonic() + random.uniform(0, self.poll_seconds)
+        last_pin = read_pin(self.pin_file)
+        while not self._stopping.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            try:
+                if self._activation_requested.is_set():
+                    self._activation_requested.clear()
+                    if not self.activate():
+                        logger.warning(
+                            "Model activation requested but no version is staged"
+                        )
+
+                pin = self.check_pin()
+                if pin != last_pin:
+                    # A new pin that is not staged yet is fetched soon, still spread across pods
+                    last_pin = pin
+                    if (
+                        pin is not None
+                        and pin != self.current_version()
+                        and pin != self.staged_version
+                    ):
+                        next_poll = min(
+                            next_poll,
+                            now + random.uniform(0, self.poll_seconds * self.jitter),
+                        )
+
+                if now >= next_poll:
+                    staged = self.poll()
+                    next_poll = time.monotonic() + self.next_poll_delay()
+                    if staged is not None and (
+                        self.auto_activate or staged == read_pin(self.pin_file)
+                    ):
+                        self.activate(staged)
+            except Exception:
+                logger.exception("Model prefetch loop error")
+
+            self._wake.wait(
+                max(0.0, min(self.pin_check_seconds, next_poll - time.monotonic()))
+            )
@@ -0,0 +1,841 @@
+"""
+Traffic capture and deterministic replay against a new build or model
+
+Capture: with CAPTURE_ENABLED the service samples CAPTURE_SAMPLE_RATIO of
+the /predict* exchanges (request line, media types, request body,
+status, response body, start time and latency) into one file per
+process:
+
+    <CAPTURE_DIR>/traffic-<utc start>-<pid>.cap
+
+Sampling is decided before the request runs, so unsampled requests pay
+one random draw; sampled ones are appended to a bounded buffer and
+written by a background thread. A file is a series of gzip members (one
+per write-out, appended and closed, so a file cut short by a crash still
+reads back up to its last write-out) holding a magic header followed by
+records:
+
+    <d f H H H H H H I I>  start time, latency, status, the lengths of
+                           method, path, content type, accept, response
+                           content type, request body and response body
+    the seven byte strings, in that order
+
+An exchange that does not fit the format (a text field over 65535 bytes,
+a body over 4 GiB) is skipped and counted as dropped; the rest of the
+write-out goes ahead. API keys and other headers are not captured.
+
+Replay: python -m src.replay sends the captured requests, in their
+recorded order, to the app in-process (ASGI calls into src.app with the
+model given by --model, no sockets) or to a URL over loopback. Requests
+are released on the recorded schedule divided by --speed (0 sends them
+as fast as --concurrency allows), so the load is open-loop like
+production; the report shows how far behind the schedule the target
+fell. Each response is compared with the recorded one: status, and per
+row the predicted class and the largest probability difference (JSON,
+packed float32 and msgpack bodies are decoded). Thresholds turn the
+report into a promotion gate that exits non-zero:
+
+    python -m src.replay traffic-*.cap --model new/model.pkl --speed 0 \\
+        --max-class-mismatches 0 --max-probability-diff 1e-6 --max-p99-ms 25
+    python -m src.replay traffic-*.cap --target http://localhost:5000 --speed 4
+"""
+
+import argparse
+import asyncio
+import gzip
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from . import wire
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IRISCAP1"
+_HEADER = struct.Struct("<dfHHHHHHII")
+_TEXT_FIELDS = ("method", "path", "content_type", "accept", "response_content_type")
+
+
+class Exchange(NamedTuple):
+    """One captured request and the response it got"""
+
+    timestamp: float
+    latency: float
+    method: str
+    path: str
+    content_type: str
+    accept: str
+    request_body: bytes
+    status: int
+    response_content_type: str
+    response_body: bytes
+
+
+def encode_exchange(exchange: Exchange) -> bytes:
+    texts = [getattr(exchange, name).encode("latin-1") for name in _TEXT_FIELDS]
+    header = _HEADER.pack(
+        exchange.timestamp,
+        exchange.latency,
+        exchange.status,
+        *(len(text) for text in texts),
+        len(exchange.request_body),
+        len(exchange.response_body),
+    )
+    return b"".join([header, *texts, exchange.request_body, exchange.response_body])
+
+
+def decode_exchanges(data: bytes) -> list[Exchange]:
+    """Records of one capture stream; a truncated final record is ignored"""
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a traffic capture file")
+    exchanges = []
+    offset = len(MAGIC)
+    while offset + _HEADER.size <= len(data):
+        timestamp, latency, status, *lengths = _HEADER.unpack_from(data, offset)
+        end = offset + _HEADER.size + sum(lengths)
+        if end > len(data):
+            break
+        position = offset + _HEADER.size
+        fields = []
+        for length in lengths:
+            fields.append(data[position : position + length])
+            position += length
+        method, path, content_type, accept, response_content_type = (
+            f.decode("latin-1") for f in fields[:5]
+        )
+        exchanges.append(
+            Exchange(
+                timestamp,
+                latency,
+                method,
+                path,
+                content_type,
+                accept,
+                fields[5],
+                status,
+                response_content_type,
+                fields[6],
+            )
+        )
+        offset = end
+    return exchanges
+
+
+def _read_stream(path: str) -> bytes:
+    # Decompress up to the last complete flush of a file that was not closed
+    decompressor = zlib.decompressobj(wbits=31)
+    chunks = []
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            chunks.append(decompressor.decompress(block))
+            while decompressor.eof and decompressor.unused_data:
+                # Concatenated gzip members
+                rest = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+                chunks.append(decompressor.decompress(rest))
+    return b"".join(chunks)
+
+
+def read_capture(paths: list[str]) -> list[Exchange]:
+    """Exchanges of one or more capture files (e.g. one per worker), ordered by start time"""
+    exchanges = []
+    for path in paths:
+        exchanges.extend(decode_exchanges(_read_stream(path)))
+    exchanges.sort(key=lambda exchange: exchange.timestamp)
+    return exchanges
+
+
+class TrafficRecorder:
+    """
+    Sampled exchanges buffered in memory and appended to a capture file
+
+    Args:
+        path: Capture file to create
+        sample_ratio: Fraction of requests captured
+        max_records: Capture stops after this many exchanges
+        capacity: Exchanges buffered between write-outs; more are dropped
+        flush_interval_seconds: How often the buffer is written out
+        seed: Seed of the sampling draw
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_ratio: float = 0.01,
+        max_records: int = 100000,
+        capacity: int = 10000,
+        flush_interval_seconds: float = 1.0,
+        seed: int | None = None,
+    ):
+        self.path = path
+        self.sample_ratio = sample_ratio
+        self.max_records = max_records
+        self.capacity = capacity
+        self.flush_interval_seconds = flush_interval_seconds
+        self._random = random.Random(seed).random
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._started = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.recorded_total = 0
+        self.dropped_total = 0
+        self.written_total = 0
+
+    def sample(self) -> bool:
+        """Whether to capture the request about to run"""
+        return (
+            self.recorded_total < self.max_records
+            and self._random() < self.sample_ratio
+        )
+
+    def record(self, exchange: Exchange):
+        with self._lock:
+            if (
+                len(self._pending) >= self.capacity
+                or self.recorded_total >= self.max_records
+            ):
+                self.dropped_total += 1
+                return
+            self._pending.append(exchange)
+            self.recorded_total += 1
+
+    def start(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(gzip.compress(MAGIC, compresslevel=6))
+        self._started = True
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="traffic-capture", daemon=True
+        )
+        self._thread.start()
+
+    def flush(self):
+        """Append buffered exchanges to the file as one gzip member"""
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+        if not self._started:
+            return
+        records = []
+        for exchange in pending:
+            try:
+                record = encode_exchange(exchange)
+            except (struct.error, UnicodeEncodeError) as e:
+                self.dropped_total += 1
+                logger.warning(
+                    f"Captured exchange for {exchange.path[:200]} not written: {e}"
+                )
+                continue
+            records.append(record)
+        if records:
+            with open(self.path, "ab") as f:
+                f.write(gzip.compress(b"".join(records), compresslevel=6))
+        self.written_total += len(records)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._started = False
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Traffic capture write failed")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "sample_ratio": self.sample_ratio,
+            "recorded_total": self.recorded_total,
+            "written_total": self.written_total,
+            "dropped_total": self.dropped_total,
+        }
+
+
+def capture_path(directory: str) -> str:
+    started = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    return os.path.join(directory, f"traffic-{started}-{os.getpid()}.cap")
+
+
+def _header(headers, name: bytes) -> str:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class CaptureMiddleware:
+    """
+    ASGI middleware handing sampled exchanges under `prefix` to the active recorder
+
+    Args:
+        app: The wrapped ASGI app
+        recorder: Returns the active TrafficRecorder, or None when capture is off
+        prefix: Only paths starting with it are sampled
+    """
+
+    def __init__(
+        self,
+        app,
+        recorder: Callable[[], TrafficRecorder | None],
+        prefix: str = "/predict",
+    ):
+        self.app = app
+        self.recorder = recorder
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        recorder = self.recorder() if scope["type"] == "http" else None
+        if (
+            recorder is None
+            or not scope["path"].startswith(self.prefix)
+            or not recorder.sample()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_chunks, response_chunks = [], []
+        response = {"status": 0, "content_type": ""}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = _header(
+                    message.get("headers", []), b"content-type"
+                )
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            query = scope.get("query_string", b"").decode("latin-1")
+            recorder.record(
+                Exchange(
+                    timestamp=started,
+                    latency=time.perf_counter() - start,
+                    method=scope["method"],
+                    path=scope["path"] + (f"?{query}" if query else ""),
+                    content_type=_header(scope["headers"], b"content-type"),
+                    accept=_header(scope["headers"], b"accept"),
+                    request_body=b"".join(request_chunks),
+                    status=response["status"],
+                    response_content_type=response["content_type"],
+                    response_body=b"".join(response_chunks),
+                )
+            )
+
+
+def _request_headers(exchange: Exchange, api_key: str | None) -> list[tuple[str, str]]:
+    headers = [("content-type", exchange.content_type), ("accept", exchange.accept)]
+    if api_key:
+        headers.append(("x-api-key", api_key))
+    return [(name, value) for name, value in headers if value]
+
+
+class InProcessTarget:
+    """Calls an ASGI app directly on the replay's event loop"""
+
+    def __init__(self, app, api_key: str | None = None):
+        self.app = app
+        self.api_key = api_key
+
+    async def send(self, exchange: Exchange) -> tuple[int, str, bytes]:
+        path, _, query = exchange.path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": exchange.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("latin-1"),
+            "query_string": query.encode("latin-1"),
+            "root_path": "",
+            "headers": [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in _request_headers(exchange, self.api_key)
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("replay", 80),
+        }
+        body_sent = False
+        finished = asyncio.Event()
+        response = {"status": 0, "content_type": "", "chunks": []}
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {
+                    "type": "http.request",
+                    "body": exchange.request_body,
+                    "more_body": False,
+                }
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = _header(
+                    message.get("headers", []), b"content-type"
+                )
+            elif message["type"] == "http.response.body":
+                response["chunks"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished.set()
+        return (
+            response["status"],
+            response["content_type"],
+            b"".join(response["chunks"]),
+        )
+
+    def close(self):
+        pass
+
+
+class LoopbackTarget:
+    """
+    HTTP/1.1 over loopback with one kept-alive connection per worker thread
+
+    Args:
+        url: Base URL of the service, e.g. http://localhost:5000
+        concurrency: Worker threads, and so connections
+        api_key: Sent as X-API-Key when set
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 8,
+        api_key: str | None = None,
+        timeout: float = 30.0,
+    ):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="replay"
+        )
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+            connection.connect()
+            connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.connection = connection
+        return connection
+
+    def _send(self, exchange: Exchange) -> tuple[int, str, bytes]:
+        headers = dict(_request_headers(exchange, self.api_key))
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(
+                    exchange.method,
+                    exchange.path,
+                    body=exchange.request_body,
+                    headers=headers,
+                )
+                response = connection.getresponse()
+                return (
+                    response.status,
+                    response.getheader("content-type", ""),
+                    response.read(),
+                )
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed a kept-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+    async def send(self, exchange: Exchange) -> tuple[int, str, bytes]:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._send, exchange
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def decode_predictions(
+    content_type: str, body: bytes, n_classes: int = 3
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Class ids and probabilities of a prediction response, in any wire format
+
+    Invalid rows have class id -1 and NaN probabilities. Returns None for
+    bodies that are not predictions (errors, other endpoints).
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        if media_type == wire.FLOAT32:
+            rows = len(body) // (4 * (1 + n_classes))
+            class_ids = np.frombuffer(body, dtype="<i4", count=rows)
+            probabilities = np.frombuffer(body, dtype="<f4", offset=4 * rows).reshape(
+                rows, n_classes
+            )
+            return class_ids.astype(np.int64), probabilities.astype(np.float64)
+        if media_type == wire.MSGPACK and wire.msgpack is not None:
+            payload = wire.msgpack.unpackb(body, raw=False)
+            entries = [
+                {"predicted_class_id": class_id, "probabilities": probabilities}
+                for class_id, probabilities in zip(
+                    payload["predicted_class_id"], payload["probabilities"]
+                )
+            ]
+        else:
+            payload = json.loads(body)
+            if "predicted_class_id" in payload:
+                entries = [payload]
+            else:
+                entries = payload.get("predictions", payload.get("explanations"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if entries is None:
+        return None
+    class_ids = np.array(
+        [-1 if e is None else e["predicted_class_id"] for e in entries], dtype=np.int64
+    )
+    probabilities = np.array(
+        [[np.nan] * n_classes if e is None else e["probabilities"] for e in entries],
+        dtype=np.float64,
+    ).reshape(len(entries), n_classes)
+    return class_ids, probabilities
+
+
+class ReplayResult(NamedTuple):
+    """Outcome of one replayed exchange"""
+
+    index: int
+    status: int
+    latency: float
+    lag: float
+    content_type: str
+    body: bytes
+    error: str
+
+
+def _percentiles_ms(seconds: list[float]) -> dict[str, float]:
+    if not seconds:
+        return {}
+    values = np.asarray(seconds) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+async def replay(
+    exchanges: list[Exchange], target, speed: float = 1.0, concurrency: int = 8
+) -> tuple[list[ReplayResult], float]:
+    """
+    Send the exchanges' requests on their recorded schedule divided by speed
+
+    Returns:
+        (results in capture order, wall seconds of the whole replay)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    first = exchanges[0].timestamp if exchanges else 0.0
+    start = time.perf_counter()
+
+    async def run(index: int, exchange: Exchange, due: float) -> ReplayResult:
+        try:
+            sent = time.perf_counter()
+            status, content_type, body = await target.send(exchange)
+            return ReplayResult(
+                index,
+                status,
+                time.perf_counter() - sent,
+                sent - due,
+                content_type,
+                body,
+                "",
+            )
+        except Exception as e:  # noqa: BLE001 - the failure is reported for this request
+            return ReplayResult(index, 0, 0.0, 0.0, "", b"", f"{type(e).__name__}: {e}")
+        finally:
+            semaphore.release()
+
+    tasks = []
+    for index, exchange in enumerate(exchanges):
+        due = start + ((exchange.timestamp - first) / speed if speed > 0 else 0.0)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await semaphore.acquire()
+        tasks.append(asyncio.ensure_future(run(index, exchange, due)))
+    results = await asyncio.gather(*tasks)
+    return list(results), time.perf_counter() - start
+
+
+def compare(
+    exchanges: list[Exchange],
+    results: list[ReplayResult],
+    wall_seconds: float,
+    speed: float,
+) -> dict[str, Any]:
+    """Throughput, latency and the differences of the replayed responses from the recorded ones"""
+    status_mismatches = errors = rows_compared = class_mismatches = undecodable = 0
+    max_probability_diff = 0.0
+    examples = []
+    for exchange, result in zip(exchanges, results):
+        if result.error:
+            errors += 1
+            if len(examples) < 10:
+                examples.append(
+                    {
+                        "index": result.index,
+                        "path": exchange.path,
+                        "error": result.error,
+                    }
+                )
+            continue
+        if result.status != exchange.status:
+            status_mismatches += 1
+            if len(examples) < 10:
+                examples.append(
+                    {
+                        "index": result.index,
+                        "path": exchange.path,
+                        "recorded_status": exchange.status,
+                        "status": result.status,
+                    }
+                )
+            continue
+        if result.status != 200:
+            continue
+        recorded = decode_predictions(
+            exchange.response_content_type, exchange.response_body
+        )
+        replayed = decode_predictions(result.content_type, result.body)
+        if recorded is None or replayed is None or len(recorded[0]) != len(replayed[0]):
+            undecodable += int(recorded is not None or replayed is not None)
+            continue
+        mismatched = recorded[0] != replayed[0]
+        rows_compared += len(mismatched)
+        class_mismatches += int(mismatched.sum())
+        diff = np.abs(recorded[1] - replayed[1])
+        if diff.size and not np.all(np.isnan(diff)):
+            max_probability_diff = max(max_probability_diff, float(np.nanmax(diff)))
+        if mismatched.any() and len(examples) < 10:
+            row = int(np.flatnonzero(mismatched)[0])
+            examples.append(
+                {
+                    "index": result.index,
+                    "path": exchange.path,
+                    "row": row,
+                    "recorded_class_id": int(recorded[0][row]),
+                    "class_id": int(replayed[0][row]),
+                }
+            )
+
+    completed = [r for r in results if not r.error]
+    return {
+        "requests": len(results),
+        "speed": speed,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(completed) / wall_seconds, 1)
+        if wall_seconds > 0
+        else 0.0,
+        "latency_ms": _percentiles_ms([r.latency for r in completed]),
+        "recorded_latency_ms": _percentiles_ms([e.latency for e in exchanges]),
+        "max_schedule_lag_ms": round(
+            max((r.lag for r in completed), default=0.0) * 1000, 3
+        ),
+        "errors": errors,
+        "status_mismatches": status_mismatches,
+        "rows_compared": rows_compared,
+        "class_mismatches": class_mismatches,
+        "max_probability_diff": max_probability_diff,
+        "undecodable": undecodable,
+        "examples": examples,
+    }
+
+
+def gate(
+    report: dict[str, Any],
+    max_class_mismatches: int | None = None,
+    max_probability_diff: float | None = None,
+    max_status_mismatches: int | None = None,
+    max_p99_ms: float | None = None,
+    min_throughput_rps: float | None = None,
+) -> list[str]:
+    """Thresholds the report violates; empty when the build may be promoted"""
+    violations = []
+    if report["errors"]:
+        violations.append(f"{report['errors']} requests failed")
+    if (
+        max_status_mismatches is not None
+        and report["status_mismatches"] > max_status_mismatches
+    ):
+        violations.append(
+            f"{report['status_mismatches']} status mismatches > {max_status_mismatches}"
+        )
+    if (
+        max_class_mismatches is not None
+        and report["class_mismatches"] > max_class_mismatches
+    ):
+        violations.append(
+            f"{report['class_mismatches']} class mismatches > {max_class_mismatches}"
+        )
+    if (
+        max_probability_diff is not None
+        and report["max_probability_diff"] > max_probability_diff
+    ):
+        violations.append(
+            f"probability diff {report['max_probability_diff']:.3g} > {max_probability_diff:g}"
+        )
+    p99 = report["latency_ms"].get("p99", 0.0)
+    if max_p99_ms is not None and p99 > max_p99_ms:
+        violations.append(f"p99 {p99:.3f} ms > {max_p99_ms:g} ms")
+    if min_throughput_rps is not None and report["throughput_rps"] < min_throughput_rps:
+        violations.append(
+            f"throughput {report['throughput_rps']:.1f} rps < {min_throughput_rps:g}"
+        )
+    return violations
+
+
+def in_process_target(model_path: str | None, api_key: str | None) -> InProcessTarget:
+    """src.app with its model loaded from model_path (default MODEL_PATH)"""
+    from . import app as service
+
+    if model_path:
+        service.settings.model_path = model_path
+    service.load_model()
+    if service.model is None:
+        raise RuntimeError(
+            f"Model could not be loaded from {service.settings.model_path}"
+        )
+    return InProcessTarget(service.app, api_key)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Replay captured traffic and compare the responses"
+    )
+    parser.add_argument("captures", nargs="+", help="Capture files (traffic-*.cap)")
+    parser.add_argument(
+        "--target",
+        default="inprocess",
+        help="'inprocess' (default) or the base URL of a running service",
+    )
+    parser.add_argument(
+        "--model",
+        default=None,
+        help="Model artifact for the in-process target (default MODEL_PATH)",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Schedule speed-up over the recording; 0 sends as fast as possible",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Requests in flight at most"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=0, help="Replay only the first N exchanges"
+    )
+    parser.add_argument(
+        "--api-key",
+        default=os.environ.get("API_KEY"),
+        help="X-API-Key to send (default API_KEY)",
+    )
+    parser.add_argument(
+        "--report", default=None, help="Also write the JSON report to this file"
+    )
+    parser.add_argument("--max-class-mismatches", type=int, default=None)
+    parser.add_argument("--max-probability-diff", type=float, default=None)
+    parser.add_argument("--max-status-mismatches", type=int, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--min-throughput-rps", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    exchanges = read_capture(args.captures)
+    if args.limit:
+        exchanges = exchanges[: args.limit]
+    if not exchanges:
+        print("No exchanges in the capture", file=sys.stderr)
+        return 2
+
+    if args.target == "inprocess":
+        target = in_process_target(args.model, args.api_key)
+    else:
+        target = LoopbackTarget(args.target, args.concurrency, args.api_key)
+    try:
+        results, wall_seconds = asyncio.run(
+            replay(exchanges, target, args.speed, args.concurrency)
+        )
+    finally:
+        target.close()
+
+    report = compare(exchanges, results, wall_seconds, args.speed)
+    report["violations"] = gate(
+        report,
+        args.max_class_mismatches,
+        args.max_probability_diff,
+        args.max_status_mismatches,
+        args.max_p99_ms,
+        args.min_throughput_rps,
+    )
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(rendered + "\n")
+    return 1 if report["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
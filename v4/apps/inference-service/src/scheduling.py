@@ -0,0 +1,199 @@
+"""
+Priority classes with weighted fair scheduling of model execution
+
+Single predictions and large batch calls share a worker. Without
+scheduling, interactive calls queue behind bulk work for the thread
+pool. Each request is classified into a priority class (by endpoint or
+header, see app.priority_of) and its model execution has to take one of
+a fixed number of execution slots. Requests that find no free slot wait
+in their class's bounded queue; when a slot frees up, the next waiter is
+chosen by stride scheduling: every class carries a virtual "pass" that
+advances by cost / weight whenever it is served, and the non-empty class
+with the lowest pass goes next. Over time each busy class gets slot time
+in proportion to its weight, with cost measured in rows, so a
+1000-row batch counts for 1000 single predictions. A class that was
+idle rejoins at the current virtual time instead of spending banked
+credit. A full queue rejects at once (429) rather than growing.
+
+The scheduler lives on the event loop of one worker process; it is not
+thread-safe.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class QueueFull(Exception):
+    """The priority class's queue is at capacity"""
+
+
+class PriorityClass:
+    """One priority class: its weight, bounded queue and counters"""
+
+    def __init__(self, name: str, weight: float = 1.0, capacity: int = 64):
+        if weight <= 0:
+            raise ValueError(f"Priority class {name} needs a positive weight")
+        self.name = name
+        self.weight = weight
+        self.capacity = capacity
+        self.waiters: deque = deque()
+        self.pass_value = 0.0
+        self.running = 0
+        self.dispatched_total = 0
+        self.rejected_total = 0
+        self.wait_seconds_total = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self.waiters)
+
+
+def parse_classes(spec: str) -> list[PriorityClass]:
+    """
+    Parse "name:weight:capacity,..." into priority classes
+
+    Example: "interactive:8:256,bulk:1:16". Weight and capacity are
+    optional (default 1 and 64).
+    """
+    classes = []
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        parts = [p.strip() for p in entry.split(":")]
+        try:
+            weight = float(parts[1]) if len(parts) > 1 else 1.0
+            capacity = int(parts[2]) if len(parts) > 2 else 64
+        except ValueError:
+            raise ValueError(f"Invalid priority class: {entry}")
+        classes.append(PriorityClass(parts[0], weight, capacity))
+    if not classes:
+        raise ValueError("At least one priority class is required")
+    return classes
+
+
+class WeightedFairScheduler:
+    """
+    Execution slots shared by priority classes with per-class queues
+
+    Args:
+        classes: Priority classes; the first one is the default
+        slots: Model executions allowed to run at once
+    """
+
+    def __init__(self, classes: list[PriorityClass], slots: int = 4):
+        if slots < 1:
+            raise ValueError("slots must be >= 1")
+        self.classes: dict[str, PriorityClass] = {c.name: c for c in classes}
+        self.default_class = classes[0].name
+        self.slots = slots
+        self._busy = 0
+        self._virtual_time = 0.0
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    def _waiting(self) -> bool:
+        return any(c.waiters for c in self.classes.values())
+
+    def _charge(self, priority: PriorityClass, cost: float):
+        self._virtual_time = max(self._virtual_time, priority.pass_value)
+        priority.pass_value += cost / priority.weight
+        priority.running += 1
+        priority.dispatched_total += 1
+        self._busy += 1
+
+    def _dispatch(self):
+        while self._busy < self.slots:
+            ready = [c for c in self.classes.values() if c.waiters]
+            if not ready:
+                return
+            priority = min(ready, key=lambda c: (c.pass_value, -c.weight))
+            future, cost, queued_at = priority.waiters.popleft()
+            if future.done():
+                continue
+            self._charge(priority, cost)
+            priority.wait_seconds_total += time.perf_counter() - queued_at
+            future.set_result(None)
+
+    async def acquire(
+        self, name: str | None = None, cost: float = 1.0, timeout: float | None = None
+    ) -> PriorityClass:
+        """
+        Wait for an execution slot in the given class
+
+        Raises:
+            QueueFull: if the class's queue is at capacity
+            asyncio.TimeoutError: if no slot was granted within timeout seconds
+        """
+        priority = self.classes.get(name) or self.classes[self.default_class]
+        if self._busy < self.slots and not self._waiting():
+            priority.pass_value = max(priority.pass_value, self._virtual_time)
+            self._charge(priority, cost)
+            return priority
+
+        if priority.depth >= priority.capacity:
+            priority.rejected_total += 1
+            raise QueueFull(f"Queue for priority class {priority.name} is full")
+        if not priority.waiters:
+            # Rejoin at the current virtual time; idle classes bank no credit
+            priority.pass_value = max(priority.pass_value, self._virtual_time)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, cost, time.perf_counter())
+        priority.waiters.append(entry)
+        try:
+            if timeout is None:
+                await future
+            else:
+                await asyncio.wait_for(future, timeout)
+        except (TimeoutError, asyncio.CancelledError):
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the caller went away
+                self.release(priority)
+            elif entry in priority.waiters:
+                priority.waiters.remove(entry)
+            raise
+        return priority
+
+    def release(self, priority: PriorityClass):
+        """Return a slot and hand it to the next waiter"""
+        priority.running -= 1
+        self._busy -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self, name: str | None = None, cost: float = 1.0, timeout: float | None = None
+    ):
+        """Hold an execution slot of the given class for the duration of the block"""
+        priority = await self.acquire(name, cost, timeout)
+        try:
+            yield priority
+        finally:
+            self.release(priority)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Per-class queue depth, running, counters and mean wait"""
+        return {
+            c.name: {
+                "weight": c.weight,
+                "capacity": c.capacity,
+                "depth": c.depth,
+                "running": c.running,
+                "dispatched_total": c.dispatched_total,
+                "rejected_total": c.rejected_total,
+                "mean_wait_seconds": c.wait_seconds_total / c.dispatched_total
+                if c.dispatched_total
+                else 0.0,
+            }
+            for c in self.classes.values()
+        }
+
+    def metric_samples(self, attribute: str):
+        """(labels, value) pairs of one per-class attribute, for a labeled gauge"""
+        return [
+            ({"priority": c.name}, getattr(c, attribute)) for c in self.classes.values()
+        ]
@@ -0,0 +1,352 @@
+"""
+Multi-process serving for the inference service
+
+A single uvicorn process uses about one core no matter the pod's CPU
+limit, and the GIL caps inference throughput. This entrypoint loads (and
+warms up) the model once in a supervisor process, then forks N uvicorn
+workers that share the listening socket and, copy-on-write, the model's
+memory. gc.freeze() before fork keeps the collector from touching (and
+so copying) the pre-loaded objects in every worker.
+
+- Worker count defaults to the cgroup CPU quota (rounded up), bounded by
+  the CPUs the process may run on.
+- With CPU_AFFINITY=true each worker is pinned to one CPU.
+- Each worker's readiness lives in a shared-memory flag array, reported
+  by /health/ready as {"worker", "total", "ready"}.
+- Workers that die are respawned from the supervisor, which still holds
+  the loaded model (first reloading the version a worker activated since
+  startup, if any); SIGTERM/SIGINT are forwarded for a graceful drain.
+
+Server profile (SERVER_* settings): uvloop and httptools when installed,
+keep-alive longer than the gateway's idle eviction, a deep accept
+backlog, and optional h2c through hypercorn. On SIGTERM a worker first
+drains: /health/ready answers 503 so the pod leaves the Service
+endpoints, and every response carries Connection: close so pooled client
+connections move to other pods. After SERVER_DRAIN_SECONDS it stops
+accepting and waits for in-flight requests. The pod's
+terminationGracePeriodSeconds must cover both phases; evictions are
+paced by the PodDisruptionBudget, so one pod drains at a time.
+
+SIGUSR2 activates the prefetched model version (see registry.py); the
+supervisor forwards it to every worker.
+
+Usage (from apps/inference-service):
+    python -m src.serve
+"""
+
+import asyncio
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import time
+from multiprocessing import Array
+
+import uvicorn
+
+from . import app as service
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> float | None:
+    """
+    CPU limit of the container in cores, from the cgroup CPU quota
+
+    Returns:
+        The quota in cores, or None when there is no quota (or no cgroup)
+    """
+    # cgroup v2: "<quota|max> <period>"
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: quota of -1 means unlimited
+    try:
+        with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read().strip())
+        with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read().strip())
+        if quota <= 0 or period <= 0:
+            return None
+        return quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process is allowed to run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def default_worker_count(root: str = CGROUP_ROOT) -> int:
+    """One worker per CPU of quota (rounded up), never more than usable CPUs"""
+    cpus = len(available_cpus())
+    limit = cgroup_cpu_limit(root)
+    if limit is None:
+        return max(cpus, 1)
+    return max(1, min(cpus, math.ceil(limit)))
+
+
+class WorkerStatus:
+    """Per-worker readiness flags in shared memory, created before fork"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.index: int | None = None
+        self._flags = Array("b", total, lock=False)
+
+    def mark(self, ready: bool, index: int | None = None):
+        """Record readiness for a worker (this worker by default)"""
+        index = self.index if index is None else index
+        if index is not None:
+            self._flags[index] = 1 if ready else 0
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "worker": self.index if self.index is not None else -1,
+            "total": self.total,
+            "ready": sum(self._flags),
+        }
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Create the listening socket shared by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # An explicit IPPROTO_TCP lets asyncio set TCP_NODELAY on accepted connections
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that drains before shutting down
+
+    The first SIGTERM/SIGINT starts the drain: readiness fails and every
+    response gets Connection: close, while requests are still served.
+    After drain_seconds (or on a second signal) the normal graceful
+    shutdown runs.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_seconds: float = 0.0):
+        super().__init__(config)
+        self.drain_seconds = drain_seconds
+        self.drain_deadline: float | None = None
+
+    def handle_exit(self, sig, frame):
+        if self.drain_deadline is None and self.drain_seconds > 0:
+            self.drain_deadline = time.monotonic() + self.drain_seconds
+            service.begin_drain()
+            return
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        should_exit = await super().on_tick(counter)
+        if self.drain_deadline is not None:
+            # Default headers are rebuilt every second; keep the close on them
+            headers = self.server_state.default_headers
+            if (b"connection", b"close") not in headers:
+                self.server_state.default_headers = headers + [
+                    (b"connection", b"close")
+                ]
+            if time.monotonic() >= self.drain_deadline:
+                self.should_exit = True
+                return True
+        return should_exit
+
+
+def uvicorn_config(settings) -> uvicorn.Config:
+    """uvicorn settings of the production server profile"""
+    return uvicorn.Config(
+        service.app,
+        loop=settings.server_loop,
+        http=settings.server_http,
+        timeout_keep_alive=int(settings.server_keepalive_seconds),
+        backlog=settings.server_backlog,
+        timeout_graceful_shutdown=int(settings.server_graceful_timeout_seconds),
+        log_level="info",
+    )
+
+
+def _serve_h2c(sock: socket.socket, settings):
+    """Serve HTTP/1.1 and h2c (prior knowledge or Upgrade) with hypercorn"""
+    try:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+    except ImportError:
+        raise ImportError("hypercorn not installed (needed for SERVER_HTTP=h2c)")
+
+    config = Config()
+    config.bind = [f"fd://{sock.fileno()}"]
+    config.keep_alive_timeout = settings.server_keepalive_seconds
+    config.backlog = settings.server_backlog
+    config.graceful_timeout = settings.server_graceful_timeout_seconds
+
+    if settings.server_loop in ("auto", "uvloop"):
+        try:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            if settings.server_loop == "uvloop":
+                raise
+
+    async def drained():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        await stop.wait()
+        service.begin_drain()
+        stop.clear()
+        try:
+            await asyncio.wait_for(stop.wait(), settings.server_drain_seconds)
+        except TimeoutError:
+            pass
+
+    asyncio.run(serve(service.app, config, shutdown_trigger=drained))
+
+
+def serve_socket(sock: socket.socket, settings):
+    """Run the configured server on an already bound socket until it drains"""
+    signal.signal(
+        signal.SIGUSR2, lambda signum, frame: service.request_model_activation()
+    )
+    if settings.server_http == "h2c":
+        _serve_h2c(sock, settings)
+        return
+    server = DrainingServer(
+        uvicorn_config(settings), drain_seconds=settings.server_drain_seconds
+    )
+    server.run(sockets=[sock])
+
+
+def _run_worker(index: int, sock: socket.socket, status: WorkerStatus, cpu: int | None):
+    """Body of a forked worker: pin, cap native threads, serve until told to stop"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    status.index = index
+
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+
+    # One BLAS/OpenMP thread per worker; parallelism comes from the processes
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+
+    logger.info(
+        f"Worker {index} (pid {os.getpid()}) serving"
+        + (f" on CPU {cpu}" if cpu is not None else "")
+    )
+    serve_socket(sock, service.settings)
+
+
+def _spawn(
+    index: int, sock: socket.socket, status: WorkerStatus, cpus: list[int] | None
+) -> int:
+    cpu = cpus[index % len(cpus)] if cpus else None
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            _run_worker(index, sock, status, cpu)
+        except BaseException:
+            logger.exception(f"Worker {index} crashed")
+            exit_code = 1
+        finally:
+            status.mark(False)
+            os._exit(exit_code)
+    return pid
+
+
+def main():
+    settings = service.settings
+    workers = settings.workers or default_worker_count()
+
+    # Every worker checks its own RSS against its share of the container limit
+    service.memory_budget = service.MemoryBudget.from_settings(
+        settings.memory_model_budget_mb,
+        settings.memory_process_budget_ratio,
+        workers=workers,
+    )
+
+    # Load and warm up once; workers inherit the model copy-on-write
+    service.load_model()
+
+    sock = bind_socket(settings.host, settings.port, settings.server_backlog)
+    if workers == 1:
+        logger.info(f"Serving with a single worker on {settings.host}:{settings.port}")
+        serve_socket(sock, settings)
+        return
+
+    status = WorkerStatus(workers)
+    service.worker_status = status
+    cpus = available_cpus() if settings.cpu_affinity else None
+    gc.freeze()
+
+    logger.info(f"Starting {workers} workers on {settings.host}:{settings.port}")
+    children = {_spawn(i, sock, status, cpus): i for i in range(workers)}
+    stopping = False
+
+    def forward(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def forward_activation(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGUSR2)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGUSR2, forward_activation)
+
+    while children:
+        try:
+            pid, wait_status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        status.mark(False, index)
+        if not stopping:
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited with status {wait_status}, respawning"
+            )
+            time.sleep(RESPAWN_DELAY_SECONDS)
+            # Otherwise the new worker would serve the startup model
+            if service.load_active_model():
+                gc.freeze()
+            children[_spawn(index, sock, status, cpus)] = index
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Streaming input-distribution statistics for drift monitoring
+
+Per feature: count, Welford mean/variance and a fixed-bin histogram; per
+class: prediction counts. Updates are O(1) per row and lock-free: each
+thread writes its own shard (threadpool and gRPC workers never contend),
+and shards are merged on read with Chan et al.'s parallel variance
+formula. A read concurrent with an update may see that one update
+half-applied, which is fine for monitoring.
+
+Drift is reported as the population stability index (PSI) of each live
+histogram against the reference histograms written into the model
+artifact by ml/training/train.py.
+"""
+
+import threading
+from typing import Any
+
+import numpy as np
+
+# 0-10 cm in 0.5 cm bins; the range PredictRequest accepts
+DEFAULT_BIN_EDGES = np.linspace(0.0, 10.0, 21)
+
+# Proportions are floored at this value so empty bins do not blow up PSI
+PSI_EPSILON = 1e-4
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI between two histograms over the same bins (counts or proportions)"""
+    expected = np.maximum(
+        np.asarray(expected, dtype=np.float64) / max(np.sum(expected), 1), PSI_EPSILON
+    )
+    actual = np.maximum(
+        np.asarray(actual, dtype=np.float64) / max(np.sum(actual), 1), PSI_EPSILON
+    )
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class _Shard:
+    """Accumulators owned by a single thread"""
+
+    __slots__ = ("class_counts", "count", "histograms", "m2", "mean")
+
+    def __init__(self, n_features: int, n_bins: int, n_classes: int):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.histograms = np.zeros((n_features, n_bins), dtype=np.int64)
+        self.class_counts = np.zeros(n_classes, dtype=np.int64)
+
+
+class StreamingStats:
+    """
+    Sharded streaming statistics over the feature matrix and predictions
+
+    Args:
+        feature_names: Names of the feature columns
+        class_names: Names of the predicted classes
+        reference: Reference statistics from the training artifact; its
+            bin edges are used for the live histograms when present
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        class_names: list[str],
+        reference: dict[str, Any] | None = None,
+    ):
+        self.feature_names = list(feature_names)
+        self.class_names = list(class_names)
+        self.reference = reference
+        edges = reference.get("bin_edges") if reference else None
+        self.bin_edges = np.asarray(
+            edges if edges is not None else DEFAULT_BIN_EDGES, dtype=np.float64
+        )
+
+        self._inner_edges = self.bin_edges[1:-1]
+        self._feature_index = np.arange(len(self.feature_names))
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(
+                len(self.feature_names), len(self.bin_edges) - 1, len(self.class_names)
+            )
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def update(self, features: np.ndarray, class_ids: np.ndarray):
+        """Fold a batch of rows and their predicted classes into this thread's shard"""
+        features = np.asarray(features, dtype=np.float64)
+        n = len(features)
+        if n == 0:
+            return
+        shard = self._shard()
+
+        # Welford / Chan batch merge
+        batch_mean = features.mean(axis=0)
+        batch_m2 = ((features - batch_mean) ** 2).sum(axis=0)
+        total = shard.count + n
+        delta = batch_mean - shard.mean
+        shard.mean += delta * (n / total)
+        shard.m2 += batch_m2 + delta**2 * (shard.count * n / total)
+        shard.count = total
+
+        # Out-of-range values land in the first/last bin
+        bins = np.searchsorted(self._inner_edges, features, side="right")
+        np.add.at(shard.histograms, (self._feature_index, bins), 1)
+        np.add.at(shard.class_counts, np.asarray(class_ids, dtype=np.int64), 1)
+
+    def _merged(self) -> _Shard:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged = _Shard(
+            len(self.feature_names), len(self.bin_edges) - 1, len(self.class_names)
+        )
+        for shard in shards:
+            n = shard.count
+            if n == 0:
+                continue
+            total = merged.count + n
+            delta = shard.mean - merged.mean
+            merged.m2 += shard.m2 + delta**2 * (merged.count * n / total)
+            merged.mean += delta * (n / total)
+            merged.count = total
+            merged.histograms += shard.histograms
+            merged.class_counts += shard.class_counts
+        return merged
+
+    def snapshot(self, drift_threshold: float = 0.2) -> dict[str, Any]:
+        """Merged statistics, plus PSI drift against the reference if one is loaded"""
+        merged = self._merged()
+        variance = (
+            merged.m2 / merged.count if merged.count > 1 else np.zeros_like(merged.m2)
+        )
+        psi = self.drift(merged)
+
+        features = {}
+        for i, name in enumerate(self.feature_names):
+            features[name] = {
+                "mean": float(merged.mean[i]),
+                "stddev": float(np.sqrt(variance[i])),
+                "histogram": merged.histograms[i].tolist(),
+            }
+            if psi is not None:
+                features[name]["psi"] = psi[name]
+                features[name]["drifted"] = psi[name] > drift_threshold
+
+        return {
+            "count": merged.count,
+            "bin_edges": self.bin_edges.tolist(),
+            "features": features,
+            "class_counts": dict(zip(self.class_names, merged.class_counts.tolist())),
+            "reference_loaded": self.reference is not None,
+        }
+
+    def drift(self, merged: _Shard | None = None) -> dict[str, float] | None:
+        """Per-feature PSI of the live histograms against the reference"""
+        if not self.reference:
+            return None
+        merged = merged if merged is not None else self._merged()
+        if merged.count == 0:
+            return None
+        reference_histograms = self.reference["feature_histograms"]
+        return {
+            name: population_stability_index(
+                reference_histograms[i], merged.histograms[i]
+            )
+            for i, name in enumerate(self.feature_names)
+        }
+
+    def metric_samples(self, field: str):
+        """(labels, value) pairs for a per-feature field, for the metrics registry"""
+        snapshot = self.snapshot()
+        return [
+            ({"feature": name}, values[field])
+            for name, values in snapshot["features"].items()
+            if field in values
+        ]
+
+    def class_samples(self):
+        """(labels, value) pairs of predictions per class, for the metrics registry"""
+        merged = self._merged()
+        return [
+            ({"class": name}, count)
+            for name, count in zip(self.class_names, merged.class_counts.tolist())
+        ]
@@ -0,0 +1,306 @@
+"""
+Request tracing for the inference service
+
+Lightweight OpenTelemetry-style spans with W3C trace-context propagation.
+The gateway's traceparent header is honoured (parent-based sampling);
+requests without one are sampled at a configurable ratio. Finished traces
+go to a pluggable exporter: in-memory (tests), JSONL file, or the log.
+
+When a request is not sampled every span is the shared NOOP_SPAN, so the
+hot path pays one random() call and a few attribute lookups.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_RE = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$"
+)
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext:
+    """Identity of a span as carried in a traceparent header"""
+
+    __slots__ = ("sampled", "span_id", "trace_id")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(header: str | None) -> SpanContext | None:
+    """Parse a W3C traceparent header, returning None if it is absent or invalid"""
+    if not header:
+        return None
+    match = _TRACEPARENT_RE.match(header.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 0x01))
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        "_trace",
+        "attributes",
+        "context",
+        "end_ns",
+        "name",
+        "parent_span_id",
+        "start_ns",
+        "status",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_span_id: str | None,
+        trace: "_Trace",
+        start_ns: int | None = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes: dict[str, Any] = {}
+        self.status = "OK"
+        self._trace = trace
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.status = "ERROR"
+        self.attributes["error.message"] = message
+
+    def child(self, name: str, start_ns: int | None = None) -> "Span":
+        context = SpanContext(self.context.trace_id, _new_span_id(), True)
+        return Span(name, context, self.context.span_id, self._trace, start_ns)
+
+    def end(self, end_ns: int | None = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+            self._trace.finish(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    """Stand-in for unsampled requests; every operation is a no-op"""
+
+    context = None
+    recording = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def child(self, name, start_ns=None):
+        return self
+
+    def end(self, end_ns=None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """Collects the spans of one request and exports them when the root ends"""
+
+    __slots__ = ("exporter", "root_span_id", "spans")
+
+    def __init__(self, root_span_id: str, exporter: "SpanExporter"):
+        self.root_span_id = root_span_id
+        self.spans: list[Span] = []
+        self.exporter = exporter
+
+    def finish(self, span: Span):
+        self.spans.append(span)
+        if span.context.span_id == self.root_span_id:
+            try:
+                self.exporter.export(self.spans)
+            except Exception:
+                logger.warning("Span export failed", exc_info=True)
+
+
+class SpanExporter:
+    """Receives the finished spans of each sampled request"""
+
+    def export(self, spans: list[Span]):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in memory, for tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: list[Span]):
+        lines = "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class LoggingSpanExporter(SpanExporter):
+    """Logs one line per span"""
+
+    def export(self, spans: list[Span]):
+        for span in spans:
+            logger.info(f"span {json.dumps(span.to_dict())}")
+
+
+def create_exporter(kind: str, file_path: str = "") -> SpanExporter:
+    """Build an exporter from its configured name: none, memory, file or log"""
+    kind = (kind or "none").lower()
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "file":
+        return FileSpanExporter(file_path)
+    if kind == "log":
+        return LoggingSpanExporter()
+    if kind == "none":
+        return SpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=NOOP_SPAN
+)
+
+
+def current_span():
+    """Span of the request being handled (NOOP_SPAN when unsampled)"""
+    return _current_span.get()
+
+
+class Tracer:
+    """
+    Starts request traces and child spans
+
+    Args:
+        exporter: Destination for finished traces
+        sample_ratio: Probability of sampling a request without a sampled parent
+    """
+
+    def __init__(self, exporter: SpanExporter, sample_ratio: float = 0.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def start_request(self, name: str, traceparent: str | None = None):
+        """
+        Start the server span for an incoming request
+
+        Returns:
+            A Span when sampled, otherwise NOOP_SPAN. The span becomes the
+            current span for the calling context.
+        """
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            sampled = parent.sampled
+        else:
+            sampled = self.sample_ratio > 0 and random.random() < self.sample_ratio
+        if not sampled:
+            return NOOP_SPAN
+
+        trace_id = parent.trace_id if parent is not None else _new_trace_id()
+        context = SpanContext(trace_id, _new_span_id(), True)
+        span = Span(
+            name,
+            context,
+            parent.span_id if parent is not None else None,
+            _Trace(context.span_id, self.exporter),
+        )
+        span.set_attribute("span.kind", "server")
+        _current_span.set(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str):
+        """Run a block as a child of the current span"""
+        parent = _current_span.get()
+        if not parent.recording:
+            yield NOOP_SPAN
+            return
+        span = parent.child(name)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
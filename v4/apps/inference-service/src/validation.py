@@ -0,0 +1,101 @@
+"""
+Feature validation shared by every transport
+
+PredictRequest enforces the 0-10 cm range per field for single JSON
+requests. Batches (JSON, float32, msgpack) and gRPC decode straight into
+NumPy and are checked here, over the whole feature matrix at once: a
+NaN, an infinity and a range pass instead of per-row objects. row_errors() returns an error code per row so the
+batch endpoint can score the valid rows and report the rest by index.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+MEASUREMENT_MIN = 0.0
+MEASUREMENT_MAX = 10.0
+
+# Per-row error codes; 0 means the row is valid
+VALID = 0
+NOT_A_NUMBER = 1
+INFINITE = 2
+OUT_OF_RANGE = 3
+MALFORMED = 4
+
+ERROR_MESSAGES = {
+    NOT_A_NUMBER: "Measurement is NaN",
+    INFINITE: "Measurement is infinite",
+    OUT_OF_RANGE: f"Measurement must be between {MEASUREMENT_MIN:g} and {MEASUREMENT_MAX:g}",
+    MALFORMED: "Row is missing a measurement or has a non-numeric value",
+}
+
+
+def row_errors(features: np.ndarray) -> np.ndarray:
+    """
+    Error code per row of an (n, 4) feature matrix
+
+    A row with several problems reports the first of NaN, infinite,
+    out of range.
+    """
+    features = np.asarray(features)
+    nan = np.isnan(features).any(axis=1)
+    infinite = np.isinf(features).any(axis=1)
+    # NaN compares False on both sides, so it never counts as out of range
+    out_of_range = ((features < MEASUREMENT_MIN) | (features > MEASUREMENT_MAX)).any(
+        axis=1
+    )
+    return np.select(
+        [nan, infinite, out_of_range], [NOT_A_NUMBER, INFINITE, OUT_OF_RANGE], VALID
+    ).astype(np.uint8)
+
+
+def invalid_rows(features: np.ndarray) -> np.ndarray:
+    """Indices of rows with a NaN, infinite or out-of-range measurement"""
+    return np.flatnonzero(row_errors(features))
+
+
+def describe_errors(errors: np.ndarray) -> list[dict[str, Any]]:
+    """[{"index", "error"}] for every invalid row, in row order"""
+    indexes = np.flatnonzero(errors)
+    return [{"index": int(i), "error": ERROR_MESSAGES[int(errors[i])]} for i in indexes]
+
+
+def json_instances_matrix(
+    instances: Sequence[Any], feature_names: Sequence[str]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build the (n, 4) matrix from decoded JSON or msgpack instances without per-row models
+
+    Rows may be objects keyed by feature name or lists of four numbers.
+    Rows that cannot be read become NaN and are flagged MALFORMED.
+
+    Returns:
+        (features, malformed mask)
+    """
+    n_features = len(feature_names)
+    try:
+        rows = [
+            [row[name] for name in feature_names] if isinstance(row, dict) else row
+            for row in instances
+        ]
+        features = np.array(rows, dtype=np.float64)
+        if features.ndim == 2 and features.shape[1] == n_features:
+            return features, np.zeros(len(features), dtype=bool)
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    # Slow path: at least one row is malformed, find out which
+    features = np.full((len(instances), n_features), np.nan)
+    malformed = np.zeros(len(instances), dtype=bool)
+    for i, row in enumerate(instances):
+        try:
+            values = (
+                [row[name] for name in feature_names] if isinstance(row, dict) else row
+            )
+            if isinstance(values, (str, bytes)) or len(values) != n_features:
+                raise ValueError("wrong number of measurements")
+            features[i] = np.array(values, dtype=np.float64)
+        except (KeyError, TypeError, ValueError):
+            malformed[i] = True
+    return features, malformed
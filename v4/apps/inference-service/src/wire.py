@@ -0,0 +1,162 @@
+"""
+Wire formats for batch prediction traffic
+
+JSON stays the default. Two compact encodings are negotiated by
+Content-Type (request) and Accept (response):
+
+- application/x-iris-float32: the request body is a packed little-endian
+  float32 matrix, one row of 4 features per instance, handed to NumPy with
+  frombuffer (no per-field copies). The response body is the int32 class
+  ids followed by the float32 probability matrix; its shape travels in the
+  X-Iris-Rows / X-Iris-Classes headers.
+- application/msgpack: a map with either "instances" (rows read like JSON
+  instances: 4-float lists or maps keyed by feature name) or "features"
+  (packed float32 bytes, same layout as above). The response is a
+  columnar map. Requires the optional msgpack package.
+
+Rows that fail validation keep their position in every response: class
+id -1 and NaN probabilities in float32 (counted in X-Iris-Invalid-Rows),
+class id -1 / name nil plus an "errors" list in msgpack.
+"""
+
+import numpy as np
+from inference_core.features import FEATURE_NAMES
+
+from . import validation
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+JSON = "application/json"
+FLOAT32 = "application/x-iris-float32"
+MSGPACK = "application/msgpack"
+
+_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+N_FEATURES = 4
+ROWS_HEADER = "X-Iris-Rows"
+CLASSES_HEADER = "X-Iris-Classes"
+INVALID_ROWS_HEADER = "X-Iris-Invalid-Rows"
+
+# Class id reported for rows that were not scored
+INVALID_CLASS_ID = -1
+
+
+class WireFormatError(ValueError):
+    """Body cannot be decoded in the declared wire format"""
+
+
+class UnsupportedMediaType(ValueError):
+    """Content-Type / Accept names a format this service does not speak"""
+
+
+def supported_formats() -> list[str]:
+    formats = [JSON, FLOAT32]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def _media_type(header_value: str | None) -> str:
+    media_type = (header_value or "").split(";", 1)[0].strip().lower()
+    return _ALIASES.get(media_type, media_type)
+
+
+def request_format(content_type: str | None) -> str:
+    """Resolve the request wire format from the Content-Type header"""
+    media_type = _media_type(content_type) or JSON
+    if media_type not in supported_formats():
+        raise UnsupportedMediaType(f"Unsupported Content-Type: {media_type}")
+    return media_type
+
+
+def response_format(accept: str | None, request_fmt: str) -> str:
+    """
+    Resolve the response wire format from the Accept header
+
+    Binary requests get binary responses unless the client asks otherwise.
+    """
+    if not accept:
+        return request_fmt
+    for candidate in accept.split(","):
+        media_type = _media_type(candidate)
+        if media_type in ("*/*", ""):
+            return request_fmt
+        if media_type in supported_formats():
+            return media_type
+    raise UnsupportedMediaType(f"Cannot produce any of: {accept}")
+
+
+def decode_float32(body: bytes) -> np.ndarray:
+    """View a packed float32 body as an (n, 4) matrix without copying"""
+    row_bytes = N_FEATURES * 4
+    if not body or len(body) % row_bytes != 0:
+        raise WireFormatError(
+            f"Body length must be a positive multiple of {row_bytes} bytes"
+        )
+    return np.frombuffer(body, dtype="<f4").reshape(-1, N_FEATURES)
+
+
+def encode_float32(class_ids: np.ndarray, probabilities: np.ndarray) -> bytes:
+    """Pack int32 class ids followed by the float32 probability matrix"""
+    return (
+        np.ascontiguousarray(class_ids, dtype="<i4").tobytes()
+        + np.ascontiguousarray(probabilities, dtype="<f4").tobytes()
+    )
+
+
+def decode_msgpack(body: bytes) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Decode a msgpack batch into an (n, 4) feature matrix
+
+    Returns:
+        (features, malformed row mask, or None for packed features)
+    """
+    if msgpack is None:
+        raise UnsupportedMediaType("msgpack is not installed")
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise WireFormatError(f"Invalid msgpack body: {e}") from e
+    if not isinstance(payload, dict):
+        raise WireFormatError("msgpack body must be a map")
+
+    if isinstance(payload.get("features"), (bytes, bytearray)):
+        return decode_float32(payload["features"]), None
+
+    instances = payload.get("instances")
+    if not isinstance(instances, list) or not instances:
+        raise WireFormatError("msgpack body needs non-empty 'instances' or 'features'")
+    # Malformed rows are flagged by index, as in JSON batches
+    return validation.json_instances_matrix(instances, FEATURE_NAMES)
+
+
+def encode_msgpack(
+    class_ids: np.ndarray,
+    class_names: list[str],
+    probabilities: np.ndarray,
+    model_version: str,
+    timestamp: str,
+    errors: list[dict] | None = None,
+) -> bytes:
+    """Encode batch predictions as a columnar msgpack map"""
+    if msgpack is None:
+        raise UnsupportedMediaType("msgpack is not installed")
+    return msgpack.packb(
+        {
+            "predicted_class_id": class_ids.tolist(),
+            "predicted_class_name": [
+                class_names[i] if i != INVALID_CLASS_ID else None for i in class_ids
+            ],
+            "probabilities": probabilities.tolist(),
+            "errors": errors or [],
+            "model_version": model_version,
+            "timestamp": timestamp,
+        }
+    )
@@ -2,10 +2,12 @@
 Tests for Iris Inference Service
 """
 
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
-import numpy as np
 
 
 class MockModel:
@@ -18,17 +20,48 @@ class MockModel:
         return np.array([[0.97, 0.02, 0.01]])
 
 
+class BatchMockModel:
+    """Mock sklearn model that scores every row: virginica if petal_length > 4"""
+
+    def predict(self, X):
+        return np.where(np.asarray(X)[:, 2] > 4, 2, 0)
+
+    def predict_proba(self, X):
+        ids = self.predict(X)
+        return np.eye(3)[ids]
+
+
+SETOSA = {
+    "sepal_length": 5.1,
+    "sepal_width": 3.5,
+    "petal_length": 1.4,
+    "petal_width": 0.2,
+}
+VIRGINICA = {
+    "sepal_length": 6.7,
+    "sepal_width": 3.0,
+    "petal_length": 5.2,
+    "petal_width": 2.3,
+}
+
+
 @pytest.fixture
 def client():
     """Create test client with mocked model"""
-    with patch.dict('os.environ', {'MODEL_PATH': 'test_model.pkl', 'API_KEY': ''}):
+    with patch.dict("os.environ", {"MODEL_PATH": "test_model.pkl", "API_KEY": ""}):
         # Import after patching environment
-        from src.app import app, load_model
         import src.app as app_module
+        from src.app import app
 
         # Mock the model
         app_module.model = MockModel()
         app_module.model_load_time = "2024-01-01T00:00:00"
+        app_module.feature_stats = app_module.StreamingStats(
+            app_module.FEATURE_NAMES, app_module.CLASS_NAMES
+        )
+        app_module.lookup_report = None
+        app_module.compact_report = None
+        app_module.explainer = None
 
         return TestClient(app)
 
@@ -51,6 +84,7 @@ class TestReadiness:
 
     def test_readiness_when_model_not_loaded(self, client):
         import src.app as app_module
+
         original_model = app_module.model
         app_module.model = None
 
@@ -62,32 +96,633 @@ class TestReadiness:
 
 class TestPredict:
     def test_predict_valid_request(self, client):
-        response = client.post("/predict", json={
-            "sepal_length": 5.1,
-            "sepal_width": 3.5,
-            "petal_length": 1.4,
-            "petal_width": 0.2
-        })
+        response = client.post(
+            "/predict",
+            json={
+                "sepal_length": 5.1,
+                "sepal_width": 3.5,
+                "petal_length": 1.4,
+                "petal_width": 0.2,
+            },
+        )
         assert response.status_code == 200
         data = response.json()
         assert data["predicted_class_id"] == 0
         assert data["predicted_class_name"] == "setosa"
         assert len(data["probabilities"]) == 3
 
+    def test_predict_response_schema_unchanged(self, client):
+        import src.app as app_module
+
+        response = client.post("/predict", json=SETOSA)
+        assert response.headers["content-type"] == "application/json"
+        parsed = app_module.PredictionResponse.model_validate_json(response.content)
+        assert list(response.json()) == list(app_module.PredictionResponse.model_fields)
+        assert parsed.model_version == app_module.settings.model_version
+
     def test_predict_invalid_values(self, client):
-        response = client.post("/predict", json={
-            "sepal_length": -1.0,
-            "sepal_width": 3.5,
-            "petal_length": 1.4,
-            "petal_width": 0.2
-        })
+        response = client.post(
+            "/predict",
+            json={
+                "sepal_length": -1.0,
+                "sepal_width": 3.5,
+                "petal_length": 1.4,
+                "petal_width": 0.2,
+            },
+        )
         assert response.status_code == 422
 
     def test_predict_missing_fields(self, client):
-        response = client.post("/predict", json={
-            "sepal_length": 5.1
-        })
+        response = client.post("/predict", json={"sepal_length": 5.1})
+        assert response.status_code == 422
+
+
+class TestLoadShedding:
+    def test_predict_shed_with_retry_after_when_saturated(self, client, monkeypatch):
+        import src.app as app_module
+        from src.concurrency import AdaptiveConcurrencyLimiter
+
+        monkeypatch.setattr(
+            app_module, "limiter", AdaptiveConcurrencyLimiter(initial_limit=1)
+        )
+        app_module.limiter.try_acquire()
+
+        response = client.post(
+            "/predict",
+            json={
+                "sepal_length": 5.1,
+                "sepal_width": 3.5,
+                "petal_length": 1.4,
+                "petal_width": 0.2,
+            },
+        )
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+    def test_health_endpoints_never_shed(self, client, monkeypatch):
+        import src.app as app_module
+        from src.concurrency import AdaptiveConcurrencyLimiter
+
+        monkeypatch.setattr(
+            app_module, "limiter", AdaptiveConcurrencyLimiter(initial_limit=1)
+        )
+        app_module.limiter.try_acquire()
+
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 200
+
+    def test_slow_batches_do_not_shrink_the_limit_for_predict(
+        self, client, monkeypatch
+    ):
+        import threading
+        import time
+
+        import src.app as app_module
+        from src.concurrency import AdaptiveConcurrencyLimiter
+
+        class SlowBatchModel(BatchMockModel):
+            def predict_proba(self, X):
+                if len(X) > 1:
+                    time.sleep(0.3)
+                return super().predict_proba(X)
+
+        app_module.model = SlowBatchModel()
+        monkeypatch.setattr(
+            app_module,
+            "limiter",
+            AdaptiveConcurrencyLimiter(initial_limit=4, latency_target_seconds=0.05),
+        )
+
+        def run_batches():
+            statuses = []
+            threads = [
+                threading.Thread(
+                    target=lambda: statuses.append(
+                        client.post(
+                            "/predict/batch", json={"instances": [SETOSA, VIRGINICA]}
+                        ).status_code
+                    )
+                )
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            return threads, statuses
+
+        # A first round of slow batches must not cut the limit
+        threads, statuses = run_batches()
+        for thread in threads:
+            thread.join()
+        assert statuses == [200, 200, 200]
+        assert app_module.limiter.limit == 4
+
+        # A second round runs alongside /predict, which is still admitted
+        threads, statuses = run_batches()
+        time.sleep(0.1)
+        assert client.post("/predict", json=SETOSA).status_code == 200
+        for thread in threads:
+            thread.join()
+        assert statuses == [200, 200, 200]
+        assert app_module.limiter.shed_total == 0
+
+    def test_admitted_request_releases_slot(self, client):
+        import src.app as app_module
+
+        client.post(
+            "/predict",
+            json={
+                "sepal_length": 5.1,
+                "sepal_width": 3.5,
+                "petal_length": 1.4,
+                "petal_width": 0.2,
+            },
+        )
+        assert app_module.limiter.inflight == 0
+
+
+class TestPriorityScheduling:
+    def test_requests_classified_by_route_and_header(self, client):
+        import src.app as app_module
+
+        app_module.model = BatchMockModel()
+        before = {
+            c.name: c.dispatched_total for c in app_module.scheduler.classes.values()
+        }
+
+        client.post("/predict", json=SETOSA)
+        client.post("/predict/batch", json={"instances": [SETOSA]})
+        client.post(
+            "/predict/batch",
+            json={"instances": [SETOSA]},
+            headers={"X-Priority": "interactive"},
+        )
+
+        classes = app_module.scheduler.classes
+        assert classes["interactive"].dispatched_total - before["interactive"] == 2
+        assert classes["bulk"].dispatched_total - before["bulk"] == 1
+
+    def test_full_class_queue_sheds(self, client, monkeypatch):
+        import src.app as app_module
+        from src.scheduling import PriorityClass, WeightedFairScheduler
+
+        scheduler = WeightedFairScheduler([PriorityClass("interactive", 8, 0)], slots=1)
+        scheduler._busy = 1
+        monkeypatch.setattr(app_module, "scheduler", scheduler)
+
+        response = client.post("/predict", json=SETOSA)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+        body = client.get("/metrics").text
+        assert "# TYPE inference_queue_rejected_total counter" in body
+        assert 'inference_queue_rejected_total{priority="interactive"} 1' in body
+        assert "# TYPE inference_queue_depth gauge" in body
+
+
+class TestPredictBatch:
+    @pytest.fixture
+    def batch_client(self, client):
+        import src.app as app_module
+
+        app_module.model = BatchMockModel()
+        return client
+
+    def test_json_batch(self, batch_client):
+        response = batch_client.post(
+            "/predict/batch", json={"instances": [SETOSA, VIRGINICA]}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["predicted_class_name"] for p in data["predictions"]] == [
+            "setosa",
+            "virginica",
+        ]
+        assert data["predictions"][1]["probabilities"] == [0.0, 0.0, 1.0]
+
+    def test_json_batch_validates_rows(self, batch_client):
+        response = batch_client.post(
+            "/predict/batch", json={"instances": [dict(SETOSA, sepal_length=-1)]}
+        )
+        assert response.status_code == 422
+
+    def test_float32_batch(self, batch_client):
+        rows = np.array([list(SETOSA.values()), list(VIRGINICA.values())], dtype="<f4")
+        response = batch_client.post(
+            "/predict/batch",
+            content=rows.tobytes(),
+            headers={"Content-Type": "application/x-iris-float32"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-iris-float32"
+        assert response.headers["X-Iris-Rows"] == "2"
+        class_ids = np.frombuffer(response.content[:8], dtype="<i4")
+        probabilities = np.frombuffer(response.content[8:], dtype="<f4").reshape(2, 3)
+        assert class_ids.tolist() == [0, 2]
+        assert probabilities[1].tolist() == [0.0, 0.0, 1.0]
+
+    def test_float32_request_json_response(self, batch_client):
+        rows = np.array([list(VIRGINICA.values())], dtype="<f4")
+        response = batch_client.post(
+            "/predict/batch",
+            content=rows.tobytes(),
+            headers={
+                "Content-Type": "application/x-iris-float32",
+                "Accept": "application/json",
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["predictions"][0]["predicted_class_id"] == 2
+
+    def test_float32_invalid_rows_are_reported_not_rejected(self, batch_client):
+        rows = np.array(
+            [list(SETOSA.values()), [np.nan, 1, 1, 1], [1, 1, 11, 1]], dtype="<f4"
+        )
+        response = batch_client.post(
+            "/predict/batch",
+            content=rows.tobytes(),
+            headers={"Content-Type": "application/x-iris-float32"},
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Iris-Invalid-Rows"] == "2"
+        class_ids = np.frombuffer(response.content[:12], dtype="<i4")
+        probabilities = np.frombuffer(response.content[12:], dtype="<f4").reshape(3, 3)
+        assert class_ids.tolist() == [0, -1, -1]
+        assert np.isnan(probabilities[1:]).all()
+
+    def test_all_invalid_rows_rejected(self, batch_client):
+        rows = np.array([[np.nan, 1, 1, 1], [1, 1, 11, 1]], dtype="<f4")
+        response = batch_client.post(
+            "/predict/batch",
+            content=rows.tobytes(),
+            headers={"Content-Type": "application/x-iris-float32"},
+        )
         assert response.status_code == 422
+        assert response.json()["detail"]["invalid_rows"] == [0, 1]
+
+    def test_json_partial_batch(self, batch_client):
+        instances = [
+            SETOSA,
+            dict(SETOSA, petal_length=12),
+            {"sepal_length": 1.0},
+            VIRGINICA,
+        ]
+        response = batch_client.post("/predict/batch", json={"instances": instances})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["predictions"][1] is None and data["predictions"][2] is None
+        assert [data["predictions"][i]["predicted_class_name"] for i in (0, 3)] == [
+            "setosa",
+            "virginica",
+        ]
+        assert [e["index"] for e in data["errors"]] == [1, 2]
+        assert "between 0 and 10" in data["errors"][0]["error"]
+
+    def test_json_batch_requires_instances(self, batch_client):
+        assert (
+            batch_client.post("/predict/batch", json={"rows": [SETOSA]}).status_code
+            == 422
+        )
+        assert (
+            batch_client.post("/predict/batch", json={"instances": []}).status_code
+            == 422
+        )
+        response = batch_client.post(
+            "/predict/batch", content=b"{", headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 422
+
+    def test_server_timing_separates_validation(self, batch_client):
+        response = batch_client.post("/predict/batch", json={"instances": [SETOSA]})
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("validate;dur=") and ", inference;dur=" in timing
+
+    def test_invalid_rows_metric(self, batch_client):
+        batch_client.post(
+            "/predict/batch", json={"instances": [SETOSA, dict(SETOSA, sepal_width=-1)]}
+        )
+        metrics = batch_client.get("/metrics").text
+        assert (
+            'inference_invalid_rows_total{reason="Measurement must be between 0 and 10"}'
+            in metrics
+        )
+        assert "inference_validation_seconds_total" in metrics
+
+    def test_msgpack_batch(self, batch_client):
+        msgpack = pytest.importorskip("msgpack")
+        response = batch_client.post(
+            "/predict/batch",
+            content=msgpack.packb(
+                {"instances": [list(SETOSA.values()), list(VIRGINICA.values())]}
+            ),
+            headers={"Content-Type": "application/msgpack"},
+        )
+        assert response.status_code == 200
+        data = msgpack.unpackb(response.content)
+        assert data["predicted_class_name"] == ["setosa", "virginica"]
+        assert data["errors"] == []
+
+    def test_msgpack_invalid_rows(self, batch_client):
+        msgpack = pytest.importorskip("msgpack")
+        response = batch_client.post(
+            "/predict/batch",
+            content=msgpack.packb(
+                {"instances": [list(SETOSA.values()), [1, 1, float("inf"), 1]]}
+            ),
+            headers={"Content-Type": "application/msgpack"},
+        )
+        data = msgpack.unpackb(response.content)
+        assert data["predicted_class_id"] == [0, -1]
+        assert data["predicted_class_name"] == ["setosa", None]
+        assert data["errors"] == [{"index": 1, "error": "Measurement is infinite"}]
+
+    def test_msgpack_malformed_rows_reported_per_index(self, batch_client):
+        msgpack = pytest.importorskip("msgpack")
+        response = batch_client.post(
+            "/predict/batch",
+            content=msgpack.packb({"instances": [list(SETOSA.values()), [1, 2]]}),
+            headers={"Content-Type": "application/msgpack"},
+        )
+        assert response.status_code == 200
+        data = msgpack.unpackb(response.content)
+        assert data["predicted_class_id"] == [0, -1]
+        assert data["errors"] == [
+            {
+                "index": 1,
+                "error": "Row is missing a measurement or has a non-numeric value",
+            }
+        ]
+
+    def test_unsupported_media_type(self, batch_client):
+        response = batch_client.post(
+            "/predict/batch", content=b"a,b", headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 415
+
+    def test_batch_row_limit(self, batch_client, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "max_batch_rows", 1)
+        response = batch_client.post(
+            "/predict/batch", json={"instances": [SETOSA, VIRGINICA]}
+        )
+        assert response.status_code == 413
+
+
+class TestMetrics:
+    def test_metrics_exposes_concurrency_limit(self, client):
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "inference_concurrency_limit " in response.text
+        assert "# TYPE inference_requests_shed_total counter" in response.text
+
+    def test_metrics_exposes_feature_stats(self, client):
+        client.post("/predict", json=SETOSA)
+        response = client.get("/metrics")
+        assert 'inference_feature_mean{feature="petal_length"} 1.4' in response.text
+        assert 'inference_predicted_class_total{class="setosa"} 1' in response.text
+        assert "# TYPE inference_predicted_class_total counter" in response.text
+
+
+class TestTableServing:
+    def test_table_mode_serves_from_table_and_reports_loss(
+        self, client, model_file, monkeypatch
+    ):
+        import src.app as app_module
+        from src.lookup import TableModel
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "serving_mode", "table")
+        monkeypatch.setattr(app_module.settings, "lookup_table_eval_rows", 2000)
+        app_module.load_model()
+
+        assert isinstance(app_module.model, TableModel)
+        data = client.get("/health/ready").json()
+        assert data["serving_mode"] == "table"
+        assert data["lookup_table"]["class_agreement"] == 1.0
+        assert data["lookup_table"]["max_probability_error"] <= 1 / 510 + 1e-9
+
+        response = client.post("/predict", json=SETOSA)
+        assert response.json()["predicted_class_name"] == "setosa"
+        off_grid = client.post("/predict", json={**VIRGINICA, "petal_length": 5.234})
+        assert off_grid.json()["predicted_class_name"] == "virginica"
+
+    def test_unsupported_model_falls_back_to_model(self, client, monkeypatch):
+        import src.app as app_module
+
+        served, report = app_module.build_table_model(MockModel())
+        assert isinstance(served, MockModel)
+        assert report is None
+        assert client.get("/health/ready").json()["serving_mode"] == "model"
+
+
+class TestCompactServing:
+    def test_compact_mode_flattens_model_at_load(self, client, model_file, monkeypatch):
+        from inference_core.compact import CompactForest
+
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "serving_mode", "compact")
+        monkeypatch.setattr(app_module.settings, "compact_leaf_dtype", "uint8")
+        monkeypatch.setattr(app_module.settings, "compact_eval_rows", 1000)
+        app_module.load_model()
+
+        assert isinstance(app_module.model, CompactForest)
+        data = client.get("/health/ready").json()
+        assert data["serving_mode"] == "compact"
+        assert data["compact_model"]["leaf_dtype"] == "uint8"
+        assert data["compact_model"]["class_agreement"] == 1.0
+        assert (
+            client.post("/predict", json=VIRGINICA).json()["predicted_class_name"]
+            == "virginica"
+        )
+
+    def test_exported_arrays_are_preferred(self, client, tmp_path, monkeypatch):
+        import joblib
+        from inference_core.compact import export_forest
+        from sklearn.datasets import load_iris
+        from sklearn.ensemble import RandomForestClassifier
+
+        import src.app as app_module
+
+        iris = load_iris()
+        rf = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+            iris.data, iris.target
+        )
+        path = tmp_path / "model.pkl"
+        joblib.dump({"model": rf, "compact_model": export_forest(rf, "uint8")}, path)
+        monkeypatch.setattr(app_module.settings, "model_path", str(path))
+        monkeypatch.setattr(app_module.settings, "serving_mode", "compact")
+        app_module.load_model()
+
+        assert app_module.model.leaf_dtype == "uint8"
+
+
+class TestEnsembleServing:
+    def test_ensemble_mode_serves_bundle_members(self, client, tmp_path, monkeypatch):
+        import joblib
+        from sklearn.datasets import load_iris
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
+
+        import src.app as app_module
+        from src.ensemble import EnsembleModel
+
+        iris = load_iris()
+        lr = LogisticRegression(max_iter=500).fit(iris.data, iris.target)
+        rf = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+            iris.data, iris.target
+        )
+        path = tmp_path / "model.pkl"
+        joblib.dump(
+            {
+                "model": rf,
+                "ensemble": [
+                    {"name": "LogisticRegression", "model": lr, "weight": 0.96},
+                    {"name": "RandomForestClassifier", "model": rf, "weight": 0.95},
+                ],
+            },
+            path,
+        )
+        monkeypatch.setattr(app_module.settings, "model_path", str(path))
+        monkeypatch.setattr(app_module.settings, "serving_mode", "ensemble")
+        monkeypatch.setattr(app_module.settings, "ensemble_member_timeout_ms", 1000.0)
+        app_module.load_model()
+
+        assert isinstance(app_module.model, EnsembleModel)
+        assert client.get("/health/ready").json()["serving_mode"] == "ensemble"
+        response = client.post("/predict", json=VIRGINICA)
+        assert response.json()["predicted_class_name"] == "virginica"
+        assert (
+            'inference_ensemble_member_calls_total{member="LogisticRegression"}'
+            in client.get("/metrics").text
+        )
+
+    def test_bundle_without_members_serves_single_model(self, client):
+        import src.app as app_module
+
+        model = MockModel()
+        assert app_module.build_ensemble_model({"model": model}, model) is model
+
+
+class TestCoalescing:
+    def test_identical_concurrent_predictions_run_model_once(self, client, monkeypatch):
+        import threading
+        import time
+
+        from inference_core.singleflight import SingleFlight
+
+        import src.app as app_module
+
+        class SlowModel(MockModel):
+            calls = 0
+
+            def predict(self, X):
+                SlowModel.calls += 1
+                time.sleep(0.2)
+                return super().predict(X)
+
+        app_module.model = SlowModel()
+        monkeypatch.setattr(app_module, "single_flight", SingleFlight())
+
+        responses = []
+        threads = [
+            threading.Thread(
+                target=lambda: responses.append(client.post("/predict", json=SETOSA))
+            )
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert [r.status_code for r in responses] == [200] * 4
+        assert SlowModel.calls == 1
+        assert app_module.single_flight.coalesced_total == 3
+        body = client.get("/metrics").text
+        assert "# TYPE inference_coalesced_requests_total counter" in body
+        assert "inference_coalesced_requests_total 3" in body
+
+    def test_coalescing_can_be_disabled(self, client, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "coalesce_enabled", False)
+        monkeypatch.setattr(app_module, "single_flight", app_module.SingleFlight())
+
+        assert client.post("/predict", json=SETOSA).status_code == 200
+        assert app_module.single_flight.leaders_total == 0
+
+
+class TestAudit:
+    def test_predictions_are_audited(self, client, tmp_path, monkeypatch):
+        import src.app as app_module
+        from src.audit import AuditLog, read_segment
+
+        app_module.model = BatchMockModel()
+        log = AuditLog(str(tmp_path))
+        monkeypatch.setattr(app_module, "audit_log", log)
+
+        client.post("/predict", json=SETOSA)
+        client.post("/predict/batch", json={"instances": [SETOSA, VIRGINICA]})
+        log.flush(seal=True)
+
+        [segment] = os.listdir(tmp_path)
+        records = read_segment(str(tmp_path / segment))
+        assert [(r["source"], r["predicted_class_id"]) for r in records] == [
+            ("predict", 0),
+            ("predict_batch", 0),
+            ("predict_batch", 2),
+        ]
+        assert records[2]["features"] == list(VIRGINICA.values())
+        body = client.get("/metrics").text
+        assert (
+            "# TYPE inference_audit_records_total counter\ninference_audit_records_total 3\n"
+            in body
+        )
+        assert "# TYPE inference_audit_upload_failures_total counter" in body
+        assert "# TYPE inference_audit_buffered_rows gauge" in body
+
+
+class TestStats:
+    def test_stats_track_single_and_batch_predictions(self, client):
+        import src.app as app_module
+
+        app_module.model = BatchMockModel()
+
+        client.post("/predict", json=SETOSA)
+        client.post(
+            "/predict/batch", json={"instances": [SETOSA, VIRGINICA, VIRGINICA]}
+        )
+
+        data = client.get("/stats").json()
+        assert data["count"] == 4
+        assert data["class_counts"] == {"setosa": 2, "versicolor": 0, "virginica": 2}
+        assert data["features"]["petal_length"]["mean"] == pytest.approx(
+            (1.4 * 2 + 5.2 * 2) / 4
+        )
+        assert data["reference_loaded"] is False
+        assert "psi" not in data["features"]["petal_length"]
+
+    def test_stats_skipped_when_disabled(self, client, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "stats_enabled", False)
+
+        client.post("/predict", json=SETOSA)
+        assert client.get("/stats").json()["count"] == 0
+
+    def test_loaded_bundle_reports_drift(self, client, model_file, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+
+        for _ in range(50):
+            client.post("/predict", json={**SETOSA, "sepal_width": 9.5})
+
+        features = client.get("/stats").json()["features"]
+        assert features["sepal_width"]["drifted"] is True
+        assert features["sepal_width"]["psi"] > 1.0
 
 
 class TestRoot:
@@ -97,3 +732,431 @@ class TestRoot:
         data = response.json()
         assert data["service"] == "Iris Inference Service"
         assert "endpoints" in data
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """Train a small real model and save it the way ml/training does"""
+    import joblib
+    from sklearn.datasets import load_iris
+    from sklearn.ensemble import RandomForestClassifier
+
+    iris = load_iris()
+    model = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=42)
+    model.fit(iris.data, iris.target)
+
+    edges = np.linspace(0.0, 10.0, 21)
+    reference = {
+        "bin_edges": edges.tolist(),
+        "feature_histograms": [
+            np.histogram(iris.data[:, i], bins=edges)[0].tolist() for i in range(4)
+        ],
+        "feature_mean": iris.data.mean(axis=0).tolist(),
+        "feature_std": iris.data.std(axis=0).tolist(),
+        "class_counts": np.bincount(iris.target).tolist(),
+        "n_samples": len(iris.data),
+    }
+
+    path = tmp_path / "model.pkl"
+    joblib.dump({"model": model, "reference_stats": reference}, path)
+    return str(path)
+
+
+class TestWarmup:
+    def test_warm_up_exercises_model(self):
+        import src.app as app_module
+
+        class CountingModel(MockModel):
+            calls = 0
+
+            def predict_proba(self, X):
+                CountingModel.calls += 1
+                return np.tile([0.97, 0.02, 0.01], (len(X), 1))
+
+        elapsed = app_module.warm_up_model(CountingModel())
+        assert elapsed >= 0
+        iterations = app_module.settings.warmup_iterations
+        batch_size = app_module.settings.warmup_batch_size
+        assert CountingModel.calls == iterations * (batch_size + 1)
+
+    def test_load_model_records_warmup_time(self, client, model_file, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "warmup_iterations", 2)
+        app_module.load_model()
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup_seconds"] is not None
+
+    def test_model_not_published_when_warmup_fails(
+        self, client, model_file, monkeypatch
+    ):
+        import src.app as app_module
+
+        def broken_warm_up(candidate):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module, "warm_up_model", broken_warm_up)
+        app_module.load_model()
+
+        assert app_module.model is None
+        assert client.get("/health/ready").status_code == 503
+
+    def test_warmup_can_be_disabled(self, client, model_file, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "warmup_enabled", False)
+        app_module.load_model()
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup_seconds"] is None
+
+
+class TestModelActivation:
+    def test_activate_requires_prefetch(self, client):
+        assert client.post("/model/activate").status_code == 404
+        assert client.get("/model/registry").status_code == 404
+
+    def test_staged_model_swapped_in(self, client, model_file, tmp_path, monkeypatch):
+        import shutil
+
+        import src.app as app_module
+        from src.registry import LocalDirectoryRegistry, ModelPrefetcher
+
+        (tmp_path / "registry" / "v2.0.0").mkdir(parents=True)
+        shutil.copyfile(model_file, tmp_path / "registry" / "v2.0.0" / "model.pkl")
+        monkeypatch.setattr(app_module.settings, "model_version", "1.0.0")
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "warmup_iterations", 2)
+        prefetcher = ModelPrefetcher(
+            LocalDirectoryRegistry(str(tmp_path / "registry")),
+            str(tmp_path / "staging"),
+            prepare=app_module.prepare_model,
+            publish=lambda version, path, prepared: app_module.publish_model(
+                prepared, version, path
+            ),
+            current_version=lambda: app_module.settings.model_version,
+        )
+        monkeypatch.setattr(app_module, "prefetcher", prefetcher)
+
+        assert client.post("/model/activate").status_code == 409
+        prefetcher.poll()
+        assert client.get("/model/registry").json()["staged_version"] == "2.0.0"
+        # Staging leaves the served model untouched
+        assert client.post("/predict", json=SETOSA).json()["model_version"] == "1.0.0"
+
+        response = client.post("/model/activate", params={"version": "2.0.0"})
+        assert response.status_code == 200
+        assert response.json()["current_version"] == "2.0.0"
+        assert client.post("/predict", json=SETOSA).json()["model_version"] == "2.0.0"
+        assert (
+            client.get("/health/ready")
+            .json()["model_path"]
+            .endswith("staging/2.0.0/model.pkl")
+        )
+        body = client.get("/metrics").text
+        assert "# TYPE inference_model_activations_total counter" in body
+        assert "inference_model_activations_total 1" in body
+        assert "# TYPE inference_model_downloads_total counter" in body
+
+    def test_supervisor_loads_the_activated_version(
+        self, client, model_file, tmp_path, monkeypatch
+    ):
+        import shutil
+
+        import src.app as app_module
+
+        staging = tmp_path / "staging"
+        (staging / "2.0.0").mkdir(parents=True)
+        shutil.copyfile(model_file, staging / "2.0.0" / "model.pkl")
+        monkeypatch.setattr(app_module.settings, "registry_type", "local")
+        monkeypatch.setattr(app_module.settings, "registry_staging_dir", str(staging))
+        monkeypatch.setattr(app_module.settings, "model_version", "1.0.0")
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "warmup_iterations", 2)
+
+        assert not app_module.load_active_model()
+        (staging / "active").write_text("2.0.0")
+        assert app_module.load_active_model()
+        assert app_module.settings.model_version == "2.0.0"
+        assert client.post("/predict", json=SETOSA).json()["model_version"] == "2.0.0"
+        assert not app_module.load_active_model()
+
+
+class TestFusedPreprocessing:
+    def test_pipeline_artifact_served_fused(self, client, tmp_path, monkeypatch):
+        import joblib
+        from inference_core.fused import FusedLinearModel
+        from sklearn.datasets import load_iris
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        import src.app as app_module
+
+        iris = load_iris()
+        pipeline = Pipeline(
+            [("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=2000))]
+        )
+        path = tmp_path / "pipeline.pkl"
+        joblib.dump({"model": pipeline.fit(iris.data, iris.target)}, path)
+        monkeypatch.setattr(app_module.settings, "model_path", str(path))
+        monkeypatch.setattr(app_module.settings, "warmup_iterations", 1)
+        app_module.load_model()
+
+        assert isinstance(app_module.model, FusedLinearModel)
+        report = client.get("/health/ready").json()["fused_model"]
+        assert report["kind"] == "folded_linear" and report["class_agreement"] == 1.0
+        response = client.post("/predict", json=SETOSA).json()
+        np.testing.assert_allclose(
+            response["probabilities"],
+            pipeline.predict_proba([list(SETOSA.values())])[0],
+        )
+
+    def test_fusing_can_be_disabled(self, client, model_file, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module.settings, "fuse_preprocessing", False)
+        app_module.load_model()
+        assert client.get("/health/ready").json()["fused_model"] is None
+
+
+class TestLoadSignal:
+    def test_predictions_feed_hpa_metrics(self, client, monkeypatch):
+        import src.app as app_module
+        from src.autoscaling import LoadSignal
+
+        monkeypatch.setattr(app_module, "load_signal", LoadSignal(window_seconds=10))
+        client.post("/predict", json=SETOSA)
+        client.get("/health/live")
+
+        signal = app_module.load_signal
+        assert signal.inflight == 0
+        assert signal.requests_per_second() == pytest.approx(0.1)
+        assert signal.rows_per_second() == pytest.approx(0.1)
+        assert signal.mean_inflight() > 0
+
+        body = client.get("/metrics").text
+        for name in (
+            "inference_load_inflight",
+            "inference_load_inflight_avg",
+            "inference_load_queue_wait_p95_seconds",
+            "inference_load_rows_per_second",
+        ):
+            assert f"\n{name} " in body
+
+
+class TestExplain:
+    def test_contributions_add_up_to_served_probabilities(
+        self, client, model_file, monkeypatch
+    ):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+
+        response = client.post(
+            "/predict/explain", json={"instances": [SETOSA, VIRGINICA, SETOSA]}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["method"] == "tree_path" and data["space"] == "probability"
+        assert data["cached_rows"] == 1
+        assert sum(data["global_importances"].values()) == pytest.approx(1.0)
+        assert [e["predicted_class_name"] for e in data["explanations"]] == [
+            "setosa",
+            "virginica",
+            "setosa",
+        ]
+        for explanation in data["explanations"]:
+            total = np.array(explanation["base_values"]) + np.sum(
+                list(explanation["contributions"].values()), axis=0
+            )
+            np.testing.assert_allclose(total, explanation["probabilities"], atol=1e-9)
+
+        # Repeated rows come from the cache
+        assert (
+            client.post("/predict/explain", json={"instances": [VIRGINICA]}).json()[
+                "cached_rows"
+            ]
+            == 1
+        )
+
+        importances = client.get("/model/importances").json()
+        assert importances["importances"] == data["global_importances"]
+        assert importances["cache_hits_total"] == 1
+        body = client.get("/metrics").text
+        assert (
+            "# TYPE inference_explain_cache_hits_total counter\ninference_explain_cache_hits_total 1\n"
+            in body
+        )
+        assert "# TYPE inference_explain_cache_misses_total counter" in body
+
+    def test_unsupported_model_and_row_limit(self, client, monkeypatch):
+        import src.app as app_module
+
+        assert (
+            client.post("/predict/explain", json={"instances": [SETOSA]}).status_code
+            == 501
+        )
+        assert client.get("/model/importances").status_code == 501
+
+        monkeypatch.setattr(app_module.settings, "explain_max_rows", 1)
+        monkeypatch.setattr(app_module, "explainer", MagicMock())
+        response = client.post("/predict/explain", json={"instances": [SETOSA, SETOSA]})
+        assert response.status_code == 413
+
+    def test_budget_rejects_instead_of_waiting(self, client, model_file, monkeypatch):
+        import asyncio
+
+        import src.app as app_module
+        from src.scheduling import WeightedFairScheduler, parse_classes
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+        monkeypatch.setattr(app_module.settings, "explain_budget_ms", 10.0)
+        scheduler = WeightedFairScheduler(
+            parse_classes("interactive:8:256,bulk:1:16"), slots=1
+        )
+        monkeypatch.setattr(app_module, "scheduler", scheduler)
+        # Every slot is taken by predictions that do not finish in time
+        asyncio.run(scheduler.acquire("interactive"))
+
+        response = client.post("/predict/explain", json={"instances": [SETOSA]})
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert scheduler.classes["bulk"].depth == 0
+        assert "inference_explain_budget_exceeded_total" in client.get("/metrics").text
+
+
+class TestTrafficCapture:
+    def test_captured_traffic_replays_against_a_new_model(
+        self, client, model_file, tmp_path, monkeypatch
+    ):
+        import asyncio
+
+        import src.app as app_module
+        from src import replay, wire
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+        recorder = replay.TrafficRecorder(
+            str(tmp_path / "traffic.cap"), sample_ratio=1.0
+        )
+        recorder.start()
+        monkeypatch.setattr(app_module, "traffic_recorder", recorder)
+
+        client.post("/predict", json=SETOSA)
+        client.post("/predict/batch", json={"instances": [SETOSA, VIRGINICA]})
+        client.post(
+            "/predict/batch",
+            content=np.array([list(VIRGINICA.values())], dtype="<f4").tobytes(),
+            headers={"Content-Type": wire.FLOAT32},
+        )
+        client.get("/health/live")
+        recorder.stop()
+
+        exchanges = replay.read_capture([recorder.path])
+        assert [e.path for e in exchanges] == [
+            "/predict",
+            "/predict/batch",
+            "/predict/batch",
+        ]
+        assert (
+            "# TYPE inference_capture_records_total counter\ninference_capture_records_total 3\n"
+            in client.get("/metrics").text
+        )
+        assert all(e.status == 200 and e.latency > 0 for e in exchanges)
+
+        # Same build and model: identical predictions
+        target = replay.InProcessTarget(app_module.app)
+        results, wall = asyncio.run(replay.replay(exchanges, target, speed=0))
+        report = replay.compare(exchanges, results, wall, 0)
+        assert report["rows_compared"] == 4
+        assert report["class_mismatches"] == 0 and report["max_probability_diff"] == 0.0
+
+        # A model that always answers setosa is caught by the gate
+        monkeypatch.setattr(app_module, "model", MockModel())
+        results, wall = asyncio.run(
+            replay.replay(exchanges[:1] + exchanges[2:], target, speed=0)
+        )
+        report = replay.compare(exchanges[:1] + exchanges[2:], results, wall, 0)
+        assert report["class_mismatches"] == 1
+        assert replay.gate(report, max_class_mismatches=0)
+
+
+class TestMemoryBudget:
+    def test_readiness_reports_model_memory(self, client, model_file, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+        memory = client.get("/health/ready").json()["memory"]
+        assert memory["estimator_bytes"] > 0
+        assert memory["footprint_bytes"] >= memory["estimator_bytes"]
+        assert memory["artifact_bytes"] == os.path.getsize(model_file)
+        body = client.get("/metrics").text
+        assert (
+            "\ninference_model_memory_bytes " in body
+            and "\ninference_process_resident_bytes " in body
+        )
+
+    def test_oversized_model_is_refused_at_startup(
+        self, client, model_file, monkeypatch
+    ):
+        import src.app as app_module
+        from src.memory import MemoryBudget
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        monkeypatch.setattr(app_module, "memory_budget", MemoryBudget(model_bytes=1024))
+        app_module.load_model()
+        assert app_module.model is None
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert "memory budget" in response.json()["detail"]["error"]
+        assert "inference_model_memory_rejections_total" in client.get("/metrics").text
+        monkeypatch.setattr(app_module, "model_load_error", None)
+
+    def test_oversized_swap_keeps_current_model(
+        self, client, model_file, tmp_path, monkeypatch
+    ):
+        import shutil
+
+        import src.app as app_module
+        from src.memory import MemoryBudget
+        from src.registry import LocalDirectoryRegistry, ModelPrefetcher
+
+        monkeypatch.setattr(app_module.settings, "model_path", model_file)
+        app_module.load_model()
+        served = app_module.model
+        footprint = app_module.model_memory["footprint_bytes"]
+
+        (tmp_path / "registry" / "v2.0.0").mkdir(parents=True)
+        shutil.copy(model_file, tmp_path / "registry" / "v2.0.0" / "model.pkl")
+        # Room for the artifact file, not for the loaded model
+        monkeypatch.setattr(
+            app_module,
+            "memory_budget",
+            MemoryBudget(model_bytes=os.path.getsize(model_file) + 1),
+        )
+        assert footprint > os.path.getsize(model_file) + 1
+        prefetcher = ModelPrefetcher(
+            LocalDirectoryRegistry(str(tmp_path / "registry")),
+            str(tmp_path / "staging"),
+            prepare=app_module.prepare_model,
+            publish=lambda version, path, prepared: app_module.publish_model(
+                prepared, version, path
+            ),
+            current_version=lambda: app_module.settings.model_version,
+            auto_activate=True,
+        )
+        assert prefetcher.poll() is None
+        assert "memory budget" in prefetcher.snapshot()["rejected"]["2.0.0"]
+        assert app_module.model is served
+        assert client.post("/predict", json=SETOSA).status_code == 200
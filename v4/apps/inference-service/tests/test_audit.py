@@ -0,0 +1,228 @@
+"""
+Tests for the asynchronous prediction audit log
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.audit import (
+    CLAIM_SUFFIX,
+    PART_SUFFIX,
+    AuditLog,
+    LocalDirectorySink,
+    SegmentSink,
+    create_sink,
+    read_segment,
+)
+
+ROW = np.array([[5.1, 3.5, 1.4, 0.2]])
+PROBS = np.array([[0.97, 0.02, 0.01]])
+
+
+def segments(directory, suffix=".jsonl.zst"):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def test_flush_writes_one_line_per_row(tmp_path):
+    log = AuditLog(str(tmp_path))
+    log.record("predict", "1.0.0", ROW, [0], PROBS)
+    log.record(
+        "predict_batch",
+        "1.0.0",
+        np.vstack([ROW, ROW]),
+        np.array([0, 2]),
+        np.vstack([PROBS, PROBS]),
+    )
+    log.flush(seal=True)
+
+    [name] = segments(tmp_path)
+    records = read_segment(str(tmp_path / name))
+    assert [r["source"] for r in records] == [
+        "predict",
+        "predict_batch",
+        "predict_batch",
+    ]
+    assert records[2]["predicted_class_id"] == 2
+    assert records[0]["features"] == ROW[0].tolist()
+    assert records[0]["probabilities"] == PROBS[0].tolist()
+    assert records[0]["model_version"] == "1.0.0"
+    assert records[0]["timestamp"].endswith("+00:00")
+    assert log.records_total == 3
+    assert log.buffered_rows == 0
+
+
+def test_full_buffer_drops_and_counts(tmp_path):
+    log = AuditLog(str(tmp_path), capacity=3)
+    assert log.record(
+        "predict_batch",
+        "1.0.0",
+        np.vstack([ROW, ROW]),
+        [0, 0],
+        np.vstack([PROBS, PROBS]),
+    )
+    assert log.record("predict", "1.0.0", ROW, [0], PROBS)
+    assert not log.record("predict", "1.0.0", ROW, [0], PROBS)
+    assert log.dropped_total == 1
+    assert log.buffered_rows == 3
+
+
+def test_rotates_on_size(tmp_path):
+    log = AuditLog(str(tmp_path), segment_max_bytes=1, compression="gzip")
+    for _ in range(3):
+        log.record("predict", "1.0.0", ROW, [0], PROBS)
+        log.flush()
+
+    assert len(segments(tmp_path, ".jsonl.gz")) == 3
+    assert log.segments_total == 3
+
+
+def test_rotates_on_age_and_appends_frames_until_then(tmp_path):
+    log = AuditLog(str(tmp_path), segment_max_seconds=0.2)
+    log.record("predict", "1.0.0", ROW, [0], PROBS)
+    log.flush()
+    log.record("predict", "1.0.0", ROW, [1], PROBS)
+    log.flush()
+    assert segments(tmp_path) == []
+
+    time.sleep(0.25)
+    log.flush()
+    [name] = segments(tmp_path)
+    assert [r["predicted_class_id"] for r in read_segment(str(tmp_path / name))] == [
+        0,
+        1,
+    ]
+
+
+def test_background_flusher_uploads_and_removes_segments(tmp_path):
+    upload_dir = tmp_path / "uploaded"
+    log = AuditLog(
+        str(tmp_path / "audit"),
+        flush_interval_seconds=0.05,
+        sink=LocalDirectorySink(str(upload_dir)),
+    )
+    log.start()
+    log.record("predict", "1.0.0", ROW, [0], PROBS)
+    log.stop()
+
+    [name] = segments(upload_dir)
+    assert len(read_segment(str(upload_dir / name))) == 1
+    assert os.listdir(tmp_path / "audit") == []
+
+
+class FailingSink(SegmentSink):
+    def upload(self, local_path, name):
+        raise ConnectionError("storage unavailable")
+
+
+def test_failed_upload_is_kept_and_retried_on_next_start(tmp_path):
+    audit_dir = str(tmp_path / "audit")
+    log = AuditLog(audit_dir, sink=FailingSink())
+    log.start()
+    log.record("predict", "1.0.0", ROW, [0], PROBS)
+    log.stop()
+    assert log.upload_failures_total == 1
+    assert len(segments(audit_dir)) == 1
+
+    upload_dir = tmp_path / "uploaded"
+    retry = AuditLog(audit_dir, sink=LocalDirectorySink(str(upload_dir)))
+    retry.start()
+    retry.stop()
+    assert len(segments(upload_dir)) == 1
+    assert segments(audit_dir) == []
+
+
+class FlakySink(SegmentSink):
+    def __init__(self, failures, upload_dir):
+        self.failures = failures
+        self.target = LocalDirectorySink(upload_dir)
+
+    def upload(self, local_path, name):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("storage unavailable")
+        self.target.upload(local_path, name)
+
+
+def test_failed_upload_is_retried_with_backoff(tmp_path):
+    audit_dir, upload_dir = str(tmp_path / "audit"), str(tmp_path / "uploaded")
+    log = AuditLog(
+        audit_dir,
+        flush_interval_seconds=0.01,
+        sink=FlakySink(2, upload_dir),
+        upload_retry_seconds=0.01,
+    )
+    log.start()
+    log.record("predict", "1.0.0", ROW, [0], PROBS)
+    log.flush(seal=True)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(upload_dir) or not segments(upload_dir):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    log.stop()
+
+    assert log.upload_failures_total == 2
+    assert os.listdir(audit_dir) == []
+
+
+class RemovingSink(LocalDirectorySink):
+    def upload(self, local_path, name):
+        super().upload(local_path, name)
+        os.remove(local_path)
+
+
+def test_segment_missing_after_upload_does_not_stop_the_uploader(tmp_path):
+    upload_dir = tmp_path / "uploaded"
+    log = AuditLog(
+        str(tmp_path / "audit"), sink=RemovingSink(str(upload_dir)), segment_max_bytes=1
+    )
+    log.start()
+    for _ in range(2):
+        log.record("predict", "1.0.0", ROW, [0], PROBS)
+        log.flush()
+    log.stop()
+    assert len(segments(upload_dir)) == 2
+
+
+def test_workers_only_claim_segments_of_dead_processes(tmp_path, monkeypatch):
+    dead = f"audit-20240101T000000Z-{2**22 + 7}-0001.jsonl.zst"
+    live = f"audit-20240101T000000Z-{os.getppid()}-0001.jsonl.zst"
+    (tmp_path / dead).write_bytes(b"")
+    (tmp_path / (live + PART_SUFFIX)).write_bytes(b"")
+    (tmp_path / live).write_bytes(b"")
+
+    # Two workers recover at once: the dead process's segment is queued once
+    first = AuditLog(str(tmp_path), sink=FailingSink())
+    second = AuditLog(str(tmp_path), sink=FailingSink())
+    first._recover()
+    real_pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: real_pid + 1)
+    second._recover()
+    monkeypatch.undo()
+    assert first._uploads.qsize() == 1
+    assert second._uploads.qsize() == 0
+
+    claimed = f"{dead}{CLAIM_SUFFIX}{os.getpid()}"
+    assert first._uploads.get() == str(tmp_path / claimed)
+    assert sorted(os.listdir(tmp_path)) == sorted([claimed, live, live + PART_SUFFIX])
+
+
+def test_open_segment_of_dead_process_is_sealed_on_start(tmp_path):
+    stale = tmp_path / f"audit-20240101T000000Z-{2**22 + 7}-0001.jsonl.zst{PART_SUFFIX}"
+    writer = AuditLog(str(tmp_path))
+    writer.record("predict", "1.0.0", ROW, [0], PROBS)
+    writer.flush()
+    os.replace(writer._segment_path, stale)
+
+    AuditLog(str(tmp_path)).start()
+    assert segments(tmp_path) == [stale.name[: -len(PART_SUFFIX)]]
+
+
+def test_create_sink():
+    assert create_sink("none") is None
+    with pytest.raises(ValueError):
+        create_sink("azure")
+    with pytest.raises(ValueError):
+        create_sink("s3")
@@ -0,0 +1,93 @@
+"""
+Tests for the sliding-window HPA load signals
+"""
+
+import pytest
+
+from src.autoscaling import LoadSignal, RingPercentile, WindowedSum
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestWindowedSum:
+    def test_sums_within_window(self):
+        clock = FakeClock()
+        window = WindowedSum(10, clock)
+        for _ in range(10):
+            window.add(2.0)
+            clock.now += 1
+        assert window.total() == 18.0
+        assert window.rate() == 1.8
+
+    def test_old_buckets_expire(self):
+        clock = FakeClock()
+        window = WindowedSum(10, clock)
+        window.add(5)
+        clock.now += 9.5
+        assert window.total() == 5
+        clock.now += 1
+        assert window.total() == 0
+
+    def test_reused_bucket_is_reset(self):
+        clock = FakeClock()
+        window = WindowedSum(10, clock)
+        window.add(5)
+        clock.now += 10
+        window.add(1)
+        assert window.total() == 1
+
+
+class TestRingPercentile:
+    def test_percentile_of_recent_samples(self):
+        clock = FakeClock()
+        ring = RingPercentile(capacity=1000, window_seconds=60, clock=clock)
+        assert ring.percentile(95) == 0.0
+        for value in range(1, 101):
+            ring.record(value / 1000)
+        assert ring.percentile(95) == pytest.approx(0.09505)
+        assert ring.percentile(50) == pytest.approx(0.0505)
+
+    def test_ring_keeps_latest_samples(self):
+        ring = RingPercentile(capacity=10, window_seconds=60, clock=FakeClock())
+        for value in range(100):
+            ring.record(value)
+        assert ring.percentile(0) == 90
+
+    def test_samples_outside_window_ignored(self):
+        clock = FakeClock()
+        ring = RingPercentile(capacity=100, window_seconds=30, clock=clock)
+        ring.record(5.0)
+        clock.now += 31
+        ring.record(0.1)
+        assert ring.percentile(95) == 0.1
+
+
+class TestLoadSignal:
+    def test_mean_inflight_by_littles_law(self):
+        clock = FakeClock(999.75)
+        signal = LoadSignal(window_seconds=10, clock=clock)
+        # Two requests in flight for the whole window
+        for _ in range(20):
+            clock.now += 0.5
+            signal.started()
+            signal.finished(1.0)
+        assert signal.mean_inflight() == pytest.approx(2.0)
+        assert signal.requests_per_second() == pytest.approx(2.0)
+        assert signal.inflight == 0
+
+    def test_snapshot(self):
+        clock = FakeClock()
+        signal = LoadSignal(window_seconds=10, clock=clock)
+        signal.started()
+        signal.add_rows(500)
+        signal.record_wait(0.02)
+        snapshot = signal.snapshot()
+        assert snapshot["inflight"] == 1
+        assert snapshot["rows_per_second"] == 50.0
+        assert snapshot["queue_wait_p95_seconds"] == pytest.approx(0.02)
@@ -0,0 +1,140 @@
+"""
+Tests for the offline batch scoring CLI
+"""
+
+import csv
+import os
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src import batch_score
+
+HEADER = "id,sepal_length,sepal_width,petal_length,petal_width,note"
+
+
+@pytest.fixture(scope="module")
+def iris_model():
+    iris = load_iris()
+    return RandomForestClassifier(n_estimators=10, max_depth=3, random_state=0).fit(
+        iris.data, iris.target
+    )
+
+
+@pytest.fixture
+def model_path(tmp_path, iris_model):
+    path = tmp_path / "model.joblib"
+    joblib.dump({"model": iris_model, "reference_stats": None}, path)
+    return str(path)
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    rows = load_iris().data
+    path = tmp_path / "input.csv"
+    with open(path, "w") as f:
+        f.write(HEADER + "\n")
+        f.writelines(
+            f'{i},{",".join(str(v) for v in row)},"a, b"\n'
+            for i, row in enumerate(rows)
+        )
+        f.write("bad-1,5.1,3.5,,0.2,x\n")
+        f.write("bad-2,5.1,3.5,12,0.2,x\n")
+    return str(path)
+
+
+def read_output(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_scores_csv_in_order_with_input_columns(
+    tmp_path, model_path, input_csv, iris_model
+):
+    output = str(tmp_path / "output.csv")
+    summary = batch_score.score_file(
+        input_csv, output, model_path, workers=0, chunk_bytes=1024
+    )
+
+    assert summary["rows"] == 152
+    assert summary["invalid_rows"] == 2
+    assert summary["rows_per_second"] > 0
+
+    rows = read_output(output)
+    assert [r["id"] for r in rows[:150]] == [str(i) for i in range(150)]
+    assert rows[0]["note"] == "a, b"
+    expected = iris_model.predict_proba(load_iris().data)
+    assert [int(r["predicted_class_id"]) for r in rows[:150]] == expected.argmax(
+        axis=1
+    ).tolist()
+    np.testing.assert_allclose(
+        [float(r["probability_virginica"]) for r in rows[:150]],
+        expected[:, 2],
+        atol=1e-6,
+    )
+    assert rows[0]["predicted_class_name"] == "setosa"
+    assert rows[0]["error"] == ""
+
+
+def test_invalid_rows_carry_the_error(tmp_path, model_path, input_csv):
+    output = str(tmp_path / "output.csv")
+    batch_score.score_file(input_csv, output, model_path, workers=0)
+    bad = {r["id"]: r for r in read_output(output)[150:]}
+    assert bad["bad-1"]["predicted_class_id"] == ""
+    assert "non-numeric" in bad["bad-1"]["error"]
+    assert "between 0 and 10" in bad["bad-2"]["error"]
+
+
+def test_process_pool_output_matches_in_process(tmp_path, model_path, input_csv):
+    single = str(tmp_path / "single.csv")
+    pooled = str(tmp_path / "pooled.csv")
+    batch_score.score_file(input_csv, single, model_path, workers=0, chunk_bytes=512)
+    summary = batch_score.score_file(
+        input_csv, pooled, model_path, workers=2, chunk_bytes=512
+    )
+    assert summary["workers"] == 2
+    with open(single, "rb") as a, open(pooled, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_missing_feature_column(tmp_path, model_path):
+    path = tmp_path / "input.csv"
+    path.write_text("sepal_length,sepal_width,petal_length\n1,2,3\n")
+    with pytest.raises(ValueError, match="petal_width"):
+        batch_score.score_file(
+            str(path), str(tmp_path / "out.csv"), model_path, workers=0
+        )
+
+
+def test_parquet_round_trip(tmp_path, model_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    data = load_iris().data
+    table = pyarrow.table(
+        {name: data[:, i] for i, name in enumerate(batch_score.FEATURE_NAMES)}
+    )
+    source = str(tmp_path / "input.parquet")
+    parquet.write_table(table, source)
+
+    output = str(tmp_path / "output.parquet")
+    summary = batch_score.score_file(
+        source, output, model_path, workers=0, chunk_rows=40
+    )
+    result = parquet.read_table(output)
+    assert summary["rows"] == 150
+    assert result.column_names[:4] == batch_score.FEATURE_NAMES
+    assert len(result) == 150
+
+
+def test_cli_does_not_import_the_service():
+    code = "import sys, src.batch_score; sys.exit('src.app' in sys.modules)"
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        check=True,
+    )
@@ -0,0 +1,104 @@
+"""
+Tests for the adaptive concurrency limiter
+"""
+
+import pytest
+
+from src.concurrency import AdaptiveConcurrencyLimiter
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_sheds_when_limit_reached(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.shed_total == 1
+        assert limiter.inflight == 2
+
+    def test_fast_requests_grow_limit_when_saturated(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=2, latency_target_seconds=0.1
+        )
+        limiter.try_acquire()
+        limiter.try_acquire()
+        limiter.release(0.001)
+        assert limiter.limit == 3
+
+    def test_fast_requests_do_not_grow_idle_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=10, latency_target_seconds=0.1
+        )
+        limiter.try_acquire()
+        limiter.release(0.001)
+        assert limiter.limit == 10
+
+    def test_slow_requests_back_off_multiplicatively(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=10, latency_target_seconds=0.01, backoff_ratio=0.5
+        )
+        limiter.try_acquire()
+        limiter.release(0.5)
+        assert limiter.limit == 5
+
+    def test_limit_cut_once_per_latency_window(self):
+        now = [100.0]
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=16,
+            latency_target_seconds=0.01,
+            backoff_ratio=0.5,
+            clock=lambda: now[0],
+        )
+        for _ in range(4):
+            limiter.try_acquire()
+        # Four requests in flight together all turn out slow: one cut
+        for _ in range(4):
+            limiter.release(1.0)
+        assert limiter.limit == 8
+
+        # A request admitted after that cut may cut again
+        now[0] += 2.0
+        limiter.try_acquire()
+        limiter.release(1.0)
+        assert limiter.limit == 4
+
+    def test_non_adaptive_release_frees_slot_without_moving_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=2, latency_target_seconds=0.01
+        )
+        limiter.try_acquire()
+        limiter.try_acquire()
+        limiter.release(5.0, adapt=False)
+        limiter.release(0.0, failed=True, adapt=False)
+        assert limiter.limit == 2
+        assert limiter.inflight == 0
+
+    def test_failures_back_off(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+        limiter.try_acquire()
+        limiter.release(0.0, failed=True)
+        assert limiter.limit == 5
+
+    def test_limit_respects_bounds(self):
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=2,
+            min_limit=2,
+            max_limit=3,
+            latency_target_seconds=0.01,
+            backoff_ratio=0.5,
+        )
+        for _ in range(5):
+            limiter.try_acquire()
+            limiter.release(1.0)
+        assert limiter.limit == 2
+
+        for _ in range(5):
+            limiter.try_acquire()
+            limiter.try_acquire()
+            limiter.release(0.0)
+            limiter.release(0.0)
+        assert limiter.limit == 3
+
+    def test_invalid_backoff_ratio(self):
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(backoff_ratio=1.5)
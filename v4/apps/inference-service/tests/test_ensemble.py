@@ -0,0 +1,145 @@
+"""
+Tests for the soft-voting ensemble
+"""
+
+import time
+
+import numpy as np
+import pytest
+from inference_core.metrics import REGISTRY
+
+from src.ensemble import EnsembleMember, EnsembleModel, members_from_bundle
+
+
+class FixedModel:
+    """Returns the same probabilities for every row, optionally after a delay"""
+
+    def __init__(self, probabilities, delay=0.0):
+        self.probabilities = np.asarray(probabilities, dtype=float)
+        self.delay = delay
+
+    def predict_proba(self, X):
+        time.sleep(self.delay)
+        return np.tile(self.probabilities, (len(X), 1))
+
+
+class FailingModel:
+    def predict_proba(self, X):
+        raise RuntimeError("member failed")
+
+
+X = np.array([[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]])
+
+
+def test_weighted_soft_vote():
+    ensemble = EnsembleModel(
+        [
+            EnsembleMember("a", FixedModel([1.0, 0.0, 0.0]), weight=1.0),
+            EnsembleMember("b", FixedModel([0.0, 1.0, 0.0]), weight=3.0),
+        ],
+        timeout_seconds=1.0,
+    )
+
+    np.testing.assert_allclose(ensemble.predict_proba(X), [[0.25, 0.75, 0.0]] * 2)
+    class_ids, _ = ensemble.predict_with_proba(X)
+    assert class_ids.tolist() == [1, 1]
+
+
+def test_slow_member_is_skipped_and_weights_renormalized():
+    ensemble = EnsembleModel(
+        [
+            EnsembleMember("fast", FixedModel([0.0, 0.0, 1.0]), weight=1.0),
+            EnsembleMember("slow", FixedModel([1.0, 0.0, 0.0], delay=0.5), weight=10.0),
+        ],
+        timeout_seconds=0.1,
+    )
+
+    start = time.perf_counter()
+    probabilities = ensemble.predict_proba(X[:1])
+    assert time.perf_counter() - start < 0.4
+    np.testing.assert_allclose(probabilities, [[0.0, 0.0, 1.0]])
+    assert (
+        REGISTRY.get("inference_ensemble_member_timeouts_total").value(member="slow")
+        >= 1
+    )
+
+
+def test_first_finisher_answers_when_nobody_meets_budget():
+    ensemble = EnsembleModel(
+        [
+            EnsembleMember("slow", FixedModel([0.0, 1.0, 0.0], delay=0.05)),
+            EnsembleMember("slower", FixedModel([1.0, 0.0, 0.0], delay=0.5)),
+        ],
+        timeout_seconds=0.001,
+    )
+
+    np.testing.assert_allclose(ensemble.predict_proba(X[:1]), [[0.0, 1.0, 0.0]])
+
+
+def test_fast_failure_waits_for_a_slow_healthy_member():
+    ensemble = EnsembleModel(
+        [
+            EnsembleMember("broken", FailingModel()),
+            EnsembleMember("slow", FixedModel([0.0, 0.0, 1.0], delay=0.2)),
+        ],
+        timeout_seconds=0.05,
+    )
+
+    np.testing.assert_allclose(ensemble.predict_proba(X[:1]), [[0.0, 0.0, 1.0]])
+
+
+def test_failed_member_is_left_out():
+    ensemble = EnsembleModel(
+        [
+            EnsembleMember("ok", FixedModel([0.0, 1.0, 0.0])),
+            EnsembleMember("broken", FailingModel()),
+        ],
+        timeout_seconds=1.0,
+    )
+    np.testing.assert_allclose(ensemble.predict_proba(X[:1]), [[0.0, 1.0, 0.0]])
+
+    only_broken = EnsembleModel(
+        [EnsembleMember("broken", FailingModel())], timeout_seconds=1.0
+    )
+    with pytest.raises(RuntimeError):
+        only_broken.predict_proba(X[:1])
+
+
+def test_member_latency_is_recorded():
+    ensemble = EnsembleModel(
+        [EnsembleMember("timed", FixedModel([1.0, 0.0, 0.0], delay=0.01))],
+        timeout_seconds=1.0,
+    )
+    calls_before = REGISTRY.get("inference_ensemble_member_calls_total").value(
+        member="timed"
+    )
+    ensemble.predict_proba(X)
+
+    assert (
+        REGISTRY.get("inference_ensemble_member_calls_total").value(member="timed")
+        == calls_before + 1
+    )
+    assert (
+        REGISTRY.get("inference_ensemble_member_seconds_total").value(member="timed")
+        >= 0.01
+    )
+
+
+def test_members_from_bundle_and_class_order_check():
+    members = members_from_bundle(
+        [{"name": "lr", "model": FixedModel([1, 0, 0]), "weight": 0.9}]
+    )
+    assert (members[0].name, members[0].weight) == ("lr", 0.9)
+
+    class Ordered(FixedModel):
+        def __init__(self, classes):
+            super().__init__([1, 0, 0])
+            self.classes_ = np.array(classes)
+
+    with pytest.raises(ValueError):
+        EnsembleModel(
+            [
+                EnsembleMember("a", Ordered([0, 1, 2])),
+                EnsembleMember("b", Ordered([2, 1, 0])),
+            ]
+        )
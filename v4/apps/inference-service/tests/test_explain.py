@@ -0,0 +1,132 @@
+"""
+Tests for per-class feature contributions
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from src.explain import (
+    ExplanationUnsupported,
+    LinearExplainer,
+    TreeExplainer,
+    build_explainer,
+)
+
+
+@pytest.fixture(scope="module")
+def iris():
+    data = load_iris()
+    return data.data, data.target
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return np.random.default_rng(0).integers(0, 101, size=(600, 4)) / 10
+
+
+def test_forest_contributions_add_up_to_probabilities(iris, rows):
+    forest = RandomForestClassifier(n_estimators=25, random_state=0).fit(*iris)
+    explainer = build_explainer(forest)
+    assert isinstance(explainer, TreeExplainer)
+
+    contributions = explainer.contributions(rows)
+    assert contributions.shape == (len(rows), 4, 3)
+    np.testing.assert_allclose(
+        explainer.bias + contributions.sum(axis=1),
+        forest.predict_proba(rows),
+        atol=1e-12,
+    )
+    np.testing.assert_allclose(explainer.importances, forest.feature_importances_)
+
+
+def test_single_tree_credits_only_split_features(iris, rows):
+    tree = DecisionTreeClassifier(max_depth=1, random_state=0).fit(*iris)
+    contributions = build_explainer(tree).contributions(rows)
+    split = tree.tree_.feature[0]
+    others = [f for f in range(4) if f != split]
+    assert np.all(contributions[:, others] == 0)
+    assert np.any(contributions[:, split] != 0)
+
+
+def test_scaled_forest_credits_raw_features(iris, rows):
+    pipeline = Pipeline(
+        [
+            ("scaler", MinMaxScaler()),
+            ("clf", RandomForestClassifier(n_estimators=10, random_state=0)),
+        ]
+    )
+    pipeline.fit(*iris)
+    explainer = build_explainer(pipeline)
+    contributions = explainer.contributions(rows)
+    np.testing.assert_allclose(
+        explainer.bias + contributions.sum(axis=1),
+        pipeline.predict_proba(rows),
+        atol=1e-12,
+    )
+
+
+def test_linear_contributions_add_up_to_decision_values(iris, rows):
+    X, y = iris
+    pipeline = Pipeline(
+        [("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=2000))]
+    ).fit(X, y)
+    explainer = build_explainer(
+        pipeline,
+        {
+            "feature_mean": X.mean(axis=0).tolist(),
+            "feature_std": X.std(axis=0).tolist(),
+        },
+    )
+    assert isinstance(explainer, LinearExplainer) and explainer.space == "log_odds"
+
+    contributions = explainer.contributions(rows)
+    np.testing.assert_allclose(
+        explainer.bias + contributions.sum(axis=1),
+        pipeline.decision_function(rows),
+        atol=1e-9,
+    )
+    # At the training mean every feature contributes nothing
+    assert np.allclose(explainer.contributions(X.mean(axis=0)[None]), 0)
+    assert explainer.importances.sum() == pytest.approx(1.0)
+    # Petal measurements dominate iris
+    assert set(np.argsort(explainer.importances)[-2:]) == {2, 3}
+
+
+def test_binary_logistic_regression(iris, rows):
+    X, y = iris
+    clf = LogisticRegression(max_iter=2000).fit(X, y == 2)
+    contributions = build_explainer(clf).contributions(rows)
+    decision = clf.decision_function(rows)
+    np.testing.assert_allclose(
+        contributions.sum(axis=1)[:, 1] + clf.intercept_[0], decision, atol=1e-9
+    )
+    np.testing.assert_allclose(contributions[:, :, 0], -contributions[:, :, 1])
+
+
+def test_explain_caches_repeated_rows(iris, rows):
+    explainer = build_explainer(
+        RandomForestClassifier(n_estimators=5, random_state=0).fit(*iris),
+        cache_rows=100,
+    )
+    first, cached = explainer.explain(rows[:10])
+    assert cached == 0
+    again, cached = explainer.explain(rows[5:15])
+    assert cached == 5
+    np.testing.assert_array_equal(again[:5], first[5:])
+    np.testing.assert_array_equal(again, explainer.contributions(rows[5:15]))
+
+
+def test_unsupported_models(iris):
+    with pytest.raises(ExplanationUnsupported):
+        build_explainer(SVC().fit(*iris))
+    with pytest.raises(ExplanationUnsupported):
+        build_explainer(
+            Pipeline([("clf", LogisticRegression(max_iter=2000))]).fit(*iris)
+        )
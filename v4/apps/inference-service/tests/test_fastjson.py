@@ -0,0 +1,71 @@
+"""
+Tests for the direct prediction JSON encoder
+"""
+
+import json
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+from starlette.responses import JSONResponse
+
+from src.app import CLASS_NAMES, PredictionResponse
+from src.fastjson import PredictionEncoder
+
+
+def reference_body(
+    class_id, probabilities, model_version, timestamp, class_names=CLASS_NAMES
+):
+    response = PredictionResponse(
+        predicted_class_id=class_id,
+        predicted_class_name=class_names[class_id],
+        probabilities=probabilities.tolist(),
+        model_version=model_version,
+        timestamp=timestamp,
+    )
+    return JSONResponse(response.model_dump()).body
+
+
+def test_matches_fastapi_encoding_byte_for_byte():
+    encoder = PredictionEncoder(CLASS_NAMES, "1.0.0")
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        probabilities = rng.dirichlet([1, 1, 1])
+        class_id = int(probabilities.argmax())
+        body = encoder.encode(class_id, probabilities)
+        timestamp = json.loads(body)["timestamp"]
+        assert body == reference_body(class_id, probabilities, "1.0.0", timestamp)
+
+
+def test_escapes_names_and_version():
+    names = ['se"to%sa', "versicolor", "virgínica"]
+    encoder = PredictionEncoder(names, "1.0%d-β")
+    probabilities = np.array([0.25, 0.25, 0.5])
+    for class_id in (0, 2):
+        body = encoder.encode(class_id, probabilities)
+        timestamp = json.loads(body)["timestamp"]
+        assert body == reference_body(
+            class_id, probabilities, "1.0%d-β", timestamp, names
+        )
+
+
+def test_timestamp_matches_isoformat():
+    encoder = PredictionEncoder(CLASS_NAMES, "1.0.0")
+    before = datetime.now(UTC).replace(tzinfo=None)
+    parsed = datetime.fromisoformat(encoder.timestamp())
+    assert abs((parsed - before).total_seconds()) < 1.0
+
+
+def test_model_version_change_rebuilds_templates():
+    encoder = PredictionEncoder(CLASS_NAMES, "1.0.0")
+    encoder.set_model_version("2.0.0")
+    assert (
+        json.loads(encoder.encode(1, np.array([0.1, 0.8, 0.1])))["model_version"]
+        == "2.0.0"
+    )
+
+
+def test_non_finite_probabilities_rejected():
+    encoder = PredictionEncoder(CLASS_NAMES, "1.0.0")
+    with pytest.raises(ValueError):
+        encoder.encode(0, np.array([np.nan, 0.5, 0.5]))
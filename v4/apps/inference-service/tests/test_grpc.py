@@ -0,0 +1,177 @@
+"""
+End-to-end tests for the gRPC endpoint, served in-process on a local port
+"""
+
+import os
+from functools import partial
+
+import numpy as np
+import pytest
+
+grpc = pytest.importorskip("grpc")
+
+from src import iris_inference_pb2 as pb
+from src.grpc_server import InferenceServicer, InferenceStub, create_server
+
+
+class MockModel:
+    """Mock sklearn model: virginica if petal_length > 4, else setosa"""
+
+    def predict(self, X):
+        return np.where(np.asarray(X)[:, 2] > 4, 2, 0)
+
+    def predict_proba(self, X):
+        return np.eye(3)[self.predict(X)]
+
+
+SETOSA = {
+    "sepal_length": 5.1,
+    "sepal_width": 3.5,
+    "petal_length": 1.4,
+    "petal_width": 0.2,
+}
+VIRGINICA = {
+    "sepal_length": 6.7,
+    "sepal_width": 3.0,
+    "petal_length": 5.2,
+    "petal_width": 2.3,
+}
+
+
+@pytest.fixture
+def grpc_stub():
+    """Start a gRPC server on the prediction path production serves it from"""
+    import src.app as app_module
+
+    state = {"model": MockModel()}
+    servicer = InferenceServicer(
+        lambda: state["model"],
+        partial(app_module.predict_and_record, source="grpc"),
+        api_key="secret",
+    )
+    server, port = create_server(servicer, 0, max_workers=2)
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    try:
+        yield InferenceStub(channel), state
+    finally:
+        channel.close()
+        server.stop(None)
+
+
+AUTH = (("x-api-key", "secret"),)
+
+
+class TestUnaryPredict:
+    def test_predict(self, grpc_stub):
+        stub, _ = grpc_stub
+        response = stub.Predict(
+            pb.PredictRequest(request_id="r1", **SETOSA), metadata=AUTH
+        )
+        assert response.predicted_class_id == 0
+        assert response.predicted_class_name == "setosa"
+        assert list(response.probabilities) == [1.0, 0.0, 0.0]
+        assert response.request_id == "r1"
+        assert response.model_version
+
+    def test_unauthenticated(self, grpc_stub):
+        stub, _ = grpc_stub
+        with pytest.raises(grpc.RpcError) as exc_info:
+            stub.Predict(pb.PredictRequest(**SETOSA))
+        assert exc_info.value.code() == grpc.StatusCode.UNAUTHENTICATED
+
+    def test_out_of_range(self, grpc_stub):
+        stub, _ = grpc_stub
+        with pytest.raises(grpc.RpcError) as exc_info:
+            stub.Predict(
+                pb.PredictRequest(**dict(SETOSA, petal_length=11.0)), metadata=AUTH
+            )
+        assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert exc_info.value.details() == "Measurement must be between 0 and 10"
+
+    def test_error_message_matches_the_row_error(self, grpc_stub):
+        stub, _ = grpc_stub
+        with pytest.raises(grpc.RpcError) as exc_info:
+            stub.Predict(
+                pb.PredictRequest(**dict(SETOSA, sepal_width=float("inf"))),
+                metadata=AUTH,
+            )
+        assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert exc_info.value.details() == "Measurement is infinite"
+
+    def test_model_not_loaded(self, grpc_stub):
+        stub, state = grpc_stub
+        state["model"] = None
+        with pytest.raises(grpc.RpcError) as exc_info:
+            stub.Predict(pb.PredictRequest(**SETOSA), metadata=AUTH)
+        assert exc_info.value.code() == grpc.StatusCode.UNAVAILABLE
+
+
+class TestStreamingPredict:
+    def test_stream_preserves_order(self, grpc_stub):
+        stub, _ = grpc_stub
+        rows = [SETOSA, VIRGINICA, SETOSA]
+        requests = (
+            pb.PredictRequest(request_id=str(i), **row) for i, row in enumerate(rows)
+        )
+        responses = list(stub.PredictStream(requests, metadata=AUTH))
+        assert [r.request_id for r in responses] == ["0", "1", "2"]
+        assert [r.predicted_class_name for r in responses] == [
+            "setosa",
+            "virginica",
+            "setosa",
+        ]
+
+    def test_invalid_row_gets_an_error_and_the_stream_continues(self, grpc_stub):
+        stub, _ = grpc_stub
+        rows = [
+            SETOSA,
+            dict(SETOSA, petal_length=11.0),
+            dict(SETOSA, sepal_width=float("nan")),
+            VIRGINICA,
+        ]
+        requests = (
+            pb.PredictRequest(request_id=str(i), **row) for i, row in enumerate(rows)
+        )
+        responses = list(stub.PredictStream(requests, metadata=AUTH))
+
+        assert [r.request_id for r in responses] == ["0", "1", "2", "3"]
+        assert [r.error for r in responses] == [
+            "",
+            "Measurement must be between 0 and 10",
+            "Measurement is NaN",
+            "",
+        ]
+        assert [r.predicted_class_name for r in responses] == [
+            "setosa",
+            "",
+            "",
+            "virginica",
+        ]
+        assert list(responses[1].probabilities) == []
+
+
+def test_grpc_predictions_are_recorded(grpc_stub, tmp_path, monkeypatch):
+    import src.app as app_module
+    from src.audit import AuditLog, read_segment
+
+    stub, _ = grpc_stub
+    log = AuditLog(str(tmp_path))
+    monkeypatch.setattr(app_module, "audit_log", log)
+
+    stub.Predict(pb.PredictRequest(**SETOSA), metadata=AUTH)
+    requests = iter(
+        [
+            pb.PredictRequest(**VIRGINICA),
+            pb.PredictRequest(**dict(SETOSA, petal_width=-1.0)),
+        ]
+    )
+    list(stub.PredictStream(requests, metadata=AUTH))
+    log.flush(seal=True)
+
+    [segment] = os.listdir(tmp_path)
+    records = read_segment(str(tmp_path / segment))
+    assert [(r["source"], r["predicted_class_id"]) for r in records] == [
+        ("grpc", 0),
+        ("grpc", 2),
+    ]
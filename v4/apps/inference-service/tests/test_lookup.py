@@ -0,0 +1,99 @@
+"""
+Tests for the precomputed decision table
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from src.lookup import DecisionTable, LookupTableUnsupported, TableModel
+
+
+@pytest.fixture(scope="module")
+def forest():
+    iris = load_iris()
+    return RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0).fit(
+        iris.data, iris.target
+    )
+
+
+def test_table_matches_model_on_grid(forest):
+    table = DecisionTable.build(forest, eval_rows=0)
+    rows = np.random.default_rng(1).integers(0, 101, size=(5000, 4)) / 10
+
+    on_grid, class_ids, probabilities = table.lookup(rows)
+    assert on_grid.all()
+    np.testing.assert_array_equal(class_ids, forest.predict(rows))
+    np.testing.assert_allclose(
+        probabilities, forest.predict_proba(rows), atol=1 / 510 + 1e-12
+    )
+
+
+def test_axis_compression_keeps_table_small(forest):
+    table = DecisionTable.build(forest, eval_rows=0)
+    assert table.codes.shape == (4, 101)
+    assert np.prod(table.shape) < 101**4 / 1000
+    assert table.probabilities.dtype == np.uint8
+
+
+def test_report_measures_accuracy_loss(forest):
+    report = DecisionTable.build(forest, eval_rows=1000).report
+    assert report["class_agreement"] == 1.0
+    assert 0 < report["max_probability_error"] <= 1 / 510 + 1e-12
+    assert report["cells"] == np.prod(report["axis_intervals"])
+
+
+def test_off_grid_and_out_of_range_rows_use_model(forest):
+    served = TableModel(forest, DecisionTable.build(forest, eval_rows=0))
+    rows = np.array(
+        [[5.1, 3.5, 1.4, 0.2], [6.05, 2.9, 4.55, 1.45], [10.5, 3.0, 5.0, 2.0]]
+    )
+
+    on_grid, _, _ = served.table.lookup(rows)
+    assert on_grid.tolist() == [True, False, False]
+    np.testing.assert_array_equal(served.predict(rows), forest.predict(rows))
+    np.testing.assert_allclose(
+        served.predict_proba(rows)[1:], forest.predict_proba(rows[1:])
+    )
+
+
+def test_predict_with_proba_calls_model_once_for_off_grid_rows(forest):
+    class Counting:
+        classes_ = forest.classes_
+        calls = 0
+
+        def predict_proba(self, X):
+            Counting.calls += 1
+            return forest.predict_proba(X)
+
+    served = TableModel(Counting(), DecisionTable.build(forest, eval_rows=0))
+    rows = np.array(
+        [[5.1, 3.5, 1.4, 0.2], [6.05, 2.9, 4.55, 1.45], [6.7, 3.0, 5.2, 2.3]]
+    )
+
+    class_ids, probabilities = served.predict_with_proba(rows)
+    assert Counting.calls == 1
+    np.testing.assert_array_equal(class_ids, forest.predict(rows))
+    np.testing.assert_allclose(probabilities[1], forest.predict_proba(rows[1:2])[0])
+
+
+def test_single_tree_supported():
+    iris = load_iris()
+    tree = DecisionTreeClassifier(max_depth=3, random_state=0).fit(
+        iris.data, iris.target
+    )
+    table = DecisionTable.build(tree, eval_rows=500)
+    assert table.report["class_agreement"] == 1.0
+
+
+def test_non_tree_model_and_budget_rejected(forest):
+    iris = load_iris()
+    with pytest.raises(LookupTableUnsupported):
+        DecisionTable.build(
+            LogisticRegression(max_iter=500).fit(iris.data, iris.target)
+        )
+    with pytest.raises(LookupTableUnsupported):
+        DecisionTable.build(forest, max_cells=10)
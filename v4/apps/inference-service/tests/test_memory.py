@@ -0,0 +1,101 @@
+"""
+Tests for model memory accounting and budgets
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src.memory import (
+    LoadMeter,
+    MemoryBudget,
+    MemoryBudgetExceeded,
+    cgroup_memory_limit,
+    deep_sizeof,
+    process_rss_bytes,
+)
+
+
+def test_deep_sizeof_counts_each_buffer_once():
+    array = np.zeros(100_000)
+    alone = deep_sizeof(array)
+    assert array.nbytes <= alone < array.nbytes + 1024
+    # Views and repeated references share the buffer
+    assert deep_sizeof({"a": array, "b": array[10:], "c": [array]}) < alone + 2048
+    assert deep_sizeof(array, np.zeros(100_000)) >= 2 * array.nbytes
+
+
+def test_deep_sizeof_sees_tree_arrays():
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(
+        *load_iris(return_X_y=True)
+    )
+    tree_bytes = 0
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        tree_bytes += state["nodes"].nbytes + state["values"].nbytes
+    assert deep_sizeof(forest) > tree_bytes
+    assert deep_sizeof(forest) < 4 * tree_bytes + 256 * 1024
+
+
+def test_cgroup_memory_limit(tmp_path):
+    assert cgroup_memory_limit(str(tmp_path)) is None
+    (tmp_path / "memory.max").write_text("536870912\n")
+    assert cgroup_memory_limit(str(tmp_path)) == 512 * 2**20
+    (tmp_path / "memory.max").write_text("max\n")
+    assert cgroup_memory_limit(str(tmp_path)) is None
+
+    v1 = tmp_path / "v1"
+    (v1 / "memory").mkdir(parents=True)
+    (v1 / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+    assert cgroup_memory_limit(str(v1)) is None
+    (v1 / "memory" / "memory.limit_in_bytes").write_text("1073741824\n")
+    assert cgroup_memory_limit(str(v1)) == 2**30
+
+
+def test_budget_from_settings(tmp_path):
+    (tmp_path / "memory.max").write_text(str(1000 * 2**20))
+    budget = MemoryBudget.from_settings(64, 0.9, cgroup_root=str(tmp_path))
+    assert budget.model_bytes == 64 * 2**20
+    assert budget.process_bytes == 900 * 2**20
+    assert (
+        MemoryBudget.from_settings(
+            0, 0.9, cgroup_root=str(tmp_path / "none")
+        ).process_bytes
+        == 0
+    )
+    # Pre-forked workers each get their share of the container limit
+    assert (
+        MemoryBudget.from_settings(
+            64, 0.9, workers=4, cgroup_root=str(tmp_path)
+        ).process_bytes
+        == 225 * 2**20
+    )
+
+
+def test_budget_checks():
+    budget = MemoryBudget(model_bytes=1000, process_bytes=10_000)
+    budget.check_before_load(900, 9000)
+    with pytest.raises(MemoryBudgetExceeded, match="model memory budget"):
+        budget.check_before_load(1001, 0)
+    with pytest.raises(MemoryBudgetExceeded, match="process memory budget"):
+        budget.check_before_load(900, 9200)
+
+    budget.check_footprint({"footprint_bytes": 1000, "process_rss_bytes": 10_000})
+    with pytest.raises(MemoryBudgetExceeded):
+        budget.check_footprint({"footprint_bytes": 1001, "process_rss_bytes": None})
+    with pytest.raises(MemoryBudgetExceeded):
+        budget.check_footprint({"footprint_bytes": 10, "process_rss_bytes": 10_001})
+    # No budget: anything goes
+    MemoryBudget().check_before_load(2**40, 2**40)
+
+
+def test_load_meter_reports_footprint():
+    meter = LoadMeter()
+    model = {"weights": np.ones(2_000_000)}
+    report = meter.report(model, artifact_bytes=123)
+    assert report["estimator_bytes"] >= model["weights"].nbytes
+    assert report["footprint_bytes"] >= report["estimator_bytes"]
+    assert report["artifact_bytes"] == 123
+    if process_rss_bytes() is not None:
+        assert report["rss_delta_bytes"] > model["weights"].nbytes // 2
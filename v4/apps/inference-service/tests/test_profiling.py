@@ -0,0 +1,136 @@
+"""
+Tests for the sampling profiler, phase timers and /debug endpoints
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.profiling import PhaseTimers, ProfilerBusy, SamplingProfiler
+from tests.test_app import MockModel
+
+PAYLOAD = {
+    "sepal_length": 5.1,
+    "sepal_width": 3.5,
+    "petal_length": 1.4,
+    "petal_width": 0.2,
+}
+
+
+def busy_loop_for_profiler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    def test_collapsed_stacks_include_busy_thread(self):
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=busy_loop_for_profiler, args=(stop,), name="busy"
+        )
+        worker.start()
+        try:
+            output = SamplingProfiler(interval_seconds=0.005).profile(0.2)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = output.strip().splitlines()
+        assert lines
+        _, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        busy = [line for line in lines if "busy_loop_for_profiler" in line]
+        assert busy and all(line.startswith("busy;") for line in busy)
+
+    def test_one_profile_at_a_time(self):
+        profiler = SamplingProfiler(interval_seconds=0.005)
+        thread = threading.Thread(target=profiler.profile, args=(0.3,))
+        thread.start()
+        time.sleep(0.05)
+        try:
+            with pytest.raises(ProfilerBusy):
+                profiler.profile(0.01)
+        finally:
+            thread.join()
+
+
+class TestPhaseTimers:
+    def test_disabled_timers_record_nothing(self):
+        timers = PhaseTimers(enabled=False)
+        with timers.time("inference"):
+            pass
+        assert timers.snapshot() == {}
+
+    def test_enabled_timers_aggregate(self):
+        timers = PhaseTimers(enabled=True)
+        timers.record("inference", 0.002)
+        timers.record("inference", 0.004)
+        stats = timers.snapshot()["inference"]
+        assert stats["count"] == 2
+        assert stats["total_seconds"] == pytest.approx(0.006)
+        assert stats["mean_seconds"] == pytest.approx(0.003)
+        assert stats["max_seconds"] == pytest.approx(0.004)
+
+    def test_reset(self):
+        timers = PhaseTimers(enabled=True)
+        timers.record("decode", 0.001)
+        timers.reset(enabled=False)
+        assert timers.snapshot() == {}
+        assert timers.enabled is False
+
+
+@pytest.fixture
+def debug_client(monkeypatch):
+    import src.app as app_module
+
+    monkeypatch.setattr(app_module.settings, "debug_endpoints_enabled", True)
+    monkeypatch.setattr(app_module, "phase_timers", PhaseTimers())
+    monkeypatch.setattr(
+        app_module, "profiler", SamplingProfiler(interval_seconds=0.005)
+    )
+    monkeypatch.setattr(app_module, "model", MockModel())
+    return TestClient(app_module.app)
+
+
+class TestDebugEndpoints:
+    def test_disabled_by_default(self, monkeypatch):
+        import src.app as app_module
+
+        monkeypatch.setattr(app_module.settings, "debug_endpoints_enabled", False)
+        client = TestClient(app_module.app)
+        assert client.get("/debug/profile", params={"seconds": 0.01}).status_code == 404
+        assert client.get("/debug/timers").status_code == 404
+
+    def test_profile_returns_collapsed_stacks(self, debug_client):
+        response = debug_client.get("/debug/profile", params={"seconds": 0.1})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.strip()
+
+    def test_toggle_phase_timers_at_runtime(self, debug_client):
+        debug_client.post("/predict", json=PAYLOAD)
+        assert debug_client.get("/debug/timers").json()["phases"] == {}
+
+        response = debug_client.put("/debug/timers", params={"enabled": True})
+        assert response.json()["enabled"] is True
+        debug_client.post("/predict", json=PAYLOAD)
+
+        phases = debug_client.get("/debug/timers").json()["phases"]
+        assert {"decode", "auth", "inference", "serialize"} <= set(phases)
+        assert phases["inference"]["count"] == 1
+
+        debug_client.put("/debug/timers", params={"enabled": False, "reset": True})
+        assert debug_client.get("/debug/timers").json() == {
+            "enabled": False,
+            "phases": {},
+        }
+
+    def test_phase_metrics_exported(self, debug_client):
+        debug_client.put("/debug/timers", params={"enabled": True})
+        debug_client.post("/predict", json=PAYLOAD)
+        assert (
+            'inference_phase_count_total{phase="inference"}'
+            in debug_client.get("/metrics").text
+        )
@@ -0,0 +1,232 @@
+"""
+Tests for model registry prefetch and staged activation
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from src import registry
+from src.registry import (
+    LocalDirectoryRegistry,
+    ModelPrefetcher,
+    file_sha256,
+    version_key,
+)
+
+
+def publish_version(base, version, content=b"artifact", sha256=None):
+    directory = base / f"v{version}"
+    directory.mkdir(parents=True)
+    (directory / "model.pkl").write_bytes(content)
+    if sha256 is not None:
+        (directory / "model.json").write_text(json.dumps({"sha256": sha256}))
+
+
+class Service:
+    """Stands in for the app: prepare reads the file, publish records the swap"""
+
+    def __init__(self, version="1.0.0"):
+        self.version = version
+        self.model = None
+        self.prepared = []
+
+    def prepare(self, path):
+        with open(path, "rb") as f:
+            content = f.read()
+        if content == b"corrupt":
+            raise ValueError("cannot unpickle")
+        self.prepared.append(path)
+        return content
+
+    def publish(self, version, path, prepared):
+        self.version = version
+        self.model = prepared
+
+
+def make_prefetcher(tmp_path, service, **kwargs):
+    return ModelPrefetcher(
+        LocalDirectoryRegistry(str(tmp_path / "registry")),
+        str(tmp_path / "staging"),
+        prepare=service.prepare,
+        publish=service.publish,
+        current_version=lambda: service.version,
+        **kwargs,
+    )
+
+
+def test_version_key_orders_numerically():
+    assert version_key("v1.2.0") == version_key("1.2.0")
+    assert sorted(["1.9.0", "1.10.0", "1.2.0"], key=version_key) == [
+        "1.2.0",
+        "1.9.0",
+        "1.10.0",
+    ]
+
+
+def test_local_registry_latest_version(tmp_path):
+    base = tmp_path / "registry"
+    assert LocalDirectoryRegistry(str(base)).get_latest_version() is None
+    for version in ("1.2.0", "1.10.0", "1.9.0"):
+        publish_version(base, version)
+    assert LocalDirectoryRegistry(str(base)).get_latest_version() == "1.10.0"
+
+
+def test_poll_stages_without_activating(tmp_path):
+    publish_version(tmp_path / "registry", "1.1.0", b"new")
+    service = Service()
+    prefetcher = make_prefetcher(tmp_path, service)
+
+    assert prefetcher.poll() == "1.1.0"
+    assert service.version == "1.0.0" and service.model is None
+    assert os.path.exists(tmp_path / "staging" / "1.1.0" / "model.pkl")
+    assert prefetcher.downloads_total == 1
+
+    # Already staged: nothing is downloaded again
+    prefetcher.poll()
+    assert prefetcher.downloads_total == 1
+
+
+def test_activate_swaps_staged_model(tmp_path):
+    publish_version(tmp_path / "registry", "1.1.0", b"new")
+    service = Service()
+    prefetcher = make_prefetcher(tmp_path, service)
+    prefetcher.poll()
+
+    assert not prefetcher.activate("9.9.9")
+    assert prefetcher.activate()
+    assert service.version == "1.1.0" and service.model == b"new"
+    assert prefetcher.staged_version is None
+    assert prefetcher.activations_total == 1
+    assert not prefetcher.activate()
+
+
+def test_activation_is_recorded_for_new_workers(tmp_path):
+    staging = str(tmp_path / "staging")
+    assert registry.read_active(staging) is None
+
+    publish_version(tmp_path / "registry", "1.1.0", b"new")
+    prefetcher = make_prefetcher(tmp_path, Service())
+    prefetcher.poll()
+    prefetcher.activate()
+    assert registry.read_active(staging) == (
+        "1.1.0",
+        os.path.join(staging, "1.1.0", "model.pkl"),
+    )
+
+    # A pruned or missing artifact is not reported
+    os.remove(os.path.join(staging, "1.1.0", "model.pkl"))
+    assert registry.read_active(staging) is None
+
+
+def test_checksum_mismatch_rejects_version(tmp_path):
+    publish_version(tmp_path / "registry", "1.1.0", b"tampered", sha256="0" * 64)
+    prefetcher = make_prefetcher(tmp_path, Service())
+
+    assert prefetcher.poll() is None
+    assert "sha256" in prefetcher.last_error
+    assert prefetcher.verify_failures_total == 1
+    assert not os.path.exists(tmp_path / "staging" / "1.1.0" / "model.pkl")
+
+    # A rejected version is not downloaded again
+    prefetcher.poll()
+    assert prefetcher.verify_failures_total == 1
+
+
+def test_checksum_match_and_failed_load(tmp_path):
+    base = tmp_path / "registry"
+    publish_version(base, "1.1.0", b"good", sha256=None)
+    (base / "v1.1.0" / "model.json").write_text(
+        json.dumps({"sha256": file_sha256(str(base / "v1.1.0" / "model.pkl"))})
+    )
+    assert make_prefetcher(tmp_path, Service()).poll() == "1.1.0"
+
+    publish_version(base, "1.2.0", b"corrupt")
+    prefetcher = make_prefetcher(tmp_path, Service())
+    assert prefetcher.poll() is None
+    assert "1.2.0" in prefetcher.snapshot()["rejected"]
+
+
+def test_workers_share_one_download(tmp_path):
+    publish_version(tmp_path / "registry", "1.1.0", b"new")
+    first = make_prefetcher(tmp_path, Service())
+    second = make_prefetcher(tmp_path, Service())
+    first.poll()
+    second.poll()
+    assert first.downloads_total == 1
+    assert second.downloads_total == 0 and second.reused_total == 1
+    assert second.staged_version == "1.1.0"
+
+
+def test_pin_selects_and_activates_version(tmp_path):
+    base = tmp_path / "registry"
+    publish_version(base, "1.1.0", b"one-one")
+    publish_version(base, "1.2.0", b"one-two")
+    pin = tmp_path / "pin"
+    pin.write_text("1.1.0\n")
+    service = Service()
+    prefetcher = make_prefetcher(tmp_path, service, pin_file=str(pin))
+
+    # The pin wins over the registry's newest version
+    assert prefetcher.poll() == "1.1.0"
+    assert prefetcher.check_pin() == "1.1.0"
+    assert service.version == "1.1.0"
+
+    pin.write_text("latest")
+    assert registry.read_pin(str(pin)) is None
+    assert prefetcher.poll() == "1.2.0"
+    assert prefetcher.check_pin() is None
+    assert service.version == "1.1.0"
+
+
+def test_activation_prunes_older_versions(tmp_path):
+    base = tmp_path / "registry"
+    publish_version(base, "1.1.0")
+    service = Service()
+    prefetcher = make_prefetcher(tmp_path, service)
+    prefetcher.poll()
+    prefetcher.activate()
+
+    publish_version(base, "1.2.0")
+    prefetcher.poll()
+    prefetcher.activate()
+    assert sorted(os.listdir(tmp_path / "staging")) == ["1.2.0", "active"]
+
+
+def test_background_thread_follows_pin_and_signal(tmp_path):
+    base = tmp_path / "registry"
+    publish_version(base, "1.1.0", b"new")
+    pin = tmp_path / "pin"
+    pin.write_text("latest")
+    service = Service()
+    prefetcher = make_prefetcher(
+        tmp_path, service, poll_seconds=0.05, pin_file=str(pin), pin_check_seconds=0.02
+    )
+
+    def wait_for(condition):
+        deadline = time.time() + 5
+        while time.time() < deadline and not condition():
+            time.sleep(0.01)
+        return condition()
+
+    prefetcher.start()
+    try:
+        assert wait_for(lambda: prefetcher.staged_version == "1.1.0")
+        assert service.version == "1.0.0"
+        prefetcher.request_activation()
+        assert wait_for(lambda: service.version == "1.1.0")
+
+        publish_version(base, "1.2.0", b"newer")
+        assert wait_for(lambda: prefetcher.staged_version == "1.2.0")
+        pin.write_text("1.2.0")
+        assert wait_for(lambda: service.version == "1.2.0")
+    finally:
+        prefetcher.stop()
+
+
+def test_create_registry_rejects_unknown_kind():
+    assert registry.create_registry("none") is None
+    with pytest.raises(ValueError):
+        registry.create_registry("s3")
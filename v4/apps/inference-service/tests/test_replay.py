@@ -0,0 +1,230 @@
+"""
+Tests for traffic capture and replay
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from src import wire
+from src.replay import (
+    MAGIC,
+    Exchange,
+    LoopbackTarget,
+    TrafficRecorder,
+    compare,
+    decode_exchanges,
+    decode_predictions,
+    encode_exchange,
+    gate,
+    read_capture,
+    replay,
+)
+
+
+def exchange(timestamp=1000.0, body=None, status=200, path="/predict"):
+    response = (
+        body
+        if body is not None
+        else json.dumps(
+            {"predicted_class_id": 0, "probabilities": [0.9, 0.1, 0.0]}
+        ).encode()
+    )
+    return Exchange(
+        timestamp,
+        0.002,
+        "POST",
+        path,
+        "application/json",
+        "",
+        b'{"x": 1}',
+        status,
+        "application/json",
+        response,
+    )
+
+
+class CannedTarget:
+    """Answers every request with the recorded response, or a fixed one"""
+
+    def __init__(self, body=None, status=None):
+        self.body = body
+        self.status = status
+        self.sent = []
+
+    async def send(self, ex):
+        self.sent.append(ex)
+        return (
+            self.status or ex.status,
+            ex.response_content_type,
+            self.body or ex.response_body,
+        )
+
+
+def test_exchange_round_trip_and_truncation():
+    records = [
+        exchange(1000.0),
+        exchange(1000.5, path="/predict/batch?x=1", status=429, body=b""),
+    ]
+    data = MAGIC + b"".join(encode_exchange(r) for r in records)
+    decoded = decode_exchanges(data)
+    assert [r.path for r in decoded] == ["/predict", "/predict/batch?x=1"]
+    assert (
+        decoded[1].status == 429
+        and decoded[0].response_body == records[0].response_body
+    )
+    assert decoded[0].latency == pytest.approx(0.002)
+
+    # A record cut short by a crash is dropped, earlier ones survive
+    assert len(decode_exchanges(data[:-3])) == 1
+    with pytest.raises(ValueError):
+        decode_exchanges(b"not a capture")
+
+
+def test_recorder_samples_and_files_read_back(tmp_path):
+    path = str(tmp_path / "traffic.cap")
+    recorder = TrafficRecorder(
+        path, sample_ratio=0.5, max_records=3, capacity=10, seed=1
+    )
+    assert 0 < sum(recorder.sample() for _ in range(100)) < 100
+
+    recorder.start()
+    for i in range(5):
+        recorder.record(exchange(1000.0 + i))
+    assert recorder.recorded_total == 3 and recorder.dropped_total == 2
+    assert not recorder.sample()
+
+    # Readable after a flush, before the file is closed
+    recorder.flush()
+    assert len(read_capture([path])) == 3
+    recorder.stop()
+    assert [r.timestamp for r in read_capture([path])] == [1000.0, 1001.0, 1002.0]
+
+
+def test_oversized_exchange_is_skipped_and_the_rest_written(tmp_path):
+    path = str(tmp_path / "traffic.cap")
+    recorder = TrafficRecorder(path, sample_ratio=1.0)
+    recorder.start()
+    recorder.record(exchange(1000.0))
+    recorder.record(exchange(1001.0, path="/predict?" + "x" * 70000))
+    recorder.record(exchange(1002.0))
+    recorder.stop()
+
+    assert recorder.written_total == 2 and recorder.dropped_total == 1
+    assert [r.timestamp for r in read_capture([path])] == [1000.0, 1002.0]
+
+
+def test_read_capture_merges_files_by_time(tmp_path):
+    for name, times in (("a.cap", [1.0, 3.0]), ("b.cap", [2.0])):
+        with gzip.open(tmp_path / name, "wb") as f:
+            f.write(MAGIC + b"".join(encode_exchange(exchange(t)) for t in times))
+    merged = read_capture([str(tmp_path / "a.cap"), str(tmp_path / "b.cap")])
+    assert [r.timestamp for r in merged] == [1.0, 2.0, 3.0]
+
+
+def test_decode_predictions_in_every_format():
+    class_ids = np.array([2, -1])
+    probabilities = np.array([[0.0, 0.1, 0.9], [np.nan] * 3])
+
+    decoded = decode_predictions(
+        wire.FLOAT32, wire.encode_float32(class_ids, probabilities)
+    )
+    np.testing.assert_array_equal(decoded[0], class_ids)
+    np.testing.assert_allclose(decoded[1], probabilities, atol=1e-7)
+
+    batch = json.dumps(
+        {
+            "predictions": [
+                {"predicted_class_id": 2, "probabilities": [0.0, 0.1, 0.9]},
+                None,
+            ]
+        }
+    )
+    decoded = decode_predictions("application/json", batch.encode())
+    np.testing.assert_array_equal(decoded[0], class_ids)
+
+    if wire.msgpack is not None:
+        body = wire.encode_msgpack(class_ids, ["a", "b", "c"], probabilities, "1", "t")
+        np.testing.assert_array_equal(
+            decode_predictions(wire.MSGPACK, body)[0], class_ids
+        )
+
+    assert decode_predictions("application/json", b'{"detail": "Unauthorized"}') is None
+    assert decode_predictions("text/plain", b"oops") is None
+
+
+def test_replay_compares_with_recording():
+    exchanges = [
+        exchange(1000.0),
+        exchange(1000.01),
+        exchange(1000.02, status=401, body=b"{}"),
+    ]
+    results, wall = asyncio.run(replay(exchanges, CannedTarget(), speed=0))
+    report = compare(exchanges, results, wall, 0)
+    assert report["requests"] == 3 and report["rows_compared"] == 2
+    assert report["class_mismatches"] == 0 and report["status_mismatches"] == 0
+    assert gate(report, max_class_mismatches=0, max_probability_diff=0.0) == []
+
+    changed = json.dumps(
+        {"predicted_class_id": 1, "probabilities": [0.4, 0.6, 0.0]}
+    ).encode()
+    results, wall = asyncio.run(
+        replay(exchanges[:2], CannedTarget(body=changed), speed=0)
+    )
+    report = compare(exchanges[:2], results, wall, 0)
+    assert report["class_mismatches"] == 2
+    assert report["max_probability_diff"] == pytest.approx(0.5)
+    assert report["examples"][0]["recorded_class_id"] == 0
+    assert len(gate(report, max_class_mismatches=0, max_probability_diff=0.1)) == 2
+
+
+def test_replay_follows_the_recorded_schedule():
+    exchanges = [exchange(1000.0), exchange(1000.2)]
+    _, recorded_speed = asyncio.run(replay(exchanges, CannedTarget(), speed=1.0))
+    _, accelerated = asyncio.run(replay(exchanges, CannedTarget(), speed=4.0))
+    assert recorded_speed >= 0.2
+    assert 0.05 <= accelerated < 0.2
+
+
+def test_loopback_target():
+    body = json.dumps(
+        {"predicted_class_id": 0, "probabilities": [1.0, 0.0, 0.0]}
+    ).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(
+                200 if self.headers.get("X-API-Key") == "secret" else 401
+            )
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    target = LoopbackTarget(
+        f"http://127.0.0.1:{server.server_address[1]}", concurrency=2, api_key="secret"
+    )
+    try:
+        exchanges = [exchange(1000.0 + i / 100) for i in range(4)]
+        results, wall = asyncio.run(replay(exchanges, target, speed=0, concurrency=2))
+    finally:
+        target.close()
+        server.shutdown()
+    report = compare(exchanges, results, wall, 0)
+    assert report["errors"] == 0 and report["status_mismatches"] == 0
+    assert report["rows_compared"] == 4 and report[
+        "max_probability_diff"
+    ] == pytest.approx(0.1)
@@ -0,0 +1,123 @@
+"""
+Tests for priority classes and weighted fair scheduling
+"""
+
+import asyncio
+
+import pytest
+
+from src.scheduling import (
+    PriorityClass,
+    QueueFull,
+    WeightedFairScheduler,
+    parse_classes,
+)
+
+
+def test_parse_classes():
+    classes = parse_classes("interactive:8:256, bulk:1:16,batch")
+    assert [(c.name, c.weight, c.capacity) for c in classes] == [
+        ("interactive", 8.0, 256),
+        ("bulk", 1.0, 16),
+        ("batch", 1.0, 64),
+    ]
+    with pytest.raises(ValueError):
+        parse_classes("bulk:heavy")
+    with pytest.raises(ValueError):
+        parse_classes("bulk:0")
+
+
+def test_free_slot_is_taken_without_queueing():
+    async def scenario():
+        scheduler = WeightedFairScheduler(parse_classes("interactive,bulk"), slots=2)
+        async with scheduler.slot("bulk") as priority:
+            assert priority.name == "bulk"
+            assert scheduler.busy == 1
+        assert scheduler.busy == 0
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["bulk"]["dispatched_total"] == 1
+    assert snapshot["bulk"]["depth"] == 0
+
+
+def test_unknown_class_uses_default():
+    async def scenario():
+        scheduler = WeightedFairScheduler(parse_classes("interactive,bulk"), slots=1)
+        async with scheduler.slot("nope") as priority:
+            return priority.name
+
+    assert asyncio.run(scenario()) == "interactive"
+
+
+def test_waiters_are_served_in_proportion_to_weight():
+    async def scenario():
+        scheduler = WeightedFairScheduler(
+            [PriorityClass("interactive", 3, 100), PriorityClass("bulk", 1, 100)],
+            slots=1,
+        )
+        order = []
+        gate = await scheduler.acquire("bulk")
+
+        async def job(name):
+            async with scheduler.slot(name):
+                order.append(name)
+
+        tasks = [
+            asyncio.create_task(job(name))
+            for name in ["bulk"] * 4 + ["interactive"] * 12
+        ]
+        await asyncio.sleep(0)
+        scheduler.release(gate)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # Bulk first pays for the slot it held, then gets one slot per three interactive
+    assert "".join(name[0] for name in order[:13]) == "iiiibiiibiiib"
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        scheduler = WeightedFairScheduler([PriorityClass("bulk", 1, 1)], slots=1)
+        held = await scheduler.acquire("bulk")
+        waiter = asyncio.create_task(scheduler.acquire("bulk"))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull):
+            await scheduler.acquire("bulk")
+        scheduler.release(held)
+        scheduler.release(await waiter)
+        return scheduler.classes["bulk"]
+
+    bulk = asyncio.run(scenario())
+    assert bulk.rejected_total == 1
+    assert bulk.dispatched_total == 2
+    assert bulk.running == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = WeightedFairScheduler(parse_classes("interactive"), slots=1)
+        held = await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        depth = scheduler.classes["interactive"].depth
+        scheduler.release(held)
+        return depth, scheduler.busy
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_waiter_gives_up_after_timeout():
+    async def scenario():
+        scheduler = WeightedFairScheduler(parse_classes("interactive"), slots=1)
+        held = await scheduler.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.acquire(timeout=0.01)
+        depth = scheduler.classes["interactive"].depth
+        scheduler.release(held)
+        return depth, scheduler.busy
+
+    assert asyncio.run(scenario()) == (0, 0)
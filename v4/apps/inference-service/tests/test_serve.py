@@ -0,0 +1,233 @@
+"""
+Tests for multi-process serving
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from src import serve
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+class TestCgroupCpuLimit:
+    def test_cgroup_v2_quota(self, tmp_path):
+        write(tmp_path / "cpu.max", "150000 100000\n")
+        assert serve.cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        write(tmp_path / "cpu.max", "max 100000\n")
+        assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        write(tmp_path / "cpu" / "cpu.cfs_quota_us", "50000\n")
+        write(tmp_path / "cpu" / "cpu.cfs_period_us", "100000\n")
+        assert serve.cgroup_cpu_limit(str(tmp_path)) == 0.5
+
+    def test_cgroup_v1_unlimited(self, tmp_path):
+        write(tmp_path / "cpu" / "cpu.cfs_quota_us", "-1\n")
+        write(tmp_path / "cpu" / "cpu.cfs_period_us", "100000\n")
+        assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_no_cgroup(self, tmp_path):
+        assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+class TestDefaultWorkerCount:
+    def test_rounds_quota_up(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(serve, "available_cpus", lambda: list(range(8)))
+        write(tmp_path / "cpu.max", "250000 100000\n")
+        assert serve.default_worker_count(str(tmp_path)) == 3
+
+    def test_fractional_quota_gets_one_worker(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(serve, "available_cpus", lambda: list(range(8)))
+        write(tmp_path / "cpu.max", "50000 100000\n")
+        assert serve.default_worker_count(str(tmp_path)) == 1
+
+    def test_bounded_by_usable_cpus(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(serve, "available_cpus", lambda: [0, 1])
+        write(tmp_path / "cpu.max", "800000 100000\n")
+        assert serve.default_worker_count(str(tmp_path)) == 2
+
+
+class TestWorkerStatus:
+    def test_summary_counts_ready_workers(self):
+        status = serve.WorkerStatus(3)
+        status.index = 1
+        status.mark(True)
+        status.mark(True, index=2)
+        assert status.summary() == {"worker": 1, "total": 3, "ready": 2}
+        status.mark(False, index=2)
+        assert status.summary()["ready"] == 1
+
+    def test_readiness_reports_workers(self):
+        from fastapi.testclient import TestClient
+
+        import src.app as app_module
+
+        status = serve.WorkerStatus(2)
+        status.index = 0
+        status.mark(True)
+        original = (app_module.model, app_module.worker_status)
+        app_module.model = object()
+        app_module.worker_status = status
+        try:
+            response = TestClient(app_module.app).get("/health/ready")
+        finally:
+            app_module.model, app_module.worker_status = original
+        assert response.status_code == 200
+        assert response.json()["workers"] == {"worker": 0, "total": 2, "ready": 1}
+
+
+def test_listen_socket_is_tcp():
+    # asyncio only sets TCP_NODELAY on accepted sockets whose proto is IPPROTO_TCP
+    sock = serve.bind_socket("127.0.0.1", 0, backlog=16)
+    try:
+        assert sock.proto == socket.IPPROTO_TCP
+    finally:
+        sock.close()
+
+
+class TestDrainingServer:
+    @pytest.fixture
+    def server(self, monkeypatch):
+        from src import app as app_module
+
+        monkeypatch.setattr(app_module, "draining", False)
+        config = serve.uvicorn_config(app_module.settings)
+        server = serve.DrainingServer(config, drain_seconds=5)
+        server.server_state.default_headers = [(b"server", b"uvicorn")]
+        return server
+
+    def test_first_signal_drains_instead_of_exiting(self, server):
+        from src import app as app_module
+
+        server.handle_exit(signal.SIGTERM, None)
+        assert not server.should_exit
+        assert app_module.draining
+        assert server.drain_deadline is not None
+
+    def test_second_signal_exits(self, server):
+        server.handle_exit(signal.SIGTERM, None)
+        server.handle_exit(signal.SIGTERM, None)
+        assert server.should_exit
+
+    def test_responses_close_connections_while_draining(self, server):
+        server.handle_exit(signal.SIGTERM, None)
+        assert asyncio.run(server.on_tick(1)) is False
+        assert (b"connection", b"close") in server.server_state.default_headers
+        asyncio.run(server.on_tick(2))
+        assert server.server_state.default_headers.count((b"connection", b"close")) == 1
+
+    def test_exits_after_drain_deadline(self, server):
+        server.handle_exit(signal.SIGTERM, None)
+        server.drain_deadline = time.monotonic() - 1
+        assert asyncio.run(server.on_tick(1)) is True
+
+    def test_no_drain_period_exits_immediately(self):
+        from src import app as app_module
+
+        server = serve.DrainingServer(
+            serve.uvicorn_config(app_module.settings), drain_seconds=0
+        )
+        server.handle_exit(signal.SIGTERM, None)
+        assert server.should_exit
+
+    def test_config_follows_settings(self, monkeypatch):
+        from src import app as app_module
+
+        monkeypatch.setattr(app_module.settings, "server_keepalive_seconds", 90.0)
+        monkeypatch.setattr(app_module.settings, "server_backlog", 4096)
+        config = serve.uvicorn_config(app_module.settings)
+        assert config.timeout_keep_alive == 90
+        assert config.backlog == 4096
+
+
+def test_readiness_fails_while_draining(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from src import app as app_module
+
+    monkeypatch.setattr(app_module, "model", object())
+    monkeypatch.setattr(app_module, "draining", True)
+    response = TestClient(app_module.app).get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"]["status"] == "draining"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork serving needs os.fork")
+def test_prefork_workers_share_model(tmp_path):
+    import joblib
+    from sklearn.datasets import load_iris
+    from sklearn.linear_model import LogisticRegression
+
+    iris = load_iris()
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(
+        LogisticRegression(max_iter=500).fit(iris.data, iris.target), model_path
+    )
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        MODEL_PATH=str(model_path),
+        HOST="127.0.0.1",
+        PORT=str(port),
+        WORKERS="2",
+        GRPC_ENABLED="false",
+        WARMUP_ITERATIONS="1",
+        SERVER_DRAIN_SECONDS="1",
+    )
+    service_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.serve"],
+        cwd=service_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        workers = None
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1)
+                workers = response.json()["workers"]
+                if response.status_code == 200 and workers["ready"] == 2:
+                    break
+            except (httpx.HTTPError, KeyError, TypeError):
+                pass
+            time.sleep(0.2)
+        assert workers is not None and workers["total"] == 2 and workers["ready"] == 2
+
+        response = httpx.post(
+            f"http://127.0.0.1:{port}/predict",
+            json={
+                "sepal_length": 5.1,
+                "sepal_width": 3.5,
+                "petal_length": 1.4,
+                "petal_width": 0.2,
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["predicted_class_name"] == "setosa"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
@@ -0,0 +1,93 @@
+"""
+Tests for streaming feature statistics
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.stats import DEFAULT_BIN_EDGES, StreamingStats, population_stability_index
+
+FEATURES = ["a", "b"]
+CLASSES = ["x", "y", "z"]
+
+
+def test_mean_and_stddev_match_numpy():
+    rng = np.random.default_rng(0)
+    data = rng.uniform(0, 10, size=(1000, 2))
+    stats = StreamingStats(FEATURES, CLASSES)
+    for start in range(0, 1000, 37):
+        chunk = data[start : start + 37]
+        stats.update(chunk, np.zeros(len(chunk), dtype=int))
+
+    snapshot = stats.snapshot()
+    assert snapshot["count"] == 1000
+    for i, name in enumerate(FEATURES):
+        assert snapshot["features"][name]["mean"] == pytest.approx(data[:, i].mean())
+        assert snapshot["features"][name]["stddev"] == pytest.approx(data[:, i].std())
+
+
+def test_histograms_match_numpy_and_clamp_out_of_range():
+    data = np.array([[0.0, 10.0], [0.49, 5.0], [0.5, 12.0], [-1.0, 9.99]])
+    stats = StreamingStats(FEATURES, CLASSES)
+    stats.update(data, [0, 1, 1, 2])
+
+    snapshot = stats.snapshot()
+    for i, name in enumerate(FEATURES):
+        expected = np.histogram(np.clip(data[:, i], 0, 10), bins=DEFAULT_BIN_EDGES)[0]
+        assert snapshot["features"][name]["histogram"] == expected.tolist()
+    assert snapshot["class_counts"] == {"x": 1, "y": 2, "z": 1}
+
+
+def test_shards_from_many_threads_merge_exactly():
+    rng = np.random.default_rng(1)
+    data = rng.normal(5, 1, size=(800, 2))
+    stats = StreamingStats(FEATURES, CLASSES)
+
+    def worker(rows):
+        for row in rows:
+            stats.update(row[None, :], [0])
+
+    threads = [threading.Thread(target=worker, args=(data[i::8],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snapshot = stats.snapshot()
+    assert snapshot["count"] == 800
+    assert snapshot["features"]["a"]["mean"] == pytest.approx(data[:, 0].mean())
+    assert snapshot["features"]["b"]["stddev"] == pytest.approx(data[:, 1].std())
+
+
+def test_psi_near_zero_for_same_distribution_and_large_for_shift():
+    rng = np.random.default_rng(2)
+    reference_data = rng.normal(5, 1, size=5000)
+    same = np.histogram(rng.normal(5, 1, size=5000), bins=DEFAULT_BIN_EDGES)[0]
+    shifted = np.histogram(rng.normal(7, 1, size=5000), bins=DEFAULT_BIN_EDGES)[0]
+    reference = np.histogram(reference_data, bins=DEFAULT_BIN_EDGES)[0]
+
+    assert population_stability_index(reference, same) < 0.05
+    assert population_stability_index(reference, shifted) > 1.0
+
+
+def test_drift_flags_only_shifted_feature():
+    rng = np.random.default_rng(3)
+    train = np.column_stack([rng.normal(3, 0.5, 2000), rng.normal(6, 0.5, 2000)])
+    reference = {
+        "bin_edges": DEFAULT_BIN_EDGES.tolist(),
+        "feature_histograms": [
+            np.histogram(train[:, i], bins=DEFAULT_BIN_EDGES)[0].tolist()
+            for i in range(2)
+        ],
+    }
+    stats = StreamingStats(FEATURES, CLASSES, reference)
+    assert stats.drift() is None
+
+    live = np.column_stack([rng.normal(3, 0.5, 2000), rng.normal(8, 0.5, 2000)])
+    stats.update(live, np.zeros(2000, dtype=int))
+
+    snapshot = stats.snapshot(drift_threshold=0.2)
+    assert snapshot["features"]["a"]["drifted"] is False
+    assert snapshot["features"]["b"]["drifted"] is True
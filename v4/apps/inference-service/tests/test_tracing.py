@@ -0,0 +1,162 @@
+"""
+Tests for request tracing
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import tracing
+from tests.test_app import MockModel
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+SAMPLED = f"00-{TRACE_ID}-{PARENT_ID}-01"
+UNSAMPLED = f"00-{TRACE_ID}-{PARENT_ID}-00"
+
+PAYLOAD = {
+    "sepal_length": 5.1,
+    "sepal_width": 3.5,
+    "petal_length": 1.4,
+    "petal_width": 0.2,
+}
+
+
+class TestTraceparent:
+    def test_parse_sampled(self):
+        context = tracing.parse_traceparent(SAMPLED)
+        assert context.trace_id == TRACE_ID
+        assert context.span_id == PARENT_ID
+        assert context.sampled is True
+
+    def test_parse_unsampled(self):
+        assert tracing.parse_traceparent(UNSAMPLED).sampled is False
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            None,
+            "",
+            "garbage",
+            f"ff-{TRACE_ID}-{PARENT_ID}-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'0' * 16}-01",
+        ],
+    )
+    def test_parse_invalid(self, header):
+        assert tracing.parse_traceparent(header) is None
+
+    def test_round_trip(self):
+        assert tracing.parse_traceparent(SAMPLED).to_traceparent() == SAMPLED
+
+
+class TestTracer:
+    def test_unsampled_requests_get_noop_span(self):
+        exporter = tracing.InMemorySpanExporter()
+        tracer = tracing.Tracer(exporter, sample_ratio=0.0)
+        span = tracer.start_request("POST /predict")
+        assert span is tracing.NOOP_SPAN
+        with tracer.span("inference") as child:
+            assert child is tracing.NOOP_SPAN
+        span.end()
+        assert exporter.spans == []
+
+    def test_unsampled_parent_is_respected(self):
+        tracer = tracing.Tracer(tracing.InMemorySpanExporter(), sample_ratio=1.0)
+        assert tracer.start_request("POST /predict", UNSAMPLED) is tracing.NOOP_SPAN
+
+    def test_child_spans_exported_with_root(self):
+        exporter = tracing.InMemorySpanExporter()
+        tracer = tracing.Tracer(exporter)
+        root = tracer.start_request("POST /predict", SAMPLED)
+        with tracer.span("inference"):
+            pass
+        assert exporter.spans == []
+        root.end()
+
+        names = [s.name for s in exporter.spans]
+        assert names == ["inference", "POST /predict"]
+        assert all(s.context.trace_id == TRACE_ID for s in exporter.spans)
+        assert exporter.spans[1].parent_span_id == PARENT_ID
+        assert exporter.spans[0].parent_span_id == root.context.span_id
+
+    def test_span_records_errors(self):
+        exporter = tracing.InMemorySpanExporter()
+        tracer = tracing.Tracer(exporter, sample_ratio=1.0)
+        root = tracer.start_request("POST /predict")
+        with pytest.raises(RuntimeError), tracer.span("inference"):
+            raise RuntimeError("boom")
+        root.end()
+        assert exporter.spans[0].status == "ERROR"
+
+    def test_file_exporter_writes_jsonl(self, tmp_path):
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = tracing.Tracer(
+            tracing.create_exporter("file", str(path)), sample_ratio=1.0
+        )
+        tracer.start_request("POST /predict").end()
+        record = json.loads(path.read_text().splitlines()[0])
+        assert record["name"] == "POST /predict"
+        assert record["duration_ms"] >= 0
+
+    def test_unknown_exporter(self):
+        with pytest.raises(ValueError):
+            tracing.create_exporter("zipkin")
+
+
+@pytest.fixture
+def traced_client(monkeypatch):
+    import src.app as app_module
+
+    exporter = tracing.InMemorySpanExporter()
+    monkeypatch.setattr(app_module, "tracer", tracing.Tracer(exporter))
+    monkeypatch.setattr(app_module, "model", MockModel())
+    return TestClient(app_module.app), exporter
+
+
+class TestRequestTracing:
+    def test_predict_emits_phase_spans(self, traced_client):
+        client, exporter = traced_client
+        response = client.post(
+            "/predict", json=PAYLOAD, headers={"traceparent": SAMPLED}
+        )
+        assert response.status_code == 200
+
+        spans = {s.name: s for s in exporter.spans}
+        assert {"decode", "auth", "inference", "serialize", "POST /predict"} <= set(
+            spans
+        )
+        root = spans["POST /predict"]
+        assert root.parent_span_id == PARENT_ID
+        assert root.attributes["http.status_code"] == 200
+        assert all(s.context.trace_id == TRACE_ID for s in exporter.spans)
+        assert response.headers["traceparent"] == root.context.to_traceparent()
+
+    def test_batch_emits_phase_spans(self, traced_client):
+        client, exporter = traced_client
+        client.post(
+            "/predict/batch",
+            json={"instances": [PAYLOAD]},
+            headers={"traceparent": SAMPLED},
+        )
+        names = {s.name for s in exporter.spans}
+        assert {
+            "auth",
+            "decode",
+            "inference",
+            "serialize",
+            "POST /predict/batch",
+        } <= names
+
+    def test_unsampled_request_is_not_traced(self, traced_client):
+        client, exporter = traced_client
+        response = client.post("/predict", json=PAYLOAD)
+        assert response.status_code == 200
+        assert "traceparent" not in response.headers
+        assert exporter.spans == []
+
+    def test_health_is_not_traced(self, traced_client):
+        client, exporter = traced_client
+        client.get("/health/live", headers={"traceparent": SAMPLED})
+        assert exporter.spans == []
@@ -0,0 +1,67 @@
+"""
+Tests for columnar feature validation
+"""
+
+import numpy as np
+
+from src import validation
+
+FEATURES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+
+def test_row_errors_codes_each_row():
+    features = np.array(
+        [
+            [5.1, 3.5, 1.4, 0.2],
+            [np.nan, 1, 1, 1],
+            [1, np.inf, 1, 1],
+            [1, 1, 11, 1],
+            [-0.1, 1, 1, 1],
+            [0, 0, 10, 10],
+        ]
+    )
+    assert validation.row_errors(features).tolist() == [
+        validation.VALID,
+        validation.NOT_A_NUMBER,
+        validation.INFINITE,
+        validation.OUT_OF_RANGE,
+        validation.OUT_OF_RANGE,
+        validation.VALID,
+    ]
+    assert validation.invalid_rows(features).tolist() == [1, 2, 3, 4]
+
+
+def test_nan_wins_over_other_problems_in_the_same_row():
+    features = np.array([[np.inf, np.nan, 20, 1]], dtype=np.float32)
+    assert validation.row_errors(features).tolist() == [validation.NOT_A_NUMBER]
+
+
+def test_describe_errors_lists_invalid_rows_in_order():
+    errors = np.array([0, 3, 0, 1], dtype=np.uint8)
+    assert validation.describe_errors(errors) == [
+        {"index": 1, "error": validation.ERROR_MESSAGES[validation.OUT_OF_RANGE]},
+        {"index": 3, "error": validation.ERROR_MESSAGES[validation.NOT_A_NUMBER]},
+    ]
+
+
+def test_json_instances_fast_path():
+    instances = [dict(zip(FEATURES, [5.1, 3.5, 1.4, 0.2])), [6.7, 3.0, 5.2, 2.3]]
+    features, malformed = validation.json_instances_matrix(instances, FEATURES)
+    np.testing.assert_allclose(features, [[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]])
+    assert not malformed.any()
+
+
+def test_json_instances_flags_malformed_rows():
+    good = dict(zip(FEATURES, [5.1, 3.5, 1.4, 0.2]))
+    instances = [
+        good,
+        {"sepal_length": 1.0},
+        dict(good, petal_width="wide"),
+        [1, 2],
+        "row",
+        good,
+    ]
+    features, malformed = validation.json_instances_matrix(instances, FEATURES)
+    assert malformed.tolist() == [False, True, True, True, True, False]
+    assert np.isnan(features[malformed]).all()
+    np.testing.assert_allclose(features[5], [5.1, 3.5, 1.4, 0.2])
@@ -0,0 +1,86 @@
+"""
+Tests for batch wire formats
+"""
+
+import numpy as np
+import pytest
+
+from src import wire
+
+
+class TestNegotiation:
+    def test_missing_content_type_defaults_to_json(self):
+        assert wire.request_format(None) == wire.JSON
+
+    def test_content_type_parameters_are_ignored(self):
+        assert wire.request_format("application/json; charset=utf-8") == wire.JSON
+
+    def test_msgpack_aliases(self):
+        pytest.importorskip("msgpack")
+        assert wire.request_format("application/x-msgpack") == wire.MSGPACK
+
+    def test_unsupported_content_type(self):
+        with pytest.raises(wire.UnsupportedMediaType):
+            wire.request_format("text/csv")
+
+    def test_response_follows_request_without_accept(self):
+        assert wire.response_format(None, wire.FLOAT32) == wire.FLOAT32
+        assert wire.response_format("*/*", wire.FLOAT32) == wire.FLOAT32
+
+    def test_response_follows_accept(self):
+        assert wire.response_format("application/json", wire.FLOAT32) == wire.JSON
+
+
+class TestFloat32:
+    def test_decode_is_zero_copy_view(self):
+        rows = np.array([[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]], dtype="<f4")
+        body = rows.tobytes()
+        features = wire.decode_float32(body)
+        assert features.shape == (2, 4)
+        assert not features.flags.owndata
+        np.testing.assert_array_equal(features, rows)
+
+    def test_decode_rejects_partial_rows(self):
+        with pytest.raises(wire.WireFormatError):
+            wire.decode_float32(b"\x00" * 10)
+
+    def test_encode_layout(self):
+        body = wire.encode_float32(
+            np.array([0, 2]), np.array([[1.0, 0.0, 0.0], [0.0, 0.25, 0.75]])
+        )
+        assert len(body) == 2 * 4 + 2 * 3 * 4
+        np.testing.assert_array_equal(np.frombuffer(body[:8], dtype="<i4"), [0, 2])
+        np.testing.assert_allclose(
+            np.frombuffer(body[8:], dtype="<f4").reshape(2, 3)[1], [0.0, 0.25, 0.75]
+        )
+
+
+class TestMsgpack:
+    def test_round_trip_instances(self):
+        msgpack = pytest.importorskip("msgpack")
+        body = msgpack.packb({"instances": [[5.1, 3.5, 1.4, 0.2]]})
+        features, malformed = wire.decode_msgpack(body)
+        np.testing.assert_allclose(features, [[5.1, 3.5, 1.4, 0.2]])
+        assert malformed.tolist() == [False]
+
+    def test_packed_features(self):
+        msgpack = pytest.importorskip("msgpack")
+        rows = np.array([[5.1, 3.5, 1.4, 0.2]], dtype="<f4")
+        body = msgpack.packb({"features": rows.tobytes()})
+        features, malformed = wire.decode_msgpack(body)
+        np.testing.assert_array_equal(features, rows)
+        assert malformed is None
+
+    def test_flags_malformed_rows(self):
+        msgpack = pytest.importorskip("msgpack")
+        body = msgpack.packb(
+            {"instances": [[1.0, 2.0], [5.1, 3.5, 1.4, 0.2], [1.0, "x", 1.0, 1.0]]}
+        )
+        features, malformed = wire.decode_msgpack(body)
+        assert malformed.tolist() == [True, False, True]
+        np.testing.assert_allclose(features[1], [5.1, 3.5, 1.4, 0.2])
+
+    def test_rejects_missing_instances(self):
+        msgpack = pytest.importorskip("msgpack")
+        with pytest.raises(wire.WireFormatError):
+            wire.decode_msgpack(msgpack.packb({"instances": []}))
@@ -1,19 +1,61 @@
 """
 Iris Model Training Script
 Trains a Random Forest classifier on the Iris dataset
-Outputs model to ../models/model.pkl
+Outputs model to ../models/model.pkl, bundled with reference statistics
+of the training features for drift monitoring in the inference service
+
+Usage:
+    python train.py                    # sklearn model only
+    python train.py --compact uint8    # also export the compact forest
+                                       # (float32 or uint8 leaves) served
+                                       # with SERVING_MODE=compact
 """
 
+import argparse
 import os
 import joblib
+import numpy as np
 from datetime import datetime
+from inference_core.compact import CompactForest, export_forest, parity_report
 from sklearn.datasets import load_iris
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
 
+FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+# Must cover the 0-10 cm range the inference service accepts
+BIN_EDGES = np.linspace(0.0, 10.0, 21)
+
+
+def reference_statistics(X, y, n_classes):
+    """Per-feature histograms, mean and std plus class counts of the training data"""
+    clipped = np.clip(X, BIN_EDGES[0], BIN_EDGES[-1])
+    return {
+        "feature_names": FEATURE_NAMES,
+        "bin_edges": BIN_EDGES.tolist(),
+        "feature_histograms": [
+            np.histogram(clipped[:, i], bins=BIN_EDGES)[0].tolist() for i in range(X.shape[1])
+        ],
+        "feature_mean": X.mean(axis=0).tolist(),
+        "feature_std": X.std(axis=0).tolist(),
+        "class_counts": np.bincount(y, minlength=n_classes).tolist(),
+        "n_samples": int(len(X)),
+    }
+
+
+def export_compact(model, leaf_dtype, X_eval):
+    """Flatten the forest with the shared inference core's exporter and report parity"""
+    arrays = export_forest(model, leaf_dtype)
+    report = parity_report(CompactForest(arrays), model, X_eval)
+    print(f"Compact forest ({leaf_dtype}) parity:")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+    print()
+    return arrays
+
 
-def train_model():
+def train_model(compact=None):
     """Train and save the Iris classification model"""
     print("=" * 50)
     print("Iris Model Training")
@@ -70,10 +112,7 @@ def train_model():
 
     # Feature importance
     print("Feature Importance:")
-    for name, importance in zip(
-        ["sepal_length", "sepal_width", "petal_length", "petal_width"],
-        model.feature_importances_
-    ):
+    for name, importance in zip(FEATURE_NAMES, model.feature_importances_):
         print(f"  {name}: {importance:.4f}")
     print()
 
@@ -82,8 +121,18 @@ def train_model():
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, "model.pkl")
 
+    artifact = {
+        "model": model,
+        "target_names": list(iris.target_names),
+        "feature_names": FEATURE_NAMES,
+        "reference_stats": reference_statistics(X_train, y_train, len(iris.target_names)),
+    }
+    if compact:
+        grid = np.random.default_rng(0).integers(0, 101, size=(20000, X.shape[1])) / 10
+        artifact["compact_model"] = export_compact(model, compact, np.vstack([X, grid]))
+
     print(f"Saving model to {output_path}...")
-    joblib.dump(model, output_path)
+    joblib.dump(artifact, output_path)
     print("  Model saved successfully")
     print()
 
@@ -95,4 +144,8 @@ def train_model():
 
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the Iris classification model")
+    parser.add_argument("--compact", choices=["float32", "uint8"],
+                        help="Also export a compact forest with this leaf dtype")
+    args = parser.parse_args()
+    train_model(compact=args.compact)